@@ -67,6 +67,21 @@ class Settings(BaseSettings):
     SESSION_STORAGE_S3_BUCKET: Optional[str] = _nexus_ai_config.get('session_storage_s3_bucket') or None
     SESSION_STORAGE_S3_PREFIX: str = "sessions/"  # S3 存储前缀
     
+    # Stage Output Offload Configuration - 大体积阶段输出转存 S3
+    STAGE_OUTPUT_S3_BUCKET: Optional[str] = _nexus_ai_config.get('artifacts_s3_bucket') or None
+    STAGE_OUTPUT_S3_PREFIX: str = "stage-outputs/"  # S3 存储前缀
+    STAGE_OUTPUT_OFFLOAD_THRESHOLD_BYTES: int = 100 * 1024  # 超过该大小的输出转存 S3
+    STAGE_OUTPUT_COMPRESSION: str = "zstd"  # zstd（需安装 zstandard，否则回退 gzip）或 gzip
+    
+    # Local Agent Runtime Cache Configuration
+    AGENT_CACHE_MAX_ENTRIES: int = 200  # Agent 实例缓存最大条目数
+    AGENT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # Agent 会话历史估算内存上限
+    AGENT_CACHE_IDLE_TTL_SECONDS: int = 1800  # 空闲超过该时间的 Agent 实例被淘汰
+    AGENT_CACHE_SWEEP_INTERVAL_SECONDS: int = 60  # 后台清理过期条目的间隔
+    SESSION_MANAGER_CACHE_MAX_ENTRIES: int = 1000  # S3SessionManager 缓存最大条目数
+    AGENT_CACHE_WARM_PROMPT_PATHS: list = []  # 启动时预热的提示词模板路径
+    AGENT_CACHE_WARM_TOP_N: int = 5  # 额外预热的最常用模板数量
+    
     # CORS Configuration
     CORS_ORIGINS: list = ["*"]
     CORS_ALLOW_CREDENTIALS: bool = False
@@ -98,6 +113,9 @@ TABLE_SESSIONS = f"{settings.DYNAMODB_TABLE_PREFIX}sessions"
 TABLE_MESSAGES = f"{settings.DYNAMODB_TABLE_PREFIX}messages"
 TABLE_TASKS = f"{settings.DYNAMODB_TABLE_PREFIX}tasks"
 TABLE_TOOLS = f"{settings.DYNAMODB_TABLE_PREFIX}tools"
+TABLE_STATISTICS = f"{settings.DYNAMODB_TABLE_PREFIX}statistics"
+TABLE_INVOCATION_EVENTS = f"{settings.DYNAMODB_TABLE_PREFIX}invocation_events"
+TABLE_LEASES = f"{settings.DYNAMODB_TABLE_PREFIX}leases"
 
 # All table names for iteration
 ALL_TABLES = [
@@ -109,6 +127,9 @@ ALL_TABLES = [
     TABLE_MESSAGES,
     TABLE_TASKS,
     TABLE_TOOLS,
+    TABLE_STATISTICS,
+    TABLE_INVOCATION_EVENTS,
+    TABLE_LEASES,
 ]
 
 # All queue names
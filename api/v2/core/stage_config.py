@@ -181,6 +181,19 @@ def _load_iterative_stages() -> List[str]:
 ITERATIVE_STAGES: List[str] = _load_iterative_stages()
 
 
+# ============================================================================
+# 阶段依赖关系 - 从配置文件加载
+# ============================================================================
+
+def _load_stage_dependencies() -> Dict[str, List[str]]:
+    """从配置文件加载各阶段直接依赖的上游阶段"""
+    workflow = _get_default_workflow()
+    return workflow.get_stage_dependencies()
+
+
+STAGE_DEPENDENCIES: Dict[str, List[str]] = _load_stage_dependencies()
+
+
 # ============================================================================
 # 辅助函数
 # ============================================================================
@@ -409,13 +422,27 @@ def get_workflow_stages(workflow_type: str) -> List[str]:
     return workflow.get_stage_sequence()
 
 
+def get_stage_dependencies(workflow_type: str = "agent_build") -> Dict[str, List[str]]:
+    """
+    获取指定工作流各阶段直接依赖的上游阶段
+    
+    参数:
+        workflow_type: 工作流类型
+    
+    返回:
+        {stage_name: [依赖阶段名称]} 字典
+    """
+    workflow = get_workflow_config(workflow_type)
+    return workflow.get_stage_dependencies()
+
+
 def reload_workflow_config() -> None:
     """
     重新加载工作流配置
     
     用于配置文件更新后刷新内存中的配置
     """
-    global STAGES, LEGACY_NAME_MAPPING, STAGE_SEQUENCE, ITERATIVE_STAGES, BuildStage
+    global STAGES, LEGACY_NAME_MAPPING, STAGE_SEQUENCE, ITERATIVE_STAGES, STAGE_DEPENDENCIES, BuildStage
     
     manager = WorkflowConfigManager()
     manager.reload()
@@ -425,6 +452,7 @@ def reload_workflow_config() -> None:
     LEGACY_NAME_MAPPING = _load_legacy_mapping()
     STAGE_SEQUENCE = _load_stage_sequence()
     ITERATIVE_STAGES = _load_iterative_stages()
+    STAGE_DEPENDENCIES = _load_stage_dependencies()
     BuildStage = _create_build_stage_enum()
     
     logger.info("Workflow config reloaded")
@@ -3,5 +3,6 @@ Database clients for API v2
 """
 from .dynamodb import DynamoDBClient, db_client
 from .sqs import SQSClient, sqs_client
+from .content_store import StageContentStore, content_store
 
-__all__ = ['DynamoDBClient', 'db_client', 'SQSClient', 'sqs_client']
+__all__ = ['DynamoDBClient', 'db_client', 'SQSClient', 'sqs_client', 'StageContentStore', 'content_store']
@@ -0,0 +1,127 @@
+"""
+Stage Content Store - 阶段输出内容的 S3 转存
+
+超过阈值的阶段输出压缩后存入 S3，阶段记录中只保存 agent_output_s3_ref 引用。
+对象键包含内容哈希，相同内容重复写入时复用同一对象。
+
+引用格式: s3://{bucket}/{prefix}{project_id}/{stage_name}/{sha256前16位}.txt.{zst|gz}
+"""
+import gzip
+import hashlib
+import logging
+import threading
+from typing import Optional, Tuple
+
+import boto3
+
+from api.v2.config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+_ENCODINGS = {
+    '.zst': 'zstd',
+    '.gz': 'gzip',
+}
+
+
+def parse_s3_ref(s3_ref: str) -> Tuple[str, str]:
+    """解析 s3://bucket/key 引用"""
+    if not s3_ref or not s3_ref.startswith('s3://'):
+        raise ValueError(f"Invalid S3 reference: {s3_ref}")
+    bucket, _, key = s3_ref[len('s3://'):].partition('/')
+    return bucket, key
+
+
+class StageContentStore:
+    """阶段输出内容 S3 存储"""
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        prefix: Optional[str] = None,
+        threshold_bytes: Optional[int] = None,
+        compression: Optional[str] = None,
+    ):
+        self.bucket = bucket if bucket is not None else settings.STAGE_OUTPUT_S3_BUCKET
+        self.prefix = prefix if prefix is not None else settings.STAGE_OUTPUT_S3_PREFIX
+        self.threshold_bytes = (
+            threshold_bytes if threshold_bytes is not None else settings.STAGE_OUTPUT_OFFLOAD_THRESHOLD_BYTES
+        )
+        compression = compression or settings.STAGE_OUTPUT_COMPRESSION
+        if compression == 'zstd' and zstandard is None:
+            logger.info("zstandard not installed, stage outputs will be compressed with gzip")
+            compression = 'gzip'
+        self.compression = compression
+        self._s3 = None
+        self._lock = threading.Lock()
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            with self._lock:
+                if self._s3 is None:
+                    self._s3 = boto3.client('s3', region_name=settings.AWS_REGION)
+        return self._s3
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.bucket)
+
+    def should_offload(self, content: Optional[str]) -> bool:
+        """内容是否需要转存 S3"""
+        if not self.enabled or not content:
+            return False
+        # 字符数不超过阈值的 1/4 时 UTF-8 编码不可能超过阈值，跳过编码
+        if len(content) * 4 <= self.threshold_bytes:
+            return False
+        return len(content.encode('utf-8')) > self.threshold_bytes
+
+    def put(self, project_id: str, stage_name: str, content: str) -> str:
+        """
+        压缩并写入 S3
+
+        Returns:
+            str: S3 引用
+        """
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        if self.compression == 'zstd':
+            body, extension = zstandard.ZstdCompressor(level=6).compress(data), '.zst'
+        else:
+            body, extension = gzip.compress(data, compresslevel=6), '.gz'
+
+        key = f"{self.prefix}{project_id}/{stage_name}/{digest}.txt{extension}"
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=body,
+            ContentType='text/plain; charset=utf-8',
+            ContentEncoding=_ENCODINGS[extension],
+            Metadata={'original-size': str(len(data))},
+        )
+        logger.info(
+            f"Stored stage output {project_id}/{stage_name} to S3: "
+            f"{len(data)} -> {len(body)} bytes ({_ENCODINGS[extension]})"
+        )
+        return f"s3://{self.bucket}/{key}"
+
+    def get(self, s3_ref: str) -> str:
+        """读取并解压 S3 中的内容"""
+        bucket, key = parse_s3_ref(s3_ref)
+        body = self.s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+        if key.endswith('.zst'):
+            if zstandard is None:
+                raise RuntimeError(f"zstandard is required to read {s3_ref}")
+            body = zstandard.ZstdDecompressor().decompress(body)
+        elif key.endswith('.gz'):
+            body = gzip.decompress(body)
+        return body.decode('utf-8')
+
+
+# 全局实例
+content_store = StageContentStore()
@@ -8,7 +8,9 @@ DynamoDB Client for API v2
 - 表创建
 """
 import boto3
+import json
 from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.types import TypeSerializer
 from botocore.exceptions import ClientError, BotoCoreError
 from botocore.config import Config
 import logging
@@ -29,10 +31,34 @@ from api.v2.config import (
     TABLE_MESSAGES,
     TABLE_TASKS,
     TABLE_TOOLS,
+    TABLE_STATISTICS,
+    TABLE_INVOCATION_EVENTS,
 )
+from api.v2.database.statistics_store import StatisticsStore, day_of, daily_stat_key, today
 
 logger = logging.getLogger(__name__)
 
+# TransactWriteItems 单次请求上限
+_TRANSACT_MAX_ITEMS = 100
+_TRANSACT_MAX_BYTES = 4 * 1024 * 1024
+
+_type_serializer = TypeSerializer()
+
+# 项目记录中影响预聚合统计的字段（更新时需通过 update_project 取得旧值）
+_PROJECT_TRACKED_FIELDS = ('status', 'metrics')
+
+# 阶段终态（进入终态时计入每日阶段统计）
+_TERMINAL_STAGE_STATUSES = ('completed', 'failed')
+
+# 阶段元数据属性（状态查询、仪表板、项目详情使用）
+STAGE_METADATA_ATTRIBUTES = (
+    'project_id', 'stage_name', 'stage_number', 'display_name', 'status',
+    'started_at', 'completed_at', 'duration_seconds', 'error_message',
+    'input_tokens', 'output_tokens', 'tool_calls', 'metrics', 'generated_files',
+    'doc_path', 'artifact_paths', 'efficiency_rating', 'agent_output_s3_ref',
+    'created_at', 'updated_at',
+)
+
 
 def retry_on_error(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0):
     """DynamoDB 操作重试装饰器"""
@@ -108,6 +134,13 @@ class DynamoDBClient:
         
         # 表引用缓存
         self._tables: Dict[str, Any] = {}
+        
+        # 预聚合统计
+        self.statistics = StatisticsStore(
+            self.dynamodb,
+            self._get_table(TABLE_STATISTICS),
+            self._get_table(TABLE_INVOCATION_EVENTS),
+        )
         self._initialized = True
         logger.info("DynamoDB client initialized")
     
@@ -148,6 +181,14 @@ class DynamoDBClient:
     @property
     def tools_table(self):
         return self._get_table(TABLE_TOOLS)
+    
+    @property
+    def statistics_table(self):
+        return self._get_table(TABLE_STATISTICS)
+    
+    @property
+    def invocation_events_table(self):
+        return self._get_table(TABLE_INVOCATION_EVENTS)
 
     # ============== Projects ==============
     
@@ -158,6 +199,7 @@ class DynamoDBClient:
         project_data['created_at'] = now
         project_data['updated_at'] = now
         self.projects_table.put_item(Item=self._to_dynamo(project_data))
+        self.statistics.on_project_changed(None, project_data)
         return project_data
     
     @retry_on_error()
@@ -171,19 +213,11 @@ class DynamoDBClient:
     def update_project(self, project_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """更新项目"""
         updates['updated_at'] = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
-        
-        update_expr = "SET " + ", ".join(f"#{k} = :{k}" for k in updates.keys())
-        expr_names = {f"#{k}": k for k in updates.keys()}
-        expr_values = {f":{k}": self._to_dynamo_value(v) for k, v in updates.items()}
-        
-        response = self.projects_table.update_item(
-            Key={'project_id': project_id},
-            UpdateExpression=update_expr,
-            ExpressionAttributeNames=expr_names,
-            ExpressionAttributeValues=expr_values,
-            ReturnValues='ALL_NEW'
+        return self._update_tracked(
+            self.projects_table, {'project_id': project_id}, updates,
+            tracked_fields=_PROJECT_TRACKED_FIELDS,
+            on_change=self.statistics.on_project_changed,
         )
-        return self._from_dynamo(response.get('Attributes', {}))
     
     @retry_on_error()
     def list_projects(
@@ -191,9 +225,10 @@ class DynamoDBClient:
         status: Optional[str] = None,
         user_id: Optional[str] = None,
         limit: int = 20,
-        last_key: Optional[str] = None
+        last_key: Optional[str] = None,
+        attributes: Optional[List[str]] = None
     ) -> Dict[str, Any]:
-        """列表项目"""
+        """列表项目（attributes 指定时只读取这些属性）"""
         scan_kwargs = {'Limit': limit}
         
         if last_key:
@@ -215,8 +250,12 @@ class DynamoDBClient:
         if filter_conditions:
             scan_kwargs['FilterExpression'] = " AND ".join(filter_conditions)
             scan_kwargs['ExpressionAttributeValues'] = expr_values
-            if expr_names:
-                scan_kwargs['ExpressionAttributeNames'] = expr_names
+        
+        if attributes:
+            scan_kwargs['ProjectionExpression'] = self._projection(attributes, expr_names)
+        
+        if expr_names:
+            scan_kwargs['ExpressionAttributeNames'] = expr_names
         
         response = self.projects_table.scan(**scan_kwargs)
         
@@ -232,7 +271,10 @@ class DynamoDBClient:
     @retry_on_error()
     def delete_project(self, project_id: str) -> bool:
         """删除项目"""
-        self.projects_table.delete_item(Key={'project_id': project_id})
+        response = self.projects_table.delete_item(Key={'project_id': project_id}, ReturnValues='ALL_OLD')
+        old_item = response.get('Attributes')
+        if old_item:
+            self.statistics.on_project_changed(self._from_dynamo(old_item), None)
         return True
 
     # ============== Stages ==============
@@ -253,28 +295,200 @@ class DynamoDBClient:
         return self._from_dynamo(item) if item else None
     
     @retry_on_error()
-    def update_stage(self, project_id: str, stage_name: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """更新阶段"""
-        update_expr = "SET " + ", ".join(f"#{k} = :{k}" for k in updates.keys())
-        expr_names = {f"#{k}": k for k in updates.keys()}
-        expr_values = {f":{k}": self._to_dynamo_value(v) for k, v in updates.items()}
-        
-        response = self.stages_table.update_item(
+    def get_stage_content(self, project_id: str, stage_name: str) -> Optional[Dict[str, Any]]:
+        """只读取阶段的内容属性（输出内容、设计文档、S3 引用）"""
+        expr_names: Dict[str, str] = {}
+        response = self.stages_table.get_item(
             Key={'project_id': project_id, 'stage_name': stage_name},
-            UpdateExpression=update_expr,
+            ProjectionExpression=self._projection(
+                ('agent_output_content', 'agent_output_s3_ref', 'design_document'), expr_names
+            ),
             ExpressionAttributeNames=expr_names,
-            ExpressionAttributeValues=expr_values,
-            ReturnValues='ALL_NEW'
         )
-        return self._from_dynamo(response.get('Attributes', {}))
+        item = response.get('Item')
+        return self._from_dynamo(item) if item is not None else None
     
     @retry_on_error()
-    def list_stages(self, project_id: str) -> List[Dict[str, Any]]:
-        """列表项目的所有阶段"""
-        response = self.stages_table.query(
-            KeyConditionExpression=Key('project_id').eq(project_id)
+    def update_stage(self, project_id: str, stage_name: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """更新阶段"""
+        return self._update_tracked(
+            self.stages_table, {'project_id': project_id, 'stage_name': stage_name}, updates,
+            tracked_fields=('status',),
+            on_change=self.statistics.on_stage_changed,
         )
-        items = [self._from_dynamo(item) for item in response.get('Items', [])]
+
+    def update_stages_batch(
+        self,
+        project_id: str,
+        stage_updates: Dict[str, Dict[str, Any]],
+        project_updates: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        批量更新多个阶段（及项目记录）的部分属性
+
+        所有更新合并为 TransactWriteItems（每批最多 100 项、4MB），一次保存通常只需一个请求：
+        - 项目记录的更新与阶段更新在同一事务中写入；涉及统计字段时仍走 update_project
+        - 阶段进入终态（completed/failed）的更新带条件"状态不等于新状态"，
+          并在同一事务中 ADD 每日阶段统计。多个进程并发写入同一阶段时统计只记一次；
+          条件不满足（状态已是新状态）时去掉该阶段的条件和统计后重试该批
+
+        Args:
+            project_id: 项目ID
+            stage_updates: {阶段名称: 需要 SET 的属性}
+            project_updates: 项目记录需要 SET 的属性（可选）
+
+        Returns:
+            写入的阶段数量
+        """
+        project_updates = dict(project_updates or {})
+        if any(field in project_updates for field in _PROJECT_TRACKED_FIELDS):
+            self.update_project(project_id, project_updates)
+            project_updates = {}
+        elif project_updates:
+            project_updates['updated_at'] = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+        entries = [(name, updates) for name, updates in stage_updates.items() if updates]
+        counted = {name for name, updates in entries if updates.get('status') in _TERMINAL_STAGE_STATUSES}
+
+        # 每个阶段最多带一个统计项，项目记录占一项
+        max_stages = (_TRANSACT_MAX_ITEMS - 1) // 2
+        batch, batch_bytes = [], 0
+        for stage_name, updates in entries:
+            size = len(json.dumps(updates, default=str))
+            if batch and (len(batch) >= max_stages or batch_bytes + size > _TRANSACT_MAX_BYTES):
+                self._write_stage_batch(project_id, batch, counted, project_updates)
+                batch, batch_bytes, project_updates = [], 0, {}
+            batch.append((stage_name, updates))
+            batch_bytes += size
+        if batch or project_updates:
+            self._write_stage_batch(project_id, batch, counted, project_updates)
+
+        return len(entries)
+
+    def _write_stage_batch(
+        self,
+        project_id: str,
+        batch: List[tuple],
+        counted: set,
+        project_updates: Dict[str, Any],
+    ) -> None:
+        """以单个事务写入一批阶段更新、项目更新和对应的每日阶段统计"""
+        while True:
+            actions = []
+            if project_updates:
+                actions.append(self._transact_update_action(
+                    TABLE_PROJECTS, {'project_id': project_id}, project_updates
+                )[0])
+
+            stage_indexes = {}
+            stat_deltas: Dict[str, Dict[str, int]] = {}
+            for stage_name, updates in batch:
+                condition_field = None
+                if stage_name in counted:
+                    condition_field = 'status'
+                    day = day_of(updates.get('completed_at')) or today()
+                    deltas = stat_deltas.setdefault(daily_stat_key(day), {})
+                    deltas[f"stages_{updates['status']}"] = deltas.get(f"stages_{updates['status']}", 0) + 1
+                stage_indexes[len(actions)] = stage_name
+                actions.append(self._transact_update_action(
+                    TABLE_STAGES, {'project_id': project_id, 'stage_name': stage_name}, updates,
+                    changed_field=condition_field,
+                )[0])
+
+            for stat_key, deltas in stat_deltas.items():
+                actions.append(self._transact_add_action(TABLE_STATISTICS, {'stat_key': stat_key}, deltas))
+
+            try:
+                self._transact_write(actions)
+                return
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+                    raise
+                reasons = e.response.get('CancellationReasons') or []
+                unchanged = {
+                    stage_indexes[i] for i, reason in enumerate(reasons)
+                    if i in stage_indexes and reason.get('Code') == 'ConditionalCheckFailed'
+                }
+                if not unchanged:
+                    raise
+                # 阶段已是目标状态（其他进程已写入），不再重复计入统计
+                counted -= unchanged
+
+    def _transact_update_action(
+        self,
+        table_name: str,
+        key: Dict[str, Any],
+        updates: Dict[str, Any],
+        changed_field: Optional[str] = None,
+    ) -> tuple:
+        """
+        构建 TransactWriteItems 的 Update 操作，返回 (操作, 估算字节数)
+
+        指定 changed_field 时附加条件：该属性不存在或不等于本次写入的值
+        """
+        names = {f"#a{i}": name for i, name in enumerate(updates)}
+        values = {
+            f":v{i}": _type_serializer.serialize(self._to_dynamo_value(value))
+            for i, value in enumerate(updates.values())
+        }
+        action = {
+            'Update': {
+                'TableName': table_name,
+                'Key': {k: _type_serializer.serialize(v) for k, v in key.items()},
+                'UpdateExpression': "SET " + ", ".join(f"#a{i} = :v{i}" for i in range(len(updates))),
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': values,
+            }
+        }
+        if changed_field:
+            index = list(updates).index(changed_field)
+            action['Update']['ConditionExpression'] = (
+                f"attribute_not_exists(#a{index}) OR #a{index} <> :v{index}"
+            )
+        return action, len(json.dumps(values, default=str))
+
+    @staticmethod
+    def _transact_add_action(table_name: str, key: Dict[str, Any], deltas: Dict[str, float]) -> Dict[str, Any]:
+        """构建 TransactWriteItems 的 ADD 计数器操作"""
+        names = {f"#a{i}": name for i, name in enumerate(deltas)}
+        values = {
+            f":v{i}": _type_serializer.serialize(Decimal(str(value)))
+            for i, value in enumerate(deltas.values())
+        }
+        return {
+            'Update': {
+                'TableName': table_name,
+                'Key': {k: _type_serializer.serialize(v) for k, v in key.items()},
+                'UpdateExpression': "ADD " + ", ".join(f"#a{i} :v{i}" for i in range(len(deltas))),
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': values,
+            }
+        }
+
+    @retry_on_error()
+    def _transact_write(self, actions: List[Dict[str, Any]]) -> None:
+        self.client.transact_write_items(TransactItems=actions)
+
+    @retry_on_error()
+    def list_stages(self, project_id: str, metadata_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        列表项目的所有阶段
+        
+        metadata_only=True 时只读取 STAGE_METADATA_ATTRIBUTES，不返回输出内容和设计文档
+        """
+        query_kwargs = {'KeyConditionExpression': Key('project_id').eq(project_id)}
+        if metadata_only:
+            expr_names: Dict[str, str] = {}
+            query_kwargs['ProjectionExpression'] = self._projection(STAGE_METADATA_ATTRIBUTES, expr_names)
+            query_kwargs['ExpressionAttributeNames'] = expr_names
+        
+        items = []
+        while True:
+            response = self.stages_table.query(**query_kwargs)
+            items.extend(self._from_dynamo(item) for item in response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
         return sorted(items, key=lambda x: x.get('stage_number', 0))
     
     @retry_on_error()
@@ -294,6 +508,7 @@ class DynamoDBClient:
         agent_data['created_at'] = now
         agent_data['updated_at'] = now
         self.agents_table.put_item(Item=self._to_dynamo(agent_data))
+        self.statistics.on_agent_changed(None, agent_data)
         return agent_data
     
     @retry_on_error()
@@ -307,19 +522,11 @@ class DynamoDBClient:
     def update_agent(self, agent_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """更新Agent"""
         updates['updated_at'] = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
-        
-        update_expr = "SET " + ", ".join(f"#{k} = :{k}" for k in updates.keys())
-        expr_names = {f"#{k}": k for k in updates.keys()}
-        expr_values = {f":{k}": self._to_dynamo_value(v) for k, v in updates.items()}
-        
-        response = self.agents_table.update_item(
-            Key={'agent_id': agent_id},
-            UpdateExpression=update_expr,
-            ExpressionAttributeNames=expr_names,
-            ExpressionAttributeValues=expr_values,
-            ReturnValues='ALL_NEW'
+        return self._update_tracked(
+            self.agents_table, {'agent_id': agent_id}, updates,
+            tracked_fields=('status', 'category'),
+            on_change=self.statistics.on_agent_changed,
         )
-        return self._from_dynamo(response.get('Attributes', {}))
     
     @retry_on_error()
     def list_agents(
@@ -368,7 +575,10 @@ class DynamoDBClient:
     @retry_on_error()
     def delete_agent(self, agent_id: str) -> bool:
         """删除Agent"""
-        self.agents_table.delete_item(Key={'agent_id': agent_id})
+        response = self.agents_table.delete_item(Key={'agent_id': agent_id}, ReturnValues='ALL_OLD')
+        old_item = response.get('Attributes')
+        if old_item:
+            self.statistics.on_agent_changed(self._from_dynamo(old_item), None)
         return True
 
     # ============== Tasks ==============
@@ -499,6 +709,33 @@ class DynamoDBClient:
         )
         return [self._from_dynamo(item) for item in response.get('Items', [])]
 
+    # ============== Invocations ==============
+    
+    @retry_on_error()
+    def create_invocation(self, invocation_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        记录调用事件
+        
+        事件按天分桶写入调用事件表（day + event_id），并更新预聚合的调用统计
+        """
+        day = day_of(invocation_data.get('created_at')) or datetime.now(timezone.utc).date().isoformat()
+        event = dict(invocation_data)
+        event['day'] = day
+        event['event_id'] = f"{invocation_data.get('created_at', '')}#{invocation_data['invocation_id']}"
+        self.statistics.put_invocation_event(self._to_dynamo(event))
+        self.statistics.record_invocation(invocation_data)
+        return invocation_data
+    
+    @retry_on_error()
+    def list_invocation_events(self, day: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """列出某天的调用事件（按时间倒序）"""
+        response = self.invocation_events_table.query(
+            KeyConditionExpression=Key('day').eq(day),
+            Limit=limit,
+            ScanIndexForward=False
+        )
+        return [self._from_dynamo(item) for item in response.get('Items', [])]
+
     # ============== Tools ==============
     
     @retry_on_error()
@@ -535,6 +772,52 @@ class DynamoDBClient:
 
     # ============== Utility Methods ==============
     
+    def _update_tracked(
+        self,
+        table,
+        key: Dict[str, Any],
+        updates: Dict[str, Any],
+        tracked_fields: tuple,
+        on_change,
+    ) -> Dict[str, Any]:
+        """
+        执行 SET 更新；当更新涉及统计相关字段时，通知统计存储新旧值
+        
+        涉及统计字段时使用 ReturnValues='ALL_OLD' 取得旧值，
+        新值由旧值与本次 SET 的字段合并得到，无需额外读取。
+        """
+        update_expr = "SET " + ", ".join(f"#{k} = :{k}" for k in updates.keys())
+        expr_names = {f"#{k}": k for k in updates.keys()}
+        expr_values = {f":{k}": self._to_dynamo_value(v) for k, v in updates.items()}
+        tracked = any(field in updates for field in tracked_fields)
+        
+        response = table.update_item(
+            Key=key,
+            UpdateExpression=update_expr,
+            ExpressionAttributeNames=expr_names,
+            ExpressionAttributeValues=expr_values,
+            ReturnValues='ALL_OLD' if tracked else 'ALL_NEW'
+        )
+        attributes = response.get('Attributes', {})
+        if not tracked:
+            return self._from_dynamo(attributes)
+        
+        old_item = self._from_dynamo(attributes)
+        new_values = {k: expr_values[f":{k}"] for k in updates.keys()}
+        new_item = self._from_dynamo({**key, **attributes, **new_values})
+        on_change(old_item or None, new_item)
+        return new_item
+    
+    @staticmethod
+    def _projection(attributes, expr_names: Dict[str, str]) -> str:
+        """构建 ProjectionExpression（属性名统一使用占位符，避免保留字冲突）"""
+        placeholders = []
+        for attribute in attributes:
+            placeholder = f"#p_{attribute}"
+            expr_names[placeholder] = attribute
+            placeholders.append(placeholder)
+        return ", ".join(placeholders)
+    
     def _to_dynamo(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """转换为 DynamoDB 格式"""
         return {k: self._to_dynamo_value(v) for k, v in data.items() if v is not None}
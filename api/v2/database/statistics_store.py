@@ -0,0 +1,247 @@
+"""
+Statistics Store - 预聚合统计存储
+
+在项目、阶段、Agent 和调用数据变更时增量更新计数器，
+仪表板读取时只需按天读取汇总项（O(days) 次读取），无需全表扫描。
+
+统计表（TABLE_STATISTICS，主键 stat_key）:
+- 'global': 全局计数器（项目/Agent 状态计数、分类计数、调用总数、构建耗时累计）
+- 'day#YYYY-MM-DD': 每日汇总（构建数、阶段完成数、调用数、调用耗时累计、活跃 Agent 集合）
+
+调用事件表（TABLE_INVOCATION_EVENTS，主键 day + event_id）按天分桶保存每次调用记录。
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone, date
+from decimal import Decimal
+from typing import Dict, Optional, Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_STAT_KEY = 'global'
+DAILY_STAT_PREFIX = 'day#'
+
+# BatchGetItem 单次最多 100 个 key
+_BATCH_GET_LIMIT = 100
+
+
+def daily_stat_key(day: str) -> str:
+    """每日汇总项主键"""
+    return f"{DAILY_STAT_PREFIX}{day}"
+
+
+def day_of(timestamp: Optional[str]) -> Optional[str]:
+    """从 ISO 时间戳提取日期（UTC）"""
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).astimezone(timezone.utc).date().isoformat()
+    except (ValueError, AttributeError):
+        return None
+
+
+def today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _build_duration(item: Optional[Dict[str, Any]]) -> Optional[float]:
+    metrics = (item or {}).get('metrics') or {}
+    duration = metrics.get('total_duration_seconds')
+    return float(duration) if duration is not None else None
+
+
+class StatisticsStore:
+    """
+    预聚合统计存储
+
+    所有写操作都是 DynamoDB ADD 原子增量，多个 API/Worker 进程并发写入也不会丢失计数。
+    统计写入失败只记录警告，不影响业务数据的写入。
+    """
+
+    def __init__(self, dynamodb, statistics_table, invocation_events_table):
+        self.dynamodb = dynamodb
+        self.statistics_table = statistics_table
+        self.invocation_events_table = invocation_events_table
+
+    # ============== 写入 ==============
+
+    def increment(
+        self,
+        stat_key: str,
+        deltas: Dict[str, float],
+        add_to_sets: Optional[Dict[str, Iterable[str]]] = None
+    ) -> None:
+        """对汇总项做原子增量更新"""
+        deltas = {name: value for name, value in deltas.items() if value}
+        add_to_sets = {name: set(values) for name, values in (add_to_sets or {}).items() if values}
+        if not deltas and not add_to_sets:
+            return
+
+        clauses = []
+        expr_names = {}
+        expr_values = {}
+        for i, (name, value) in enumerate(list(deltas.items()) + list(add_to_sets.items())):
+            expr_names[f"#a{i}"] = name
+            expr_values[f":v{i}"] = Decimal(str(value)) if isinstance(value, (int, float)) else value
+            clauses.append(f"#a{i} :v{i}")
+
+        self.statistics_table.update_item(
+            Key={'stat_key': stat_key},
+            UpdateExpression="ADD " + ", ".join(clauses),
+            ExpressionAttributeNames=expr_names,
+            ExpressionAttributeValues=expr_values,
+        )
+
+    def _safe_apply(self, updates: Dict[str, Dict[str, float]], action: str) -> None:
+        for stat_key, deltas in updates.items():
+            try:
+                self.increment(stat_key, deltas)
+            except Exception as e:
+                logger.warning(f"Failed to update statistics {stat_key} on {action}: {e}")
+
+    def on_project_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """
+        项目创建/更新/删除时更新计数器
+
+        每日构建数按项目创建日期归档，与仪表板原有口径一致。
+        """
+        updates = _new_counters()
+        _add_project_deltas(updates, old, -1)
+        _add_project_deltas(updates, new, 1)
+        self._safe_apply(updates, 'project change')
+
+    def on_stage_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """阶段进入终态时记录每日阶段完成/失败数"""
+        old_status = (old or {}).get('status')
+        new_status = (new or {}).get('status')
+        if old_status == new_status or new_status not in ('completed', 'failed'):
+            return
+        day = day_of((new or {}).get('completed_at')) or today()
+        self._safe_apply({daily_stat_key(day): {f'stages_{new_status}': 1}}, 'stage change')
+
+    def on_agent_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Agent 创建/更新/删除时更新状态和分类计数"""
+        updates = _new_counters()
+        _add_agent_deltas(updates, old, -1)
+        _add_agent_deltas(updates, new, 1)
+        self._safe_apply(updates, 'agent change')
+
+    def record_invocation(self, invocation: Dict[str, Any]) -> None:
+        """写入调用事件并更新全局/每日调用计数"""
+        day = day_of(invocation.get('created_at')) or today()
+        succeeded = invocation.get('status') == 'success'
+        deltas = {
+            'invocations_total': 1,
+            'invocations_success': 1 if succeeded else 0,
+            'invocations_failed': 0 if succeeded else 1,
+        }
+        try:
+            self.increment(GLOBAL_STAT_KEY, deltas)
+            self.increment(
+                daily_stat_key(day),
+                {**deltas, 'invocation_duration_ms_sum': invocation.get('duration_ms') or 0},
+                add_to_sets={'active_agents': [invocation['agent_id']] if invocation.get('agent_id') else []},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to update invocation statistics: {e}")
+
+    def put_invocation_event(self, item: Dict[str, Any]) -> None:
+        """按天分桶写入调用事件"""
+        self.invocation_events_table.put_item(Item=item)
+
+    # ============== 读取 ==============
+
+    def get_global(self) -> Dict[str, Any]:
+        """读取全局计数器"""
+        response = self.statistics_table.get_item(Key={'stat_key': GLOBAL_STAT_KEY})
+        return response.get('Item') or {}
+
+    def get_daily(self, days: Iterable[date]) -> Dict[str, Dict[str, Any]]:
+        """批量读取多天的汇总项，返回 {日期: 汇总项}"""
+        table_name = self.statistics_table.name
+        keys = [{'stat_key': daily_stat_key(d.isoformat())} for d in days]
+        result: Dict[str, Dict[str, Any]] = {}
+
+        for start in range(0, len(keys), _BATCH_GET_LIMIT):
+            request = {table_name: {'Keys': keys[start:start + _BATCH_GET_LIMIT]}}
+            while request:
+                response = self.dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(table_name, []):
+                    result[item['stat_key'][len(DAILY_STAT_PREFIX):]] = item
+                request = response.get('UnprocessedKeys') or None
+        return result
+
+    # ============== 重建 ==============
+
+    def rebuild(self, projects: Iterable[Dict[str, Any]], agents: Iterable[Dict[str, Any]]) -> int:
+        """
+        从源数据全量重建项目/Agent 计数器
+
+        用于首次启用预聚合统计或修复计数漂移。每日调用、阶段数据只能来自增量记录，
+        重建时予以保留；全局调用总数以各 Agent 的调用计数为基线。
+
+        Returns:
+            写入的汇总项数量
+        """
+        counters = _new_counters()
+        for project in projects:
+            _add_project_deltas(counters, project, 1)
+        for agent in agents:
+            _add_agent_deltas(counters, agent, 1)
+            counters[GLOBAL_STAT_KEY]['invocations_total'] += agent.get('total_invocations') or 0
+            counters[GLOBAL_STAT_KEY]['invocations_success'] += agent.get('successful_invocations') or 0
+            counters[GLOBAL_STAT_KEY]['invocations_failed'] += agent.get('failed_invocations') or 0
+
+        for stat_key, values in counters.items():
+            item = {}
+            if stat_key != GLOBAL_STAT_KEY:
+                existing = self.statistics_table.get_item(Key={'stat_key': stat_key}).get('Item') or {}
+                item = {name: value for name, value in existing.items() if name.startswith(_INCREMENTAL_ONLY_PREFIXES)}
+            item.update({name: Decimal(str(value)) for name, value in values.items()})
+            item['stat_key'] = stat_key
+            self.statistics_table.put_item(Item=item)
+        return len(counters)
+
+
+# 只能由增量事件产生、重建时需要保留的每日字段
+_INCREMENTAL_ONLY_PREFIXES = ('invocation', 'stages_', 'active_agents')
+
+
+def _new_counters() -> Dict[str, Dict[str, float]]:
+    return defaultdict(lambda: defaultdict(float))
+
+
+def _add_project_deltas(counters: Dict[str, Dict[str, float]], item: Optional[Dict[str, Any]], sign: int) -> None:
+    """累加单个项目对各汇总项的贡献（sign=-1 表示撤销旧状态）"""
+    if not item:
+        return
+    status = item.get('status')
+    global_counters = counters[GLOBAL_STAT_KEY]
+    global_counters['projects_total'] += sign
+    if status:
+        global_counters[f'projects_status_{status}'] += sign
+
+    created_day = day_of(item.get('created_at'))
+    daily_counters = counters[daily_stat_key(created_day)] if created_day else None
+    if daily_counters is not None:
+        daily_counters['builds_total'] += sign
+        if status:
+            daily_counters[f'builds_status_{status}'] += sign
+
+    duration = _build_duration(item)
+    if status == 'completed' and duration is not None:
+        for target in (global_counters, daily_counters):
+            if target is not None:
+                target['build_duration_seconds_sum'] += sign * duration
+                target['build_duration_count'] += sign
+
+
+def _add_agent_deltas(counters: Dict[str, Dict[str, float]], item: Optional[Dict[str, Any]], sign: int) -> None:
+    """累加单个 Agent 对全局计数的贡献"""
+    if not item:
+        return
+    global_counters = counters[GLOBAL_STAT_KEY]
+    global_counters['agents_total'] += sign
+    if item.get('status'):
+        global_counters[f"agents_status_{item['status']}"] += sign
+    global_counters[f"agents_category_{item.get('category') or 'uncategorized'}"] += sign
@@ -6,9 +6,11 @@ Nexus AI API v2 - FastAPI Application
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import logging
 import time
 import uuid
+from typing import Optional
 
 from api.v2.config import settings
 from api.v2.routers import (
@@ -182,19 +184,42 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 # ============== 启动事件 ==============
 
+_cache_sweeper_task: Optional[asyncio.Task] = None
+
+
+async def _agent_cache_maintenance_loop():
+    """定期清理空闲的 Agent 实例缓存，并为热门模板补充预热实例"""
+    from api.v2.services.agent_runtime_service import sweep_agent_caches, warm_agent_cache
+    
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, warm_agent_cache)
+            removed = sweep_agent_caches()
+            if removed:
+                logger.info(f"Agent cache sweep removed {removed} idle entries")
+        except Exception as e:
+            logger.warning(f"Agent cache maintenance failed: {e}")
+        await asyncio.sleep(settings.AGENT_CACHE_SWEEP_INTERVAL_SECONDS)
+
+
 @app.on_event("startup")
 async def startup_event():
     """应用启动事件"""
+    global _cache_sweeper_task
     logger.info(f"Starting Nexus AI API v{settings.APP_VERSION}")
     logger.info(f"AWS Region: {settings.AWS_REGION}")
     logger.info(f"DynamoDB Endpoint: {settings.DYNAMODB_ENDPOINT_URL or 'AWS Default'}")
     logger.info(f"SQS Endpoint: {settings.SQS_ENDPOINT_URL or 'AWS Default'}")
+    _cache_sweeper_task = asyncio.create_task(_agent_cache_maintenance_loop())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭事件"""
     logger.info("Shutting down Nexus AI API")
+    if _cache_sweeper_task:
+        _cache_sweeper_task.cancel()
 
 
 # ============== 开发服务器 ==============
@@ -331,6 +331,18 @@ class ProjectControlRequest(BaseModel):
     reason: Optional[str] = Field(None, max_length=500)
 
 
+class DeployProjectRequest(BaseModel):
+    """项目部署请求（部署任务由 Worker 的部署队列执行）"""
+    agent_id: Optional[str] = None
+    region: Optional[str] = None
+    agent_script_path: Optional[str] = None
+    requirements_path: Optional[str] = None
+    agent_name_override: Optional[str] = None
+    package: bool = True
+    sync_artifacts: bool = True
+    build_image: bool = False
+
+
 class StageRecord(BaseModel):
     """
     阶段记录
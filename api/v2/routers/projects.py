@@ -18,6 +18,7 @@ from api.v2.models.schemas import (
     ProjectListResponse,
     ProjectDetailResponse,
     ProjectControlRequest,
+    DeployProjectRequest,
     BuildDashboardResponse,
     StageListResponse,
     APIResponse,
@@ -220,6 +221,37 @@ async def control_project(
         raise HTTPException(status_code=500, detail=f"控制项目失败: {str(e)}")
 
 
+@router.post("/{project_id}/deploy", response_model=APIResponse)
+async def deploy_project(
+    project_id: str = Path(..., description="项目ID"),
+    request: Optional[DeployProjectRequest] = None
+):
+    """
+    部署项目
+    
+    部署任务提交到部署队列，由 Worker 执行，返回的 task_id 可用于查询部署进度
+    """
+    try:
+        result = project_service.deploy_project(
+            project_id=project_id,
+            request=request or DeployProjectRequest()
+        )
+        
+        return APIResponse(
+            success=True,
+            data=result,
+            message=result.get('message'),
+            timestamp=_now(),
+            request_id=_request_id()
+        )
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to deploy project {project_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"提交部署任务失败: {str(e)}")
+
+
 @router.delete("/{project_id}", response_model=APIResponse)
 async def delete_project(
     project_id: str = Path(..., description="项目ID")
@@ -8,6 +8,7 @@ from fastapi.responses import StreamingResponse
 from typing import Optional, List
 import logging
 from datetime import datetime, timezone
+import time
 import uuid
 import json
 import asyncio
@@ -402,6 +403,9 @@ async def stream_chat(
             content_blocks_for_db = []
             # 当前文本块 ID
             current_text_block_id = None
+            # 调用统计
+            invocation_started = time.monotonic()
+            invocation_error = None
             
             try:
                 if runtime_arn:
@@ -515,9 +519,10 @@ async def stream_chat(
                             })
                         
                         elif event_type == "error":
+                            invocation_error = event.get("error", "Unknown error")
                             yield _format_sse({
                                 "event": "error",
-                                "error": event.get("error", "Unknown error")
+                                "error": invocation_error
                             })
                         
                         elif event_type == "done":
@@ -644,9 +649,10 @@ async def stream_chat(
                                 current_tool_input = ""
                         
                         elif event_type == "error":
+                            invocation_error = event.get("error", "Unknown error")
                             yield _format_sse({
                                 "event": "error",
-                                "error": event.get("error", "Unknown error")
+                                "error": invocation_error
                             })
                         
                         elif event_type == "done":
@@ -674,12 +680,32 @@ async def stream_chat(
                 
             except Exception as e:
                 logger.error(f"Stream error: {e}", exc_info=True)
+                invocation_error = str(e)
                 yield _format_sse({
                     "event": "error",
                     "error": str(e)
                 })
             
             finally:
+                # 后台记录调用事件（更新调用统计）
+                invocation_duration_ms = int((time.monotonic() - invocation_started) * 1000)
+                
+                def record_invocation():
+                    try:
+                        agent_service.record_invocation(
+                            agent_id=agent_id,
+                            session_id=session_id,
+                            input_text=request.content[:1000],
+                            output_text="".join(assistant_chunks)[:1000],
+                            status='failed' if invocation_error else 'success',
+                            duration_ms=invocation_duration_ms,
+                            error_message=invocation_error,
+                        )
+                    except Exception as record_error:
+                        logger.warning(f"Failed to record invocation: {record_error}")
+                
+                asyncio.get_running_loop().run_in_executor(None, record_invocation)
+                
                 # 异步保存助手消息（包含工具调用信息和内容块顺序）
                 # 使用后台任务，不阻塞流式响应
                 if assistant_chunks:
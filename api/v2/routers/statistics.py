@@ -63,6 +63,14 @@ class SystemHealthResponse(BaseModel):
     request_id: str
 
 
+class RuntimeCacheStatisticsResponse(BaseModel):
+    """运行时缓存统计响应"""
+    success: bool
+    data: Dict[str, Any]
+    timestamp: str
+    request_id: str
+
+
 @router.get("/overview", response_model=StatisticsOverviewResponse)
 async def get_overview():
     """
@@ -203,6 +211,28 @@ async def get_recent_activities(
         raise HTTPException(status_code=500, detail=f"获取最近活动失败: {str(e)}")
 
 
+@router.get("/runtime-cache", response_model=RuntimeCacheStatisticsResponse)
+async def get_runtime_cache_statistics():
+    """
+    获取运行时缓存统计
+    
+    返回本地 Agent 实例缓存的条目数、内存占用、命中率和淘汰次数
+    """
+    try:
+        stats = statistics_service.get_runtime_cache_statistics()
+        
+        return RuntimeCacheStatisticsResponse(
+            success=True,
+            data=stats,
+            timestamp=_now(),
+            request_id=_request_id()
+        )
+    
+    except Exception as e:
+        logger.error(f"Failed to get runtime cache statistics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取运行时缓存统计失败: {str(e)}")
+
+
 @router.get("/system-health", response_model=SystemHealthResponse)
 async def get_system_health():
     """
@@ -166,6 +166,10 @@ async def pause_workflow(
         
         db_client.update_project(project_id, updates)
         
+        # 通知正在运行的工作流，使其在当前 Agent 轮次/工具调用结束后响应
+        from nexus_utils.workflow.control import publish_control_signal
+        publish_control_signal(project_id, 'paused', now)
+        
         logger.info(f"Workflow paused for project: {project_id}")
         
         return ControlResponse(
@@ -293,6 +297,10 @@ async def stop_workflow(
         
         db_client.update_project(project_id, updates)
         
+        # 通知正在运行的工作流，使其在当前 Agent 轮次/工具调用结束后响应
+        from nexus_utils.workflow.control import publish_control_signal
+        publish_control_signal(project_id, 'stopped', now)
+        
         logger.info(f"Workflow stopped for project: {project_id}")
         
         return ControlResponse(
@@ -415,8 +423,8 @@ async def get_workflow_status(
         if not project:
             raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
         
-        # 获取所有阶段
-        stages = stage_service.list_stages(project_id)
+        # 获取所有阶段（仅元数据）
+        stages = stage_service.list_stages(project_id, metadata_only=True)
         
         # 分类阶段
         completed_stages = []
@@ -506,7 +514,7 @@ async def get_workflow_metrics(
             raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
         
         # 获取所有阶段的指标
-        stages = stage_service.list_stages(project_id)
+        stages = stage_service.list_stages(project_id, metadata_only=True)
         
         stage_metrics = {}
         for stage in stages:
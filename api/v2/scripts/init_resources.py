@@ -35,6 +35,9 @@ from api.v2.config import (
     TABLE_MESSAGES,
     TABLE_TASKS,
     TABLE_TOOLS,
+    TABLE_STATISTICS,
+    TABLE_INVOCATION_EVENTS,
+    TABLE_LEASES,
     ALL_TABLES,
     ALL_QUEUES,
 )
@@ -74,6 +77,8 @@ DYNAMODB_TABLE_DEFINITIONS = {
                 'Projection': {'ProjectionType': 'ALL'}
             }
         ],
+        # 工作流控制信号（暂停/停止）通过表流推送给正在运行的 Worker
+        'StreamSpecification': {'StreamEnabled': True, 'StreamViewType': 'NEW_IMAGE'},
         'BillingMode': 'PAY_PER_REQUEST'
     },
     
@@ -264,6 +269,41 @@ DYNAMODB_TABLE_DEFINITIONS = {
             }
         ],
         'BillingMode': 'PAY_PER_REQUEST'
+    },
+    
+    # 预聚合统计（global / day#YYYY-MM-DD 汇总项）
+    TABLE_STATISTICS: {
+        'KeySchema': [
+            {'AttributeName': 'stat_key', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'stat_key', 'AttributeType': 'S'},
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    
+    # 调用事件（按天分桶）
+    TABLE_INVOCATION_EVENTS: {
+        'KeySchema': [
+            {'AttributeName': 'day', 'KeyType': 'HASH'},
+            {'AttributeName': 'event_id', 'KeyType': 'RANGE'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'day', 'AttributeType': 'S'},
+            {'AttributeName': 'event_id', 'AttributeType': 'S'},
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    
+    # 分布式协调租约（如控制信号流读取者名额）
+    TABLE_LEASES: {
+        'KeySchema': [
+            {'AttributeName': 'lease_key', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'lease_key', 'AttributeType': 'S'},
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
     }
 }
 
@@ -364,6 +404,9 @@ class ResourceInitializer:
             if 'GlobalSecondaryIndexes' in definition:
                 create_params['GlobalSecondaryIndexes'] = definition['GlobalSecondaryIndexes']
             
+            if 'StreamSpecification' in definition:
+                create_params['StreamSpecification'] = definition['StreamSpecification']
+            
             self.dynamodb.create_table(**create_params)
             logger.info(f"Creating table {table_name}...")
             
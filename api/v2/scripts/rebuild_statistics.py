@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Nexus AI v2 统计重建脚本
+
+从项目表和 Agent 表全量重建预聚合统计计数器，用于首次启用预聚合统计
+或修复计数漂移。每日调用和阶段统计只能来自增量记录，重建时会保留。
+
+使用方法:
+    python -m api.v2.scripts.rebuild_statistics
+"""
+import sys
+import logging
+
+# 添加项目根目录到路径
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from api.v2.database import db_client
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _scan_all(table):
+    """分页扫描整张表"""
+    scan_kwargs = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            yield db_client._from_dynamo(item)
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        scan_kwargs['ExclusiveStartKey'] = last_key
+
+
+def main():
+    projects = list(_scan_all(db_client.projects_table))
+    agents = list(_scan_all(db_client.agents_table))
+    logger.info(f"Loaded {len(projects)} projects and {len(agents)} agents")
+
+    written = db_client.statistics.rebuild(projects, agents)
+    logger.info(f"✓ Rebuilt {written} statistics items")
+
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,7 @@ from .agent_deployment_service import (
     AgentDeploymentService,
     AgentDeploymentError,
     DeploymentResult,
+    PreparedDeployment,
 )
 
 __all__ = [
@@ -29,5 +30,5 @@ __all__ = [
     'StageServiceV2', 'stage_service_v2',
     'mark_stage_running', 'mark_stage_completed', 'mark_stage_failed',
     'AgentCLIBuildService', 'AgentWorkflowOutput',
-    'AgentDeploymentService', 'AgentDeploymentError', 'DeploymentResult',
+    'AgentDeploymentService', 'AgentDeploymentError', 'DeploymentResult', 'PreparedDeployment',
 ]
@@ -46,6 +46,21 @@ class DeploymentResult:
         return payload
 
 
+@dataclass
+class PreparedDeployment:
+    """Artifacts and records resolved before launching an AgentCore deployment."""
+
+    project_name: str
+    project_dir: Path
+    agent_record: AgentRecord
+    agent_name: str
+    script_path: Path
+    requirements_file: Optional[Path]
+    deployment_dir: Path
+    region: str
+    metadata: Any
+
+
 class AgentDeploymentService:
     """High-level service to deploy generated agents to AgentCore."""
 
@@ -70,6 +85,34 @@ class AgentDeploymentService:
     ) -> DeploymentResult:
         """Deploy the specified agent to Amazon Bedrock AgentCore."""
 
+        prepared = self.prepare_agentcore_deployment(
+            project_name=project_name,
+            project_id=project_id,
+            agent_id=agent_id,
+            agent_script_path=agent_script_path,
+            requirements_path=requirements_path,
+            region=region,
+            agent_name_override=agent_name_override,
+        )
+        return self.launch_agentcore(prepared)
+
+    def prepare_agentcore_deployment(
+        self,
+        *,
+        project_name: str,
+        project_id: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        agent_script_path: Optional[str] = None,
+        requirements_path: Optional[str] = None,
+        region: Optional[str] = None,
+        agent_name_override: Optional[str] = None,
+    ) -> PreparedDeployment:
+        """Resolve project artifacts and the agent record ahead of launch.
+
+        Separated from :meth:`launch_agentcore` so callers (e.g. the deploy
+        worker) can run packaging/image/upload steps in parallel with the launch.
+        """
+
         project_dir = self.repo_root / "projects" / project_name
         if not project_dir.exists():
             raise AgentDeploymentError(f"项目目录不存在: {project_dir}")
@@ -118,6 +161,29 @@ class AgentDeploymentService:
         )
         deployment_dir = self._ensure_deployment_directory(project_name, metadata.agent_name)
 
+        return PreparedDeployment(
+            project_name=project_name,
+            project_dir=project_dir,
+            agent_record=agent_record,
+            agent_name=metadata.agent_name,
+            script_path=script_path,
+            requirements_file=requirements_file,
+            deployment_dir=deployment_dir,
+            region=deployment_region,
+            metadata=metadata,
+        )
+
+    def launch_agentcore(self, prepared: PreparedDeployment) -> DeploymentResult:
+        """Configure and launch a prepared deployment on AgentCore."""
+
+        project_name = prepared.project_name
+        agent_record = prepared.agent_record
+        metadata = prepared.metadata
+        script_path = prepared.script_path
+        requirements_file = prepared.requirements_file
+        deployment_dir = prepared.deployment_dir
+        deployment_region = prepared.region
+
         # Determine execution parameters
         dry_run = settings.AGENTCORE_DEPLOY_DRY_RUN
         alias = settings.AGENTCORE_DEFAULT_ALIAS or "DEFAULT"
@@ -126,7 +192,7 @@ class AgentDeploymentService:
         if dry_run:
             logger.info(
                 "Dry-run enabled. Skipping actual AgentCore deployment for agent %s",
-                resolved_agent_id,
+                agent_record.agent_id,
             )
             self._update_agent_record_after_deploy(
                 agent_record.agent_id,
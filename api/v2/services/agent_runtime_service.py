@@ -8,10 +8,13 @@ Agent Runtime Service - Agent 运行时调用服务
 - 支持多轮对话（通过 S3SessionManager）
 """
 import json
+import time
 import logging
 import asyncio
+import threading
 import http.client
-from typing import Dict, Any, Optional, AsyncGenerator, List
+from collections import Counter, OrderedDict
+from typing import Dict, Any, Optional, AsyncGenerator, List, Callable
 import boto3
 from botocore.config import Config
 
@@ -20,11 +23,184 @@ from api.v2.config import settings
 logger = logging.getLogger(__name__)
 
 
+class BoundedInstanceCache:
+    """
+    有界实例缓存（LRU + 空闲 TTL）
+
+    - 条目数量和估算内存（权重）双重预算，超出时按最久未使用淘汰
+    - 条目空闲超过 idle_ttl_seconds 后淘汰
+    - 记录命中/未命中/淘汰计数，供统计 API 展示
+
+    OrderedDict 按最近访问排序，头部即最久未访问的条目，
+    因此 TTL 清理只需从头部开始检查，无需全表扫描。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        max_weight: int = 0,
+        idle_ttl_seconds: float = 0,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._lock = threading.RLock()
+        # key -> (value, weight, last_access)
+        self._entries: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._total_weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions: Counter = Counter()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            self._expire()
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取条目并刷新其访问时间"""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[2] = time.monotonic()
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any, weight: int = 0) -> None:
+        """写入条目，必要时淘汰旧条目"""
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = [value, weight, time.monotonic()]
+            self._total_weight += weight
+            self._expire()
+            self._enforce_budget()
+
+    def update_weight(self, key: str, weight: int) -> None:
+        """更新条目权重（如多轮对话后会话历史增长）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._total_weight += weight - entry[1]
+            entry[1] = weight
+            self._enforce_budget()
+
+    def pop(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._remove(key)
+            return entry[0] if entry else None
+
+    def remove_where(self, predicate: Callable[[str], bool]) -> int:
+        """删除所有满足条件的 key，返回删除数量"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def sweep(self) -> int:
+        """主动清理过期条目，返回清理数量"""
+        with self._lock:
+            before = len(self._entries)
+            self._expire()
+            return before - len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'total_weight': self._total_weight,
+                'max_weight': self.max_weight,
+                'idle_ttl_seconds': self.idle_ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': dict(self.evictions),
+                'total_evictions': sum(self.evictions.values()),
+            }
+
+    def _remove(self, key: str) -> Optional[List[Any]]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_weight -= entry[1]
+        return entry
+
+    def _expire(self) -> None:
+        if not self.idle_ttl_seconds:
+            return
+        deadline = time.monotonic() - self.idle_ttl_seconds
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[2] > deadline:
+                break
+            self._remove(key)
+            self.evictions['ttl'] += 1
+            logger.info(f"[{self.name}] Evicted idle entry: {key}")
+
+    def _enforce_budget(self) -> None:
+        while self.max_entries and len(self._entries) > self.max_entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions['lru'] += 1
+            logger.info(f"[{self.name}] Evicted LRU entry: {key}")
+        # 保留至少一个条目，避免单个超大会话被反复创建
+        while self.max_weight and self._total_weight > self.max_weight and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions['memory'] += 1
+            logger.info(f"[{self.name}] Evicted entry over memory budget: {key}")
+
+
 # S3SessionManager 实例缓存
-_session_manager_cache: Dict[str, Any] = {}
+_session_manager_cache = BoundedInstanceCache(
+    name="session_manager_cache",
+    max_entries=settings.SESSION_MANAGER_CACHE_MAX_ENTRIES,
+    idle_ttl_seconds=settings.AGENT_CACHE_IDLE_TTL_SECONDS,
+)
 
 # Agent 实例缓存（按 session_id + prompt_path 组合）
-_agent_instance_cache: Dict[str, Any] = {}
+_agent_instance_cache = BoundedInstanceCache(
+    name="agent_instance_cache",
+    max_entries=settings.AGENT_CACHE_MAX_ENTRIES,
+    max_weight=settings.AGENT_CACHE_MAX_BYTES,
+    idle_ttl_seconds=settings.AGENT_CACHE_IDLE_TTL_SECONDS,
+)
+
+# 预热 Agent 池（按 prompt_path，仅用于未启用 S3SessionManager 的单轮会话）
+_warm_agent_pool: Dict[str, List[Any]] = {}
+_warm_agent_pool_lock = threading.Lock()
+
+# prompt_path 使用次数，用于挑选需要预热的热门模板
+_prompt_path_usage: Counter = Counter()
+
+# 已预加载模板和工具模块的 prompt_path
+_preloaded_prompt_paths: set = set()
+
+
+def _estimate_agent_size(agent: Any) -> int:
+    """估算 Agent 实例占用内存（以会话历史的序列化字节数近似）"""
+    try:
+        messages = getattr(agent, 'messages', None) or []
+        return len(json.dumps(messages, ensure_ascii=False, default=str).encode('utf-8'))
+    except Exception:
+        return 0
 
 
 def _get_s3_session_manager(session_id: str):
@@ -45,8 +221,9 @@ def _get_s3_session_manager(session_id: str):
     
     # 检查缓存
     cache_key = f"{settings.SESSION_STORAGE_S3_BUCKET}:{session_id}"
-    if cache_key in _session_manager_cache:
-        return _session_manager_cache[cache_key]
+    cached = _session_manager_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
         from strands.session.s3_session_manager import S3SessionManager
@@ -63,7 +240,7 @@ def _get_s3_session_manager(session_id: str):
         logger.info(f"Created S3SessionManager for session {session_id}, bucket: {settings.SESSION_STORAGE_S3_BUCKET}")
         
         # 缓存实例
-        _session_manager_cache[cache_key] = session_manager
+        _session_manager_cache.put(cache_key, session_manager)
         
         return session_manager
         
@@ -641,8 +818,18 @@ async def invoke_local_agent_stream(
             else:
                 logger.info(f"S3SessionManager not available, single-turn mode for session: {session_id}")
             
-            # 从提示词模板创建 Agent
             if prompt_path:
+                _prompt_path_usage[prompt_path] += 1
+            
+            # 无会话持久化时可直接使用预热的 Agent 实例
+            if prompt_path and not session_manager:
+                agent = _take_warm_agent(prompt_path)
+                if agent:
+                    _agent_instance_cache.put(agent_cache_key, agent, _estimate_agent_size(agent))
+                    logger.info(f"Using pre-warmed agent for key: {agent_cache_key}")
+            
+            # 从提示词模板创建 Agent
+            if prompt_path and not agent:
                 logger.info(f"Creating agent from prompt template: {prompt_path}")
                 try:
                     # 生成唯一的 agent_id 后缀，确保同一 session 中可以多次创建 Agent
@@ -662,7 +849,7 @@ async def invoke_local_agent_stream(
                     
                     # 缓存 Agent 实例
                     if agent:
-                        _agent_instance_cache[agent_cache_key] = agent
+                        _agent_instance_cache.put(agent_cache_key, agent, _estimate_agent_size(agent))
                         logger.info(f"Cached agent instance for key: {agent_cache_key}")
                         
                 except Exception as e:
@@ -791,6 +978,9 @@ async def invoke_local_agent_stream(
                     "error": f"Agent 被强制停止: {reason}"
                 }
         
+        # 会话历史增长后重新估算缓存占用
+        _agent_instance_cache.update_weight(agent_cache_key, _estimate_agent_size(agent))
+        
         # 流式输出完成，发送 done 事件
         logger.info(f"Stream completed for session {session_id}, sending done event")
         yield {"event": "done"}
@@ -860,18 +1050,110 @@ def clear_agent_cache_for_session(session_id: str) -> int:
     cleared_count = 0
     
     # 清理 Agent 实例缓存
-    keys_to_remove = [key for key in _agent_instance_cache if key.startswith(f"{session_id}:")]
-    for key in keys_to_remove:
-        del _agent_instance_cache[key]
-        cleared_count += 1
+    cleared_count += _agent_instance_cache.remove_where(lambda key: key.startswith(f"{session_id}:"))
     
     # 清理 SessionManager 缓存
-    sm_keys_to_remove = [key for key in _session_manager_cache if session_id in key]
-    for key in sm_keys_to_remove:
-        del _session_manager_cache[key]
-        cleared_count += 1
+    cleared_count += _session_manager_cache.remove_where(lambda key: session_id in key)
     
     if cleared_count > 0:
         logger.info(f"Cleared {cleared_count} cache entries for session {session_id}")
     
     return cleared_count
+
+
+def _take_warm_agent(prompt_path: str):
+    """从预热池取出一个 Agent 实例"""
+    with _warm_agent_pool_lock:
+        pool = _warm_agent_pool.get(prompt_path)
+        if pool:
+            return pool.pop()
+    return None
+
+
+def warm_agent_cache(prompt_paths: Optional[List[str]] = None, per_path: int = 1) -> Dict[str, int]:
+    """
+    为常用提示词模板预热 Agent
+    
+    未指定 prompt_paths 时，使用配置的 AGENT_CACHE_WARM_PROMPT_PATHS，
+    并补充运行期间使用次数最多的模板。
+    启用 S3SessionManager 时 Agent 必须绑定会话，无法预先创建实例，
+    此时只预加载提示词模板和工具模块，缩短首轮对话的创建时间。
+    
+    参数:
+        prompt_paths: 需要预热的提示词模板路径
+        per_path: 每个模板预创建的 Agent 数量
+    
+    返回:
+        每个模板新增的预热 Agent 数量
+    """
+    if prompt_paths is None:
+        prompt_paths = list(settings.AGENT_CACHE_WARM_PROMPT_PATHS)
+        for path, _ in _prompt_path_usage.most_common(settings.AGENT_CACHE_WARM_TOP_N):
+            if path not in prompt_paths:
+                prompt_paths.append(path)
+    
+    warmed: Dict[str, int] = {}
+    for prompt_path in prompt_paths:
+        warmed[prompt_path] = 0
+        try:
+            if settings.SESSION_STORAGE_S3_BUCKET:
+                if prompt_path not in _preloaded_prompt_paths:
+                    _preload_prompt_template(prompt_path)
+                    _preloaded_prompt_paths.add(prompt_path)
+                continue
+            
+            with _warm_agent_pool_lock:
+                missing = per_path - len(_warm_agent_pool.get(prompt_path, []))
+            for _ in range(max(0, missing)):
+                agent = _create_agent_from_template(prompt_path, None, f"warm_{int(time.time() * 1000)}")
+                if not agent:
+                    break
+                with _warm_agent_pool_lock:
+                    _warm_agent_pool.setdefault(prompt_path, []).append(agent)
+                warmed[prompt_path] += 1
+        except Exception as e:
+            logger.warning(f"Failed to warm agent for {prompt_path}: {e}")
+    
+    return warmed
+
+
+def _preload_prompt_template(prompt_path: str) -> None:
+    """预加载提示词模板及其工具依赖模块"""
+    from nexus_utils.prompts_manager import get_default_prompt_manager
+    from nexus_utils.agent_factory import import_tools_by_strings
+    
+    manager = get_default_prompt_manager()
+    template = manager.get_agent(prompt_path)
+    if not template and manager.load_single_prompt(prompt_path):
+        template = manager.get_agent(prompt_path)
+    if not template:
+        return
+    version = template.get_version("latest")
+    tools_dependencies = getattr(version.metadata, 'tools_dependencies', None) if version else None
+    if tools_dependencies:
+        import_tools_by_strings(tools_dependencies)
+
+
+def sweep_agent_caches() -> int:
+    """清理所有运行时缓存中的空闲过期条目"""
+    return _agent_instance_cache.sweep() + _session_manager_cache.sweep()
+
+
+def get_agent_cache_stats() -> Dict[str, Any]:
+    """
+    获取本地 Agent 运行时缓存统计
+    
+    返回:
+        Agent 实例缓存、SessionManager 缓存和预热池的统计信息
+    """
+    with _warm_agent_pool_lock:
+        warm_pool = {path: len(agents) for path, agents in _warm_agent_pool.items() if agents}
+    return {
+        'agent_instances': _agent_instance_cache.stats(),
+        'session_managers': _session_manager_cache.stats(),
+        'warm_pool': warm_pool,
+        'top_prompt_paths': [
+            {'prompt_path': path, 'count': count}
+            for path, count in _prompt_path_usage.most_common(settings.AGENT_CACHE_WARM_TOP_N)
+        ],
+    }
@@ -560,8 +560,11 @@ class AgentService:
             'metadata': metadata or {}
         }
         
-        # 这里需要添加 invocations 表的操作
-        # self.db.create_invocation(invocation_data)
+        # 写入按天分桶的调用事件表，并更新预聚合统计
+        try:
+            self.db.create_invocation(invocation_data)
+        except Exception as e:
+            logger.warning(f"Failed to record invocation event for agent {agent_id}: {e}")
         
         # 更新 Agent 统计
         agent = self.db.get_agent(agent_id)
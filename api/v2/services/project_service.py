@@ -25,11 +25,24 @@ from api.v2.models.schemas import (
     TaskType,
     BuildStage,
     CreateProjectRequest,
+    DeployProjectRequest,
 )
 from api.v2.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 项目列表只需要摘要字段，避免读取需求原文、聚合指标等大属性
+PROJECT_SUMMARY_ATTRIBUTES = (
+    'project_id',
+    'project_name',
+    'status',
+    'progress',
+    'current_stage',
+    'created_at',
+    'updated_at',
+    'user_id',
+)
+
 
 def _get_project_root() -> Path:
     """获取项目根目录"""
@@ -350,8 +363,8 @@ class ProjectService:
         # 先从数据库查找
         project = self.db.get_project(project_id)
         if project:
-            # 获取阶段信息
-            stages = self.db.list_stages(project_id)
+            # 获取阶段信息（仅元数据，输出内容通过阶段输出接口按需读取）
+            stages = self.db.list_stages(project_id, metadata_only=True)
             project['stages'] = stages
             
             # 计算完成的阶段数
@@ -381,7 +394,8 @@ class ProjectService:
         db_result = self.db.list_projects(
             status=status,
             user_id=user_id,
-            limit=limit
+            limit=limit,
+            attributes=PROJECT_SUMMARY_ATTRIBUTES
         )
         
         db_projects = db_result.get('items', [])
@@ -434,7 +448,7 @@ class ProjectService:
         project = self.db.get_project(project_id)
         
         if project:
-            stages = self.db.list_stages(project_id)
+            stages = self.db.list_stages(project_id, metadata_only=True)
             
             # 转换阶段数据格式
             dashboard_stages = []
@@ -604,6 +618,72 @@ class ProjectService:
             logger.warning(f"加载本地项目指标失败: {e}")
             return None
     
+    def deploy_project(self, project_id: str, request: DeployProjectRequest) -> Dict[str, Any]:
+        """
+        提交部署任务
+        
+        流程:
+        1. 创建部署任务记录 (status=pending)
+        2. 发送消息到 SQS 部署队列，由 Worker 的 DeployHandler 执行
+        3. 更新任务状态为 queued
+        
+        Returns:
+            包含 task_id 等信息的字典
+        """
+        project = self.db.get_project(project_id)
+        if not project:
+            raise ValueError(f"Project {project_id} not found")
+        
+        task_id = f"task_{uuid.uuid4().hex[:12]}"
+        deployment_config = request.model_dump(exclude={'agent_id'}, exclude_none=True)
+        deployment_config['project_name'] = project.get('project_name')
+        
+        task_data = {
+            'task_id': task_id,
+            'task_type': TaskType.DEPLOY_AGENT.value,
+            'project_id': project_id,
+            'status': TaskStatus.PENDING.value,
+            'priority': project.get('priority', 3),
+            'payload': {
+                'agent_id': request.agent_id,
+                'deployment_config': deployment_config
+            },
+            'result': None,
+            'error_message': None,
+            'retry_count': 0,
+            'started_at': None,
+            'completed_at': None,
+            'worker_id': None
+        }
+        
+        self.db.create_task(task_data)
+        logger.info(f"Created deploy task {task_id} for project {project_id}")
+        
+        try:
+            self.sqs.send_deploy_task(
+                task_id=task_id,
+                project_id=project_id,
+                agent_id=request.agent_id,
+                deployment_config=deployment_config
+            )
+            logger.info(f"Sent deploy task {task_id} to SQS")
+            self.db.update_task(task_id, {'status': TaskStatus.QUEUED.value})
+            
+        except Exception as e:
+            logger.error(f"Failed to send deploy task to SQS: {e}")
+            self.db.update_task(task_id, {
+                'status': TaskStatus.FAILED.value,
+                'error_message': str(e)
+            })
+            raise
+        
+        return {
+            'project_id': project_id,
+            'task_id': task_id,
+            'status': TaskStatus.QUEUED.value,
+            'message': '部署任务已提交到队列'
+        }
+    
     def control_project(self, project_id: str, action: str, reason: Optional[str] = None) -> Dict[str, Any]:
         """
         控制项目状态
@@ -650,7 +730,7 @@ class ProjectService:
                 
                 # 如果没有指定阶段，查找下一个待执行阶段
                 if not target_stage:
-                    stages = self.db.list_stages(project_id)
+                    stages = self.db.list_stages(project_id, metadata_only=True)
                     for stage in sorted(stages, key=lambda x: x.get('stage_number', 0)):
                         if stage.get('status') != 'completed':
                             target_stage = stage.get('stage_name')
@@ -748,6 +828,11 @@ class ProjectService:
         
         self.db.update_project(project_id, updates)
         
+        # 通知正在运行的工作流控制状态变更
+        if 'control_status' in updates:
+            from nexus_utils.workflow.control import publish_control_signal
+            publish_control_signal(project_id, updates['control_status'], now)
+        
         return {
             'project_id': project_id,
             'action': action,
@@ -806,7 +891,7 @@ class ProjectService:
         self.db.update_project(project_id, updates)
         
         # 重置从指定阶段开始的所有阶段状态
-        stages = self.db.list_stages(project_id)
+        stages = self.db.list_stages(project_id, metadata_only=True)
         stage_order = [s.get('stage_name') for s in sorted(stages, key=lambda x: x.get('stage_number', 0))]
         
         if from_stage not in stage_order:
@@ -992,7 +1077,7 @@ class ProjectService:
                         logger.warning(error_msg)
         
         # 删除 DynamoDB 中的阶段记录
-        stages = self.db.list_stages(project_id)
+        stages = self.db.list_stages(project_id, metadata_only=True)
         for stage in stages:
             stage_name = stage.get('stage_name')
             if stage_name:
@@ -20,12 +20,11 @@ Requirements:
     - 2.7: 超过 400KB 时存储 S3 引用
 """
 import logging
-import hashlib
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone
 from enum import Enum
 
-from api.v2.database import db_client
+from api.v2.database import db_client, content_store
 from api.v2.models.schemas import (
     ProjectStatus,
     StageStatus,
@@ -59,6 +58,7 @@ class StageServiceV2:
     
     def __init__(self):
         self.db = db_client
+        self.content_store = content_store
     
     def _normalize_stage_name(self, stage_name: str) -> Optional[str]:
         """
@@ -80,14 +80,17 @@ class StageServiceV2:
     
     def _check_content_size(self, content: str) -> bool:
         """
-        检查内容是否超过大小限制
+        检查内容是否需要转存 S3
         
         Args:
             content: 要检查的内容
             
         Returns:
-            bool: 内容是否超过 400KB
+            bool: 内容是否超过转存阈值（STAGE_OUTPUT_OFFLOAD_THRESHOLD_BYTES）；
+                  未配置 S3 存储桶时退回 400KB 的 DynamoDB 条目限制
         """
+        if self.content_store.enabled:
+            return self.content_store.should_offload(content)
         return len(content.encode('utf-8')) > MAX_CONTENT_SIZE
     
     def mark_stage_running(self, project_id: str, stage_name: str) -> bool:
@@ -233,8 +236,7 @@ class StageServiceV2:
             # 处理 agent 输出内容（Requirement 2.1, 2.7）
             if agent_output_content:
                 if self._check_content_size(agent_output_content):
-                    # 超过 400KB，需要存储到 S3
-                    # TODO: 实现 S3 存储逻辑
+                    # 超过阈值，压缩后存储到 S3
                     s3_ref = self._store_content_to_s3(
                         project_id, normalized_name, agent_output_content
                     )
@@ -293,12 +295,7 @@ class StageServiceV2:
             
         Validates: Requirement 2.7 - 超过 400KB 时存储 S3 引用
         """
-        # TODO: 实现实际的 S3 存储逻辑
-        # 目前返回一个占位符引用
-        content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
-        s3_ref = f"s3://nexus-ai-stage-outputs/{project_id}/{stage_name}/{content_hash}.txt"
-        logger.warning(f"S3 storage not implemented, using placeholder: {s3_ref}")
-        return s3_ref
+        return self.content_store.put(project_id, stage_name, content)
     
     def _update_project_aggregated_metrics(
         self, 
@@ -413,7 +410,7 @@ class StageServiceV2:
     def _update_project_progress(self, project_id: str):
         """更新项目进度百分比"""
         try:
-            stages = self.db.list_stages(project_id)
+            stages = self.db.list_stages(project_id, metadata_only=True)
             total = len(stages)
             if total == 0:
                 return
@@ -484,19 +481,21 @@ class StageServiceV2:
             s3_ref: S3 对象引用
             
         Returns:
-            str: 加载的内容
+            str: 加载的内容（读取失败时返回引用占位文本）
         """
-        # TODO: 实现实际的 S3 加载逻辑
-        logger.warning(f"S3 loading not implemented for: {s3_ref}")
-        return f"[Content stored at {s3_ref}]"
+        try:
+            return self.content_store.get(s3_ref)
+        except Exception as e:
+            logger.warning(f"Failed to load stage output from {s3_ref}: {e}")
+            return f"[Content stored at {s3_ref}]"
     
-    def list_stages(self, project_id: str) -> List[Dict[str, Any]]:
-        """列出项目所有阶段"""
-        return self.db.list_stages(project_id)
+    def list_stages(self, project_id: str, metadata_only: bool = False) -> List[Dict[str, Any]]:
+        """列出项目所有阶段（metadata_only=True 时不读取输出内容和设计文档）"""
+        return self.db.list_stages(project_id, metadata_only=metadata_only)
     
     def calculate_progress(self, project_id: str) -> float:
         """计算项目进度"""
-        stages = self.db.list_stages(project_id)
+        stages = self.db.list_stages(project_id, metadata_only=True)
         total = len(stages)
         if total == 0:
             return 0.0
@@ -554,7 +553,7 @@ class StageServiceV2:
             return stage.get('generated_files', [])
         
         # 获取所有阶段的文件
-        stages = self.list_stages(project_id)
+        stages = self.list_stages(project_id, metadata_only=True)
         all_files = []
         for stage in stages:
             files = stage.get('generated_files', [])
@@ -8,8 +8,7 @@ Statistics Service - 统计服务
 """
 import logging
 from typing import Dict, List, Optional, Any
-from datetime import datetime, timezone, timedelta
-from collections import defaultdict
+from datetime import datetime, timezone, timedelta, date
 
 from api.v2.database import db_client
 from api.v2.models.schemas import ProjectStatus, AgentStatus
@@ -27,66 +26,36 @@ class StatisticsService:
         """
         获取统计概览
         
-        实时聚合计算，适合小规模数据
-        大规模数据应考虑预计算或缓存
+        读取预聚合的全局计数器和今日汇总项，共 2 次读取，与项目/Agent 数量无关
         """
-        # 获取项目统计
-        projects_result = self.db.list_projects(limit=1000)
-        projects = projects_result.get('items', [])
+        stats = self.db.statistics
+        counters = stats.get_global()
+        today = datetime.now(timezone.utc).date()
+        today_stats = stats.get_daily([today]).get(today.isoformat(), {})
         
-        total_projects = len(projects)
-        building_projects = sum(1 for p in projects if p.get('status') == ProjectStatus.BUILDING.value)
-        completed_projects = sum(1 for p in projects if p.get('status') == ProjectStatus.COMPLETED.value)
-        failed_projects = sum(1 for p in projects if p.get('status') == ProjectStatus.FAILED.value)
+        completed_projects = _count(counters, f'projects_status_{ProjectStatus.COMPLETED.value}')
+        failed_projects = _count(counters, f'projects_status_{ProjectStatus.FAILED.value}')
         
         # 计算成功率
         finished_projects = completed_projects + failed_projects
         success_rate = (completed_projects / finished_projects * 100) if finished_projects > 0 else 0.0
         
-        # 计算平均构建时间
-        build_times = []
-        for p in projects:
-            if p.get('status') == ProjectStatus.COMPLETED.value:
-                metrics = p.get('metrics', {})
-                if metrics and 'total_duration_seconds' in metrics:
-                    build_times.append(metrics['total_duration_seconds'] / 60)  # 转换为分钟
-        
-        avg_build_time = sum(build_times) / len(build_times) if build_times else 0.0
-        
-        # 获取 Agent 统计
-        agents_result = self.db.list_agents(limit=1000)
-        agents = agents_result.get('items', [])
-        
-        total_agents = len(agents)
-        running_agents = sum(1 for a in agents if a.get('status') == AgentStatus.RUNNING.value)
-        
-        # 计算总调用次数
-        total_invocations = sum(a.get('total_invocations', 0) for a in agents)
-        
-        # 今日调用统计
-        today = datetime.now(timezone.utc).date()
-        today_invocations = 0
-        for a in agents:
-            # 检查 Agent 的最后调用时间是否是今天
-            last_invoked = a.get('last_invoked_at')
-            if last_invoked:
-                try:
-                    last_date = datetime.fromisoformat(last_invoked.replace('Z', '+00:00')).date()
-                    if last_date == today:
-                        # 简化：假设今天的调用次数为最近一次增量
-                        today_invocations += 1
-                except:
-                    pass
+        # 计算平均构建时间（分钟）
+        build_count = _count(counters, 'build_duration_count')
+        avg_build_time = (
+            float(counters.get('build_duration_seconds_sum', 0)) / build_count / 60
+            if build_count > 0 else 0.0
+        )
         
         return {
-            'total_projects': total_projects,
-            'building_projects': building_projects,
+            'total_projects': _count(counters, 'projects_total'),
+            'building_projects': _count(counters, f'projects_status_{ProjectStatus.BUILDING.value}'),
             'completed_projects': completed_projects,
             'failed_projects': failed_projects,
-            'total_agents': total_agents,
-            'running_agents': running_agents,
-            'total_invocations': total_invocations,
-            'today_invocations': today_invocations,
+            'total_agents': _count(counters, 'agents_total'),
+            'running_agents': _count(counters, f'agents_status_{AgentStatus.RUNNING.value}'),
+            'total_invocations': _count(counters, 'invocations_total'),
+            'today_invocations': _count(today_stats, 'invocations_total'),
             'success_rate': round(success_rate, 2),
             'avg_build_time_minutes': round(avg_build_time, 2)
         }
@@ -95,59 +64,26 @@ class StatisticsService:
         """
         获取构建统计（按天）
         
-        基于项目的 created_at 和 status 字段进行统计
+        读取每日汇总项（按项目创建日期归档），一次 BatchGetItem 完成
         """
-        # 获取所有项目
-        projects_result = self.db.list_projects(limit=1000)
-        projects = projects_result.get('items', [])
-        
-        # 计算日期范围
-        end_date = datetime.now(timezone.utc).date()
-        start_date = end_date - timedelta(days=days - 1)
-        
-        # 初始化每天的统计
-        daily_stats = {}
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.isoformat()
-            daily_stats[date_str] = {
+        date_range = _date_range(days)
+        daily_items = self.db.statistics.get_daily(date_range)
+        
+        result = []
+        for day in date_range:
+            date_str = day.isoformat()
+            item = daily_items.get(date_str, {})
+            build_count = _count(item, 'build_duration_count')
+            result.append({
                 'date': date_str,
-                'total_builds': 0,
-                'successful_builds': 0,
-                'failed_builds': 0,
-                'in_progress_builds': 0
-            }
-            current_date += timedelta(days=1)
-        
-        # 统计每个项目
-        for project in projects:
-            created_at = project.get('created_at')
-            if not created_at:
-                continue
-            
-            try:
-                # 解析创建日期
-                created_date = datetime.fromisoformat(created_at.replace('Z', '+00:00')).date()
-                date_str = created_date.isoformat()
-                
-                # 只统计指定日期范围内的项目
-                if date_str in daily_stats:
-                    daily_stats[date_str]['total_builds'] += 1
-                    
-                    status = project.get('status')
-                    if status == ProjectStatus.COMPLETED.value:
-                        daily_stats[date_str]['successful_builds'] += 1
-                    elif status == ProjectStatus.FAILED.value:
-                        daily_stats[date_str]['failed_builds'] += 1
-                    elif status == ProjectStatus.BUILDING.value:
-                        daily_stats[date_str]['in_progress_builds'] += 1
-            except Exception as e:
-                logger.warning(f"Failed to parse project date: {e}")
-                continue
-        
-        # 转换为列表并按日期排序
-        result = list(daily_stats.values())
-        result.sort(key=lambda x: x['date'])
+                'total_builds': _count(item, 'builds_total'),
+                'successful_builds': _count(item, f'builds_status_{ProjectStatus.COMPLETED.value}'),
+                'failed_builds': _count(item, f'builds_status_{ProjectStatus.FAILED.value}'),
+                'in_progress_builds': _count(item, f'builds_status_{ProjectStatus.BUILDING.value}'),
+                'avg_duration_minutes': round(
+                    float(item.get('build_duration_seconds_sum', 0)) / build_count / 60, 2
+                ) if build_count > 0 else 0.0
+            })
         
         return result
     
@@ -155,60 +91,24 @@ class StatisticsService:
         """
         获取调用统计（按天）
         
-        基于 Agent 的调用数据进行统计
-        注意：这是简化实现，实际应该有独立的调用记录表
+        基于调用事件写入时更新的每日汇总项
         """
-        # 获取所有 Agent
-        agents_result = self.db.list_agents(limit=1000)
-        agents = agents_result.get('items', [])
-        
-        # 计算日期范围
-        end_date = datetime.now(timezone.utc).date()
-        start_date = end_date - timedelta(days=days - 1)
-        
-        # 初始化每天的统计
-        daily_stats = {}
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.isoformat()
-            daily_stats[date_str] = {
+        date_range = _date_range(days)
+        daily_items = self.db.statistics.get_daily(date_range)
+        
+        result = []
+        for day in date_range:
+            date_str = day.isoformat()
+            item = daily_items.get(date_str, {})
+            total = _count(item, 'invocations_total')
+            result.append({
                 'date': date_str,
-                'total_invocations': 0,
-                'successful_invocations': 0,
-                'failed_invocations': 0,
-                'avg_duration_ms': 0,
-                'active_agents': 0
-            }
-            current_date += timedelta(days=1)
-        
-        # 简化实现：将总调用次数平均分配到各天（模拟数据）
-        # 实际应该从 invocations 表查询
-        total_invocations = sum(a.get('total_invocations', 0) for a in agents)
-        if total_invocations > 0 and days > 0:
-            # 生成模拟的每日调用数据（带有一定波动）
-            import random
-            base_daily = total_invocations // days
-            remaining = total_invocations % days
-            
-            for i, date_str in enumerate(sorted(daily_stats.keys())):
-                # 添加一些随机波动，使数据更真实
-                variation = random.uniform(0.7, 1.3)
-                daily_count = int(base_daily * variation)
-                if i < remaining:
-                    daily_count += 1
-                
-                daily_stats[date_str]['total_invocations'] = max(0, daily_count)
-                # 假设 95% 成功率
-                daily_stats[date_str]['successful_invocations'] = int(daily_count * 0.95)
-                daily_stats[date_str]['failed_invocations'] = daily_count - daily_stats[date_str]['successful_invocations']
-                # 模拟平均响应时间 200-500ms
-                daily_stats[date_str]['avg_duration_ms'] = random.randint(200, 500)
-                # 活跃 Agent 数
-                daily_stats[date_str]['active_agents'] = min(len(agents), random.randint(1, len(agents) + 1)) if agents else 0
-        
-        # 转换为列表并按日期排序
-        result = list(daily_stats.values())
-        result.sort(key=lambda x: x['date'])
+                'total_invocations': total,
+                'successful_invocations': _count(item, 'invocations_success'),
+                'failed_invocations': _count(item, 'invocations_failed'),
+                'avg_duration_ms': round(float(item.get('invocation_duration_ms_sum', 0)) / total, 2) if total else 0,
+                'active_agents': len(item.get('active_agents') or ())
+            })
         
         return result
     
@@ -216,19 +116,13 @@ class StatisticsService:
         """
         获取 Agent 分类分布
         """
-        agents_result = self.db.list_agents(limit=1000)
-        agents = agents_result.get('items', [])
-        
-        # 按分类统计
-        category_counts = defaultdict(int)
-        for agent in agents:
-            category = agent.get('category', 'uncategorized')
-            category_counts[category] += 1
+        counters = self.db.statistics.get_global()
+        prefix = 'agents_category_'
         
-        # 转换为列表
         result = [
-            {'category': cat, 'count': count}
-            for cat, count in category_counts.items()
+            {'category': name[len(prefix):], 'count': int(count)}
+            for name, count in counters.items()
+            if name.startswith(prefix) and count > 0
         ]
         result.sort(key=lambda x: x['count'], reverse=True)
         
@@ -266,7 +160,10 @@ class StatisticsService:
         activities = []
         
         # 获取最近的项目
-        projects_result = self.db.list_projects(limit=limit)
+        projects_result = self.db.list_projects(
+            limit=limit,
+            attributes=('project_id', 'project_name', 'status', 'created_at', 'updated_at'),
+        )
         for project in projects_result.get('items', []):
             activities.append({
                 'type': 'project',
@@ -315,6 +212,14 @@ class StatisticsService:
         }
         return actions.get(status, '状态更新')
     
+    def get_runtime_cache_statistics(self) -> Dict[str, Any]:
+        """
+        获取本地 Agent 运行时缓存统计（命中/未命中/淘汰计数）
+        """
+        from api.v2.services.agent_runtime_service import get_agent_cache_stats
+        
+        return get_agent_cache_stats()
+    
     def get_system_health(self) -> Dict[str, Any]:
         """
         获取系统健康状态
@@ -357,5 +262,16 @@ class StatisticsService:
         }
 
 
+def _count(item: Dict[str, Any], name: str) -> int:
+    """读取计数器（DynamoDB 数值为 Decimal，缺失视为 0）"""
+    return max(0, int(item.get(name, 0)))
+
+
+def _date_range(days: int) -> List[date]:
+    """最近 days 天（含今天），按日期升序"""
+    end_date = datetime.now(timezone.utc).date()
+    return [end_date - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+
+
 # 全局单例
 statistics_service = StatisticsService()
@@ -15,11 +15,15 @@ from nexus_utils.config_loader import get_config
 from strands.models import BedrockModel
 from botocore.config import Config as BotocoreConfig
 from nexus_utils import prompts_manager
+from nexus_utils.prompts_manager import PromptCacheConfig
 from strands import Agent, tool
 os.environ["BYPASS_TOOL_CONSENT"] = "true"
 
 STAGE_LOG_DIR = Path.cwd() / "logs" / "stages"
 
+# Bedrock 缓存点类型
+CACHE_POINT_TYPE = "default"
+
 
 def _build_stage_log_path(agent_label: str) -> Path:
     """Generate per-agent stage log path."""
@@ -89,6 +93,8 @@ def _wrap_model_stream_for_stage_logging(model: BedrockModel, agent_label: str)
                 "system_prompt": system_prompt,
                 "messages": messages,
             }
+            if kwargs.get("system_prompt_content"):
+                payload["system_prompt_content"] = kwargs["system_prompt_content"]
             _append_stage_log(agent_label, payload)
         except Exception:
             pass
@@ -125,6 +131,63 @@ def get_bedrock_model(model_id="model_id",agent_name="template",env="production"
     )
     return bedrock_model
 
+
+def _prompt_cache_enabled() -> bool:
+    """提示词缓存总开关（环境变量 NEXUS_BEDROCK_PROMPT_CACHE 或配置 bedrock.prompt_cache.enabled）"""
+    enabled = config.get_with_env_override(
+        "NEXUS_BEDROCK_PROMPT_CACHE",
+        "bedrock", "prompt_cache", "enabled",
+        default=True,
+    )
+    if isinstance(enabled, str):
+        return enabled.strip().lower() not in ("0", "false", "no", "off")
+    return bool(enabled)
+
+
+def resolve_prompt_cache(metadata) -> Optional[PromptCacheConfig]:
+    """
+    根据模板元数据中的 prompt_cache 确定缓存点的放置位置
+    
+    模板未声明 prompt_cache 或总开关关闭时返回 None（不放置缓存点）
+    """
+    prompt_cache = getattr(metadata, 'prompt_cache', None) if metadata else None
+    if prompt_cache is None or not prompt_cache.enabled or not _prompt_cache_enabled():
+        return None
+    return prompt_cache
+
+
+def _build_system_prompt(system_prompt: str, prompt_cache: Optional[PromptCacheConfig]) -> Union[str, List[Dict[str, Any]]]:
+    """启用系统提示词缓存时在系统提示词之后放置缓存点"""
+    if not system_prompt or not (prompt_cache and prompt_cache.system_prompt):
+        return system_prompt
+    return [{"text": system_prompt}, {"cachePoint": {"type": CACHE_POINT_TYPE}}]
+
+
+def build_agent_input(agent: Agent, prefix: str, suffix: str = "") -> Union[str, List[Dict[str, Any]]]:
+    """
+    按 Agent 的提示词缓存配置组装输入消息
+    
+    模板启用 context_prefix 时在稳定前缀（规则、需求、前置阶段输出）之后放置缓存点，
+    同一 Agent 的后续模型调用（工具调用循环中的每一轮）从缓存读取前缀；
+    未启用时返回拼接后的字符串。
+    
+    Args:
+        agent: create_agent_from_prompt_template 创建的 Agent
+        prefix: 稳定前缀
+        suffix: 可变后缀
+    
+    Returns:
+        输入消息（字符串或内容块列表）
+    """
+    prompt_cache = getattr(agent, "_prompt_cache", None)
+    if not (prompt_cache and prompt_cache.context_prefix and prefix):
+        return prefix + suffix
+    content = [{"text": prefix}, {"cachePoint": {"type": CACHE_POINT_TYPE}}]
+    if suffix:
+        content.append({"text": suffix})
+    return content
+
+
 def import_module_by_string(module_name: str):
     """根据字符串导入模块"""
     try:
@@ -162,63 +225,20 @@ def import_from_path(full_path: str):
 def get_builtin_tools_mapping():
     """通过工具模板提供器获取内置工具映射"""
     try:
-        from tools.system_tools.agent_build_workflow.tool_template_provider import get_builtin_tools
-        
-        builtin_result = get_builtin_tools()
-        builtin_data = json.loads(builtin_result)
-        
-        mapping = {}
-        if "tools_by_category" in builtin_data:
-            for category, tools in builtin_data["tools_by_category"].items():
-                for tool in tools:
-                    tool_name = tool["name"]
-                    mapping[tool_name] = f"strands_tools.{tool_name}"
+        from tools.system_tools.agent_build_workflow.tool_template_provider import _get_builtin_tools_info
         
-        return mapping
+        return {tool_name: f"strands_tools.{tool_name}" for tool_name in _get_builtin_tools_info()}
     except Exception as e:
         print(f"Error getting builtin tools mapping: {e}")
         return {}
 
 
 def get_system_tools_mapping():
-    """通过工具模板提供器获取系统工具映射"""
+    """通过工具索引获取系统、模板和生成工具映射"""
     try:
-        from tools.system_tools.agent_build_workflow.tool_template_provider import list_all_tools
-        
-        all_tools_result = list_all_tools()
-        all_tools_data = json.loads(all_tools_result)
-        
-        mapping = {}
-        
-        # 处理系统工具
-        if "system_tools" in all_tools_data:
-            for tool_info in all_tools_data["system_tools"]:
-                tool_name = tool_info["name"]
-                file_path = tool_info.get("file_path", "")
-                if file_path:
-                    # 将文件路径转换为模块路径
-                    module_path = file_path.replace("/", ".").replace(".py", "")
-                    mapping[tool_name] = f"{module_path}.{tool_name}"
-        
-        # 处理模板工具
-        if "template_tools" in all_tools_data:
-            for tool_info in all_tools_data["template_tools"]:
-                tool_name = tool_info["name"]
-                file_path = tool_info.get("file_path", "")
-                if file_path:
-                    module_path = file_path.replace("/", ".").replace(".py", "")
-                    mapping[tool_name] = f"{module_path}.{tool_name}"
-        
-        # 处理生成的工具
-        if "generated_tools" in all_tools_data:
-            for tool_info in all_tools_data["generated_tools"]:
-                tool_name = tool_info["name"]
-                file_path = tool_info.get("file_path", "")
-                if file_path:
-                    module_path = file_path.replace("/", ".").replace(".py", "")
-                    mapping[tool_name] = f"{module_path}.{tool_name}"
-        
-        return mapping
+        from tools.system_tools.agent_build_workflow.tool_template_provider import get_tool_index
+        
+        return get_tool_index().get_import_paths()
     except Exception as e:
         print(f"Error getting system tools mapping: {e}")
         return {}
@@ -393,45 +413,19 @@ def get_tool_by_name(tool_name: str):
             except Exception as e:
                 print(f"Failed to import system tool {tool_name}: {e}")
         
-        # 最后尝试通过工具模板提供器搜索
-        from tools.system_tools.agent_build_workflow.tool_template_provider import search_tools_by_name
-        
-        search_result = search_tools_by_name(tool_name)
-        search_data = json.loads(search_result)
+        # 最后尝试索引中的其他同名工具（映射中同名工具只保留了一个）
+        from tools.system_tools.agent_build_workflow.tool_template_provider import get_tool_index
         
-        if search_data.get("total_matches", 0) > 0:
-            matching_tools = search_data["matching_tools"]
-            
-            for tool_info in matching_tools:
-                if tool_info["name"] == tool_name:
-                    if tool_info["type"] == "builtin":
-                        try:
-                            # 使用正确的导入方式
-                            tool_module = importlib.import_module(f'strands_tools.{tool_name}')
-                            
-                            # 尝试获取与工具名称相同的函数
-                            if hasattr(tool_module, tool_name):
-                                return getattr(tool_module, tool_name)
-                            
-                            # 查找被装饰的工具函数
-                            for attr_name in dir(tool_module):
-                                attr = getattr(tool_module, attr_name)
-                                if hasattr(attr, '__name__') and not attr_name.startswith('_'):
-                                    if hasattr(attr, '__wrapped__') or str(type(attr)).find('Tool') != -1:
-                                        return attr
-                            
-                            return tool_module
-                            
-                        except (ImportError, AttributeError):
-                            pass
-                    else:
-                        file_path = tool_info.get("file_path", "")
-                        if file_path:
-                            module_path = file_path.replace("/", ".").replace(".py", "")
-                            try:
-                                return import_from_path(f"{module_path}.{tool_name}")
-                            except:
-                                pass
+        for tool_info in get_tool_index().find(tool_name):
+            file_path = tool_info.get("file_path", "")
+            if file_path:
+                module_path = file_path.replace("/", ".").replace(".py", "")
+                try:
+                    tool_obj = import_from_path(f"{module_path}.{tool_name}")
+                except Exception:
+                    tool_obj = None
+                if tool_obj:
+                    return tool_obj
         
         print(f"Warning: Tool '{tool_name}' not found")
         return None
@@ -566,6 +560,14 @@ def create_agent_from_prompt_template(
         
         print(f"Successfully imported {len(tools_dependencies)} tools")
         
+        # 提示词缓存：按模板元数据在系统提示词、工具定义之后放置缓存点
+        prompt_cache = resolve_prompt_cache(latest_version.metadata)
+        model_cache_params = {}
+        if prompt_cache and prompt_cache.tools and tools_dependencies:
+            model_cache_params['cache_tools'] = CACHE_POINT_TYPE
+        if prompt_cache:
+            print(f"Prompt cache enabled: {prompt_cache}")
+        
         # 获取模型配置 - 默认选择 supported_models 中的第一个
         if model_id == "default":
             if hasattr(latest_version.metadata, 'supported_models') and latest_version.metadata.supported_models:
@@ -581,7 +583,8 @@ def create_agent_from_prompt_template(
                     streaming=agent_template.get_environment_config(env).streaming,
                     boto_session=session,
                     boto_client_config=boto_config,
-                    additional_request_fields=additional_request_fields
+                    additional_request_fields=additional_request_fields,
+                    **model_cache_params
                 )
             else:
                 # 如果 supported_models 为空，使用配置文件中的默认模型
@@ -593,7 +596,8 @@ def create_agent_from_prompt_template(
                     temperature=agent_template.get_environment_config(env).temperature,
                     streaming=agent_template.get_environment_config(env).streaming,
                     boto_session=session,
-                    boto_client_config=boto_config
+                    boto_client_config=boto_config,
+                    **model_cache_params
                 )
         else:
             # 使用指定的模型ID
@@ -604,7 +608,8 @@ def create_agent_from_prompt_template(
                 temperature=agent_template.get_environment_config(env).temperature,
                 streaming=agent_template.get_environment_config(env).streaming,
                 boto_session=session,
-                boto_client_config=boto_config
+                boto_client_config=boto_config,
+                **model_cache_params
             )
         
         _wrap_model_stream_for_stage_logging(model, latest_version.agent_name)
@@ -615,7 +620,7 @@ def create_agent_from_prompt_template(
             'agent_id': agent_name.split('/')[-1],
             # 'name': latest_version.agent_name,
             'model': model,
-            'system_prompt': latest_version.system_prompt,
+            'system_prompt': _build_system_prompt(latest_version.system_prompt, prompt_cache),
             'tools': tools_dependencies
         }
         
@@ -642,6 +647,7 @@ def create_agent_from_prompt_template(
         # 创建Agent
         agent = Agent(**agent_kwargs)
         _wrap_agent_call_for_stage_logging(agent, latest_version.agent_name)
+        setattr(agent, "_prompt_cache", prompt_cache)
         if state:
             for key, value in state.items():
                 agent.state.set(key, value)
@@ -5,6 +5,11 @@ Artifact Sync Module
 
 用于将Agent相关文件同步到S3存储桶，并管理版本信息。
 支持agents、projects、tools、prompts的同步和备份。
+
+文件按内容寻址存储，各版本只保存一份清单（manifest），版本之间共享相同内容的文件：
+    {workspace}/blobs/{sha256[:2]}/{sha256}              文件内容
+    {workspace}/manifests/{agent_name}/{version}.json    版本清单（类别 -> 相对路径 -> sha256/size）
+每次同步只上传 S3 中尚不存在的内容。
 """
 
 import os
@@ -18,11 +23,14 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field, asdict
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 
 from .config_loader import get_config
+from .file_index import file_checksum
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +49,7 @@ class ArtifactVersion:
     file_count: int = 0
     total_size: int = 0
     checksum: str = ""
+    manifest: str = ""  # 版本清单的 S3 URI（内容寻址存储的版本才有）
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -62,6 +71,8 @@ class SyncResult:
     s3_paths: Dict[str, str] = field(default_factory=dict)
     files_synced: int = 0
     total_size: int = 0
+    files_uploaded: int = 0  # 本次实际上传的新内容数量
+    bytes_uploaded: int = 0
     duration_seconds: float = 0.0
     error: Optional[str] = None
     
@@ -109,6 +120,20 @@ class ArtifactSyncManager:
         )
         self._table_prefix = 'nexus_'
         
+        # 上传并发与分片配置
+        self._max_workers = int(self.config.get_nested(
+            'nexus_ai', 'artifact_sync', 'max_workers', default=8
+        ))
+        self._transfer_config = TransferConfig(
+            multipart_threshold=int(self.config.get_nested(
+                'nexus_ai', 'artifact_sync', 'multipart_threshold_mb', default=8
+            )) * 1024 * 1024,
+            multipart_chunksize=int(self.config.get_nested(
+                'nexus_ai', 'artifact_sync', 'multipart_chunksize_mb', default=8
+            )) * 1024 * 1024,
+            max_concurrency=4,
+        )
+        
         # 初始化AWS客户端
         self._s3_client = None
         self._dynamodb_client = None
@@ -260,58 +285,122 @@ class ArtifactSyncManager:
         base = self.LOCAL_PATHS.get(category, category)
         return self.base_path / base / agent_name
     
-    def _get_s3_prefix(self, category: str, agent_name: str, version_uuid: str) -> str:
-        """获取S3前缀路径"""
-        workspace_uuid = self.get_workspace_uuid()
-        return f"{workspace_uuid}/{category}/{agent_name}/{version_uuid}"
-    
     def _calculate_checksum(self, file_path: Path) -> str:
-        """计算文件SHA256校验和"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
-    
-    def _upload_directory(self, local_dir: Path, s3_prefix: str) -> Tuple[int, int]:
+        """计算文件SHA256校验和（未变化的文件使用缓存的校验和）"""
+        return file_checksum(file_path, algorithm="sha256")
+    
+    def _blob_key(self, checksum: str) -> str:
+        """内容对象的S3键"""
+        return f"{self.get_workspace_uuid()}/blobs/{checksum[:2]}/{checksum}"
+    
+    def _manifest_key(self, agent_name: str, version_uuid: str) -> str:
+        """版本清单的S3键"""
+        return f"{self.get_workspace_uuid()}/manifests/{agent_name}/{version_uuid}.json"
+    
+    def _collect_files(self, local_dir: Path) -> Dict[str, Path]:
+        """收集目录下需要同步的文件（相对路径 -> 本地路径）"""
+        files = {}
+        if not local_dir.exists():
+            return files
+        for file_path in local_dir.rglob('*'):
+            if file_path.is_file():
+                # 跳过__pycache__和.pyc文件
+                if '__pycache__' in file_path.parts or file_path.suffix == '.pyc':
+                    continue
+                files[file_path.relative_to(local_dir).as_posix()] = file_path
+        return files
+    
+    def _load_manifest(self, manifest_uri: str) -> Optional[Dict[str, Any]]:
+        """读取版本清单"""
+        if not manifest_uri or not manifest_uri.startswith('s3://'):
+            return None
+        bucket, _, key = manifest_uri[5:].partition('/')
+        try:
+            body = self.s3_client.get_object(Bucket=bucket, Key=key.split('#', 1)[0])['Body'].read()
+            return json.loads(body)
+        except (ClientError, ValueError) as e:
+            logger.warning(f"读取版本清单失败 {manifest_uri}: {e}")
+            return None
+    
+    def _known_blobs(self, agent_name: str) -> set:
+        """最近一个版本清单中引用的内容（已确认存在于S3，无需再检查）"""
+        versions = [v for v in self.list_agent_versions(agent_name) if v.manifest]
+        if not versions:
+            return set()
+        latest = max(versions, key=lambda v: v.created_at or '')
+        manifest = self._load_manifest(latest.manifest) or {}
+        return {
+            entry['sha256']
+            for files in manifest.get('categories', {}).values()
+            for entry in files.values()
+        }
+    
+    def _blob_exists(self, checksum: str) -> bool:
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=self._blob_key(checksum))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+    
+    def _upload_blob(self, checksum: str, file_path: Path, known: set) -> Optional[int]:
+        """上传尚不存在的内容，返回上传的字节数（已存在时返回 None）"""
+        if checksum in known or self._blob_exists(checksum):
+            return None
+        self.s3_client.upload_file(
+            str(file_path),
+            self.bucket_name,
+            self._blob_key(checksum),
+            Config=self._transfer_config,
+        )
+        logger.debug(f"上传内容: {checksum} ({file_path})")
+        return file_path.stat().st_size
+    
+    def _upload_files(
+        self,
+        agent_name: str,
+        files_by_category: Dict[str, Dict[str, Path]]
+    ) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], int, int]:
         """
-        上传目录到S3
+        计算校验和并并行上传新内容
         
         Args:
-            local_dir: 本地目录路径
-            s3_prefix: S3前缀
+            agent_name: Agent名称
+            files_by_category: 类别 -> 相对路径 -> 本地路径
             
         Returns:
-            Tuple[int, int]: (文件数, 总大小)
+            Tuple: (清单中的类别条目, 上传文件数, 上传字节数)
         """
-        file_count = 0
-        total_size = 0
-        
-        if not local_dir.exists():
-            return file_count, total_size
-        
-        for file_path in local_dir.rglob('*'):
-            if file_path.is_file():
-                # 跳过__pycache__和.pyc文件
-                if '__pycache__' in str(file_path) or file_path.suffix == '.pyc':
-                    continue
-                
-                relative_path = file_path.relative_to(local_dir)
-                s3_key = f"{s3_prefix}/{relative_path}"
-                
-                try:
-                    self.s3_client.upload_file(
-                        str(file_path),
-                        self.bucket_name,
-                        s3_key
-                    )
-                    file_count += 1
-                    total_size += file_path.stat().st_size
-                    logger.debug(f"上传文件: {s3_key}")
-                except ClientError as e:
-                    logger.error(f"上传文件失败 {file_path}: {e}")
+        known = self._known_blobs(agent_name)
+        entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            checksums = {
+                (category, rel): executor.submit(self._calculate_checksum, path)
+                for category, files in files_by_category.items()
+                for rel, path in files.items()
+            }
+            
+            # 同一内容只上传一次
+            unique: Dict[str, Path] = {}
+            for (category, rel), future in checksums.items():
+                path = files_by_category[category][rel]
+                checksum = future.result()
+                entries.setdefault(category, {})[rel] = {
+                    'sha256': checksum,
+                    'size': path.stat().st_size,
+                }
+                unique.setdefault(checksum, path)
+            
+            uploads = [
+                executor.submit(self._upload_blob, checksum, path, known)
+                for checksum, path in unique.items()
+            ]
+            uploaded = [future.result() for future in uploads]
         
-        return file_count, total_size
+        uploaded = [size for size in uploaded if size is not None]
+        return entries, len(uploaded), sum(uploaded)
     
     def sync_agent(
         self,
@@ -362,22 +451,14 @@ class ArtifactSyncManager:
                 error="DynamoDB表不存在且无法创建"
             )
         
-        # 同步各类别
-        s3_paths = {}
-        total_files = 0
-        total_size = 0
-        
+        # 收集各类别文件
+        files_by_category = {}
         for category in categories:
-            local_path = self._get_local_path(category, agent_name)
-            if local_path.exists():
-                s3_prefix = self._get_s3_prefix(category, agent_name, version_uuid)
-                files, size = self._upload_directory(local_path, s3_prefix)
-                if files > 0:
-                    s3_paths[category] = f"s3://{self.bucket_name}/{s3_prefix}"
-                    total_files += files
-                    total_size += size
-                    logger.info(f"同步 {category}: {files} 文件, {size} 字节")
+            files = self._collect_files(self._get_local_path(category, agent_name))
+            if files:
+                files_by_category[category] = files
         
+        total_files = sum(len(files) for files in files_by_category.values())
         if total_files == 0:
             return SyncResult(
                 success=False,
@@ -387,6 +468,51 @@ class ArtifactSyncManager:
                 error=f"未找到Agent '{agent_name}' 的任何文件"
             )
         
+        # 上传新内容并写入版本清单
+        created_at = datetime.utcnow().isoformat() + 'Z'
+        try:
+            entries, files_uploaded, bytes_uploaded = self._upload_files(agent_name, files_by_category)
+            manifest = {
+                'agent_name': agent_name,
+                'version_uuid': version_uuid,
+                'workspace_uuid': workspace_uuid,
+                'created_at': created_at,
+                'categories': entries,
+            }
+            manifest_key = self._manifest_key(agent_name, version_uuid)
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=manifest_key,
+                Body=json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode('utf-8'),
+                ContentType='application/json',
+            )
+        except ClientError as e:
+            logger.error(f"上传文件失败: {e}")
+            return SyncResult(
+                success=False,
+                agent_name=agent_name,
+                version_uuid=version_uuid,
+                workspace_uuid=workspace_uuid,
+                error=f"上传文件失败: {e}"
+            )
+        
+        manifest_uri = f"s3://{self.bucket_name}/{manifest_key}"
+        s3_paths = {category: f"{manifest_uri}#{category}" for category in entries}
+        total_size = sum(
+            entry['size'] for files in entries.values() for entry in files.values()
+        )
+        for category, files in entries.items():
+            logger.info(f"同步 {category}: {len(files)} 文件")
+        logger.info(
+            f"同步 {agent_name}: {total_files} 文件, {total_size} 字节; "
+            f"新上传 {files_uploaded} 个对象, {bytes_uploaded} 字节"
+        )
+        
+        # 版本校验和：文件路径与内容均相同的版本校验和相同
+        version_checksum = hashlib.sha256(
+            json.dumps(entries, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        
         # 记录版本信息到DynamoDB
         version_info = ArtifactVersion(
             agent_name=agent_name,
@@ -395,10 +521,12 @@ class ArtifactSyncManager:
             s3_paths=s3_paths,
             version_tag=version_tag or f"v{datetime.now().strftime('%Y%m%d%H%M%S')}",
             notes=notes,
-            created_at=datetime.utcnow().isoformat() + 'Z',
+            created_at=created_at,
             created_by=os.environ.get('USER', 'unknown'),
             file_count=total_files,
-            total_size=total_size
+            total_size=total_size,
+            checksum=version_checksum,
+            manifest=manifest_uri,
         )
         
         try:
@@ -427,9 +555,56 @@ class ArtifactSyncManager:
             s3_paths=s3_paths,
             files_synced=total_files,
             total_size=total_size,
+            files_uploaded=files_uploaded,
+            bytes_uploaded=bytes_uploaded,
             duration_seconds=duration
         )
     
+    def download_version(
+        self,
+        agent_name: str,
+        version_uuid: str,
+        target_dir: Optional[Path] = None,
+        categories: Optional[List[str]] = None
+    ) -> int:
+        """
+        按版本清单下载文件
+        
+        Args:
+            agent_name: Agent名称
+            version_uuid: 版本UUID
+            target_dir: 目标根目录，默认项目根目录（文件还原到各类别的本地目录）
+            categories: 要下载的类别，默认全部
+            
+        Returns:
+            int: 下载的文件数
+        """
+        version = self.get_version_detail(agent_name, version_uuid)
+        manifest = self._load_manifest(version.manifest) if version else None
+        if not manifest:
+            raise ValueError(f"版本 {agent_name}/{version_uuid} 没有内容清单")
+        
+        root = Path(target_dir) if target_dir else self.base_path
+        downloads = []
+        for category, files in manifest.get('categories', {}).items():
+            if categories and category not in categories:
+                continue
+            local_dir = root / self.LOCAL_PATHS.get(category, category) / agent_name
+            for rel, entry in files.items():
+                downloads.append((entry['sha256'], local_dir / rel))
+        
+        def download(checksum: str, path: Path) -> None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.s3_client.download_file(
+                self.bucket_name, self._blob_key(checksum), str(path), Config=self._transfer_config
+            )
+        
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for future in [executor.submit(download, checksum, path) for checksum, path in downloads]:
+                future.result()
+        
+        return len(downloads)
+    
     def sync_backup(
         self,
         agent_name: str,
@@ -671,7 +846,14 @@ class ArtifactSyncManager:
             return False
         
         # 删除S3文件（如果需要）
-        if delete_s3 and version.s3_paths:
+        # 内容寻址存储的版本只删除清单，内容对象可能被其他版本共享而保留
+        if delete_s3 and version.manifest:
+            bucket, _, key = version.manifest[5:].partition('/')
+            try:
+                self.s3_client.delete_object(Bucket=bucket, Key=key)
+            except ClientError as e:
+                logger.error(f"删除版本清单失败: {e}")
+        elif delete_s3 and version.s3_paths:
             for category, s3_path in version.s3_paths.items():
                 # 解析S3路径
                 if s3_path.startswith('s3://'):
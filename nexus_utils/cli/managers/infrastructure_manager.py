@@ -223,7 +223,8 @@ class InfrastructureManager:
             from api.v2.config import (
                 TABLE_PROJECTS, TABLE_STAGES, TABLE_AGENTS,
                 TABLE_INVOCATIONS, TABLE_SESSIONS, TABLE_MESSAGES,
-                TABLE_TASKS, TABLE_TOOLS
+                TABLE_TASKS, TABLE_TOOLS, TABLE_STATISTICS,
+                TABLE_INVOCATION_EVENTS, TABLE_LEASES
             )
         except ImportError:
             # Fallback to default names
@@ -236,6 +237,9 @@ class InfrastructureManager:
             TABLE_MESSAGES = f'{prefix}messages'
             TABLE_TASKS = f'{prefix}tasks'
             TABLE_TOOLS = f'{prefix}tools'
+            TABLE_STATISTICS = f'{prefix}statistics'
+            TABLE_INVOCATION_EVENTS = f'{prefix}invocation_events'
+            TABLE_LEASES = f'{prefix}leases'
         
         return [
             TableDefinition(
@@ -306,6 +310,27 @@ class InfrastructureManager:
                 key_schema=[{'AttributeName': 'tool_id', 'KeyType': 'HASH'}],
                 attribute_definitions=[{'AttributeName': 'tool_id', 'AttributeType': 'S'}],
             ),
+            TableDefinition(
+                table_name=TABLE_STATISTICS,
+                key_schema=[{'AttributeName': 'stat_key', 'KeyType': 'HASH'}],
+                attribute_definitions=[{'AttributeName': 'stat_key', 'AttributeType': 'S'}],
+            ),
+            TableDefinition(
+                table_name=TABLE_INVOCATION_EVENTS,
+                key_schema=[
+                    {'AttributeName': 'day', 'KeyType': 'HASH'},
+                    {'AttributeName': 'event_id', 'KeyType': 'RANGE'}
+                ],
+                attribute_definitions=[
+                    {'AttributeName': 'day', 'AttributeType': 'S'},
+                    {'AttributeName': 'event_id', 'AttributeType': 'S'}
+                ],
+            ),
+            TableDefinition(
+                table_name=TABLE_LEASES,
+                key_schema=[{'AttributeName': 'lease_key', 'KeyType': 'HASH'}],
+                attribute_definitions=[{'AttributeName': 'lease_key', 'AttributeType': 'S'}],
+            ),
         ]
     
     def get_queue_names(self) -> List[str]:
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Index Module
+
+进程内共享的文件索引服务，用于扫描项目目录、计算文件校验和并比较两次扫描的差异。
+
+- 校验和按 (size, mtime_ns, inode) 缓存，文件未变化时不再读取内容，只对新增或修改的文件计算哈希
+- 分块流式计算哈希，不把整个文件读入内存
+- 两次扫描结果的差异以 FileDelta（新增/修改/删除）返回，用于记录每个阶段生成的文件
+
+默认使用 SHA-256：在支持 SHA 指令扩展的 CPU 上比 MD5 快约一倍，
+并且与 artifact_sync 的内容寻址键一致，同一文件的校验和可以在两处复用。
+"""
+
+import os
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# 默认哈希算法
+DEFAULT_HASH_ALGORITHM = "sha256"
+
+# 流式计算哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 校验和缓存的最大条目数
+CHECKSUM_CACHE_MAX_ENTRIES = 100000
+
+# 修改时间距当前不足该时长的文件不缓存校验和：
+# 同一时间粒度内再次写入且大小不变的文件无法通过 mtime 区分
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+# 文件签名：(size, mtime_ns, inode)
+FileSignature = Tuple[int, int, int]
+
+
+def _signature(stat: os.stat_result) -> FileSignature:
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def hash_file(path: Path, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """分块流式计算文件哈希"""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, algorithm).hexdigest()
+        digest = hashlib.new(algorithm)
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+class FileChecksumCache:
+    """
+    文件校验和缓存
+    
+    以（算法, 绝对路径）为键，文件签名 (size, mtime_ns, inode) 未变化时直接返回缓存的校验和。
+    可以在多个线程中并发调用，哈希计算不持有锁。
+    """
+    
+    def __init__(self, max_entries: int = CHECKSUM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[FileSignature, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "hashed_bytes": 0}
+    
+    def checksum(
+        self,
+        path: Path,
+        stat: Optional[os.stat_result] = None,
+        algorithm: str = DEFAULT_HASH_ALGORITHM,
+    ) -> str:
+        """
+        获取文件校验和
+        
+        Args:
+            path: 文件路径
+            stat: 已获取的文件状态（可选，避免重复 stat）
+            algorithm: 哈希算法
+        
+        Returns:
+            str: 十六进制校验和
+        """
+        path = Path(path)
+        if stat is None:
+            stat = path.stat()
+        key = (algorithm, os.path.abspath(path))
+        signature = _signature(stat)
+        
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == signature:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached[1]
+        
+        checksum = hash_file(path, algorithm)
+        
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["hashed_bytes"] += stat.st_size
+            if time.time_ns() - stat.st_mtime_ns >= RACY_WINDOW_NS:
+                self._entries[key] = (signature, checksum)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.pop(key, None)
+        return checksum
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_checksum_cache = FileChecksumCache()
+
+
+def file_checksum(path: Path, algorithm: str = DEFAULT_HASH_ALGORITHM) -> str:
+    """计算文件校验和（使用进程内共享缓存）"""
+    return _checksum_cache.checksum(path, algorithm=algorithm)
+
+
+@dataclass(frozen=True)
+class FileIndexEntry:
+    """
+    文件索引条目
+    
+    属性:
+        path: 相对于索引根目录的路径（POSIX 格式）
+        size: 文件大小（字节）
+        mtime_ns: 修改时间（纳秒）
+        inode: inode 编号
+        checksum: 文件校验和
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    checksum: str
+    
+    @property
+    def last_modified(self) -> datetime:
+        return datetime.fromtimestamp(self.mtime_ns / 1e9, tz=timezone.utc)
+
+
+# 一次扫描的结果：相对路径 -> 索引条目
+FileSnapshot = Dict[str, FileIndexEntry]
+
+
+@dataclass
+class FileDelta:
+    """
+    两次扫描之间的文件变化
+    
+    属性:
+        added: 新增的文件
+        modified: 内容发生变化的文件
+        removed: 删除的文件路径
+    """
+    added: List[FileIndexEntry] = field(default_factory=list)
+    modified: List[FileIndexEntry] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    
+    @property
+    def changed(self) -> List[FileIndexEntry]:
+        """新增和修改的文件（按路径排序）"""
+        return sorted(self.added + self.modified, key=lambda entry: entry.path)
+    
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.modified or self.removed)
+    
+    @classmethod
+    def between(cls, before: FileSnapshot, after: FileSnapshot) -> 'FileDelta':
+        """比较两次扫描结果，内容未变化（仅修改时间变化）的文件不算修改"""
+        delta = cls()
+        for path in sorted(after):
+            entry = after[path]
+            previous = before.get(path)
+            if previous is None:
+                delta.added.append(entry)
+            elif previous.checksum != entry.checksum:
+                delta.modified.append(entry)
+        delta.removed = sorted(path for path in before if path not in after)
+        return delta
+
+
+def skip_hidden_files(relative_path: str, is_dir: bool) -> bool:
+    """默认过滤规则：跳过以 . 开头的文件"""
+    return not is_dir and os.path.basename(relative_path).startswith('.')
+
+
+def skip_python_cache(relative_path: str, is_dir: bool) -> bool:
+    """跳过 __pycache__ 目录和 .pyc 文件"""
+    name = os.path.basename(relative_path)
+    return name == '__pycache__' if is_dir else name.endswith('.pyc')
+
+
+class FileIndex:
+    """
+    目录文件索引
+    
+    扫描目录下的所有文件并计算校验和，只对签名变化的文件重新计算哈希。
+    """
+    
+    def __init__(
+        self,
+        root: Path,
+        algorithm: str = DEFAULT_HASH_ALGORITHM,
+        skip: Optional[Callable[[str, bool], bool]] = skip_hidden_files,
+        checksum_cache: Optional[FileChecksumCache] = None,
+    ):
+        """
+        初始化文件索引
+        
+        Args:
+            root: 索引根目录
+            algorithm: 哈希算法
+            skip: 过滤函数 (相对路径, 是否目录) -> 是否跳过，跳过的目录不再遍历
+            checksum_cache: 校验和缓存（默认使用进程内共享缓存）
+        """
+        self.root = Path(root)
+        self.algorithm = algorithm
+        self.skip = skip
+        self.checksum_cache = checksum_cache or _checksum_cache
+        self._lock = threading.Lock()
+        self._last_snapshot: FileSnapshot = {}
+    
+    def scan(self) -> FileSnapshot:
+        """
+        扫描目录，返回当前的文件快照
+        
+        Returns:
+            FileSnapshot: 相对路径 -> 索引条目，目录不存在时返回空快照
+        """
+        with self._lock:
+            snapshot: FileSnapshot = {}
+            if self.root.is_dir():
+                for relative_path, entry in self._walk(self.root, ""):
+                    try:
+                        stat = entry.stat()
+                        checksum = self.checksum_cache.checksum(
+                            Path(entry.path), stat=stat, algorithm=self.algorithm
+                        )
+                        snapshot[relative_path] = FileIndexEntry(
+                            path=relative_path,
+                            size=stat.st_size,
+                            mtime_ns=stat.st_mtime_ns,
+                            inode=stat.st_ino,
+                            checksum=checksum,
+                        )
+                    except OSError as e:
+                        logger.warning(f"Failed to index file {entry.path}: {e}")
+            self._last_snapshot = snapshot
+            return snapshot
+    
+    def scan_delta(self, baseline: Optional[FileSnapshot] = None) -> Tuple[FileSnapshot, FileDelta]:
+        """
+        扫描目录并与基准快照比较
+        
+        Args:
+            baseline: 基准快照（默认使用上一次扫描的结果）
+        
+        Returns:
+            Tuple: (当前快照, 相对基准的变化)
+        """
+        if baseline is None:
+            with self._lock:
+                baseline = self._last_snapshot
+        snapshot = self.scan()
+        return snapshot, FileDelta.between(baseline, snapshot)
+    
+    def _walk(self, directory: Path, prefix: str):
+        """使用 os.scandir 遍历目录（不跟随符号链接目录）"""
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logger.warning(f"Failed to list directory {directory}: {e}")
+            return
+        for entry in entries:
+            relative_path = f"{prefix}{entry.name}"
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if self.skip is not None and self.skip(relative_path, is_dir):
+                continue
+            if is_dir:
+                yield from self._walk(Path(entry.path), f"{relative_path}/")
+            else:
+                yield relative_path, entry
+
+
+_indexes: Dict[Tuple[str, str], FileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_index(root: Path, algorithm: str = DEFAULT_HASH_ALGORITHM) -> FileIndex:
+    """
+    获取目录的共享文件索引（使用默认过滤规则）
+    
+    Args:
+        root: 索引根目录
+        algorithm: 哈希算法
+    
+    Returns:
+        FileIndex: 同一目录和算法返回同一个索引实例
+    """
+    key = (os.path.abspath(root), algorithm)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = FileIndex(Path(key[0]), algorithm)
+        return index
+
+
+def get_checksum_cache_stats() -> Dict[str, int]:
+    """获取校验和缓存的命中统计"""
+    with _checksum_cache._lock:
+        return {**_checksum_cache.stats, "entries": len(_checksum_cache._entries)}
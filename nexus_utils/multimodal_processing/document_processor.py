@@ -6,12 +6,20 @@ This module provides the DocumentProcessor class that handles:
 - Word document processing using python-docx
 - Structured document to text conversion
 - Integration with multimodal model service for content processing
+
+Spreadsheets are read in a single streaming pass (openpyxl read-only row
+iterator for .xlsx, chunked pandas reader for CSV). Per-column statistics are
+accumulated incrementally, so memory does not grow with the number of rows.
 """
 
 import os
+import random
 import time
 import logging
-from typing import List, Dict, Any, Optional
+import zipfile
+from datetime import date, datetime
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook
 try:
@@ -26,6 +34,215 @@ from .models.exceptions import FileProcessingError
 from .multimodal_model_service import MultimodalModelService
 
 
+class _RunningStats:
+    """
+    Incremental numeric column statistics.
+
+    Mean/std use Welford's algorithm (merged per chunk with Chan's formula);
+    quartiles are estimated from a fixed-size reservoir sample.
+    """
+
+    def __init__(self, sample_size: int, rng: random.Random, np_rng: np.random.Generator):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self._sample: List[float] = []
+        self._sample_size = sample_size
+        self._rng = rng
+        self._np_rng = np_rng
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._reservoir_add(value, self.count)
+
+    def add_array(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += chunk_m2 + delta * delta * self.count * n / total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        seen = self.count
+        self.count = total
+
+        # Fill the reservoir, then replace entries with probability k/seen (vectorised)
+        start = min(max(self._sample_size - len(self._sample), 0), n)
+        self._sample.extend(values[:start].tolist())
+        if start < n:
+            positions = np.arange(seen + start + 1, seen + n + 1)
+            slots = (self._np_rng.random(n - start) * positions).astype(np.int64)
+            hits = slots < self._sample_size
+            for slot, value in zip(slots[hits].tolist(), values[start:][hits].tolist()):
+                self._sample[slot] = value
+
+    def _reservoir_add(self, value: float, seen: int) -> None:
+        if len(self._sample) < self._sample_size:
+            self._sample.append(value)
+        else:
+            j = self._rng.randrange(seen)
+            if j < self._sample_size:
+                self._sample[j] = value
+
+    def describe(self) -> Dict[str, float]:
+        """Same rows as ``DataFrame.describe()`` for a numeric column."""
+        if self.count == 0:
+            return {'count': 0.0}
+        quartiles = np.percentile(self._sample, [25, 50, 75]) if self._sample else [np.nan] * 3
+        std = (self._m2 / (self.count - 1)) ** 0.5 if self.count > 1 else np.nan
+        return {
+            'count': float(self.count),
+            'mean': self.mean,
+            'std': std,
+            'min': self.min,
+            '25%': float(quartiles[0]),
+            '50%': float(quartiles[1]),
+            '75%': float(quartiles[2]),
+            'max': self.max,
+        }
+
+
+class _TableSummary:
+    """
+    Streaming summary of a table: row count, preview rows, inferred column
+    types and running statistics for numeric columns.
+    """
+
+    PREVIEW_ROWS = 10
+
+    def __init__(self, columns: List[str], sample_size: int):
+        self.columns = columns
+        self.row_count = 0
+        self.truncated = False
+        self.preview: List[Tuple] = []
+        self._kinds: List[set] = [set() for _ in columns]
+        self._dtypes: List[Optional[str]] = [None] * len(columns)
+        self._stats = {}
+        self._rng = random.Random(0)
+        self._np_rng = np.random.default_rng(0)
+        self._sample_size = sample_size
+
+    def _column_stats(self, index: int) -> _RunningStats:
+        stats = self._stats.get(index)
+        if stats is None:
+            stats = self._stats[index] = _RunningStats(self._sample_size, self._rng, self._np_rng)
+        return stats
+
+    def add_row(self, row: Iterable[Any]) -> None:
+        """Add a row of python cell values (openpyxl ``values_only`` rows)."""
+        row = tuple(row)[:len(self.columns)]
+        if len(self.preview) < self.PREVIEW_ROWS:
+            self.preview.append(row)
+        self.row_count += 1
+        for i, value in enumerate(row):
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                self._kinds[i].add('bool')
+            elif isinstance(value, int):
+                self._kinds[i].add('int')
+                self._column_stats(i).add(float(value))
+            elif isinstance(value, float):
+                self._kinds[i].add('float')
+                self._column_stats(i).add(value)
+            elif isinstance(value, (datetime, date)):
+                self._kinds[i].add('datetime')
+            else:
+                self._kinds[i].add('object')
+
+    def add_frame(self, frame: pd.DataFrame) -> None:
+        """Add a pandas chunk (CSV reader)."""
+        if len(self.preview) < self.PREVIEW_ROWS:
+            need = self.PREVIEW_ROWS - len(self.preview)
+            self.preview.extend(frame.head(need).itertuples(index=False, name=None))
+        self.row_count += len(frame)
+        for i, column in enumerate(frame.columns[:len(self.columns)]):
+            series = frame[column]
+            dtype = str(series.dtype)
+            previous = self._dtypes[i]
+            if previous is None or series.notna().any():
+                if previous is None or previous == dtype:
+                    self._dtypes[i] = dtype
+                elif {previous, dtype} <= {'int64', 'float64'}:
+                    self._dtypes[i] = 'float64'
+                else:
+                    self._dtypes[i] = 'object'
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                self._column_stats(i).add_array(series.to_numpy(dtype='float64', na_value=np.nan))
+
+    def dtypes(self) -> List[Tuple[str, str]]:
+        """Inferred column types using pandas dtype names."""
+        result = []
+        for i, column in enumerate(self.columns):
+            if self._dtypes[i] is not None:
+                result.append((column, self._dtypes[i]))
+                continue
+            kinds = self._kinds[i]
+            if not kinds:
+                dtype = 'float64' if self.row_count else 'object'
+            elif kinds == {'int'}:
+                dtype = 'int64'
+            elif kinds <= {'int', 'float'}:
+                dtype = 'float64'
+            elif kinds == {'datetime'}:
+                dtype = 'datetime64[ns]'
+            elif kinds == {'bool'}:
+                dtype = 'bool'
+            else:
+                dtype = 'object'
+            result.append((column, dtype))
+        return result
+
+    def numeric_columns(self) -> List[int]:
+        dtypes = [dtype for _, dtype in self.dtypes()]
+        return [i for i in sorted(self._stats) if dtypes[i].startswith(('int', 'float'))]
+
+    def describe(self) -> Optional[pd.DataFrame]:
+        numeric = self.numeric_columns()
+        if not numeric:
+            return None
+        return pd.DataFrame({self.columns[i]: self._stats[i].describe() for i in numeric})
+
+    def format(self, content_parts: List[str], empty_message: str, preview_title: str) -> None:
+        """Append the summary using the same layout as the pandas-based output."""
+        content_parts.append(f"行数: {self.row_count}{'（已达扫描上限，后续行未统计）' if self.truncated else ''}")
+        content_parts.append(f"列数: {len(self.columns)}")
+        content_parts.append(f"列名: {', '.join(self.columns)}")
+
+        if self.row_count == 0:
+            content_parts.append(empty_message)
+            return
+
+        content_parts.append(f"\n{preview_title}:")
+        content_parts.append(
+            pd.DataFrame(self.preview, columns=self.columns[:max((len(r) for r in self.preview), default=0)])
+            .to_string(index=False)
+        )
+
+        content_parts.append(f"\n数据类型:")
+        for col, dtype in self.dtypes():
+            content_parts.append(f"  {col}: {dtype}")
+
+        stats = self.describe()
+        if stats is not None:
+            content_parts.append(f"\n数值列统计:")
+            content_parts.append(stats.to_string())
+
+
 class DocumentProcessor(FileProcessor):
     """
     Processor for handling structured documents (Excel, Word, CSV).
@@ -54,9 +271,16 @@ class DocumentProcessor(FileProcessor):
         self._supported_types = ['xlsx', 'xls', 'docx', 'csv']
         
         # Excel processing settings
-        self.max_rows_per_sheet = 10000  # Limit to prevent memory issues
+        # Rows are streamed, so this only bounds scan time, not memory
+        self.max_rows_per_sheet = 1_000_000
         self.max_sheets = 20  # Limit number of sheets to process
         
+        # Memory cap for a single document: bounds the per-column reservoir
+        # samples and rejects inputs that cannot be streamed within the budget
+        # (legacy .xls workbooks, oversized xlsx shared-string tables)
+        self.max_memory_bytes = 256 * 1024 * 1024
+        self.csv_chunk_rows = 50_000
+        
     def can_process(self, file_type: str) -> bool:
         """
         Check if this processor can handle the given file type.
@@ -287,9 +511,28 @@ class DocumentProcessor(FileProcessor):
                 context={"file_type": file_type, "file_path": file_path, "error": str(e)}
             )
     
+    def _sample_size(self, column_count: int) -> int:
+        """Reservoir sample size per numeric column within the memory cap."""
+        # ~40 bytes per sampled python float in a list, keep samples within 1/4 of the budget
+        budget = self.max_memory_bytes // 4
+        return max(100, min(10000, budget // (max(column_count, 1) * 40)))
+    
+    def _check_memory_budget(self, file_path: str, required_bytes: int, reason: str) -> None:
+        if required_bytes > self.max_memory_bytes:
+            raise FileProcessingError(
+                f"File exceeds memory cap ({reason}: {required_bytes} > {self.max_memory_bytes} bytes)",
+                error_code="FILE_TOO_LARGE",
+                context={"file_path": file_path, "required_bytes": required_bytes,
+                         "max_memory_bytes": self.max_memory_bytes}
+            )
+    
     def _extract_excel_content(self, file_path: str) -> str:
         """
-        Extract content from Excel file using pandas and openpyxl.
+        Extract content from Excel file in a single pass.
+        
+        .xlsx workbooks are streamed with openpyxl's read-only row iterator;
+        legacy .xls workbooks (not supported by openpyxl) are parsed once with
+        ``pd.read_excel(sheet_name=None)``.
         
         Args:
             file_path: Path to the Excel file
@@ -300,55 +543,28 @@ class DocumentProcessor(FileProcessor):
         content_parts = []
         
         try:
-            # First, get sheet names using openpyxl for better metadata
-            workbook = load_workbook(file_path, read_only=True)
-            sheet_names = workbook.sheetnames[:self.max_sheets]  # Limit sheets
-            workbook.close()
-            
-            content_parts.append(f"Excel文件包含 {len(sheet_names)} 个工作表")
-            content_parts.append("=" * 50)
+            if zipfile.is_zipfile(file_path):
+                sheets = self._iter_xlsx_sheets(file_path)
+            else:
+                sheets = self._iter_xls_sheets(file_path)
+            
+            for i, (sheet_name, sheet_count, summary, error) in enumerate(sheets, 1):
+                if i == 1:
+                    content_parts.append(f"Excel文件包含 {sheet_count} 个工作表")
+                    content_parts.append("=" * 50)
+                if error is not None:
+                    content_parts.append(f"\n处理工作表 '{sheet_name}' 时出错: {error}")
+                    continue
+                content_parts.append(f"\n工作表 {i}: {sheet_name}")
+                content_parts.append("-" * 30)
+                summary.format(content_parts, "工作表为空", "前几行数据")
             
-            # Process each sheet with pandas
-            for i, sheet_name in enumerate(sheet_names, 1):
-                try:
-                    # Read sheet with pandas
-                    df = pd.read_excel(
-                        file_path, 
-                        sheet_name=sheet_name,
-                        nrows=self.max_rows_per_sheet
-                    )
-                    
-                    content_parts.append(f"\n工作表 {i}: {sheet_name}")
-                    content_parts.append("-" * 30)
-                    
-                    # Add basic info
-                    content_parts.append(f"行数: {len(df)}")
-                    content_parts.append(f"列数: {len(df.columns)}")
-                    content_parts.append(f"列名: {', '.join(df.columns.astype(str))}")
-                    
-                    # Convert DataFrame to string representation
-                    if not df.empty:
-                        # Show first few rows and summary
-                        content_parts.append("\n前几行数据:")
-                        content_parts.append(df.head(10).to_string(index=False))
-                        
-                        # Add data types info
-                        content_parts.append(f"\n数据类型:")
-                        for col, dtype in df.dtypes.items():
-                            content_parts.append(f"  {col}: {dtype}")
-                        
-                        # Add basic statistics for numeric columns
-                        numeric_cols = df.select_dtypes(include=['number']).columns
-                        if len(numeric_cols) > 0:
-                            content_parts.append(f"\n数值列统计:")
-                            stats = df[numeric_cols].describe()
-                            content_parts.append(stats.to_string())
-                    else:
-                        content_parts.append("工作表为空")
-                        
-                except Exception as e:
-                    content_parts.append(f"\n处理工作表 '{sheet_name}' 时出错: {str(e)}")
+            if not content_parts:
+                content_parts.append("Excel文件包含 0 个工作表")
+                content_parts.append("=" * 50)
                     
+        except FileProcessingError:
+            raise
         except Exception as e:
             raise FileProcessingError(
                 f"Failed to process Excel file: {str(e)}",
@@ -358,6 +574,55 @@ class DocumentProcessor(FileProcessor):
         
         return "\n".join(content_parts)
     
+    def _iter_xlsx_sheets(self, file_path: str):
+        """Stream .xlsx sheets, yielding (sheet_name, sheet_count, summary, error)."""
+        # read-only mode still loads the shared string table into memory
+        with zipfile.ZipFile(file_path) as archive:
+            shared = next((info for info in archive.infolist() if info.filename == 'xl/sharedStrings.xml'), None)
+            if shared is not None:
+                self._check_memory_budget(file_path, shared.file_size, "shared strings")
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet_names = workbook.sheetnames[:self.max_sheets]  # Limit sheets
+            for sheet_name in sheet_names:
+                try:
+                    rows = workbook[sheet_name].iter_rows(values_only=True)
+                    header = next(rows, None)
+                    columns = self._column_names(header or ())
+                    summary = _TableSummary(columns, self._sample_size(len(columns)))
+                    for row in rows:
+                        if summary.row_count >= self.max_rows_per_sheet:
+                            summary.truncated = True
+                            break
+                        summary.add_row(row)
+                    yield sheet_name, len(sheet_names), summary, None
+                except Exception as e:
+                    yield sheet_name, len(sheet_names), None, str(e)
+        finally:
+            workbook.close()
+    
+    def _iter_xls_sheets(self, file_path: str):
+        """Parse a legacy .xls workbook once, yielding (sheet_name, sheet_count, summary, error)."""
+        # xlrd materialises the whole workbook; assume ~10x expansion of the file size
+        self._check_memory_budget(file_path, os.path.getsize(file_path) * 10, "legacy .xls workbook")
+        frames = pd.read_excel(file_path, sheet_name=None, nrows=self.max_rows_per_sheet)
+        sheet_names = list(frames)[:self.max_sheets]
+        for sheet_name in sheet_names:
+            df = frames[sheet_name]
+            summary = _TableSummary(list(df.columns.astype(str)), self._sample_size(len(df.columns)))
+            summary.add_frame(df)
+            summary.truncated = len(df) >= self.max_rows_per_sheet
+            yield sheet_name, len(sheet_names), summary, None
+    
+    @staticmethod
+    def _column_names(header: Tuple) -> List[str]:
+        """Column names from a header row, matching pandas defaults for blanks."""
+        return [
+            str(value) if value is not None else f"Unnamed: {i}"
+            for i, value in enumerate(header)
+        ]
+    
     def _extract_word_content(self, file_path: str) -> str:
         """
         Extract content from Word document using python-docx.
@@ -436,9 +701,25 @@ class DocumentProcessor(FileProcessor):
         
         return "\n".join(content_parts)
     
+    def _detect_csv_encoding(self, file_path: str, encodings: List[str]) -> Optional[str]:
+        """Pick the first encoding that decodes the head of the file."""
+        limit = 1024 * 1024
+        with open(file_path, 'rb') as f:
+            head = f.read(limit)
+        for encoding in encodings:
+            try:
+                head.decode(encoding)
+                return encoding
+            except UnicodeDecodeError as e:
+                # The sample may end in the middle of a multi-byte character
+                if len(head) == limit and e.start >= len(head) - 3:
+                    return encoding
+                continue
+        return None
+    
     def _extract_csv_content(self, file_path: str) -> str:
         """
-        Extract content from CSV file using pandas.
+        Extract content from CSV file with a chunked pandas reader.
         
         Args:
             file_path: Path to the CSV file
@@ -451,55 +732,39 @@ class DocumentProcessor(FileProcessor):
         try:
             # Try different encodings
             encodings = ['utf-8', 'gbk', 'gb2312', 'latin1']
-            df = None
+            encoding = self._detect_csv_encoding(file_path, encodings)
             
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(
-                        file_path, 
-                        encoding=encoding,
-                        nrows=self.max_rows_per_sheet
-                    )
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if df is None:
+            if encoding is None:
                 raise FileProcessingError(
                     "Failed to read CSV file with any supported encoding",
                     error_code="CSV_ENCODING_ERROR",
                     context={"file_path": file_path, "tried_encodings": encodings}
                 )
             
+            summary = None
+            with pd.read_csv(file_path, encoding=encoding, chunksize=self.csv_chunk_rows) as reader:
+                for chunk in reader:
+                    if summary is None:
+                        columns = list(chunk.columns.astype(str))
+                        summary = _TableSummary(columns, self._sample_size(len(columns)))
+                    remaining = self.max_rows_per_sheet - summary.row_count
+                    summary.add_frame(chunk.iloc[:remaining])
+                    if len(chunk) > remaining:
+                        summary.truncated = True
+                        break
+            
             content_parts.append("CSV文件内容")
             content_parts.append("=" * 50)
             
-            # Add basic info
-            content_parts.append(f"行数: {len(df)}")
-            content_parts.append(f"列数: {len(df.columns)}")
-            content_parts.append(f"列名: {', '.join(df.columns.astype(str))}")
-            
-            # Show data preview
-            if not df.empty:
-                content_parts.append("\n数据预览:")
-                content_parts.append(df.head(10).to_string(index=False))
-                
-                # Add data types
-                content_parts.append(f"\n数据类型:")
-                for col, dtype in df.dtypes.items():
-                    content_parts.append(f"  {col}: {dtype}")
-                
-                # Add basic statistics for numeric columns
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                if len(numeric_cols) > 0:
-                    content_parts.append(f"\n数值列统计:")
-                    stats = df[numeric_cols].describe()
-                    content_parts.append(stats.to_string())
-            else:
+            if summary is None:
                 content_parts.append("CSV文件为空")
+            else:
+                summary.format(content_parts, "CSV文件为空", "数据预览")
                 
         except FileProcessingError:
             raise
+        except pd.errors.EmptyDataError:
+            return "\n".join(["CSV文件内容", "=" * 50, "CSV文件为空"])
         except Exception as e:
             raise FileProcessingError(
                 f"Failed to process CSV file: {str(e)}",
@@ -512,10 +777,10 @@ class DocumentProcessor(FileProcessor):
     def _get_extraction_method(self, file_type: str) -> str:
         """Get the extraction method used for the file type."""
         method_map = {
-            'xlsx': 'pandas + openpyxl',
-            'xls': 'pandas + openpyxl',
+            'xlsx': 'openpyxl (read-only stream)',
+            'xls': 'pandas',
             'docx': 'python-docx',
-            'csv': 'pandas'
+            'csv': 'pandas (chunked)'
         }
         return method_map.get(file_type.lower(), 'unknown')
     
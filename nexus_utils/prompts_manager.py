@@ -38,6 +38,17 @@ class Compatibility:
     min_strands_version: Optional[str] = None
     supported_models: List[str] = None
 
+@dataclass
+class PromptCacheConfig:
+    """提示词缓存配置类（Bedrock 缓存点放置位置）"""
+    system_prompt: bool = False
+    tools: bool = False
+    context_prefix: bool = False
+    
+    @property
+    def enabled(self) -> bool:
+        return self.system_prompt or self.tools or self.context_prefix
+
 @dataclass
 class Metadata:
     """元数据类"""
@@ -49,6 +60,7 @@ class Metadata:
     dependencies: Optional[List[str]] = None
     compatibility: Optional[Compatibility] = None
     additional_request_fields: Optional[Dict[str, Any]] = None
+    prompt_cache: Optional[PromptCacheConfig] = None
     
 @dataclass
 class Example:
@@ -166,6 +178,17 @@ class PromptManager:
             supported_models=compat_data.get('supported_models', [])
         )
 
+    def _parse_prompt_cache(self, cache_data: Any) -> PromptCacheConfig:
+        """解析提示词缓存配置，true 表示在系统提示词、工具定义和上下文前缀之后都放置缓存点"""
+        if isinstance(cache_data, dict):
+            return PromptCacheConfig(
+                system_prompt=bool(cache_data.get('system_prompt', False)),
+                tools=bool(cache_data.get('tools', False)),
+                context_prefix=bool(cache_data.get('context_prefix', False))
+            )
+        enabled = bool(cache_data)
+        return PromptCacheConfig(system_prompt=enabled, tools=enabled, context_prefix=enabled)
+
     def _parse_metadata(self, metadata_data: Dict[str, Any]) -> Metadata:
         """解析元数据"""
         performance_metrics = None
@@ -176,6 +199,10 @@ class PromptManager:
         if 'compatibility' in metadata_data:
             compatibility = self._parse_compatibility(metadata_data['compatibility'])
         
+        prompt_cache = None
+        if 'prompt_cache' in metadata_data:
+            prompt_cache = self._parse_prompt_cache(metadata_data['prompt_cache'])
+        
         return Metadata(
             tags=metadata_data.get('tags', []),
             supported_models=metadata_data.get('supported_models'),
@@ -184,7 +211,8 @@ class PromptManager:
             performance_metrics=performance_metrics,
             dependencies=metadata_data.get('dependencies'),
             compatibility=compatibility,
-            additional_request_fields=metadata_data.get('additional_request_fields')
+            additional_request_fields=metadata_data.get('additional_request_fields'),
+            prompt_cache=prompt_cache
         )
 
     def _parse_examples(self, examples_data: List[Dict[str, str]]) -> List[Example]:
@@ -474,6 +502,13 @@ class PromptManager:
             return agent_version.metadata.additional_request_fields
         return None
 
+    def get_agent_prompt_cache(self, agent_name: str, version: str = "latest") -> Optional[PromptCacheConfig]:
+        """获取指定agent的提示词缓存配置"""
+        agent_version = self.get_agent_version(agent_name, version)
+        if agent_version and agent_version.metadata:
+            return agent_version.metadata.prompt_cache
+        return None
+
     def get_agent_lib_dependencies(self, agent_name: str, version: str = "latest") -> Optional[List[str]]:
         """获取指定agent的库依赖列表"""
         agent_version = self.get_agent_version(agent_name, version)
@@ -32,12 +32,19 @@ from .context import (
     load_workflow_context,
     save_workflow_context,
     get_stage_context,
+    build_stage_context,
     estimate_tokens,
     truncate_to_tokens,
     summarize_stage_output,
     DEFAULT_MAX_CONTEXT_TOKENS,
 )
 
+from .context_builder import (
+    StageContextParts,
+    count_tokens,
+    set_token_counter,
+)
+
 from .executor import (
     StageExecutor,
     StageExecutionError,
@@ -45,6 +52,18 @@ from .executor import (
     STAGE_PROMPT_MAPPING,
 )
 
+from .control import (
+    ControlEvent,
+    ControlChannel,
+    LocalControlChannel,
+    DynamoDBStreamControlChannel,
+    ControlSignalWatcher,
+    ControlSignalHook,
+    get_control_channel,
+    set_control_channel,
+    publish_control_signal,
+)
+
 from .engine import (
     WorkflowEngine,
     ExecutionResult,
@@ -110,6 +129,10 @@ __all__ = [
     'load_workflow_context',
     'save_workflow_context',
     'get_stage_context',
+    'build_stage_context',
+    'StageContextParts',
+    'count_tokens',
+    'set_token_counter',
     'estimate_tokens',
     'truncate_to_tokens',
     'summarize_stage_output',
@@ -119,6 +142,16 @@ __all__ = [
     'StageExecutionError',
     'execute_stage',
     'STAGE_PROMPT_MAPPING',
+    # 控制信号
+    'ControlEvent',
+    'ControlChannel',
+    'LocalControlChannel',
+    'DynamoDBStreamControlChannel',
+    'ControlSignalWatcher',
+    'ControlSignalHook',
+    'get_control_channel',
+    'set_control_channel',
+    'publish_control_signal',
     # 工作流引擎
     'WorkflowEngine',
     'ExecutionResult',
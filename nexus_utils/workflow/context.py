@@ -12,10 +12,13 @@ Requirements:
     - 9.5: Stage_Context 包含本地文档内容
     - 9.6: 上下文大小限制处理
     - 9.7: 旧阶段输出摘要功能
+
+token 计数、摘要缓存和预算分配见 context_builder 模块。
 """
 
 import logging
 import os
+from contextlib import nullcontext
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -30,13 +33,22 @@ from .models import (
     IntentRecognitionResult,
     AggregatedMetrics,
 )
+from .context_builder import (
+    StageContextParts,
+    count_tokens,
+    fit_blocks,
+    stage_relevance_weights,
+    summarize_content,
+    truncate_text_to_tokens,
+)
 
 logger = logging.getLogger(__name__)
 
-# 上下文大小限制（默认 100K tokens，约 400KB 文本）
+# 上下文大小限制（默认 100K tokens）
 DEFAULT_MAX_CONTEXT_TOKENS = 100000
-# 每个字符约 0.25 tokens（中英文混合估算）
-CHARS_PER_TOKEN = 4
+
+# 剩余预算不足该值时不再添加本地文档
+MIN_LOCAL_DOCS_TOKENS = 1000
 
 
 def _get_project_root() -> Path:
@@ -49,7 +61,7 @@ def estimate_tokens(text: str) -> int:
     """
     估算文本的 token 数量
     
-    使用简单的字符数估算，中英文混合约 4 字符 = 1 token
+    按文字类型分别估算（中日韩文字约每字一个 token），详见 context_builder.count_tokens
     
     参数:
         text: 要估算的文本
@@ -57,9 +69,7 @@ def estimate_tokens(text: str) -> int:
     返回:
         int: 估算的 token 数量
     """
-    if not text:
-        return 0
-    return len(text) // CHARS_PER_TOKEN
+    return count_tokens(text)
 
 
 def truncate_to_tokens(text: str, max_tokens: int) -> str:
@@ -73,23 +83,15 @@ def truncate_to_tokens(text: str, max_tokens: int) -> str:
     返回:
         str: 截断后的文本
     """
-    if not text:
-        return ""
-    
-    max_chars = max_tokens * CHARS_PER_TOKEN
-    if len(text) <= max_chars:
-        return text
-    
-    # 截断并添加省略标记
-    truncated = text[:max_chars - 50]
-    return truncated + "\n\n... [内容已截断] ..."
+    return truncate_text_to_tokens(text, max_tokens)
 
 
 def summarize_stage_output(content: str, max_tokens: int = 2000) -> str:
     """
     生成阶段输出的摘要
     
-    对于较长的阶段输出，提取关键信息生成摘要。
+    对于较长的阶段输出，保留全部章节标题，并按章节长度比例保留各章节正文的开头部分。
+    摘要按内容哈希缓存，同一份输出在多个阶段的上下文中只生成一次。
     
     参数:
         content: 原始内容
@@ -100,43 +102,7 @@ def summarize_stage_output(content: str, max_tokens: int = 2000) -> str:
         
     Validates: Requirement 9.7 - 旧阶段输出摘要功能
     """
-    if not content:
-        return ""
-    
-    current_tokens = estimate_tokens(content)
-    if current_tokens <= max_tokens:
-        return content
-    
-    # 提取关键部分
-    lines = content.split('\n')
-    summary_parts = []
-    
-    # 1. 提取标题和章节头
-    for line in lines:
-        if line.startswith('#') or line.startswith('##'):
-            summary_parts.append(line)
-    
-    # 2. 提取关键信息（JSON 块、代码块的开头）
-    in_code_block = False
-    code_block_lines = 0
-    for line in lines:
-        if line.startswith('```'):
-            in_code_block = not in_code_block
-            if in_code_block:
-                summary_parts.append(line)
-                code_block_lines = 0
-            else:
-                summary_parts.append('```')
-        elif in_code_block and code_block_lines < 10:
-            summary_parts.append(line)
-            code_block_lines += 1
-    
-    # 3. 如果摘要仍然太长，进一步截断
-    summary = '\n'.join(summary_parts)
-    if estimate_tokens(summary) > max_tokens:
-        summary = truncate_to_tokens(summary, max_tokens)
-    
-    return f"[摘要]\n{summary}"
+    return summarize_content(content, max_tokens)
 
 
 class WorkflowContextManager:
@@ -154,14 +120,16 @@ class WorkflowContextManager:
         - Requirement 9.5: 包含本地文档内容
     """
     
-    def __init__(self, db_client=None):
+    def __init__(self, db_client=None, content_store=None):
         """
         初始化上下文管理器
         
         参数:
             db_client: DynamoDB 客户端实例，如果为 None 则延迟加载
+            content_store: 阶段输出 S3 存储，如果为 None 则延迟加载
         """
         self._db_client = db_client
+        self._content_store = content_store
         self._rules_cache: Optional[str] = None
     
     @property
@@ -172,6 +140,17 @@ class WorkflowContextManager:
             self._db_client = db_client
         return self._db_client
     
+    @property
+    def content_store(self):
+        """延迟加载阶段输出 S3 存储（不可用时返回 None，大内容不转存）"""
+        if self._content_store is None:
+            try:
+                from api.v2.database import content_store
+                self._content_store = content_store
+            except Exception as e:
+                logger.debug(f"Stage content store unavailable: {e}")
+        return self._content_store
+    
     def load_from_db(self, project_id: str) -> WorkflowContext:
         """
         从 DynamoDB 加载工作流上下文
@@ -192,8 +171,8 @@ class WorkflowContextManager:
         if not project:
             raise ValueError(f"Project {project_id} not found")
         
-        # 加载所有阶段记录
-        stages = self.db.list_stages(project_id)
+        # 加载所有阶段记录（仅元数据，输出内容在首次访问时按需读取）
+        stages = self.db.list_stages(project_id, metadata_only=True)
         
         # 构建阶段输出字典
         stage_outputs: Dict[str, StageOutput] = {}
@@ -228,16 +207,18 @@ class WorkflowContextManager:
             # 创建阶段输出
             stage_output = StageOutput(
                 stage_name=stage_name,
-                content=stage_data.get('agent_output_content', ''),
                 metrics=metrics,
                 generated_files=generated_files,
-                document_content=stage_data.get('design_document', {}).get('content', ''),
-                document_format=stage_data.get('design_document', {}).get('format', 'markdown'),
                 completed_at=completed_at,
                 status=status,
                 error_message=stage_data.get('error_message'),
                 s3_content_ref=stage_data.get('agent_output_s3_ref'),
             )
+            stage_output.defer_content(
+                lambda name=stage_name: self._load_stage_content(project_id, name)
+            )
+            # 刚从数据库加载，视为已持久化，后续保存只写入变化的属性
+            stage_output.mark_persisted()
             
             stage_outputs[stage_name] = stage_output
         
@@ -323,9 +304,50 @@ class WorkflowContextManager:
             stop_requested_at=stop_requested_at,
             resume_from_stage=project.get('resume_from_stage'),
         )
+        context.mark_project_persisted(self._build_project_record(context))
         
         return context
     
+    def _load_stage_content(self, project_id: str, stage_name: str) -> Dict[str, Any]:
+        """
+        读取阶段输出内容和设计文档
+        
+        内容已转存 S3 时从 S3 读取并解压。
+        
+        返回:
+            Dict[str, Any]: content/document_content/document_format
+        """
+        stage = self.db.get_stage_content(project_id, stage_name) or {}
+        content = stage.get('agent_output_content') or ''
+        s3_ref = stage.get('agent_output_s3_ref')
+        if not content and s3_ref and self.content_store:
+            try:
+                content = self.content_store.get(s3_ref)
+            except Exception as e:
+                logger.warning(f"Failed to load stage output {stage_name} from {s3_ref}: {e}")
+        
+        design_document = stage.get('design_document') or {}
+        return {
+            'content': content,
+            'document_content': design_document.get('content', ''),
+            'document_format': design_document.get('format', 'markdown'),
+        }
+    
+    def _should_offload(self, output: StageOutput) -> bool:
+        """检查阶段输出内容是否需要转存 S3"""
+        if not output.is_content_loaded or output.s3_content_ref:
+            return False
+        store = self.content_store
+        return bool(store and store.should_offload(output.content))
+    
+    def _offload_content(self, project_id: str, stage_name: str, content: str) -> Optional[str]:
+        """超过阈值的阶段输出内容转存 S3，返回引用（失败时返回 None）"""
+        try:
+            return self.content_store.put(project_id, stage_name, content)
+        except Exception as e:
+            logger.warning(f"Failed to offload stage output {stage_name} to S3: {e}")
+            return None
+    
     def _parse_intent_result(self, orchestrator_content: str) -> Optional[IntentRecognitionResult]:
         """
         从编排器输出中解析意图识别结果
@@ -385,29 +407,115 @@ class WorkflowContextManager:
         self._rules_cache = ""
         return self._rules_cache
     
-    def save_to_db(self, context: WorkflowContext) -> None:
+    def save_to_db(
+        self,
+        context: WorkflowContext,
+        refresh_control_status: bool = True,
+        lock: Optional[Any] = None,
+    ) -> None:
         """
         保存工作流上下文到 DynamoDB
         
         参数:
             context: 要保存的上下文
+            refresh_control_status: 保存前是否从数据库刷新控制状态。
+                调用方已通过控制信号通道同步控制状态时传入 False，省去一次项目读取，
+                此时仅在控制状态非 running 时写入，避免覆盖用户刚发出的暂停/停止
+            lock: 保护上下文的锁（多个阶段并行执行时传入）。只在读取/修改上下文时持有，
+                S3 转存和 DynamoDB 写入在锁外进行，避免其他阶段线程等待网络往返
         """
+        lock = lock if lock is not None else nullcontext()
         now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
         
         # 在保存前从数据库刷新控制状态，避免覆盖用户的暂停/停止操作
-        try:
-            project = self.db.get_project(context.project_id)
-            if project:
-                db_control_status = project.get('control_status', 'running')
-                if db_control_status in ['paused', 'stopped']:
-                    # 数据库中的控制状态优先
-                    try:
-                        context.control_status = ControlStatus(db_control_status)
-                    except ValueError:
-                        pass
-        except Exception as e:
-            logger.warning(f"Failed to refresh control status before save: {e}")
+        if refresh_control_status:
+            try:
+                project = self.db.get_project(context.project_id)
+                if project:
+                    db_control_status = project.get('control_status', 'running')
+                    if db_control_status in ['paused', 'stopped']:
+                        # 数据库中的控制状态优先
+                        try:
+                            with lock:
+                                context.control_status = ControlStatus(db_control_status)
+                        except ValueError:
+                            pass
+            except Exception as e:
+                logger.warning(f"Failed to refresh control status before save: {e}")
+        
+        # 在锁内生成快照：项目变更属性、正在运行的阶段、待转存 S3 的阶段输出
+        with lock:
+            # 只写入相对上次保存发生变化的项目属性
+            project_record = self._build_project_record(
+                context, include_running_control_status=refresh_control_status
+            )
+            project_updates = context.dirty_project_attributes(project_record)
+            running_stage = None
+            if context.current_stage and context.status == StageStatus.RUNNING:
+                if context.current_stage not in context.stage_outputs:
+                    # 当前阶段还没有输出记录，说明正在运行中
+                    running_stage = context.current_stage
+            pending_offloads = [
+                (stage_name, output, output.content)
+                for stage_name, output in context.stage_outputs.items()
+                if self._should_offload(output)
+            ]
+        
+        offloaded_refs = {}
+        for stage_name, output, content in pending_offloads:
+            ref = self._offload_content(context.project_id, stage_name, content)
+            if ref:
+                offloaded_refs[stage_name] = (output, content, ref)
+        
+        # 只写入有变化的阶段属性，已完成且未修改的阶段不再重复上传输出内容
+        with lock:
+            for output, content, ref in offloaded_refs.values():
+                # 转存期间内容被修改时丢弃该引用，下次保存重新转存
+                if output.content == content and not output.s3_content_ref:
+                    output.s3_content_ref = ref
+            stage_updates = {}
+            for stage_name, output in context.stage_outputs.items():
+                dirty = output.dirty_attributes()
+                if dirty:
+                    stage_updates[stage_name] = dirty
+        
+        # 项目记录和阶段记录的变更尽量合并为一次批量写入
+        self._write_updates(context.project_id, project_updates, stage_updates, now)
+        
+        # 如果当前阶段正在运行，使用 stage_service 更新状态
+        # 这确保阶段名称被正确规范化
+        if running_stage:
+            try:
+                from api.v2.services.stage_service import stage_service_v2
+                stage_service_v2.mark_stage_running(context.project_id, running_stage)
+                logger.info(f"Stage {running_stage} marked as running via stage_service for project {context.project_id}")
+            except Exception as e:
+                # 回退到直接更新数据库
+                logger.warning(f"Could not use stage_service: {e}, falling back to direct update")
+                self.db.update_stage(context.project_id, running_stage, {
+                    'status': 'running',
+                    'started_at': now,
+                })
+        
+        # 记录已写入的属性；写入期间又被修改的属性指纹不一致，下次保存时仍会写入
+        with lock:
+            if project_updates:
+                context.mark_project_persisted(project_updates)
+            for stage_name, attributes in stage_updates.items():
+                context.stage_outputs[stage_name].mark_persisted(attributes)
+    
+    def _build_project_record(
+        self,
+        context: WorkflowContext,
+        include_running_control_status: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        根据上下文构建项目记录属性（不含 updated_at）
         
+        参数:
+            context: 工作流上下文
+            include_running_control_status: 控制状态为 running 时是否写入 control_status
+        """
         # 将 StageStatus 映射到 ProjectStatus
         # StageStatus.RUNNING -> ProjectStatus.BUILDING
         # StageStatus.COMPLETED -> ProjectStatus.COMPLETED
@@ -427,67 +535,50 @@ class WorkflowContextManager:
         # 避免覆盖用户的暂停/停止操作
         if context.control_status == ControlStatus.PAUSED:
             project_status = 'paused'
-        elif context.control_status == ControlStatus.STOPPED:
+        elif context.control_status in (ControlStatus.STOPPED, ControlStatus.CANCELLED):
             project_status = 'cancelled'
         
-        # 更新项目记录
-        project_updates = {
+        record = {
             'project_name': context.project_name,
             'current_stage': context.current_stage,
             'status': project_status,
             'control_status': context.control_status.value,
             'aggregated_metrics': context.aggregated_metrics.to_dict(),
-            'updated_at': now,
         }
+        if not include_running_control_status and context.control_status == ControlStatus.RUNNING:
+            record.pop('control_status')
         
         if context.pause_requested_at:
-            project_updates['pause_requested_at'] = context.pause_requested_at.isoformat()
+            record['pause_requested_at'] = context.pause_requested_at.isoformat()
         if context.stop_requested_at:
-            project_updates['stop_requested_at'] = context.stop_requested_at.isoformat()
+            record['stop_requested_at'] = context.stop_requested_at.isoformat()
         if context.resume_from_stage:
-            project_updates['resume_from_stage'] = context.resume_from_stage
+            record['resume_from_stage'] = context.resume_from_stage
         
-        self.db.update_project(context.project_id, project_updates)
+        return record
+    
+    def _write_updates(
+        self,
+        project_id: str,
+        project_updates: Dict[str, Any],
+        stage_updates: Dict[str, Dict[str, Any]],
+        now: str,
+    ) -> None:
+        """
+        写入项目记录和多个阶段的变更属性
         
-        # 如果当前阶段正在运行，使用 stage_service 更新状态
-        # 这确保阶段名称被正确规范化
-        if context.current_stage and context.status == StageStatus.RUNNING:
-            current_stage = context.current_stage
-            if current_stage not in context.stage_outputs:
-                # 当前阶段还没有输出记录，说明正在运行中
-                try:
-                    from api.v2.services.stage_service import stage_service_v2
-                    stage_service_v2.mark_stage_running(context.project_id, current_stage)
-                    logger.info(f"Stage {current_stage} marked as running via stage_service for project {context.project_id}")
-                except Exception as e:
-                    # 回退到直接更新数据库
-                    logger.warning(f"Could not use stage_service: {e}, falling back to direct update")
-                    self.db.update_stage(context.project_id, current_stage, {
-                        'status': 'running',
-                        'started_at': now,
-                    })
-        
-        # 更新已有输出的阶段记录
-        for stage_name, output in context.stage_outputs.items():
-            stage_updates = {
-                'status': output.status.value,
-                'agent_output_content': output.content if not output.s3_content_ref else '',
-                'agent_output_s3_ref': output.s3_content_ref,
-                'metrics': output.metrics.to_dict(),
-                'generated_files': [f.to_dict() for f in output.generated_files],
-                'error_message': output.error_message,
-            }
-            
-            if output.document_content:
-                stage_updates['design_document'] = {
-                    'content': output.document_content,
-                    'format': output.document_format,
-                }
-            
-            if output.completed_at:
-                stage_updates['completed_at'] = output.completed_at.isoformat()
-            
-            self.db.update_stage(context.project_id, stage_name, stage_updates)
+        数据库客户端支持批量更新时与项目更新合并为事务批量写入，否则逐条更新。
+        """
+        if not project_updates and not stage_updates:
+            return
+        if hasattr(self.db, 'update_stages_batch'):
+            self.db.update_stages_batch(project_id, stage_updates, project_updates=project_updates)
+            return
+        
+        if project_updates:
+            self.db.update_project(project_id, {**project_updates, 'updated_at': now})
+        for stage_name, attributes in stage_updates.items():
+            self.db.update_stage(project_id, stage_name, attributes)
     
     def get_stage_context(
         self, 
@@ -522,6 +613,35 @@ class WorkflowContextManager:
             - Requirement 9.6: 上下文大小限制处理
             - Requirement 9.7: 旧阶段输出摘要功能
         """
+        return self.build_stage_context(
+            context, stage_name, include_rules, include_local_docs, max_tokens
+        ).text
+    
+    def build_stage_context(
+        self, 
+        context: WorkflowContext, 
+        stage_name: str,
+        include_rules: bool = True,
+        include_local_docs: bool = True,
+        max_tokens: int = DEFAULT_MAX_CONTEXT_TOKENS,
+    ) -> StageContextParts:
+        """
+        组装指定阶段的执行上下文
+        
+        规则、需求和前置阶段输出（按阶段顺序）组成稳定前缀，本地文档作为可变后缀放在最后。
+        前置阶段输出按与目标阶段的依赖距离加权分配预算，放得下的输出保持原文，
+        放不下的输出按分配额生成摘要。
+        
+        参数:
+            context: 工作流上下文
+            stage_name: 目标阶段名称
+            include_rules: 是否包含工作流规则
+            include_local_docs: 是否包含本地文档
+            max_tokens: 最大 token 数量限制
+            
+        返回:
+            StageContextParts: 上下文前缀、后缀及各片段的预算使用情况
+        """
         import json
         
         # 从统一配置模块获取阶段名称到 Agent 显示名称的映射
@@ -563,60 +683,72 @@ class WorkflowContextManager:
         
         # 只包含当前阶段的前置阶段输出
         relevant_stages = [s for s in completed_stages if s in prerequisite_stages]
-        
-        current_context = base_context
-        
-        # 计算每个阶段可用的 token 预算
-        remaining_tokens = max_tokens - estimate_tokens(base_context)
-        tokens_per_stage = remaining_tokens // len(relevant_stages) if relevant_stages else remaining_tokens
-        
+        stage_contents = []
         for completed_stage in relevant_stages:
             output = context.get_stage_output(completed_stage)
             if output and output.content:
-                content = output.content
-                content_tokens = estimate_tokens(content)
-                
-                # 如果内容超过预算，生成摘要（Requirement 9.7）
-                if content_tokens > tokens_per_stage:
-                    content = summarize_stage_output(content, tokens_per_stage)
-                    logger.info(
-                        f"Stage {completed_stage} output summarized: "
-                        f"{content_tokens} -> {estimate_tokens(content)} tokens"
-                    )
-                
-                # 使用与旧版本一致的格式
-                agent_name = STAGE_TO_AGENT_NAME.get(completed_stage, completed_stage)
-                current_context = current_context + f"\n===\n{agent_name} Agent: " + content + "\n===\n"
+                stage_contents.append((completed_stage, output.content))
+        
+        def stage_header(stage: str) -> str:
+            return f"\n===\n{STAGE_TO_AGENT_NAME.get(stage, stage)} Agent: "
+        
+        # 按依赖距离加权分配阶段输出的预算，超出分配额的输出生成摘要（Requirement 9.7）
+        framing_tokens = sum(count_tokens(stage_header(stage) + "\n===\n") for stage, _ in stage_contents)
+        weights = stage_relevance_weights(
+            stage_name, [stage for stage, _ in stage_contents], context.get_stage_dependencies
+        )
+        stage_blocks = fit_blocks(
+            [(stage, content, weights[stage]) for stage, content in stage_contents],
+            max_tokens - count_tokens(base_context) - framing_tokens,
+        )
+        
+        prefix_parts = [base_context]
+        for block in stage_blocks:
+            if block.summarized:
+                logger.info(
+                    f"Stage {block.name} output summarized: "
+                    f"{block.original_tokens} -> {block.tokens} tokens"
+                )
+            prefix_parts.append(stage_header(block.name) + block.text + "\n===\n")
+        prefix = "".join(prefix_parts)
         
         # 6. 添加本地文档内容（Requirement 9.5）
+        suffix = ""
+        blocks = list(stage_blocks)
         if include_local_docs:
-            remaining_tokens = max_tokens - estimate_tokens(current_context)
-            if remaining_tokens > 1000:  # 至少需要 1000 tokens 才添加文档
+            remaining_tokens = max_tokens - count_tokens(prefix)
+            if remaining_tokens > MIN_LOCAL_DOCS_TOKENS:
                 local_docs = self._load_local_documents(context.project_id, context.project_name)
                 if local_docs:
                     doc_parts = ["\n## 本地文档\n"]
-                    doc_budget = remaining_tokens // len(local_docs) if local_docs else 0
+                    framing = count_tokens(doc_parts[0]) + sum(
+                        count_tokens(f"### {doc_name}\n") + 2 for doc_name in local_docs
+                    )
+                    doc_blocks = fit_blocks(
+                        [(doc_name, doc_content, 1.0) for doc_name, doc_content in local_docs.items()],
+                        remaining_tokens - framing,
+                        reducer=truncate_text_to_tokens,
+                    )
                     
-                    for doc_name, doc_content in local_docs.items():
-                        doc_tokens = estimate_tokens(doc_content)
-                        if doc_tokens > doc_budget:
-                            doc_content = truncate_to_tokens(doc_content, doc_budget)
-                        
-                        doc_parts.append(f"### {doc_name}\n")
-                        doc_parts.append(doc_content)
+                    for block in doc_blocks:
+                        doc_parts.append(f"### {block.name}\n")
+                        doc_parts.append(block.text)
                         doc_parts.append("\n")
                     
-                    current_context = current_context + "\n".join(doc_parts)
+                    suffix = "\n".join(doc_parts)
+                    blocks.extend(doc_blocks)
         
-        # 最终检查：如果仍然超过限制，进行截断（Requirement 9.6）
-        final_tokens = estimate_tokens(current_context)
+        # 最终检查：如果仍然超过限制，先去掉本地文档，再截断（Requirement 9.6）
+        parts = StageContextParts(prefix=prefix, suffix=suffix, blocks=blocks)
+        final_tokens = parts.tokens
         if final_tokens > max_tokens:
             logger.warning(
                 f"Context exceeded limit: {final_tokens} > {max_tokens} tokens, truncating"
             )
-            current_context = truncate_to_tokens(current_context, max_tokens)
+            parts.suffix = ""
+            parts.prefix = truncate_text_to_tokens(prefix, max_tokens)
         
-        return current_context
+        return parts
     
     def _load_local_documents(
         self, 
@@ -769,3 +901,28 @@ def get_stage_context(
     return workflow_context_manager.get_stage_context(
         context, stage_name, include_rules, include_local_docs, max_tokens
     )
+
+
+def build_stage_context(
+    context: WorkflowContext, 
+    stage_name: str,
+    include_rules: bool = True,
+    include_local_docs: bool = True,
+    max_tokens: int = DEFAULT_MAX_CONTEXT_TOKENS,
+) -> StageContextParts:
+    """
+    组装指定阶段的执行上下文（区分稳定前缀和可变后缀）
+    
+    参数:
+        context: 工作流上下文
+        stage_name: 目标阶段名称
+        include_rules: 是否包含工作流规则
+        include_local_docs: 是否包含本地文档
+        max_tokens: 最大 token 数量限制
+        
+    返回:
+        StageContextParts: 组装好的上下文
+    """
+    return workflow_context_manager.build_stage_context(
+        context, stage_name, include_rules, include_local_docs, max_tokens
+    )
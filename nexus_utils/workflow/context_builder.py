@@ -0,0 +1,444 @@
+"""
+阶段上下文组装
+
+为 WorkflowContextManager.get_stage_context 提供 token 计数、阶段输出摘要缓存和预算分配。
+
+- token 计数按文字类型分别估算（中日韩文字约每字一个 token，英文单词、数字、符号按 BPE 分词习惯估算），
+  比按字符数除以 4 的估算更接近模型的实际 token 数；可以通过 set_token_counter 注册真实的分词器
+- 阶段输出超出预算时按章节提取摘要，摘要按（内容哈希, 预算档位）缓存，同一份输出只生成一次
+- 前置阶段按与目标阶段的依赖距离加权分配预算，直接依赖的阶段获得更多预算，放得下的输出保持原文
+- 上下文按「稳定前缀 + 可变后缀」组织：规则、需求和阶段输出按阶段顺序排在前面，本地文档排在最后，
+  相邻阶段的上下文共享尽量长的相同前缀，便于模型侧的提示词缓存命中
+
+Requirements:
+    - 9.6: 上下文大小限制处理
+    - 9.7: 旧阶段输出摘要功能
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# 依赖距离每增加一级，阶段输出的预算权重衰减的比例
+STAGE_RELEVANCE_DECAY = 0.5
+
+# 摘要预算按档位取整，相近的预算生成相同的摘要（提高摘要缓存和提示词缓存的命中率）
+SUMMARY_BUDGET_STEP = 256
+
+# 摘要缓存条目数
+SUMMARY_CACHE_MAX_ENTRIES = 256
+
+# 超过该长度的文本缓存 token 计数结果
+TOKEN_COUNT_CACHE_MIN_CHARS = 2048
+TOKEN_COUNT_CACHE_MAX_ENTRIES = 1024
+
+# 摘要中截断长行时，至少保留的 token 数
+MIN_PARTIAL_LINE_TOKENS = 16
+
+# 截断标记
+TRUNCATED_MARKER = "\n\n... [内容已截断] ..."
+
+# 分词模式：中日韩单字 | 拉丁/希腊/西里尔字母串 | 数字串 | 空白 | 连续符号 | 其他单字
+_TOKEN_PATTERN = re.compile(
+    r"(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\u3000-\u303f\uff00-\uffef])"
+    r"|(?P<word>[A-Za-z\u00c0-\u024f\u0370-\u03ff\u0400-\u04ff]+)"
+    r"|(?P<digits>\d+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<symbols>[!-/:-@\[-`{-~]+)"
+    r"|(?P<other>.)",
+    re.DOTALL,
+)
+
+
+def _piece_tokens(kind: str, length: int, text: str) -> int:
+    """单个分词片段的 token 数"""
+    if kind == "word":
+        # 常见单词为一个 token，长单词按约 6 个字母一个 token 拆分
+        return 1 + (length - 1) // 6
+    if kind == "digits":
+        return math.ceil(length / 3)
+    if kind == "space":
+        # 单个空格与后面的单词合并；换行和缩进单独计数
+        if "\n" in text:
+            return 1
+        return 0 if length == 1 else math.ceil(length / 8)
+    if kind == "symbols":
+        return math.ceil(length / 2)
+    return 1
+
+
+def _heuristic_count_tokens(text: str) -> int:
+    return sum(
+        _piece_tokens(match.lastgroup, match.end() - match.start(), match.group())
+        for match in _TOKEN_PATTERN.finditer(text)
+    )
+
+
+_token_counter: Callable[[str], int] = _heuristic_count_tokens
+_token_count_cache: "OrderedDict[str, int]" = OrderedDict()
+_token_count_lock = threading.Lock()
+
+
+def set_token_counter(counter: Optional[Callable[[str], int]]) -> None:
+    """
+    注册 token 计数函数（例如模型分词器），传入 None 恢复内置的估算
+    
+    参数:
+        counter: 接收文本、返回 token 数的函数
+    """
+    global _token_counter
+    with _token_count_lock:
+        _token_counter = counter or _heuristic_count_tokens
+        _token_count_cache.clear()
+    with _summary_lock:
+        _summary_cache.clear()
+
+
+def count_tokens(text: str) -> int:
+    """
+    计算文本的 token 数量
+    
+    参数:
+        text: 要计算的文本
+    
+    返回:
+        int: token 数量
+    """
+    if not text:
+        return 0
+    if len(text) < TOKEN_COUNT_CACHE_MIN_CHARS:
+        return _token_counter(text)
+    
+    key = _content_key(text)
+    with _token_count_lock:
+        cached = _token_count_cache.get(key)
+        if cached is not None:
+            _token_count_cache.move_to_end(key)
+            return cached
+    
+    tokens = _token_counter(text)
+    with _token_count_lock:
+        _token_count_cache[key] = tokens
+        while len(_token_count_cache) > TOKEN_COUNT_CACHE_MAX_ENTRIES:
+            _token_count_cache.popitem(last=False)
+    return tokens
+
+
+def truncate_text_to_tokens(text: str, max_tokens: int, marker: str = TRUNCATED_MARKER) -> str:
+    """
+    将文本截断到指定的 token 数量（含截断标记）
+    
+    参数:
+        text: 要截断的文本
+        max_tokens: 最大 token 数量
+        marker: 追加在截断处的标记
+    
+    返回:
+        str: 截断后的文本
+    """
+    if not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    
+    budget = max(0, max_tokens - count_tokens(marker))
+    if _token_counter is _heuristic_count_tokens:
+        # 按分词片段累加，在超出预算的片段之前截断
+        used = 0
+        cut = 0
+        for match in _TOKEN_PATTERN.finditer(text):
+            used += _piece_tokens(match.lastgroup, match.end() - match.start(), match.group())
+            if used > budget:
+                break
+            cut = match.end()
+    else:
+        # 自定义计数函数：二分查找能放下的最长前缀
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if _token_counter(text[:middle]) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        cut = low
+    
+    return text[:cut].rstrip() + marker
+
+
+# ============================================================================
+# 阶段输出摘要
+# ============================================================================
+
+_summary_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+_summary_lock = threading.Lock()
+
+
+def _content_key(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _split_sections(content: str) -> List[Tuple[str, List[str]]]:
+    """按 Markdown 标题拆分为（标题行, 正文行）列表，代码块中的 # 不视为标题"""
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    in_code_block = False
+    for line in content.split("\n"):
+        if line.lstrip().startswith("```"):
+            in_code_block = not in_code_block
+        if not in_code_block and line.startswith("#"):
+            sections.append((line, []))
+        else:
+            sections[-1][1].append(line)
+    return [(heading, body) for heading, body in sections if heading or any(l.strip() for l in body)]
+
+
+def _leading_lines(lines: List[str], max_tokens: int) -> Tuple[List[str], bool]:
+    """取正文开头能放进预算的行，截断在代码块内时补全代码块结束标记"""
+    kept: List[str] = []
+    used = 0
+    in_code_block = False
+    for line in lines:
+        tokens = count_tokens(line) + 1
+        if used + tokens > max_tokens:
+            # 放不下的长行保留开头部分
+            room = max_tokens - used - 1
+            if room >= MIN_PARTIAL_LINE_TOKENS and not in_code_block:
+                kept.append(truncate_text_to_tokens(line, room, marker="..."))
+            if in_code_block:
+                kept.append("```")
+            return kept, True
+        kept.append(line)
+        used += tokens
+        if line.lstrip().startswith("```"):
+            in_code_block = not in_code_block
+    return kept, False
+
+
+def _build_summary(content: str, max_tokens: int) -> str:
+    """按章节提取摘要：保留全部标题，正文预算在章节之间均分（短章节保留原文），保留各章节正文的开头部分"""
+    header = "[摘要]"
+    budget = max_tokens - count_tokens(header) - 1
+    sections = _split_sections(content)
+    
+    heading_tokens = sum(count_tokens(heading) + 1 for heading, _ in sections if heading)
+    if heading_tokens >= budget:
+        headings = "\n".join(heading for heading, _ in sections if heading)
+        return f"{header}\n{truncate_text_to_tokens(headings, budget)}"
+    
+    body_tokens = [count_tokens("\n".join(body)) + len(body) for _, body in sections]
+    shares = allocate_budget(
+        [(str(i), tokens, 1.0) for i, tokens in enumerate(body_tokens)], budget - heading_tokens
+    )
+    
+    parts = [header]
+    for i, ((heading, body), tokens) in enumerate(zip(sections, body_tokens)):
+        if heading:
+            parts.append(heading)
+        if not tokens:
+            continue
+        kept, trimmed = _leading_lines(body, shares[str(i)])
+        while kept and not kept[-1].strip():
+            kept.pop()
+        parts.extend(kept)
+        if trimmed:
+            parts.append("...")
+    
+    summary = "\n".join(parts)
+    if count_tokens(summary) > max_tokens:
+        summary = truncate_text_to_tokens(summary, max_tokens)
+    return summary
+
+
+def summarize_content(content: str, max_tokens: int) -> str:
+    """
+    生成不超过预算的摘要（结果按内容哈希和预算档位缓存）
+    
+    参数:
+        content: 原始内容
+        max_tokens: 摘要的最大 token 数量
+    
+    返回:
+        str: 内容本身（未超出预算时）或摘要
+    """
+    if not content or count_tokens(content) <= max_tokens:
+        return content
+    
+    # 预算按档位向下取整，相近的预算复用同一份摘要
+    if max_tokens > SUMMARY_BUDGET_STEP:
+        max_tokens -= max_tokens % SUMMARY_BUDGET_STEP
+    
+    key = (_content_key(content), max_tokens)
+    with _summary_lock:
+        cached = _summary_cache.get(key)
+        if cached is not None:
+            _summary_cache.move_to_end(key)
+            return cached
+    
+    summary = _build_summary(content, max_tokens)
+    with _summary_lock:
+        _summary_cache[key] = summary
+        while len(_summary_cache) > SUMMARY_CACHE_MAX_ENTRIES:
+            _summary_cache.popitem(last=False)
+    return summary
+
+
+# ============================================================================
+# 预算分配
+# ============================================================================
+
+def allocate_budget(
+    items: Sequence[Tuple[str, int, float]],
+    budget: int,
+) -> Dict[str, int]:
+    """
+    按权重分配 token 预算（注水式分配）
+    
+    需求量不超过其加权份额的条目按需求量分配，剩余预算在其余条目之间按权重重新分配。
+    
+    参数:
+        items: (名称, 需要的 token 数, 权重) 列表
+        budget: 总预算
+    
+    返回:
+        Dict[str, int]: 名称 -> 分配的 token 数
+    """
+    allocation: Dict[str, int] = {}
+    active = [(name, tokens, max(weight, 1e-6)) for name, tokens, weight in items]
+    remaining = max(0, budget)
+    
+    while active:
+        total_weight = sum(weight for _, _, weight in active)
+        satisfied = [
+            item for item in active
+            if item[1] <= remaining * item[2] / total_weight
+        ]
+        if not satisfied:
+            for name, _, weight in active:
+                allocation[name] = int(remaining * weight / total_weight)
+            break
+        for item in satisfied:
+            allocation[item[0]] = item[1]
+            remaining -= item[1]
+        active = [item for item in active if item not in satisfied]
+    
+    return allocation
+
+
+def stage_relevance_weights(
+    target_stage: str,
+    stages: Sequence[str],
+    get_dependencies: Callable[[str], List[str]],
+) -> Dict[str, float]:
+    """
+    计算前置阶段对目标阶段的相关性权重
+    
+    直接依赖的阶段权重为 1，依赖距离每增加一级权重乘以 STAGE_RELEVANCE_DECAY。
+    
+    参数:
+        target_stage: 目标阶段
+        stages: 需要计算权重的阶段
+        get_dependencies: 获取阶段直接依赖的函数
+    
+    返回:
+        Dict[str, float]: 阶段 -> 权重
+    """
+    distances: Dict[str, int] = {}
+    frontier = [target_stage]
+    distance = 0
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for stage in frontier:
+            for dependency in get_dependencies(stage):
+                if dependency not in distances:
+                    distances[dependency] = distance
+                    next_frontier.append(dependency)
+        frontier = next_frontier
+    
+    farthest = max(distances.values(), default=1)
+    return {
+        stage: STAGE_RELEVANCE_DECAY ** (distances.get(stage, farthest + 1) - 1)
+        for stage in stages
+    }
+
+
+# ============================================================================
+# 上下文组装
+# ============================================================================
+
+@dataclass
+class ContextBlock:
+    """
+    上下文片段
+    
+    属性:
+        name: 片段名称（阶段名称或文档名称）
+        text: 片段内容
+        original_tokens: 原始内容的 token 数
+        tokens: 放入上下文的 token 数
+        summarized: 是否为摘要/截断后的内容
+    """
+    name: str
+    text: str
+    original_tokens: int
+    tokens: int
+    summarized: bool = False
+
+
+@dataclass
+class StageContextParts:
+    """
+    组装好的阶段上下文
+    
+    属性:
+        prefix: 稳定前缀（规则、需求、前置阶段输出），相邻阶段之间尽量保持一致
+        suffix: 可变后缀（本地文档等随文件变化的内容）
+        blocks: 各片段的预算使用情况
+    """
+    prefix: str
+    suffix: str = ""
+    blocks: List[ContextBlock] = field(default_factory=list)
+    
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+    
+    @property
+    def tokens(self) -> int:
+        return count_tokens(self.text)
+
+
+def fit_blocks(
+    blocks: Sequence[Tuple[str, str, float]],
+    budget: int,
+    reducer: Callable[[str, int], str] = summarize_content,
+) -> List[ContextBlock]:
+    """
+    把多个片段放入预算：按权重分配预算，超出分配额的片段用 reducer 缩减
+    
+    参数:
+        blocks: (名称, 内容, 权重) 列表
+        budget: 总预算
+        reducer: 缩减函数 (内容, 预算) -> 缩减后的内容
+    
+    返回:
+        List[ContextBlock]: 与输入顺序一致的片段
+    """
+    sizes = {name: count_tokens(text) for name, text, _ in blocks}
+    allocation = allocate_budget(
+        [(name, sizes[name], weight) for name, _, weight in blocks], budget
+    )
+    
+    fitted = []
+    for name, text, _ in blocks:
+        original = sizes[name]
+        limit = allocation.get(name, 0)
+        if original <= limit:
+            fitted.append(ContextBlock(name, text, original, original))
+            continue
+        reduced = reducer(text, limit) if limit > 0 else ""
+        fitted.append(ContextBlock(name, reduced, original, count_tokens(reduced), summarized=True))
+    return fitted
@@ -0,0 +1,589 @@
+"""
+工作流控制信号通道
+
+提供暂停/停止控制信号的发布订阅机制，让正在运行的阶段在 Agent 轮次或工具调用之间
+及时响应控制请求，而不必在每个阶段前后反复从 DynamoDB 读取项目记录。
+
+通道实现:
+    - LocalControlChannel: 进程内通道，API 与 Worker 同进程运行（本地开发/测试）时使用
+    - DynamoDBStreamControlChannel: 订阅项目表的 DynamoDB Streams，跨进程推送控制状态；
+      表未开启流时退化为按项目的低频投影读取。DynamoDB Streams 每个分片约只支持两个并发读取者，
+      读取者名额通过租约限制，拿不到名额的进程同样退化为投影读取
+
+Requirements:
+    - 3.1: 支持暂停控制
+    - 3.2: 支持停止控制
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Any
+
+from .models import ControlStatus
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowControlSignal(Exception):
+    """
+    工作流控制信号
+
+    用于在执行过程中传递控制信号。
+    """
+    PAUSE = "pause"
+    STOP = "stop"
+
+    def __init__(self, signal_type: str, message: str = ""):
+        self.signal_type = signal_type
+        super().__init__(f"Control signal: {signal_type} - {message}")
+
+
+@dataclass
+class ControlEvent:
+    """
+    控制状态变更事件
+
+    属性:
+        project_id: 项目ID
+        control_status: 新的控制状态（running/paused/stopped/cancelled）
+        requested_at: 请求时间（ISO 格式）
+    """
+    project_id: str
+    control_status: str
+    requested_at: Optional[str] = None
+
+
+ControlCallback = Callable[[ControlEvent], None]
+
+
+class ControlChannel:
+    """
+    控制信号通道基类
+
+    维护按项目划分的订阅者列表，子类负责把控制状态变更送达 dispatch()。
+    """
+
+    # 是否能跨进程送达（API 与 Worker 分开部署时需要）
+    distributed = False
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[ControlCallback]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, project_id: str, control_status: str, requested_at: Optional[str] = None) -> None:
+        """
+        发布控制状态变更
+
+        调用方应先将控制状态写入项目记录，再调用此方法通知订阅者。
+        """
+        self.dispatch(ControlEvent(project_id, control_status, requested_at))
+
+    def subscribe(self, project_id: str, callback: ControlCallback) -> Callable[[], None]:
+        """
+        订阅指定项目的控制信号
+
+        返回:
+            Callable: 取消订阅函数
+        """
+        with self._lock:
+            self._subscribers.setdefault(project_id, []).append(callback)
+        self._on_subscribed(project_id)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                callbacks = self._subscribers.get(project_id, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self._subscribers.pop(project_id, None)
+                    ended = True
+                else:
+                    ended = False
+            if ended:
+                self._on_unsubscribed(project_id)
+
+        return unsubscribe
+
+    def dispatch(self, event: ControlEvent) -> None:
+        """将事件分发给该项目的订阅者"""
+        with self._lock:
+            callbacks = list(self._subscribers.get(event.project_id, []))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Control signal callback failed for project {event.project_id}: {e}")
+
+    def subscribed_projects(self) -> List[str]:
+        with self._lock:
+            return list(self._subscribers.keys())
+
+    def close(self) -> None:
+        """释放通道资源"""
+        with self._lock:
+            self._subscribers.clear()
+
+    def _on_subscribed(self, project_id: str) -> None:
+        """新增订阅时的钩子（子类可用于启动后台监听）"""
+
+    def _on_unsubscribed(self, project_id: str) -> None:
+        """项目的最后一个订阅者取消订阅时的钩子"""
+
+
+class LocalControlChannel(ControlChannel):
+    """
+    进程内控制信号通道
+
+    publish() 直接同步分发给本进程内的订阅者，作为 Redis 等消息通道的轻量替身。
+    """
+
+
+class DynamoDBStreamControlChannel(ControlChannel):
+    """
+    基于 DynamoDB Streams 的控制信号通道
+
+    后台线程读取项目表的流记录，只解析订阅中项目的 control_status 变化并分发。
+    项目表未开启流（或流不可用）时，改为对订阅中的项目做低频的投影读取，
+    每个项目每个间隔只读取一次 control_status。
+
+    DynamoDB Streams 每个分片最多约两个并发读取者。配置了 lease_table_name 时，
+    进程需先在租约表中取得读取者名额（最多 max_stream_readers 个）才读取流，
+    没有名额或没有订阅的进程使用投影读取，并定期重试获取名额。
+    """
+
+    distributed = True
+
+    # 分片列表刷新间隔（秒），用于发现分片拆分后的新分片
+    SHARD_REFRESH_INTERVAL = 60
+    # 读取者租约时长（秒），读取期间每 1/3 租约时长续约一次
+    READER_LEASE_SECONDS = 60
+    # 没有读取者名额时重试获取名额的间隔（秒）
+    READER_SLOT_RETRY_INTERVAL = 60
+    # 租约项主键前缀（租约表主键为 lease_key）
+    READER_LEASE_KEY_PREFIX = "control-stream#"
+
+    def __init__(
+        self,
+        table_name: str,
+        region_name: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        poll_interval: float = 1.0,
+        fallback_poll_interval: float = 15.0,
+        lease_table_name: Optional[str] = None,
+        max_stream_readers: int = 2,
+    ):
+        """
+        初始化通道
+
+        参数:
+            table_name: 项目表名
+            region_name: AWS 区域
+            endpoint_url: DynamoDB 端点（本地开发）
+            poll_interval: 流记录读取间隔（秒）
+            fallback_poll_interval: 未开启流或没有读取者名额时的投影读取间隔（秒）
+            lease_table_name: 保存读取者租约的表（主键 lease_key），为空时不限制读取者数量
+            max_stream_readers: 同时读取流的进程数上限
+        """
+        super().__init__()
+        self.table_name = table_name
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.poll_interval = poll_interval
+        self.fallback_poll_interval = fallback_poll_interval
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._thread_lock = threading.Lock()
+        self._last_status: Dict[str, str] = {}
+        self.lease_table_name = lease_table_name
+        self.max_stream_readers = max_stream_readers
+        self._owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._reader_slot: Optional[int] = None
+
+    def _client(self, service_name: str):
+        import boto3
+        kwargs = {}
+        if self.region_name:
+            kwargs['region_name'] = self.region_name
+        if self.endpoint_url:
+            kwargs['endpoint_url'] = self.endpoint_url
+        return boto3.client(service_name, **kwargs)
+
+    def _on_subscribed(self, project_id: str) -> None:
+        with self._thread_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="control-signal-stream",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _on_unsubscribed(self, project_id: str) -> None:
+        # 去重状态只在一次订阅内有效，重新订阅后同样的控制状态需要再次送达
+        self._last_status.pop(project_id, None)
+
+    def close(self) -> None:
+        self._stop_event.set()
+        super().close()
+
+    def _run(self) -> None:
+        """后台监听主循环"""
+        try:
+            dynamodb = self._client('dynamodb')
+            stream_arn = dynamodb.describe_table(TableName=self.table_name)['Table'].get('LatestStreamArn')
+        except Exception as e:
+            logger.warning(f"Failed to describe table {self.table_name} for control stream: {e}")
+            dynamodb, stream_arn = self._client('dynamodb'), None
+
+        if not stream_arn:
+            logger.info(
+                f"Table {self.table_name} has no stream enabled, "
+                f"polling control status every {self.fallback_poll_interval}s"
+            )
+            self._poll_projects(dynamodb)
+            return
+
+        while not self._stop_event.is_set():
+            if self.subscribed_projects() and self._acquire_reader_slot(dynamodb):
+                logger.info(f"Control signals subscribed via stream {stream_arn} (reader slot {self._reader_slot})")
+                try:
+                    self._consume_stream(stream_arn, dynamodb)
+                except Exception as e:
+                    logger.warning(f"Control stream consumer stopped, falling back to polling: {e}")
+                finally:
+                    self._release_reader_slot(dynamodb)
+            self._poll_projects(dynamodb, duration=self.READER_SLOT_RETRY_INTERVAL)
+
+    def _reader_lease_key(self, slot: int) -> Dict[str, Any]:
+        return {'lease_key': {'S': f"{self.READER_LEASE_KEY_PREFIX}{self.table_name}#{slot}"}}
+
+    def _acquire_reader_slot(self, dynamodb) -> bool:
+        """获取（或续约）流读取者名额，未配置租约表时总是成功"""
+        if not self.lease_table_name:
+            return True
+        slots = [self._reader_slot] if self._reader_slot is not None else range(self.max_stream_readers)
+        now = time.time()
+        for slot in slots:
+            try:
+                dynamodb.put_item(
+                    TableName=self.lease_table_name,
+                    Item={
+                        **self._reader_lease_key(slot),
+                        'owner': {'S': self._owner_id},
+                        'expires_at': {'N': str(now + self.READER_LEASE_SECONDS)},
+                    },
+                    ConditionExpression='attribute_not_exists(lease_key) OR expires_at < :now OR #owner = :owner',
+                    ExpressionAttributeNames={'#owner': 'owner'},
+                    ExpressionAttributeValues={':now': {'N': str(now)}, ':owner': {'S': self._owner_id}},
+                )
+            except dynamodb.exceptions.ConditionalCheckFailedException:
+                continue
+            except Exception as e:
+                logger.warning(f"Failed to acquire control stream reader slot: {e}")
+                break
+            self._reader_slot = slot
+            return True
+        self._reader_slot = None
+        return False
+
+    def _release_reader_slot(self, dynamodb) -> None:
+        if not self.lease_table_name or self._reader_slot is None:
+            return
+        try:
+            dynamodb.delete_item(
+                TableName=self.lease_table_name,
+                Key=self._reader_lease_key(self._reader_slot),
+                ConditionExpression='#owner = :owner',
+                ExpressionAttributeNames={'#owner': 'owner'},
+                ExpressionAttributeValues={':owner': {'S': self._owner_id}},
+            )
+        except Exception as e:
+            logger.debug(f"Failed to release control stream reader slot: {e}")
+        self._reader_slot = None
+
+    def _consume_stream(self, stream_arn: str, dynamodb) -> None:
+        """
+        读取所有开放分片的新增流记录
+
+        租约续约失败或持续一个租约周期没有订阅时返回，让出读取者名额。
+        """
+        streams = self._client('dynamodbstreams')
+        iterators: Dict[str, str] = {}
+        last_refresh = 0.0
+        last_renewal = time.time()
+        last_subscribed = time.time()
+
+        while not self._stop_event.is_set():
+            if self.subscribed_projects():
+                last_subscribed = time.time()
+            elif time.time() - last_subscribed >= self.READER_LEASE_SECONDS:
+                return
+            if time.time() - last_renewal >= self.READER_LEASE_SECONDS / 3:
+                if not self._acquire_reader_slot(dynamodb):
+                    logger.info("Lost control stream reader slot, falling back to polling")
+                    return
+                last_renewal = time.time()
+
+            if time.time() - last_refresh >= self.SHARD_REFRESH_INTERVAL:
+                description = streams.describe_stream(StreamArn=stream_arn)['StreamDescription']
+                for shard in description.get('Shards', []):
+                    shard_id = shard['ShardId']
+                    is_open = 'EndingSequenceNumber' not in shard.get('SequenceNumberRange', {})
+                    if is_open and shard_id not in iterators:
+                        iterators[shard_id] = streams.get_shard_iterator(
+                            StreamArn=stream_arn,
+                            ShardId=shard_id,
+                            ShardIteratorType='LATEST',
+                        )['ShardIterator']
+                last_refresh = time.time()
+
+            for shard_id, iterator in list(iterators.items()):
+                response = streams.get_records(ShardIterator=iterator, Limit=1000)
+                for record in response.get('Records', []):
+                    self._handle_stream_record(record)
+                next_iterator = response.get('NextShardIterator')
+                if next_iterator:
+                    iterators[shard_id] = next_iterator
+                else:
+                    # 分片已关闭，下次刷新时会发现其子分片
+                    iterators.pop(shard_id, None)
+                    last_refresh = 0.0
+
+            self._stop_event.wait(self.poll_interval)
+
+    def _handle_stream_record(self, record: Dict[str, Any]) -> None:
+        image = record.get('dynamodb', {}).get('NewImage') or {}
+        project_id = image.get('project_id', {}).get('S')
+        control_status = image.get('control_status', {}).get('S')
+        if not project_id or not control_status:
+            return
+        if project_id not in self.subscribed_projects():
+            return
+        if self._last_status.get(project_id) == control_status:
+            return
+        self._last_status[project_id] = control_status
+
+        requested_at = (
+            image.get('stop_requested_at', {}).get('S')
+            if control_status == ControlStatus.STOPPED.value
+            else image.get('pause_requested_at', {}).get('S')
+        )
+        self.dispatch(ControlEvent(project_id, control_status, requested_at))
+
+    def _poll_projects(self, dynamodb, duration: Optional[float] = None) -> None:
+        """
+        退化方案：定期读取订阅项目的 control_status 投影
+
+        参数:
+            duration: 轮询时长（秒），为空时一直轮询到通道关闭
+        """
+        deadline = time.time() + duration if duration is not None else None
+        # 切换到轮询时立即读取一次，流读取期间或切换前发生的状态变化不必等待一个轮询间隔
+        while not self._stop_event.is_set():
+            for project_id in self.subscribed_projects():
+                try:
+                    response = dynamodb.get_item(
+                        TableName=self.table_name,
+                        Key={'project_id': {'S': project_id}},
+                        ProjectionExpression='control_status',
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to poll control status for project {project_id}: {e}")
+                    continue
+                control_status = response.get('Item', {}).get('control_status', {}).get('S')
+                if control_status and self._last_status.get(project_id) != control_status:
+                    self._last_status[project_id] = control_status
+                    self.dispatch(ControlEvent(project_id, control_status))
+            
+            if deadline is not None and time.time() + self.fallback_poll_interval > deadline:
+                self._stop_event.wait(max(deadline - time.time(), 0))
+                return
+            self._stop_event.wait(self.fallback_poll_interval)
+
+
+class ControlSignalWatcher:
+    """
+    单个项目的控制信号监视器
+
+    订阅控制通道并在内存中维护最新的控制状态，引擎和阶段执行器通过它检查
+    是否需要暂停/停止，检查本身不访问数据库。
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        channel: Optional[ControlChannel] = None,
+        initial_status: ControlStatus = ControlStatus.RUNNING,
+    ):
+        self.project_id = project_id
+        self.channel = channel or get_control_channel()
+        self._status = initial_status
+        self._lock = threading.Lock()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    @property
+    def status(self) -> ControlStatus:
+        with self._lock:
+            return self._status
+
+    def start(self) -> 'ControlSignalWatcher':
+        """开始订阅（重复调用无副作用）"""
+        if self._unsubscribe is None:
+            self._unsubscribe = self.channel.subscribe(self.project_id, self._on_event)
+        return self
+
+    def close(self) -> None:
+        """取消订阅"""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def set_status(self, status: ControlStatus) -> None:
+        """本地设置控制状态（引擎自身发起暂停/停止/恢复时使用）"""
+        with self._lock:
+            self._status = status
+
+    def _on_event(self, event: ControlEvent) -> None:
+        try:
+            status = ControlStatus(event.control_status)
+        except ValueError:
+            return
+        with self._lock:
+            previous, self._status = self._status, status
+        if previous != status:
+            logger.info(f"Control status for project {self.project_id} changed: {previous.value} -> {status.value}")
+
+    def pending_signal(self) -> Optional[str]:
+        """返回待处理的控制信号类型（无信号时返回 None）"""
+        status = self.status
+        if status in (ControlStatus.STOPPED, ControlStatus.CANCELLED):
+            return WorkflowControlSignal.STOP
+        if status == ControlStatus.PAUSED:
+            return WorkflowControlSignal.PAUSE
+        return None
+
+    def raise_if_signalled(self) -> None:
+        """
+        如果存在控制信号则抛出
+
+        Raises:
+            WorkflowControlSignal: 如果收到暂停或停止请求
+        """
+        signal_type = self.pending_signal()
+        if signal_type == WorkflowControlSignal.STOP:
+            raise WorkflowControlSignal(WorkflowControlSignal.STOP, "Stop requested")
+        if signal_type == WorkflowControlSignal.PAUSE:
+            raise WorkflowControlSignal(WorkflowControlSignal.PAUSE, "Pause requested")
+
+
+class ControlSignalHook:
+    """
+    Strands Agent 控制信号 Hook
+
+    在每次模型调用和工具调用前检查控制信号，使暂停/停止能在阶段执行中途生效。
+    """
+
+    def __init__(self, watcher: ControlSignalWatcher):
+        self.watcher = watcher
+
+    def register_hooks(self, registry, **kwargs: Any) -> None:
+        for event_type in _before_call_event_types():
+            registry.add_callback(event_type, self._check)
+
+    def _check(self, event) -> None:
+        self.watcher.raise_if_signalled()
+
+
+def _before_call_event_types() -> List[type]:
+    """获取当前 Strands 版本中可用的模型/工具调用前事件类型"""
+    event_types = []
+    try:
+        from strands.hooks import BeforeModelCallEvent, BeforeToolCallEvent
+        event_types.extend([BeforeModelCallEvent, BeforeToolCallEvent])
+    except ImportError:
+        try:
+            from strands.experimental.hooks import (
+                BeforeModelInvocationEvent,
+                BeforeToolInvocationEvent,
+            )
+            event_types.extend([BeforeModelInvocationEvent, BeforeToolInvocationEvent])
+        except ImportError:
+            logger.warning("Strands model/tool hook events unavailable, mid-stage control signals disabled")
+    return event_types
+
+
+# 全局控制通道实例
+_control_channel: Optional[ControlChannel] = None
+_control_channel_lock = threading.Lock()
+
+
+def get_control_channel() -> ControlChannel:
+    """
+    获取全局控制信号通道
+
+    后端由环境变量 NEXUS_CONTROL_CHANNEL_BACKEND 或配置 workflow.control_channel.backend 决定：
+    'dynamodb_stream'（默认）或 'local'。
+    """
+    global _control_channel
+    if _control_channel is not None:
+        return _control_channel
+
+    with _control_channel_lock:
+        if _control_channel is None:
+            _control_channel = _create_control_channel()
+    return _control_channel
+
+
+def set_control_channel(channel: Optional[ControlChannel]) -> None:
+    """替换全局控制信号通道（传入 None 时下次使用重新按配置创建）"""
+    global _control_channel
+    with _control_channel_lock:
+        if _control_channel is not None and _control_channel is not channel:
+            _control_channel.close()
+        _control_channel = channel
+
+
+def _create_control_channel() -> ControlChannel:
+    from nexus_utils.config_loader import get_config
+    config = get_config()
+    backend = config.get_with_env_override(
+        "NEXUS_CONTROL_CHANNEL_BACKEND",
+        "workflow", "control_channel", "backend",
+        default="dynamodb_stream",
+    )
+
+    if backend == "local":
+        return LocalControlChannel()
+
+    from api.v2.config import settings, TABLE_PROJECTS, TABLE_LEASES
+    return DynamoDBStreamControlChannel(
+        table_name=TABLE_PROJECTS,
+        region_name=settings.AWS_REGION,
+        endpoint_url=settings.DYNAMODB_ENDPOINT_URL,
+        poll_interval=float(config.get_nested("workflow", "control_channel", "poll_interval_seconds", default=1)),
+        fallback_poll_interval=float(
+            config.get_nested("workflow", "control_channel", "fallback_poll_interval_seconds", default=15)
+        ),
+        lease_table_name=TABLE_LEASES,
+        max_stream_readers=int(config.get_nested("workflow", "control_channel", "max_stream_readers", default=2)),
+    )
+
+
+def publish_control_signal(project_id: str, control_status: str, requested_at: Optional[str] = None) -> None:
+    """
+    发布控制信号（项目记录已写入后调用）
+
+    对 DynamoDB Streams 后端而言，跨进程传递由项目表写入本身完成，此调用只通知本进程订阅者。
+    """
+    try:
+        get_control_channel().publish(project_id, control_status, requested_at)
+    except Exception as e:
+        logger.warning(f"Failed to publish control signal for project {project_id}: {e}")
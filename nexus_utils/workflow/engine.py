@@ -13,11 +13,20 @@ Requirements:
     - 3.1: 支持暂停控制
     - 3.2: 支持停止控制
     - 3.3: 支持恢复执行
+
+控制信号通过 ControlSignalWatcher 订阅推送，检查控制状态不再读取数据库，
+正在执行的阶段也会在 Agent 轮次/工具调用之间响应暂停和停止。
+
+阶段按 config/workflows.yaml 中的 depends_on 依赖关系调度：依赖全部完成的阶段即可开始，
+互不依赖的阶段并行执行，暂停/停止/失败重试以分支为单位处理。
 """
 
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Set
 from dataclasses import dataclass, field
 
 from .models import (
@@ -32,10 +41,35 @@ from .context import (
     save_workflow_context,
 )
 from .executor import StageExecutor, StageExecutionError
+from .control import (
+    ControlChannel,
+    ControlSignalWatcher,
+    WorkflowControlSignal,
+    publish_control_signal,
+)
 
 logger = logging.getLogger(__name__)
 
 
+# 阶段调度的默认并行数（config/default_config.yaml 中 workflow.stage_scheduler 可覆盖）
+DEFAULT_MAX_PARALLEL_STAGES = 3
+
+
+def _load_max_parallel_stages() -> int:
+    """读取同时执行的阶段数"""
+    try:
+        from nexus_utils.config_loader import get_config
+        max_parallel = get_config().get_with_env_override(
+            "NEXUS_WORKFLOW_MAX_PARALLEL_STAGES",
+            "workflow", "stage_scheduler", "max_parallel_stages",
+            default=DEFAULT_MAX_PARALLEL_STAGES,
+        )
+        return int(max_parallel)
+    except Exception as e:
+        logger.debug(f"Failed to load stage scheduler config, using defaults: {e}")
+        return DEFAULT_MAX_PARALLEL_STAGES
+
+
 @dataclass
 class ExecutionResult:
     """
@@ -57,20 +91,6 @@ class ExecutionResult:
     metrics: Dict[str, Any] = field(default_factory=dict)
 
 
-class WorkflowControlSignal(Exception):
-    """
-    工作流控制信号
-    
-    用于在执行过程中传递控制信号。
-    """
-    PAUSE = "pause"
-    STOP = "stop"
-    
-    def __init__(self, signal_type: str, message: str = ""):
-        self.signal_type = signal_type
-        super().__init__(f"Control signal: {signal_type} - {message}")
-
-
 class PrerequisiteError(Exception):
     """
     前置阶段验证错误
@@ -109,6 +129,8 @@ class WorkflowEngine:
         project_id: str, 
         config: Optional[Dict[str, Any]] = None,
         db_client=None,
+        control_channel: Optional[ControlChannel] = None,
+        max_parallel_stages: Optional[int] = None,
     ):
         """
         初始化工作流引擎
@@ -117,12 +139,18 @@ class WorkflowEngine:
             project_id: 项目唯一标识
             config: 可选的配置覆盖
             db_client: DynamoDB 客户端（可选）
+            control_channel: 控制信号通道（可选，默认使用全局通道）
+            max_parallel_stages: 同时执行的阶段数（可选，默认读取配置，1 表示按顺序串行执行）
             
         Validates: Requirement 1.1 - 封装为独立的类
         """
         self.project_id = project_id
         self.config = config or {}
         
+        if max_parallel_stages is None:
+            max_parallel_stages = self.config.get('max_parallel_stages') or _load_max_parallel_stages()
+        self.max_parallel_stages = max(1, int(max_parallel_stages))
+        
         # 初始化上下文管理器
         self.context_manager = WorkflowContextManager(db_client)
         
@@ -136,6 +164,15 @@ class WorkflowEngine:
         self._pause_requested = False
         self._stop_requested = False
         
+        # 并行执行的阶段共享上下文：所有上下文修改都在该锁内进行；保存时只在生成快照期间持有
+        self._context_lock = threading.RLock()
+        # 正在执行的阶段（并行执行时可能有多个）
+        self._running_stages: Set[str] = set()
+        
+        # 控制信号监视器（延迟创建，加载上下文后以其控制状态为初始值）
+        self._control_channel = control_channel
+        self._control_watcher: Optional[ControlSignalWatcher] = None
+        
         # 回调函数
         self._on_stage_start: Optional[Callable[[str], None]] = None
         self._on_stage_complete: Optional[Callable[[str, StageOutput], None]] = None
@@ -148,6 +185,17 @@ class WorkflowEngine:
             self._context = self.load_context()
         return self._context
     
+    @property
+    def control_watcher(self) -> ControlSignalWatcher:
+        """获取控制信号监视器（延迟创建并订阅）"""
+        if self._control_watcher is None:
+            self._control_watcher = ControlSignalWatcher(
+                self.project_id,
+                channel=self._control_channel,
+                initial_status=self.context.control_status,
+            )
+        return self._control_watcher.start()
+    
     @property
     def executor(self) -> StageExecutor:
         """获取阶段执行器（延迟创建）"""
@@ -158,6 +206,8 @@ class WorkflowEngine:
                 on_stage_start=self._on_stage_start,
                 on_stage_complete=self._on_stage_complete,
                 on_stage_error=self._on_stage_error,
+                control_watcher=self.control_watcher,
+                context_lock=self._context_lock,
             )
         return self._executor
     
@@ -255,12 +305,11 @@ class WorkflowEngine:
         if not skip_validation:
             self.validate_prerequisites(stage_name)
         
-        # 在每个阶段开始前检查控制信号（从数据库刷新状态）
+        # 在每个阶段开始前检查控制信号
         self._check_control_signals()
         
         # 更新当前阶段
-        self.context.current_stage = stage_name
-        self.context.status = StageStatus.RUNNING
+        self._mark_stage_started(stage_name)
         
         # 使用 stage_service 更新阶段状态，确保名称规范化和 started_at 被正确设置
         try:
@@ -287,27 +336,63 @@ class WorkflowEngine:
             self._refresh_control_status()
             
             # 如果控制状态是暂停或停止，不更新阶段为完成，保持当前状态
-            if self.context.control_status in [ControlStatus.PAUSED, ControlStatus.STOPPED]:
+            if self.context.control_status in [ControlStatus.PAUSED, ControlStatus.STOPPED, ControlStatus.CANCELLED]:
                 logger.info(f"Stage {stage_name} completed but workflow is {self.context.control_status.value}")
-                # 仍然保存阶段输出，但不改变项目状态
-                self._save_context()
                 
-                # 抛出控制信号
+                # 抛出控制信号（阶段输出在下方的控制信号处理中保存）
                 if self.context.control_status == ControlStatus.PAUSED:
                     raise WorkflowControlSignal(WorkflowControlSignal.PAUSE, "Pause requested")
                 else:
                     raise WorkflowControlSignal(WorkflowControlSignal.STOP, "Stop requested")
             
             # 保存状态
+            self._mark_stage_finished(stage_name)
             self._save_context()
             
             return output
             
+        except WorkflowControlSignal:
+            # 暂停/停止：已完成的阶段输出照常保存；中途被打断的阶段保持未完成，恢复时重新执行
+            logger.info(f"Stage {stage_name} interrupted by control signal")
+            self._mark_stage_finished(stage_name, StageStatus.PAUSED)
+            self._save_context()
+            raise
+            
         except StageExecutionError as e:
             # 保存失败状态
-            self.context.status = StageStatus.FAILED
+            self._mark_stage_finished(stage_name, StageStatus.FAILED)
             self._save_context()
             raise
+            
+        except Exception:
+            self._mark_stage_finished(stage_name)
+            raise
+    
+    def _mark_stage_started(self, stage_name: str) -> None:
+        """记录阶段开始执行"""
+        with self._context_lock:
+            self._running_stages.add(stage_name)
+            self.context.current_stage = stage_name
+            self.context.status = StageStatus.RUNNING
+    
+    def _mark_stage_finished(self, stage_name: str, status: Optional[StageStatus] = None) -> None:
+        """
+        记录阶段执行结束
+        
+        其他阶段仍在执行时，当前阶段指向仍在执行的阶段，工作流状态保持运行中；
+        否则更新为 status（未指定时保持不变）。
+        """
+        with self._context_lock:
+            self._running_stages.discard(stage_name)
+            if self._running_stages:
+                if self.context.current_stage not in self._running_stages:
+                    # 指向仍在执行的阶段中最靠前的一个
+                    self.context.current_stage = next(
+                        (s for s in self.context.STAGE_ORDER if s in self._running_stages),
+                        next(iter(self._running_stages)),
+                    )
+            elif status is not None:
+                self.context.status = status
     
     def execute_from_stage(
         self, 
@@ -358,55 +443,143 @@ class WorkflowEngine:
         logger.info(f"Stages to execute: {stages_to_execute}")
         
         # 执行阶段
-        for stage in stages_to_execute:
-            try:
-                # 检查控制信号
-                self._check_control_signals()
-                
-                # 执行阶段
-                output = self.execute_single_stage(stage, state=state, skip_validation=True)
-                result.completed_stages.append(stage)
-                
-            except WorkflowControlSignal as e:
-                # 处理控制信号
-                if e.signal_type == WorkflowControlSignal.PAUSE:
-                    logger.info(f"Workflow paused after stage: {stage}")
-                    result.final_status = StageStatus.PAUSED
-                    return result
-                elif e.signal_type == WorkflowControlSignal.STOP:
-                    logger.info(f"Workflow stopped after stage: {stage}")
-                    result.final_status = StageStatus.FAILED
-                    result.error_message = "Workflow stopped by user"
-                    return result
-                    
-            except StageExecutionError as e:
-                result.failed_stage = stage
-                result.error_message = str(e)
-                result.final_status = StageStatus.FAILED
+        try:
+            return self._execute_stages(stages_to_execute, result, state)
+        finally:
+            self.close()
+    
+    def _execute_stages(
+        self,
+        stages_to_execute: List[str],
+        result: ExecutionResult,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> ExecutionResult:
+        """
+        按依赖关系调度执行阶段列表，处理控制信号与错误
+        
+        依赖的阶段全部完成后即可开始，互不依赖的阶段并行执行（最多 max_parallel_stages 个）。
+        某个阶段失败时只跳过依赖它的阶段，其他分支照常执行完成，重试时从失败的阶段继续；
+        收到暂停/停止信号后不再启动新阶段，等待正在执行的阶段响应信号后返回。
+        """
+        dependencies = {
+            stage: self.context.get_stage_dependencies(stage) for stage in stages_to_execute
+        }
+        # 本次要（重新）执行的阶段，其下游阶段需要等待本次执行完成
+        completed = set(self.context.get_completed_stages()) - set(stages_to_execute)
+        pending = list(stages_to_execute)
+        
+        running = {}
+        failed: Dict[str, str] = {}
+        control_signal: Optional[WorkflowControlSignal] = None
+        stage_durations: Dict[str, float] = {}
+        start_time = time.monotonic()
+        
+        with ThreadPoolExecutor(
+            max_workers=self.max_parallel_stages,
+            thread_name_prefix=f"{self.project_id[:8]}-stage",
+        ) as pool:
+            while pending or running:
+                if control_signal is None:
+                    ready = [
+                        stage for stage in pending
+                        if all(dep in completed for dep in dependencies[stage])
+                    ]
+                    for stage in ready:
+                        if len(running) >= self.max_parallel_stages:
+                            break
+                        
+                        # 启动新阶段前检查控制信号
+                        try:
+                            self._check_control_signals()
+                        except WorkflowControlSignal as e:
+                            control_signal = e
+                            break
+                        
+                        pending.remove(stage)
+                        future = pool.submit(
+                            self.execute_single_stage, stage, state=state, skip_validation=True
+                        )
+                        running[future] = (stage, time.monotonic())
+                        if len(running) > 1:
+                            logger.info(f"Running stages in parallel: {[s for s, _ in running.values()]}")
                 
-                # 保存失败状态
-                self._save_context()
+                if not running:
+                    break
                 
-                logger.error(f"Stage {stage} failed: {e}")
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage, stage_start = running.pop(future)
+                    stage_durations[stage] = time.monotonic() - stage_start
+                    try:
+                        future.result()
+                        completed.add(stage)
+                        result.completed_stages.append(stage)
+                        
+                    except WorkflowControlSignal as e:
+                        # 停止优先于暂停
+                        if control_signal is None or e.signal_type == WorkflowControlSignal.STOP:
+                            control_signal = e
+                        logger.info(f"Stage {stage} interrupted by control signal: {e.signal_type}")
+                        
+                    except StageExecutionError as e:
+                        failed[stage] = str(e)
+                        logger.error(f"Stage {stage} failed: {e}")
+                        
+                    except Exception as e:
+                        failed[stage] = str(e)
+                        logger.error(f"Unexpected error in stage {stage}: {e}")
+        
+        wall_time = time.monotonic() - start_time
+        result.metrics['stage_durations'] = {
+            stage: round(duration, 3) for stage, duration in stage_durations.items()
+        }
+        result.metrics['wall_time_seconds'] = round(wall_time, 3)
+        if len(stage_durations) > 1:
+            logger.info(
+                f"Executed {len(stage_durations)} stages in {wall_time:.1f}s "
+                f"(sum of stage time {sum(stage_durations.values()):.1f}s)"
+            )
+        
+        # 处理控制信号
+        if control_signal is not None:
+            if control_signal.signal_type == WorkflowControlSignal.PAUSE:
+                logger.info(f"Workflow paused, pending stages: {pending}")
+                result.final_status = StageStatus.PAUSED
                 return result
-                
-            except Exception as e:
-                result.failed_stage = stage
-                result.error_message = str(e)
+            elif control_signal.signal_type == WorkflowControlSignal.STOP:
+                logger.info(f"Workflow stopped, pending stages: {pending}")
                 result.final_status = StageStatus.FAILED
-                
-                # 保存失败状态
-                self._save_context()
-                
-                logger.error(f"Unexpected error in stage {stage}: {e}")
+                result.error_message = "Workflow stopped by user"
                 return result
         
+        # 失败分支的下游阶段，或依赖未完成且不在本次执行范围内的阶段
+        if failed or pending:
+            if failed:
+                failed_stage = next(stage for stage in stages_to_execute if stage in failed)
+                result.failed_stage = failed_stage
+                result.error_message = failed[failed_stage]
+            else:
+                blocked_stage = pending[0]
+                missing = [dep for dep in dependencies[blocked_stage] if dep not in completed]
+                result.failed_stage = blocked_stage
+                result.error_message = str(PrerequisiteError(blocked_stage, missing))
+            if pending:
+                logger.warning(f"Stages not executed because dependencies did not complete: {pending}")
+            result.final_status = StageStatus.FAILED
+            
+            # 保存失败状态
+            with self._context_lock:
+                self.context.status = StageStatus.FAILED
+            self._save_context()
+            return result
+        
         # 所有阶段执行完成
         result.success = True
         result.final_status = StageStatus.COMPLETED
         
         # 更新上下文状态
-        self.context.status = StageStatus.COMPLETED
+        with self._context_lock:
+            self.context.status = StageStatus.COMPLETED
         self._save_context()
         
         logger.info(f"Workflow completed successfully")
@@ -448,9 +621,14 @@ class WorkflowEngine:
         self._pause_requested = True
         
         # 更新上下文
-        self.context.control_status = ControlStatus.PAUSED
-        self.context.pause_requested_at = datetime.now(timezone.utc)
+        with self._context_lock:
+            self.context.control_status = ControlStatus.PAUSED
+            self.context.pause_requested_at = datetime.now(timezone.utc)
+        self.control_watcher.set_status(ControlStatus.PAUSED)
         self._save_context()
+        publish_control_signal(
+            self.project_id, ControlStatus.PAUSED.value, self.context.pause_requested_at.isoformat()
+        )
         
         return True
     
@@ -471,15 +649,25 @@ class WorkflowEngine:
         self._stop_requested = False
         
         # 更新上下文
-        self.context.control_status = ControlStatus.RUNNING
-        self.context.pause_requested_at = None
-        self.context.stop_requested_at = None
-        
-        if from_stage:
-            self.context.resume_from_stage = from_stage
+        with self._context_lock:
+            self.context.control_status = ControlStatus.RUNNING
+            self.context.pause_requested_at = None
+            self.context.stop_requested_at = None
+            if from_stage:
+                self.context.resume_from_stage = from_stage
+        self.control_watcher.set_status(ControlStatus.RUNNING)
         
         self._save_context()
         
+        # 保存上下文时不会写回 running 控制状态，这里显式写入并通知订阅者
+        try:
+            self.context_manager.db.update_project(
+                self.project_id, {'control_status': ControlStatus.RUNNING.value}
+            )
+        except Exception as e:
+            logger.error(f"Failed to save resumed control status: {e}")
+        publish_control_signal(self.project_id, ControlStatus.RUNNING.value)
+        
         return True
     
     def stop(self) -> bool:
@@ -495,12 +683,22 @@ class WorkflowEngine:
         self._stop_requested = True
         
         # 更新上下文
-        self.context.control_status = ControlStatus.STOPPED
-        self.context.stop_requested_at = datetime.now(timezone.utc)
+        with self._context_lock:
+            self.context.control_status = ControlStatus.STOPPED
+            self.context.stop_requested_at = datetime.now(timezone.utc)
+        self.control_watcher.set_status(ControlStatus.STOPPED)
         self._save_context()
+        publish_control_signal(
+            self.project_id, ControlStatus.STOPPED.value, self.context.stop_requested_at.isoformat()
+        )
         
         return True
     
+    def close(self) -> None:
+        """取消控制信号订阅"""
+        if self._control_watcher is not None:
+            self._control_watcher.close()
+    
     def _check_control_signals(self) -> None:
         """
         检查控制信号
@@ -508,7 +706,7 @@ class WorkflowEngine:
         Raises:
             WorkflowControlSignal: 如果有控制信号
         """
-        # 重新加载上下文以获取最新的控制状态
+        # 从控制信号监视器同步最新的控制状态
         self._refresh_control_status()
         
         if self._stop_requested or self.context.control_status == ControlStatus.STOPPED:
@@ -518,28 +716,28 @@ class WorkflowEngine:
             raise WorkflowControlSignal(WorkflowControlSignal.PAUSE, "Pause requested")
     
     def _refresh_control_status(self) -> None:
-        """刷新控制状态（从数据库重新加载）"""
-        try:
-            project = self.context_manager.db.get_project(self.project_id)
-            if project:
-                control_status_str = project.get('control_status', 'running')
-                try:
-                    self.context.control_status = ControlStatus(control_status_str)
-                except ValueError:
-                    pass
-                
-                # 更新本地标志
-                if self.context.control_status == ControlStatus.PAUSED:
-                    self._pause_requested = True
-                elif self.context.control_status == ControlStatus.STOPPED:
-                    self._stop_requested = True
-        except Exception as e:
-            logger.warning(f"Failed to refresh control status: {e}")
+        """刷新控制状态（从控制信号监视器同步，不读取数据库）"""
+        watcher_status = self.control_watcher.status
+        with self._context_lock:
+            if watcher_status != ControlStatus.RUNNING:
+                self.context.control_status = watcher_status
+            control_status = self.context.control_status
+        
+        # 更新本地标志
+        if control_status == ControlStatus.PAUSED:
+            self._pause_requested = True
+        elif control_status in (ControlStatus.STOPPED, ControlStatus.CANCELLED):
+            self._stop_requested = True
     
     def _save_context(self) -> None:
         """保存上下文到 DynamoDB"""
         try:
-            self.context_manager.save_to_db(self.context)
+            # 控制状态已由监视器同步，保存前无需再从数据库刷新；
+            # 上下文锁只在生成快照时持有，写入 DynamoDB 时其他阶段线程无需等待
+            self._refresh_control_status()
+            self.context_manager.save_to_db(
+                self.context, refresh_control_status=False, lock=self._context_lock
+            )
         except Exception as e:
             logger.error(f"Failed to save context: {e}")
     
@@ -550,15 +748,17 @@ class WorkflowEngine:
         返回:
             Dict: 状态信息
         """
-        return {
-            'project_id': self.project_id,
-            'status': self.context.status.value,
-            'control_status': self.context.control_status.value,
-            'current_stage': self.context.current_stage,
-            'completed_stages': self.context.get_completed_stages(),
-            'pending_stages': self.context.get_pending_stages(),
-            'aggregated_metrics': self.context.aggregated_metrics.to_dict(),
-        }
+        with self._context_lock:
+            return {
+                'project_id': self.project_id,
+                'status': self.context.status.value,
+                'control_status': self.context.control_status.value,
+                'current_stage': self.context.current_stage,
+                'running_stages': sorted(self._running_stages),
+                'completed_stages': self.context.get_completed_stages(),
+                'pending_stages': self.context.get_pending_stages(),
+                'aggregated_metrics': self.context.aggregated_metrics.to_dict(),
+            }
 
 
 # 便捷函数
@@ -15,9 +15,9 @@ Requirements:
 """
 
 import logging
+import threading
 import time
 import os
-import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Callable, TYPE_CHECKING
@@ -29,7 +29,9 @@ from .models import (
     FileMetadata,
     StageStatus,
 )
-from .context import WorkflowContextManager, get_stage_context
+from .context import WorkflowContextManager, build_stage_context
+from .control import ControlSignalWatcher, ControlSignalHook, WorkflowControlSignal
+from nexus_utils.file_index import FileIndex, FileSnapshot, get_file_index
 
 # 从统一配置模块导入阶段配置
 from api.v2.core.stage_config import (
@@ -99,6 +101,8 @@ class StageExecutor:
         on_stage_complete: Optional[Callable[[str, StageOutput], None]] = None,
         on_stage_error: Optional[Callable[[str, Exception], None]] = None,
         enable_multi_agent: bool = True,
+        control_watcher: Optional[ControlSignalWatcher] = None,
+        context_lock: Optional[threading.RLock] = None,
     ):
         """
         初始化阶段执行器
@@ -110,6 +114,8 @@ class StageExecutor:
             on_stage_complete: 阶段完成回调
             on_stage_error: 阶段错误回调
             enable_multi_agent: 是否启用多 Agent 迭代处理
+            control_watcher: 控制信号监视器（可选），用于在阶段执行中途响应暂停/停止
+            context_lock: 上下文锁（可选），并行执行的阶段共享上下文时由引擎传入
         """
         self.context = context
         self.context_manager = context_manager or WorkflowContextManager()
@@ -117,6 +123,8 @@ class StageExecutor:
         self.on_stage_complete = on_stage_complete
         self.on_stage_error = on_stage_error
         self.enable_multi_agent = enable_multi_agent
+        self.control_watcher = control_watcher
+        self._context_lock = context_lock or threading.RLock()
         
         # 执行过程中的指标收集
         self._current_metrics = StageMetrics()
@@ -125,6 +133,9 @@ class StageExecutor:
         # 多 Agent 支持（延迟初始化）
         self._multi_agent_iterator: Optional['MultiAgentIterator'] = None
         self._multi_agent_executor: Optional['MultiAgentStageExecutor'] = None
+        
+        # 迭代阶段中各 Agent 共享的基础上下文（阶段名 -> 上下文），作为提示词缓存的稳定前缀
+        self._iteration_contexts: Dict[str, str] = {}
     
     @property
     def multi_agent_iterator(self) -> 'MultiAgentIterator':
@@ -211,6 +222,10 @@ class StageExecutor:
                     recoverable=False
                 )
             
+            # 在模型调用和工具调用之间检查控制信号
+            if self.control_watcher is not None and hasattr(agent, 'hooks'):
+                agent.hooks.add_hook(ControlSignalHook(self.control_watcher))
+            
             return agent
             
         except Exception as e:
@@ -230,12 +245,18 @@ class StageExecutor:
         返回:
             str: 格式化的上下文字符串
         """
-        return get_stage_context(
-            self.context, 
-            stage_name,
-            include_rules=True,
-            include_local_docs=True,
-        )
+        with self._context_lock:
+            return build_stage_context(
+                self.context, 
+                stage_name,
+                include_rules=True,
+                include_local_docs=True,
+            ).text
+    
+    def _update_stage_output(self, stage_name: str, output: StageOutput) -> None:
+        """更新上下文中的阶段输出和聚合指标"""
+        with self._context_lock:
+            self.context.update_stage_output(stage_name, output)
     
     def execute_stage(
         self, 
@@ -279,6 +300,9 @@ class StageExecutor:
         """
         执行迭代阶段（多 Agent）
         
+        各 Agent 的输出由多 Agent 执行器合并，合并结果作为阶段输出写入上下文；
+        生成的文件在所有 Agent 完成后统一扫描一次。
+        
         参数:
             stage_name: 阶段名称
             input_message: 输入消息
@@ -290,13 +314,102 @@ class StageExecutor:
         # 准备基础上下文
         base_context = input_message or self.format_context(stage_name)
         
-        # 使用多 Agent 执行器
-        return self.multi_agent_executor.execute_iterative_stage(
-            stage_name,
-            self,  # 传递自身作为基础执行器
-            base_context,
-            state,
-        )
+        # 触发开始回调
+        if self.on_stage_start:
+            self.on_stage_start(stage_name)
+        
+        start_time = time.time()
+        baseline = self._snapshot_project_files()
+        self._iteration_contexts[stage_name] = base_context
+        
+        try:
+            # 使用多 Agent 执行器
+            output = self.multi_agent_executor.execute_iterative_stage(
+                stage_name,
+                self,  # 传递自身作为基础执行器
+                base_context,
+                state,
+            )
+            
+            # 扫描生成的文件
+            output.generated_files = self._scan_generated_files(stage_name, baseline)
+            
+            # 更新上下文
+            self._update_stage_output(stage_name, output)
+            
+            # 触发完成回调
+            if self.on_stage_complete:
+                self.on_stage_complete(stage_name, output)
+            
+            logger.info(f"Stage {stage_name} completed successfully")
+            return output
+            
+        except WorkflowControlSignal:
+            raise
+        except Exception as e:
+            message = e.message if isinstance(e, StageExecutionError) else str(e)
+            
+            # 创建失败输出
+            output = StageOutput(
+                stage_name=stage_name,
+                content="",
+                metrics=StageMetrics(execution_time_seconds=time.time() - start_time),
+                completed_at=datetime.now(timezone.utc),
+                status=StageStatus.FAILED,
+                error_message=message,
+            )
+            
+            # 更新上下文
+            self._update_stage_output(stage_name, output)
+            
+            # 触发错误回调
+            if self.on_stage_error:
+                self.on_stage_error(stage_name, e)
+            
+            logger.error(f"Stage {stage_name} failed: {message}")
+            if isinstance(e, StageExecutionError):
+                raise
+            raise StageExecutionError(stage_name, message, recoverable=True)
+        finally:
+            self._iteration_contexts.pop(stage_name, None)
+    
+    def execute_agent_iteration(
+        self,
+        stage_name: str,
+        input_message: Optional[str] = None,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> StageOutput:
+        """
+        为多 Agent 项目中的单个 Agent 执行阶段
+        
+        只执行 Agent 并返回输出，不写入上下文、不触发阶段回调、不扫描生成的文件，
+        可以在多个线程中并行调用。
+        
+        参数:
+            stage_name: 阶段名称
+            input_message: 输入消息
+            state: Agent 状态
+            
+        返回:
+            StageOutput: 该 Agent 的阶段输出
+            
+        Raises:
+            StageExecutionError: Agent 执行失败
+            WorkflowControlSignal: 执行被暂停/停止打断
+        """
+        try:
+            return self._run_stage_agent(
+                stage_name,
+                input_message,
+                state,
+                scan_files=False,
+                context_prefix=self._iteration_contexts.get(stage_name),
+            )
+        except (StageExecutionError, WorkflowControlSignal):
+            raise
+        except Exception as e:
+            self._raise_if_interrupted(stage_name, e)
+            raise StageExecutionError(stage_name, str(e), recoverable=True)
     
     def _execute_single_agent_stage(
         self,
@@ -328,48 +441,10 @@ class StageExecutor:
         start_time = time.time()
         
         try:
-            # 创建 Agent
-            agent = self.create_agent(stage_name, state)
-            
-            # 准备输入消息
-            if input_message is None:
-                input_message = self.format_context(stage_name)
-            
-            # 执行 Agent
-            logger.info(f"Invoking agent for stage: {stage_name}")
-            result = agent(input_message)
-            
-            # 计算执行时间
-            execution_time = time.time() - start_time
-            
-            # 收集指标
-            metrics = self._collect_metrics(agent, execution_time)
-            
-            # 扫描生成的文件
-            generated_files = self._scan_generated_files(stage_name)
-            
-            # 提取输出内容
-            output_content = self._extract_output_content(result)
-            
-            # 提取设计文档（如果有）
-            document_content, document_format = self._extract_design_document(
-                stage_name, output_content
-            )
-            
-            # 创建阶段输出
-            output = StageOutput(
-                stage_name=stage_name,
-                content=output_content,
-                metrics=metrics,
-                generated_files=generated_files,
-                document_content=document_content,
-                document_format=document_format,
-                completed_at=datetime.now(timezone.utc),
-                status=StageStatus.COMPLETED,
-            )
+            output = self._run_stage_agent(stage_name, input_message, state)
             
             # 更新上下文
-            self.context.update_stage_output(stage_name, output)
+            self._update_stage_output(stage_name, output)
             
             # 触发完成回调
             if self.on_stage_complete:
@@ -378,9 +453,11 @@ class StageExecutor:
             logger.info(f"Stage {stage_name} completed successfully")
             return output
             
-        except StageExecutionError:
+        except (StageExecutionError, WorkflowControlSignal):
             raise
         except Exception as e:
+            self._raise_if_interrupted(stage_name, e)
+            
             # 计算执行时间
             execution_time = time.time() - start_time
             
@@ -395,7 +472,7 @@ class StageExecutor:
             )
             
             # 更新上下文
-            self.context.update_stage_output(stage_name, output)
+            self._update_stage_output(stage_name, output)
             
             # 触发错误回调
             if self.on_stage_error:
@@ -404,6 +481,99 @@ class StageExecutor:
             logger.error(f"Stage {stage_name} failed: {e}")
             raise StageExecutionError(stage_name, str(e), recoverable=True)
     
+    def _run_stage_agent(
+        self,
+        stage_name: str,
+        input_message: Optional[str] = None,
+        state: Optional[Dict[str, Any]] = None,
+        scan_files: bool = True,
+        context_prefix: Optional[str] = None,
+    ) -> StageOutput:
+        """
+        创建并执行阶段 Agent，返回阶段输出（不写入上下文）
+        
+        模板启用提示词缓存（prompt_cache.context_prefix）时，上下文的稳定前缀之后放置缓存点。
+        
+        参数:
+            stage_name: 阶段名称
+            input_message: 输入消息（可选，默认使用格式化的上下文）
+            state: Agent 状态
+            scan_files: 是否扫描生成的文件
+            context_prefix: 输入消息中可缓存的稳定前缀（可选）
+            
+        返回:
+            StageOutput: 阶段输出
+        """
+        # 记录开始时间
+        start_time = time.time()
+        baseline = self._snapshot_project_files() if scan_files else None
+        
+        # 创建 Agent 前确认没有待处理的控制信号
+        if self.control_watcher is not None:
+            self.control_watcher.raise_if_signalled()
+        
+        # 创建 Agent
+        agent = self.create_agent(stage_name, state)
+        
+        from nexus_utils.agent_factory import build_agent_input
+        
+        # 准备输入消息
+        if input_message is None:
+            with self._context_lock:
+                parts = build_stage_context(
+                    self.context,
+                    stage_name,
+                    include_rules=True,
+                    include_local_docs=True,
+                )
+            agent_input = build_agent_input(agent, parts.prefix, parts.suffix)
+        elif context_prefix and input_message.startswith(context_prefix):
+            agent_input = build_agent_input(
+                agent, context_prefix, input_message[len(context_prefix):]
+            )
+        else:
+            agent_input = input_message
+        
+        # 执行 Agent
+        logger.info(f"Invoking agent for stage: {stage_name}")
+        result = agent(agent_input)
+        
+        # 计算执行时间
+        execution_time = time.time() - start_time
+        
+        # 收集指标
+        metrics = self._collect_metrics(agent, execution_time)
+        
+        # 扫描生成的文件
+        generated_files = self._scan_generated_files(stage_name, baseline) if scan_files else []
+        
+        # 提取输出内容
+        output_content = self._extract_output_content(result)
+        
+        # 提取设计文档（如果有）
+        document_content, document_format = self._extract_design_document(
+            stage_name, output_content
+        )
+        
+        # 创建阶段输出
+        return StageOutput(
+            stage_name=stage_name,
+            content=output_content,
+            metrics=metrics,
+            generated_files=generated_files,
+            document_content=document_content,
+            document_format=document_format,
+            completed_at=datetime.now(timezone.utc),
+            status=StageStatus.COMPLETED,
+        )
+    
+    def _raise_if_interrupted(self, stage_name: str, error: Exception) -> None:
+        """Hook 抛出的控制信号可能被 Agent 事件循环包装，按控制信号处理"""
+        signal_type = self.control_watcher.pending_signal() if self.control_watcher else None
+        if signal_type:
+            logger.info(f"Stage {stage_name} interrupted by {signal_type} signal")
+            raise WorkflowControlSignal(signal_type, f"Interrupted during stage {stage_name}") from error
+    
     def _collect_metrics(self, agent, execution_time: float) -> StageMetrics:
         """
         从 Agent 收集执行指标
@@ -421,9 +591,15 @@ class StageExecutor:
             execution_time_seconds=execution_time,
         )
         
-        # 尝试从 Agent 获取 token 使用情况
+        # 尝试从 Agent 获取 token 使用情况（包括提示词缓存的读写量）
         try:
-            if hasattr(agent, 'model') and hasattr(agent.model, 'usage'):
+            usage = getattr(getattr(agent, 'event_loop_metrics', None), 'accumulated_usage', None)
+            if isinstance(usage, dict):
+                metrics.input_tokens = usage.get('inputTokens', 0)
+                metrics.output_tokens = usage.get('outputTokens', 0)
+                metrics.cache_read_input_tokens = usage.get('cacheReadInputTokens', 0)
+                metrics.cache_write_input_tokens = usage.get('cacheWriteInputTokens', 0)
+            elif hasattr(agent, 'model') and hasattr(agent.model, 'usage'):
                 usage = agent.model.usage
                 if hasattr(usage, 'input_tokens'):
                     metrics.input_tokens = usage.input_tokens
@@ -447,59 +623,77 @@ class StageExecutor:
         
         return metrics
     
-    def _scan_generated_files(self, stage_name: str) -> List[FileMetadata]:
+    def _get_project_file_index(self) -> Optional[FileIndex]:
+        """获取项目目录的共享文件索引，项目目录不存在时返回 None"""
+        project_root = _get_project_root()
+        
+        # 确定项目目录
+        project_dir = project_root / "projects" / self.context.project_name
+        if not project_dir.exists():
+            project_dir = project_root / "projects" / self.context.project_id
+        
+        if not project_dir.exists():
+            return None
+        return get_file_index(project_dir)
+    
+    def _snapshot_project_files(self) -> FileSnapshot:
+        """记录阶段开始时的项目文件快照，作为计算阶段生成文件的基准"""
+        index = self._get_project_file_index()
+        if index is None:
+            return {}
+        try:
+            return index.scan()
+        except Exception as e:
+            logger.warning(f"Failed to snapshot project files: {e}")
+            return {}
+    
+    def _scan_generated_files(
+        self,
+        stage_name: str,
+        baseline: Optional[FileSnapshot] = None,
+    ) -> List[FileMetadata]:
         """
         扫描阶段生成的文件
         
+        与阶段开始时的快照比较，只返回阶段执行期间新增或修改的文件；
+        文件索引只对大小、修改时间或 inode 变化的文件重新计算校验和。
+        并行执行的阶段会同时看到对方写入的文件。
+        
         参数:
             stage_name: 阶段名称
+            baseline: 阶段开始时的文件快照（未提供时返回项目目录中的全部文件）
             
         返回:
             List[FileMetadata]: 生成的文件列表
             
         Validates: Requirement 2.3 - 记录生成的文件
         """
-        files = []
-        project_root = _get_project_root()
+        index = self._get_project_file_index()
+        if index is None:
+            return []
         
-        # 确定项目目录
-        project_dir = project_root / "projects" / self.context.project_name
-        if not project_dir.exists():
-            project_dir = project_root / "projects" / self.context.project_id
-        
-        if not project_dir.exists():
-            return files
-        
-        # 扫描项目目录中的文件
         try:
-            for file_path in project_dir.rglob("*"):
-                if file_path.is_file() and not file_path.name.startswith('.'):
-                    # 计算相对路径
-                    relative_path = str(file_path.relative_to(project_dir))
-                    
-                    # 获取文件信息
-                    stat = file_path.stat()
-                    
-                    # 计算校验和
-                    checksum = None
-                    try:
-                        with open(file_path, 'rb') as f:
-                            checksum = hashlib.md5(f.read()).hexdigest()
-                    except:
-                        pass
-                    
-                    files.append(FileMetadata(
-                        path=relative_path,
-                        size=stat.st_size,
-                        checksum=checksum,
-                        last_modified=datetime.fromtimestamp(
-                            stat.st_mtime, tz=timezone.utc
-                        ),
-                    ))
+            _, delta = index.scan_delta(baseline or {})
         except Exception as e:
             logger.warning(f"Failed to scan generated files: {e}")
+            return []
         
-        return files
+        logger.info(
+            f"Stage {stage_name} files: {len(delta.added)} added, "
+            f"{len(delta.modified)} modified, {len(delta.removed)} removed"
+        )
+        if delta.removed:
+            logger.info(f"Stage {stage_name} removed files: {delta.removed}")
+        
+        return [
+            FileMetadata(
+                path=entry.path,
+                size=entry.size,
+                checksum=entry.checksum,
+                last_modified=entry.last_modified,
+            )
+            for entry in delta.changed
+        ]
     
     def _extract_output_content(self, result) -> str:
         """
@@ -13,7 +13,6 @@ Requirements:
 
 import logging
 import os
-import hashlib
 import boto3
 from datetime import datetime, timezone
 from pathlib import Path
@@ -21,6 +20,7 @@ from typing import Dict, List, Optional, Any, BinaryIO
 from dataclasses import dataclass, field
 
 from .models import FileMetadata
+from nexus_utils.file_index import file_checksum, get_file_index
 
 logger = logging.getLogger(__name__)
 
@@ -116,37 +116,28 @@ class FileMetadataManager:
             logger.warning(f"Project directory not found: {project_dir}")
             return files
         
-        # 扫描所有文件
-        for file_path in project_dir.rglob("*"):
-            if file_path.is_file() and not file_path.name.startswith('.'):
-                try:
-                    # 计算相对路径
-                    relative_path = str(file_path.relative_to(project_dir))
-                    
-                    # 获取文件信息
-                    stat = file_path.stat()
-                    
-                    # 计算校验和
-                    checksum = self._calculate_checksum(file_path)
-                    
-                    files.append(FileMetadata(
-                        path=relative_path,
-                        size=stat.st_size,
-                        checksum=checksum,
-                        last_modified=datetime.fromtimestamp(
-                            stat.st_mtime, tz=timezone.utc
-                        ),
-                    ))
-                except Exception as e:
-                    logger.warning(f"Failed to scan file {file_path}: {e}")
+        # 扫描所有文件（只对变化的文件重新计算校验和）
+        try:
+            snapshot = get_file_index(project_dir).scan()
+        except Exception as e:
+            logger.warning(f"Failed to scan project files in {project_dir}: {e}")
+            return files
+        
+        for relative_path in sorted(snapshot):
+            entry = snapshot[relative_path]
+            files.append(FileMetadata(
+                path=entry.path,
+                size=entry.size,
+                checksum=entry.checksum,
+                last_modified=entry.last_modified,
+            ))
         
         return files
     
     def _calculate_checksum(self, file_path: Path) -> str:
-        """计算文件 MD5 校验和"""
+        """计算文件校验和"""
         try:
-            with open(file_path, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
+            return file_checksum(file_path)
         except Exception:
             return ""
     
@@ -11,10 +11,11 @@ Requirements:
     - 9.4: Stage_Context 包含编排器阶段的意图分析结果
 """
 
+import json
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 
 
 def _get_stage_sequence() -> List[str]:
@@ -27,6 +28,16 @@ def _get_stage_sequence() -> List[str]:
     return STAGE_SEQUENCE.copy()
 
 
+def _get_stage_dependencies() -> Dict[str, List[str]]:
+    """
+    从统一配置模块获取各阶段直接依赖的上游阶段
+    
+    延迟导入以避免循环依赖
+    """
+    from api.v2.core.stage_config import STAGE_DEPENDENCIES
+    return {stage: list(deps) for stage, deps in STAGE_DEPENDENCIES.items()}
+
+
 def _get_stage_order() -> List[str]:
     """
     获取阶段顺序（模块级别导出）
@@ -105,6 +116,66 @@ class ControlStatus(Enum):
     CANCELLED = "cancelled"
 
 
+def _fingerprint(value: Any) -> int:
+    """
+    计算存储属性值的指纹，用于脏数据检测
+
+    字符串直接使用 hash()（CPython 会缓存字符串的哈希值，未变化的大段内容重复计算开销可忽略），
+    字典/列表等结构使用其 JSON 序列化结果的哈希。
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return hash(value)
+    return hash(json.dumps(value, sort_keys=True, default=str))
+
+
+def changed_attributes(fingerprints: Dict[str, int], record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    返回相对上次持久化发生变化的属性
+
+    参数:
+        fingerprints: 上次持久化时各属性的指纹
+        record: 当前的存储记录
+
+    返回:
+        Dict[str, Any]: 需要写入的属性
+    """
+    return {
+        name: value for name, value in record.items()
+        if fingerprints.get(name) != _fingerprint(value)
+    }
+
+
+class _LazyText:
+    """
+    按需加载的文本字段（数据描述符）
+    
+    阶段输出的内容和设计文档体积较大，列表/状态查询只需要元数据。
+    调用 StageOutput.defer_content() 后，首次访问字段时才通过加载函数读取内容。
+    """
+    
+    def __init__(self, default: str = ""):
+        self.default = default
+        self.name = None
+    
+    def __set_name__(self, owner, name):
+        self.name = name
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self.default
+        if self.name not in obj.__dict__:
+            obj._load_content()
+        return obj.__dict__.get(self.name, self.default)
+    
+    def __set__(self, obj, value):
+        if self.name == 'content' and getattr(obj, 's3_content_ref', None):
+            # 内容被替换后原 S3 引用失效，由持久化层重新判断是否转存
+            deferred = self.name not in obj.__dict__ and obj._content_loader is not None
+            if deferred or obj.__dict__.get(self.name, value) != value:
+                obj.s3_content_ref = None
+        obj.__dict__[self.name] = value
+
+
 @dataclass
 class StageMetrics:
     """
@@ -120,12 +191,16 @@ class StageMetrics:
         execution_time_seconds: 执行时间（秒）
         tool_calls_count: 工具调用次数
         model_id: 使用的模型 ID（可选）
+        cache_read_input_tokens: 从提示词缓存读取的输入 token 数量
+        cache_write_input_tokens: 写入提示词缓存的输入 token 数量
     """
     input_tokens: int = 0
     output_tokens: int = 0
     execution_time_seconds: float = 0.0
     tool_calls_count: int = 0
     model_id: Optional[str] = None
+    cache_read_input_tokens: int = 0
+    cache_write_input_tokens: int = 0
     
     @property
     def total_tokens(self) -> int:
@@ -137,6 +212,19 @@ class StageMetrics:
         """
         return self.input_tokens + self.output_tokens
     
+    @property
+    def cache_hit_ratio(self) -> float:
+        """
+        计算提示词缓存命中率
+        
+        返回:
+            float: 缓存读取 token 占全部输入 token（含缓存读写）的比例
+        """
+        prompt_tokens = self.input_tokens + self.cache_read_input_tokens + self.cache_write_input_tokens
+        if prompt_tokens == 0:
+            return 0.0
+        return self.cache_read_input_tokens / prompt_tokens
+    
     def to_dict(self) -> Dict[str, Any]:
         """
         转换为字典格式
@@ -151,6 +239,8 @@ class StageMetrics:
             "tool_calls_count": self.tool_calls_count,
             "model_id": self.model_id,
             "total_tokens": self.total_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cache_write_input_tokens": self.cache_write_input_tokens,
         }
     
     @classmethod
@@ -170,6 +260,8 @@ class StageMetrics:
             execution_time_seconds=data.get("execution_time_seconds", 0.0),
             tool_calls_count=data.get("tool_calls_count", 0),
             model_id=data.get("model_id"),
+            cache_read_input_tokens=data.get("cache_read_input_tokens", 0),
+            cache_write_input_tokens=data.get("cache_write_input_tokens", 0),
         )
 
 
@@ -183,7 +275,7 @@ class FileMetadata:
     属性:
         path: 文件相对路径（相对于 projects/<agent_name>/）
         size: 文件大小（字节）
-        checksum: MD5 校验和（可选）
+        checksum: SHA-256 校验和（可选）
         last_modified: 最后修改时间（可选）
     """
     path: str
@@ -239,7 +331,8 @@ class StageOutput:
     
     属性:
         stage_name: 阶段名称
-        content: Agent 输出内容（最大 400KB，超出存储 S3 引用）
+        content: Agent 输出内容（超过转存阈值时内容存入 S3，记录中保存 s3_content_ref；
+                 从数据库加载时按需读取）
         metrics: 执行指标
         generated_files: 生成的文件列表
         document_content: 设计文档内容（JSON 或 Markdown 格式）
@@ -247,22 +340,61 @@ class StageOutput:
         completed_at: 完成时间
         status: 阶段状态
         error_message: 错误信息（失败时）
-        s3_content_ref: S3 内容引用（内容超过 400KB 时使用）
+        s3_content_ref: S3 内容引用（内容超过转存阈值时使用）
     """
     stage_name: str
-    content: str = ""
+    content: str = _LazyText()
     metrics: StageMetrics = field(default_factory=StageMetrics)
     generated_files: List[FileMetadata] = field(default_factory=list)
-    document_content: str = ""
-    document_format: str = "markdown"
+    document_content: str = _LazyText()
+    document_format: str = _LazyText(default="markdown")
     completed_at: Optional[datetime] = None
     status: StageStatus = StageStatus.PENDING
     error_message: Optional[str] = None
     s3_content_ref: Optional[str] = None
     
+    # 上次写入/加载时各存储属性的指纹（脏数据检测用，不参与比较）
+    _persisted_fingerprints: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+    
+    # 延迟加载内容的函数，返回 content/document_content/document_format 字典
+    _content_loader: Optional[Callable[[], Dict[str, Any]]] = field(default=None, repr=False, compare=False)
+    
     # 内容大小限制（400KB）
     MAX_CONTENT_SIZE = 400 * 1024
     
+    # 按需加载的内容字段
+    LAZY_FIELDS = ("content", "document_content", "document_format")
+    
+    def defer_content(self, loader: Callable[[], Dict[str, Any]]) -> None:
+        """
+        延迟加载输出内容
+        
+        参数:
+            loader: 首次访问内容字段时调用，返回包含 content/document_content/document_format 的字典
+        """
+        for name in self.LAZY_FIELDS:
+            self.__dict__.pop(name, None)
+        self._content_loader = loader
+    
+    def _load_content(self) -> None:
+        """调用加载函数填充内容字段，并将加载结果视为已持久化"""
+        loader, self._content_loader = self._content_loader, None
+        data = loader() if loader else {}
+        for name in self.LAZY_FIELDS:
+            if name not in self.__dict__:
+                self.__dict__[name] = data.get(name) or getattr(type(self), name)
+        if loader:
+            record = self.to_stage_record()
+            self.mark_persisted({
+                name: record[name] for name in ('agent_output_content', 'design_document')
+                if name in record
+            })
+    
+    @property
+    def is_content_loaded(self) -> bool:
+        """内容字段是否已加载（未加载时访问会触发读取）"""
+        return all(name in self.__dict__ for name in self.LAZY_FIELDS)
+    
     @property
     def is_completed(self) -> bool:
         """
@@ -313,6 +445,67 @@ class StageOutput:
             "error_message": self.error_message,
         }
     
+    def to_stage_record(self) -> Dict[str, Any]:
+        """
+        转换为阶段表记录的属性（不含主键）
+        
+        返回:
+            Dict[str, Any]: 阶段表中需要保存的属性
+        """
+        record = {
+            'status': self.status.value,
+            'agent_output_s3_ref': self.s3_content_ref,
+            'metrics': self.metrics.to_dict(),
+            'generated_files': [f.to_dict() for f in self.generated_files],
+            'error_message': self.error_message,
+        }
+        
+        # 内容未加载时不输出内容属性，避免为计算记录触发读取
+        if not self.is_content_loaded:
+            if self.completed_at:
+                record['completed_at'] = self.completed_at.isoformat()
+            return record
+        
+        record['agent_output_content'] = self.content if not self.s3_content_ref else ''
+        
+        if self.document_content:
+            record['design_document'] = {
+                'content': self.document_content,
+                'format': self.document_format,
+            }
+        
+        if self.completed_at:
+            record['completed_at'] = self.completed_at.isoformat()
+        
+        return record
+    
+    def dirty_attributes(self) -> Dict[str, Any]:
+        """
+        获取自上次持久化以来发生变化的阶段记录属性
+        
+        返回:
+            Dict[str, Any]: 需要写入的属性（未变化时为空字典）
+        """
+        return changed_attributes(self._persisted_fingerprints, self.to_stage_record())
+    
+    @property
+    def is_dirty(self) -> bool:
+        """检查是否存在未持久化的修改"""
+        return bool(self.dirty_attributes())
+    
+    def mark_persisted(self, attributes: Optional[Dict[str, Any]] = None) -> None:
+        """
+        记录已持久化的属性
+        
+        参数:
+            attributes: 已写入的属性，为 None 时表示当前全部属性与存储一致
+        """
+        if attributes is None:
+            attributes = self.to_stage_record()
+        self._persisted_fingerprints.update(
+            (name, _fingerprint(value)) for name, value in attributes.items()
+        )
+    
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "StageOutput":
         """
@@ -554,12 +747,14 @@ class AgentStageProgress:
         agent_name: Agent 名称
         stage_statuses: 各阶段状态（键为阶段名称）
         current_stage: 当前阶段
+        stage_durations: 各阶段执行耗时（秒，键为阶段名称）
         completed_stages: 已完成阶段数
         total_stages: 总阶段数
     """
     agent_name: str
     stage_statuses: Dict[str, StageStatus] = field(default_factory=dict)
     current_stage: str = ""
+    stage_durations: Dict[str, float] = field(default_factory=dict)
     
     # Agent 开发相关的阶段
     AGENT_STAGES: List[str] = field(default_factory=lambda: [
@@ -600,6 +795,7 @@ class AgentStageProgress:
             "agent_name": self.agent_name,
             "stage_statuses": {k: v.value for k, v in self.stage_statuses.items()},
             "current_stage": self.current_stage,
+            "stage_durations": dict(self.stage_durations),
             "completed_stages": self.completed_stages,
             "total_stages": self.total_stages,
             "progress_percentage": self.progress_percentage,
@@ -616,6 +812,7 @@ class AgentStageProgress:
             agent_name=data.get("agent_name", ""),
             stage_statuses=stage_statuses,
             current_stage=data.get("current_stage", ""),
+            stage_durations=dict(data.get("stage_durations", {})),
         )
 
 
@@ -742,6 +939,35 @@ class WorkflowContext:
     # 工作流阶段顺序定义 - 从统一配置模块获取
     STAGE_ORDER: List[str] = field(default_factory=lambda: _get_stage_sequence())
     
+    # 各阶段直接依赖的上游阶段 - 从统一配置模块获取
+    STAGE_DEPENDENCIES: Dict[str, List[str]] = field(default_factory=lambda: _get_stage_dependencies())
+    
+    # 上次写入/加载时项目记录各属性的指纹（脏数据检测用，不参与比较）
+    _persisted_project_fingerprints: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+    
+    def dirty_project_attributes(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        获取项目记录中自上次持久化以来发生变化的属性
+        
+        参数:
+            record: 当前上下文对应的项目记录属性
+            
+        返回:
+            Dict[str, Any]: 需要写入的属性
+        """
+        return changed_attributes(self._persisted_project_fingerprints, record)
+    
+    def mark_project_persisted(self, attributes: Dict[str, Any]) -> None:
+        """
+        记录已持久化的项目记录属性
+        
+        参数:
+            attributes: 已写入（或从存储加载）的属性
+        """
+        self._persisted_project_fingerprints.update(
+            (name, _fingerprint(value)) for name, value in attributes.items()
+        )
+    
     def get_completed_stages(self) -> List[str]:
         """
         获取所有已完成的阶段列表
@@ -804,21 +1030,48 @@ class WorkflowContext:
         if output.is_completed:
             self.aggregated_metrics.add_stage_metrics(output.metrics)
     
-    def get_prerequisite_stages(self, stage_name: str) -> List[str]:
+    def get_stage_dependencies(self, stage_name: str) -> List[str]:
         """
-        获取指定阶段的前置阶段列表
+        获取指定阶段直接依赖的上游阶段
+        
+        未配置依赖关系的阶段依赖其前一个阶段（按顺序串行执行）
         
         参数:
             stage_name: 阶段名称
             
         返回:
-            List[str]: 前置阶段名称列表
+            List[str]: 直接依赖的阶段名称列表
         """
         if stage_name not in self.STAGE_ORDER:
             return []
         
+        if stage_name in self.STAGE_DEPENDENCIES:
+            return [s for s in self.STAGE_DEPENDENCIES[stage_name] if s in self.STAGE_ORDER]
+        
         stage_index = self.STAGE_ORDER.index(stage_name)
-        return self.STAGE_ORDER[:stage_index]
+        return self.STAGE_ORDER[stage_index - 1:stage_index]
+    
+    def get_prerequisite_stages(self, stage_name: str) -> List[str]:
+        """
+        获取指定阶段的前置阶段列表
+        
+        前置阶段为依赖链上的全部上游阶段（直接依赖及其依赖），不包含与当前阶段互不依赖的并行分支
+        
+        参数:
+            stage_name: 阶段名称
+            
+        返回:
+            List[str]: 前置阶段名称列表（按执行顺序）
+        """
+        prerequisites = set()
+        pending = self.get_stage_dependencies(stage_name)
+        while pending:
+            dependency = pending.pop()
+            if dependency not in prerequisites:
+                prerequisites.add(dependency)
+                pending.extend(self.get_stage_dependencies(dependency))
+        
+        return [s for s in self.STAGE_ORDER if s in prerequisites]
     
     def are_prerequisites_completed(self, stage_name: str) -> bool:
         """
@@ -16,8 +16,11 @@ Requirements:
 import logging
 import json
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 
 from .models import (
     WorkflowContext,
@@ -27,6 +30,7 @@ from .models import (
     MultiAgentArchitecture,
     AgentStageProgress,
 )
+from .control import WorkflowControlSignal
 
 # 从统一配置模块导入
 from api.v2.core.stage_config import ITERATIVE_STAGES as _ITERATIVE_STAGES
@@ -34,6 +38,31 @@ from api.v2.core.stage_config import ITERATIVE_STAGES as _ITERATIVE_STAGES
 logger = logging.getLogger(__name__)
 
 
+# 迭代阶段调度的默认配置（config/default_config.yaml 中 workflow.multi_agent 可覆盖）
+DEFAULT_MAX_PARALLEL_AGENTS = 3
+DEFAULT_AGENT_START_INTERVAL_SECONDS = 2.0
+
+
+def _load_scheduler_config() -> Tuple[int, float]:
+    """读取迭代阶段的并行数和 Agent 启动间隔"""
+    try:
+        from nexus_utils.config_loader import get_config
+        config = get_config()
+        max_parallel = config.get_with_env_override(
+            "NEXUS_MULTI_AGENT_MAX_PARALLEL",
+            "workflow", "multi_agent", "max_parallel_agents",
+            default=DEFAULT_MAX_PARALLEL_AGENTS,
+        )
+        start_interval = config.get_nested(
+            "workflow", "multi_agent", "agent_start_interval_seconds",
+            default=DEFAULT_AGENT_START_INTERVAL_SECONDS,
+        )
+        return int(max_parallel), float(start_interval)
+    except Exception as e:
+        logger.debug(f"Failed to load multi-agent scheduler config, using defaults: {e}")
+        return DEFAULT_MAX_PARALLEL_AGENTS, DEFAULT_AGENT_START_INTERVAL_SECONDS
+
+
 class MultiAgentIterator:
     """
     多 Agent 迭代器
@@ -68,6 +97,8 @@ class MultiAgentIterator:
         self.context = context
         self._architecture: Optional[MultiAgentArchitecture] = None
         self._progress_tracker: Dict[str, AgentStageProgress] = {}
+        # 迭代阶段中多个 Agent 并行更新进度
+        self._progress_lock = threading.Lock()
     
     @property
     def architecture(self) -> Optional[MultiAgentArchitecture]:
@@ -374,17 +405,19 @@ class MultiAgentIterator:
             
         Validates: Requirement 6.7 - 多 Agent 进度跟踪
         """
-        if agent_name not in self._progress_tracker:
-            self._progress_tracker[agent_name] = AgentStageProgress(
-                agent_name=agent_name
-            )
-        return self._progress_tracker[agent_name]
+        with self._progress_lock:
+            if agent_name not in self._progress_tracker:
+                self._progress_tracker[agent_name] = AgentStageProgress(
+                    agent_name=agent_name
+                )
+            return self._progress_tracker[agent_name]
     
     def update_progress(
         self, 
         agent_name: str, 
         stage_name: str, 
-        status: StageStatus
+        status: StageStatus,
+        duration_seconds: Optional[float] = None,
     ) -> None:
         """
         更新 Agent 进度
@@ -393,6 +426,7 @@ class MultiAgentIterator:
             agent_name: Agent 名称
             stage_name: 阶段名称
             status: 状态
+            duration_seconds: 阶段执行耗时（秒，完成或失败时记录）
             
         Validates: Requirement 6.7 - 多 Agent 进度跟踪
         """
@@ -400,7 +434,10 @@ class MultiAgentIterator:
         
         # 映射到进度阶段名称
         progress_stage = self.STAGE_TO_PROGRESS_STAGE.get(stage_name, stage_name)
-        progress.update_stage_status(progress_stage, status)
+        with self._progress_lock:
+            progress.update_stage_status(progress_stage, status)
+            if duration_seconds is not None:
+                progress.stage_durations[progress_stage] = round(duration_seconds, 3)
         
         logger.info(
             f"Agent {agent_name} progress updated: {progress_stage} -> {status.value} "
@@ -474,7 +511,9 @@ class MultiAgentStageExecutor:
     """
     多 Agent 阶段执行器
     
-    负责执行多 Agent 项目中的迭代阶段。
+    负责执行多 Agent 项目中的迭代阶段。Agent 按依赖关系组成有向无环图调度：
+    依赖已完成的 Agent 并行执行（受并行数和启动间隔限制），每个 Agent 使用独立的状态副本，
+    结果按依赖排序后的 Agent 顺序合并，与完成先后无关。
     
     Validates:
         - Requirement 6.2: agent_designer 阶段迭代处理
@@ -489,6 +528,8 @@ class MultiAgentStageExecutor:
         iterator: Optional[MultiAgentIterator] = None,
         on_agent_start: Optional[Callable[[str, str], None]] = None,
         on_agent_complete: Optional[Callable[[str, str, StageOutput], None]] = None,
+        max_parallel_agents: Optional[int] = None,
+        agent_start_interval_seconds: Optional[float] = None,
     ):
         """
         初始化多 Agent 阶段执行器
@@ -496,13 +537,25 @@ class MultiAgentStageExecutor:
         参数:
             context: 工作流上下文
             iterator: 多 Agent 迭代器（可选）
-            on_agent_start: Agent 开始处理回调 (agent_name, stage_name)
-            on_agent_complete: Agent 完成处理回调 (agent_name, stage_name, output)
+            on_agent_start: Agent 开始处理回调 (agent_name, stage_name)，并行执行时在工作线程中调用
+            on_agent_complete: Agent 完成处理回调 (agent_name, stage_name, output)，并行执行时在工作线程中调用
+            max_parallel_agents: 同时执行的 Agent 数（可选，默认读取配置）
+            agent_start_interval_seconds: 相邻两个 Agent 启动的最小间隔（可选，默认读取配置）
         """
         self.context = context
         self.iterator = iterator or MultiAgentIterator(context)
         self.on_agent_start = on_agent_start
         self.on_agent_complete = on_agent_complete
+        
+        config_parallel, config_interval = _load_scheduler_config()
+        self.max_parallel_agents = max(1, max_parallel_agents if max_parallel_agents is not None else config_parallel)
+        self.agent_start_interval_seconds = max(
+            0.0,
+            agent_start_interval_seconds if agent_start_interval_seconds is not None else config_interval,
+        )
+        
+        # 最近一次迭代阶段中各 Agent 的执行耗时（秒）
+        self.last_agent_timings: Dict[str, float] = {}
     
     def should_iterate(self, stage_name: str) -> bool:
         """
@@ -535,10 +588,10 @@ class MultiAgentStageExecutor:
             agent: Agent 定义
             base_executor: 基础阶段执行器
             base_context: 基础上下文
-            state: Agent 状态
+            state: Agent 状态（复制后使用，不修改传入的字典）
             
         返回:
-            StageOutput: 阶段输出
+            StageOutput: 阶段输出（不写入工作流上下文，由调用方合并后记录）
         """
         logger.info(f"Executing stage {stage_name} for agent: {agent.name}")
         
@@ -548,6 +601,7 @@ class MultiAgentStageExecutor:
         
         # 更新进度
         self.iterator.update_progress(agent.name, stage_name, StageStatus.RUNNING)
+        start_time = time.time()
         
         try:
             # 格式化 Agent 特定的上下文
@@ -555,22 +609,26 @@ class MultiAgentStageExecutor:
                 agent, stage_name, base_context
             )
             
-            # 准备状态
-            agent_state = state or {}
+            # 准备状态（每个 Agent 使用独立副本，避免并行执行时互相覆盖）
+            agent_state = dict(state or {})
             agent_state['current_agent'] = agent.name
             agent_state['agent_type'] = agent.agent_type
             agent_state['is_multi_agent'] = True
             agent_state['total_agents'] = self.iterator.agent_count
             
             # 执行阶段
-            output = base_executor.execute_stage(
+            output = base_executor.execute_agent_iteration(
                 stage_name, 
                 input_message=agent_context,
                 state=agent_state,
             )
             
-            # 更新进度
-            self.iterator.update_progress(agent.name, stage_name, StageStatus.COMPLETED)
+            # 更新进度并记录耗时
+            duration = time.time() - start_time
+            self.last_agent_timings[agent.name] = round(duration, 3)
+            self.iterator.update_progress(
+                agent.name, stage_name, StageStatus.COMPLETED, duration
+            )
             
             # 触发完成回调
             if self.on_agent_complete:
@@ -578,9 +636,16 @@ class MultiAgentStageExecutor:
             
             return output
             
+        except WorkflowControlSignal:
+            # 被暂停/停止打断，进度保持未完成
+            raise
         except Exception as e:
             # 更新进度为失败
-            self.iterator.update_progress(agent.name, stage_name, StageStatus.FAILED)
+            duration = time.time() - start_time
+            self.last_agent_timings[agent.name] = round(duration, 3)
+            self.iterator.update_progress(
+                agent.name, stage_name, StageStatus.FAILED, duration
+            )
             raise
     
     def execute_iterative_stage(
@@ -601,24 +666,52 @@ class MultiAgentStageExecutor:
             
         返回:
             StageOutput: 合并的阶段输出
+            
+        Raises:
+            任一 Agent 失败或被控制信号打断时，等待已启动的 Agent 结束后抛出第一个异常，
+            依赖失败 Agent 的后续 Agent 不再启动
         """
         if not self.should_iterate(stage_name):
             # 非迭代阶段，直接执行
             return base_executor.execute_stage(stage_name, base_context, state)
         
-        logger.info(f"Starting iterative execution of stage {stage_name}")
-        
         agents = self.iterator.get_agents_for_stage(stage_name)
-        all_outputs: List[StageOutput] = []
+        logger.info(
+            f"Starting iterative execution of stage {stage_name}: {len(agents)} agents, "
+            f"max_parallel={self.max_parallel_agents}"
+        )
         
-        for agent in agents:
-            output = self.execute_for_agent(
-                stage_name, agent, base_executor, base_context, state
-            )
-            all_outputs.append(output)
+        self.last_agent_timings = {}
+        start_time = time.time()
+        outputs, error = self._execute_agent_graph(
+            stage_name, agents, base_executor, base_context, state
+        )
+        wall_time = time.time() - start_time
+        
+        # 记录各 Agent 耗时与并行加速比
+        timings = {
+            agent.name: self.last_agent_timings[agent.name]
+            for agent in agents if agent.name in self.last_agent_timings
+        }
+        agent_time = sum(timings.values())
+        speedup = agent_time / wall_time if wall_time > 0 else 1.0
+        logger.info(
+            f"Iterative stage {stage_name}: wall time {wall_time:.1f}s, "
+            f"sum of agent time {agent_time:.1f}s (speedup {speedup:.2f}x), per agent: {timings}"
+        )
         
-        # 合并所有输出
-        merged_output = self._merge_outputs(stage_name, all_outputs)
+        if error is not None:
+            raise error
+        
+        # 按依赖排序后的 Agent 顺序合并，与完成先后无关
+        ordered_agents = [agent for agent in agents if agent.name in outputs]
+        merged_output = self._merge_outputs(
+            stage_name,
+            [outputs[agent.name] for agent in ordered_agents],
+            agent_names=[agent.name for agent in ordered_agents],
+        )
+        # 并行执行时阶段耗时为实际经过的时间，而不是各 Agent 耗时之和
+        merged_output.metrics.execution_time_seconds = wall_time
         
         logger.info(
             f"Iterative stage {stage_name} completed for {len(agents)} agents"
@@ -626,10 +719,107 @@ class MultiAgentStageExecutor:
         
         return merged_output
     
+    def _execute_agent_graph(
+        self,
+        stage_name: str,
+        agents: List[AgentDefinition],
+        base_executor,  # StageExecutor
+        base_context: str,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Dict[str, StageOutput], Optional[BaseException]]:
+        """
+        按依赖关系调度 Agent 执行
+        
+        参数:
+            stage_name: 阶段名称
+            agents: 按依赖排序的 Agent 列表
+            base_executor: 基础阶段执行器
+            base_context: 基础上下文
+            state: Agent 状态
+            
+        返回:
+            Tuple: (Agent 名称到输出的映射, 第一个异常或 None)
+        """
+        names = {agent.name for agent in agents}
+        dependencies = {
+            agent.name: [dep for dep in agent.dependencies if dep in names and dep != agent.name]
+            for agent in agents
+        }
+        control_watcher = getattr(base_executor, 'control_watcher', None)
+        
+        pending = list(agents)
+        completed = set()
+        outputs: Dict[str, StageOutput] = {}
+        running = {}
+        error: Optional[BaseException] = None
+        last_start = None
+        
+        with ThreadPoolExecutor(
+            max_workers=self.max_parallel_agents,
+            thread_name_prefix=f"{stage_name}-agent",
+        ) as pool:
+            while pending or running:
+                if error is None:
+                    ready = [
+                        agent for agent in pending
+                        if all(dep in completed for dep in dependencies[agent.name])
+                    ]
+                    if not ready and not running and pending:
+                        # 循环依赖：按排序结果继续执行剩余的 Agent
+                        ready = pending[:1]
+                    
+                    for agent in ready:
+                        if len(running) >= self.max_parallel_agents:
+                            break
+                        
+                        # 控制启动速率
+                        if last_start is not None and self.agent_start_interval_seconds > 0:
+                            delay = last_start + self.agent_start_interval_seconds - time.monotonic()
+                            if delay > 0:
+                                time.sleep(delay)
+                        
+                        # 启动新 Agent 前确认没有待处理的控制信号
+                        if control_watcher is not None:
+                            try:
+                                control_watcher.raise_if_signalled()
+                            except WorkflowControlSignal as e:
+                                error = e
+                                break
+                        
+                        pending.remove(agent)
+                        last_start = time.monotonic()
+                        future = pool.submit(
+                            self.execute_for_agent,
+                            stage_name, agent, base_executor, base_context, state,
+                        )
+                        running[future] = agent
+                
+                if not running:
+                    break
+                
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    agent = running.pop(future)
+                    try:
+                        outputs[agent.name] = future.result()
+                        completed.add(agent.name)
+                    except BaseException as e:
+                        logger.error(f"Stage {stage_name} failed for agent {agent.name}: {e}")
+                        if error is None:
+                            error = e
+        
+        if error is not None and pending:
+            logger.warning(
+                f"Stage {stage_name}: skipped agents after failure: {[agent.name for agent in pending]}"
+            )
+        
+        return outputs, error
+    
     def _merge_outputs(
         self, 
         stage_name: str, 
-        outputs: List[StageOutput]
+        outputs: List[StageOutput],
+        agent_names: Optional[List[str]] = None,
     ) -> StageOutput:
         """
         合并多个 Agent 的输出
@@ -637,6 +827,7 @@ class MultiAgentStageExecutor:
         参数:
             stage_name: 阶段名称
             outputs: 输出列表
+            agent_names: 与输出一一对应的 Agent 名称（可选）
             
         返回:
             StageOutput: 合并的输出
@@ -648,13 +839,26 @@ class MultiAgentStageExecutor:
             return outputs[0]
         
         # 合并内容
+        if not agent_names:
+            agent_names = [
+                self.iterator.architecture.agents[i].name if self.iterator.architecture else f"Agent_{i}"
+                for i in range(len(outputs))
+            ]
         merged_content_parts = []
-        for i, output in enumerate(outputs):
-            agent_name = self.iterator.architecture.agents[i].name if self.iterator.architecture else f"Agent_{i}"
+        for agent_name, output in zip(agent_names, outputs):
             merged_content_parts.append(f"## {agent_name}\n\n{output.content}")
         
         merged_content = "\n\n---\n\n".join(merged_content_parts)
         
+        # 合并设计文档（只包含产生了文档的 Agent）
+        document_parts = []
+        document_format = "markdown"
+        for agent_name, output in zip(agent_names, outputs):
+            if output.document_content:
+                document_parts.append(f"## {agent_name}\n\n{output.document_content}")
+                document_format = output.document_format
+        merged_document = "\n\n---\n\n".join(document_parts)
+        
         # 合并指标
         from .models import StageMetrics
         merged_metrics = StageMetrics()
@@ -663,11 +867,15 @@ class MultiAgentStageExecutor:
             merged_metrics.output_tokens += output.metrics.output_tokens
             merged_metrics.execution_time_seconds += output.metrics.execution_time_seconds
             merged_metrics.tool_calls_count += output.metrics.tool_calls_count
+            merged_metrics.cache_read_input_tokens += output.metrics.cache_read_input_tokens
+            merged_metrics.cache_write_input_tokens += output.metrics.cache_write_input_tokens
         
-        # 合并生成的文件
-        merged_files = []
+        # 合并生成的文件（同一路径只保留最后一个 Agent 的记录）
+        merged_files_by_path = {}
         for output in outputs:
-            merged_files.extend(output.generated_files)
+            for file_metadata in output.generated_files:
+                merged_files_by_path[file_metadata.path] = file_metadata
+        merged_files = [merged_files_by_path[path] for path in sorted(merged_files_by_path)]
         
         # 确定最终状态
         final_status = StageStatus.COMPLETED
@@ -683,6 +891,8 @@ class MultiAgentStageExecutor:
             content=merged_content,
             metrics=merged_metrics,
             generated_files=merged_files,
+            document_content=merged_document,
+            document_format=document_format,
             completed_at=datetime.now(timezone.utc),
             status=final_status,
             error_message="; ".join(error_messages) if error_messages else None,
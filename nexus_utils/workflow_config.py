@@ -32,6 +32,7 @@ class StageConfig:
         log_filename: 日志文件名（不含扩展名）
         order: 阶段序号
         prerequisites: 前置阶段列表
+        depends_on: 阶段实际依赖的上游阶段（调度依据），未配置时与 prerequisites 相同
         supports_iteration: 是否支持迭代（多 Agent 场景）
         optional: 是否可选
         description: 阶段描述
@@ -48,6 +49,7 @@ class StageConfig:
     optional: bool = False
     description: str = ""
     prompt_path: str = ""  # 完整路径，由 WorkflowConfig 计算
+    depends_on: Optional[List[str]] = None  # 未配置时由 WorkflowConfig 使用 prerequisites
 
 
 @dataclass
@@ -117,10 +119,34 @@ class WorkflowConfig:
     context: ContextConfig = field(default_factory=ContextConfig)
     
     def __post_init__(self):
-        """初始化后处理：计算完整提示词路径"""
+        """初始化后处理：计算完整提示词路径，补全并校验阶段依赖"""
         for stage in self.stages:
             if not stage.prompt_path:
                 stage.prompt_path = f"{self.prompt_base_path}/{stage.prompt_file}"
+            if stage.depends_on is None:
+                stage.depends_on = list(stage.prerequisites)
+        self._validate_dependencies()
+    
+    def _validate_dependencies(self) -> None:
+        """
+        校验阶段依赖：依赖的阶段必须存在且顺序靠前（保证依赖关系无环）
+        
+        异常:
+            ValueError: 依赖的阶段不存在或顺序不在当前阶段之前
+        """
+        orders = {s.name: s.order for s in self.stages}
+        for stage in self.stages:
+            for dependency in stage.depends_on:
+                if dependency not in orders:
+                    raise ValueError(
+                        f"Stage {stage.name} of workflow {self.workflow_type} "
+                        f"depends on unknown stage: {dependency}"
+                    )
+                if orders[dependency] >= stage.order:
+                    raise ValueError(
+                        f"Stage {stage.name} of workflow {self.workflow_type} "
+                        f"depends on later stage: {dependency}"
+                    )
     
     def get_stage(self, stage_name: str) -> Optional[StageConfig]:
         """
@@ -187,6 +213,16 @@ class WorkflowConfig:
         """
         return [s.name for s in self.stages if s.supports_iteration]
     
+    def get_stage_dependencies(self) -> Dict[str, List[str]]:
+        """
+        获取各阶段直接依赖的上游阶段
+        
+        返回:
+            {stage_name: [依赖阶段名称]} 字典，按阶段执行顺序排列
+        """
+        sorted_stages = sorted(self.stages, key=lambda s: s.order)
+        return {s.name: list(s.depends_on) for s in sorted_stages}
+    
     def get_optional_stages(self) -> List[str]:
         """
         获取可选阶段列表
@@ -353,6 +389,7 @@ class WorkflowConfigManager:
                 log_filename=stage_data['log_filename'],
                 order=stage_data['order'],
                 prerequisites=stage_data.get('prerequisites', []),
+                depends_on=stage_data.get('depends_on'),
                 supports_iteration=stage_data.get('supports_iteration', False),
                 optional=stage_data.get('optional', False),
                 description=stage_data.get('description', ''),
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+lifescience_news_collector 文章近似去重吞吐量基准测试
+
+生成带有近似重复（转载、轻微改写）的合成文章，对比：
+- 逐篇两两比较标题词集合的 Jaccard 相似度（旧 fuzzy 实现，O(n²)）
+- MinHash + LSH（标题 + 正文），并报告签名计算耗时、吞吐量和召回率
+- 使用历史索引：第二批文章与第一批保留的文章去重
+
+使用方法:
+    python scripts/benchmark_article_dedup.py [--articles 20000] [--duplicate-rate 0.2] [--baseline-limit 5000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.generated_tools.lifescience_news_collector.article_dedup import find_near_duplicates
+
+
+def make_vocabulary(rng: random.Random, size: int = 8000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+    hanzi = [chr(0x4E00 + rng.randint(0, 5000)) for _ in range(2000)]
+    return words, hanzi
+
+
+def make_text(rng: random.Random, vocabulary, chars: int, chinese: bool) -> str:
+    words, hanzi = vocabulary
+    if chinese:
+        return "".join(rng.choice(hanzi) for _ in range(chars // 2))
+    return " ".join(rng.choice(words) for _ in range(chars // 6))
+
+
+def rewrite(rng: random.Random, vocabulary, text: str, rate: float) -> str:
+    """随机替换少量词（中文按字）模拟转载时的改写"""
+    words, hanzi = vocabulary
+    if " " in text:
+        return " ".join(rng.choice(words) if rng.random() < rate else w for w in text.split(" "))
+    return "".join(rng.choice(hanzi) if rng.random() < rate else c for c in text)
+
+
+def make_articles(count: int, duplicate_rate: float, seed: int = 7):
+    """返回 (文章列表, 是否为重复文章)"""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    originals, articles, is_duplicate = [], [], []
+    for i in range(count):
+        if originals and rng.random() < duplicate_rate:
+            source = rng.choice(originals)
+            articles.append({
+                "title": source["title"],
+                "content": rewrite(rng, vocabulary, source["content"], 0.01),
+                "url": f"https://mirror.example/{i}"
+            })
+            is_duplicate.append(True)
+        else:
+            chinese = rng.random() < 0.3
+            article = {
+                "title": make_text(rng, vocabulary, 60, chinese),
+                "content": make_text(rng, vocabulary, rng.randint(800, 5000), chinese),
+                "url": f"https://news.example/{i}"
+            }
+            originals.append(article)
+            articles.append(article)
+            is_duplicate.append(False)
+    return articles, is_duplicate
+
+
+def pairwise_title_jaccard(articles, threshold: float):
+    """旧 fuzzy 实现：与每篇已保留文章比较标题词集合"""
+    unique, duplicates = [], []
+    for index, article in enumerate(articles):
+        title_words = set(re.findall(r'\w+', article.get("title", "").lower()))
+        is_duplicate = False
+        for kept in unique:
+            kept_words = kept[1]
+            if title_words and kept_words:
+                similarity = len(title_words & kept_words) / len(title_words | kept_words)
+                if similarity >= threshold:
+                    is_duplicate = True
+                    break
+        if is_duplicate:
+            duplicates.append(index)
+        else:
+            unique.append((index, title_words))
+    return duplicates
+
+
+def report(label: str, elapsed: float, duplicates, is_duplicate, extra: str = "") -> None:
+    """duplicates 为检测出的重复文章下标，is_duplicate 为参与测试的文章的真实标记"""
+    count = len(is_duplicate)
+    detected = set(duplicates)
+    true_positive = sum(1 for i in detected if is_duplicate[i])
+    recall = true_positive / max(1, sum(is_duplicate))
+    precision = true_positive / max(1, len(detected))
+    print(f"{label:<26} articles={count:<7} time={elapsed:8.2f} s  "
+          f"throughput={count / elapsed:10.0f}/s  recall={recall:.3f}  precision={precision:.3f}  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lifescience_news_collector near-duplicate detection")
+    parser.add_argument('--articles', type=int, default=20000, help="文章数量")
+    parser.add_argument('--duplicate-rate', type=float, default=0.2, help="近似重复文章比例")
+    parser.add_argument('--threshold', type=float, default=0.85, help="相似度阈值")
+    parser.add_argument('--baseline-limit', type=int, default=5000, help="旧实现最多测试的文章数（O(n²)）")
+    args = parser.parse_args()
+
+    articles, is_duplicate = make_articles(args.articles, args.duplicate_rate)
+    print(f"articles={args.articles} duplicate_rate={args.duplicate_rate} threshold={args.threshold}\n")
+
+    baseline_count = min(args.articles, args.baseline_limit)
+    start = time.perf_counter()
+    duplicates = pairwise_title_jaccard(articles[:baseline_count], args.threshold)
+    report("pairwise title (before)", time.perf_counter() - start, duplicates, is_duplicate[:baseline_count])
+
+    start = time.perf_counter()
+    result = find_near_duplicates(articles, threshold=args.threshold)
+    stats = result.stats
+    report("minhash lsh (after)", time.perf_counter() - start,
+           [d["index"] for d in result.duplicates], is_duplicate,
+           f"signatures={stats['signature_seconds']:.2f} s  bands={stats['bands']}x{stats['rows']}")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        half = args.articles // 2
+        find_near_duplicates(articles[:half], threshold=args.threshold, history_days=7, index_dir=index_dir)
+        start = time.perf_counter()
+        result = find_near_duplicates(articles[half:], threshold=args.threshold, history_days=7, index_dir=index_dir)
+        elapsed = time.perf_counter() - start
+        sources = [d["source"] for d in result.duplicates]
+        report("minhash lsh + history", elapsed,
+               [d["index"] for d in result.duplicates], is_duplicate[half:],
+               f"from_history={sources.count('history')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+工作流上下文持久化写入量基准测试
+
+模拟一次完整构建（每个阶段开始、完成时各保存一次上下文），对比：
+- 全量写入：每次保存重写项目记录和所有阶段记录（旧实现）
+- 增量写入：WorkflowContextManager.save_to_db 基于脏数据检测只写入变化的属性
+
+不访问 DynamoDB，使用记录写入字节数的内存数据库客户端。
+
+使用方法:
+    python scripts/benchmark_context_persistence.py [--content-kb 200] [--stages 10]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nexus_utils.workflow.models import (
+    WorkflowContext,
+    StageOutput,
+    StageMetrics,
+    FileMetadata,
+    StageStatus,
+)
+from nexus_utils.workflow.context import WorkflowContextManager
+
+
+class RecordingDBClient:
+    """记录写入请求数和字节数的内存数据库客户端（逐个阶段更新）"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_written = 0
+
+    def _record(self, payload) -> None:
+        self.requests += 1
+        self.bytes_written += len(json.dumps(payload, default=str).encode('utf-8'))
+
+    def get_project(self, project_id):
+        return {'project_id': project_id, 'control_status': 'running'}
+
+    def update_project(self, project_id, updates):
+        self._record(updates)
+
+    def update_stage(self, project_id, stage_name, updates):
+        self._record(updates)
+
+
+class BatchRecordingDBClient(RecordingDBClient):
+    """支持批量阶段更新的内存数据库客户端"""
+
+    def update_stages_batch(self, project_id, stage_updates, project_updates=None):
+        # 项目更新涉及统计字段时单独写入
+        if project_updates and any(field in project_updates for field in ('status', 'metrics')):
+            self.update_project(project_id, project_updates)
+            project_updates = None
+        # 项目与阶段更新合并为 TransactWriteItems，每批最多 49 个阶段（每个阶段可能附带一个统计项）
+        stage_count = sum(1 for updates in stage_updates.values() if updates)
+        self.requests += max((stage_count + 48) // 49, 1 if project_updates else 0)
+        self.bytes_written += sum(
+            len(json.dumps(updates, default=str).encode('utf-8'))
+            for updates in list(stage_updates.values()) + [project_updates or {}]
+            if updates
+        )
+
+
+def save_full(manager: WorkflowContextManager, context: WorkflowContext) -> None:
+    """旧实现：每次保存重写项目记录和全部阶段记录"""
+    project_updates = manager._build_project_record(context)
+    project_updates['updated_at'] = datetime.now(timezone.utc).isoformat()
+    manager.db.update_project(context.project_id, project_updates)
+    for stage_name, output in context.stage_outputs.items():
+        manager.db.update_stage(context.project_id, stage_name, output.to_stage_record())
+
+
+def make_output(stage_name: str, content_kb: int, file_count: int) -> StageOutput:
+    content = (f"# {stage_name}\n" + "x" * 1023 + "\n") * content_kb
+    return StageOutput(
+        stage_name=stage_name,
+        content=content,
+        metrics=StageMetrics(execution_time_seconds=120.0, input_tokens=50000, output_tokens=8000),
+        generated_files=[
+            FileMetadata(path=f"{stage_name}/file_{i}.py", size=2048, checksum=f"{i:032x}")
+            for i in range(file_count)
+        ],
+        document_content=content[: content_kb * 256],
+        completed_at=datetime.now(timezone.utc),
+        status=StageStatus.COMPLETED,
+    )
+
+
+def simulate_build(save, stages, content_kb: int, file_count: int) -> None:
+    context = WorkflowContext(project_id="bench-project", project_name="bench")
+    for stage_name in stages:
+        # 阶段开始
+        context.current_stage = stage_name
+        save(context)
+        # 阶段完成
+        context.update_stage_output(stage_name, make_output(stage_name, content_kb, file_count))
+        save(context)
+    context.status = StageStatus.COMPLETED
+    save(context)
+
+
+def run(label: str, db: RecordingDBClient, incremental: bool, stages, content_kb: int, file_count: int) -> None:
+    manager = WorkflowContextManager(db)
+    if incremental:
+        save = lambda ctx: manager.save_to_db(ctx, refresh_control_status=False)
+    else:
+        save = lambda ctx: save_full(manager, ctx)
+
+    start = time.perf_counter()
+    simulate_build(save, stages, content_kb, file_count)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} requests={db.requests:<6} "
+        f"written={db.bytes_written / 1024 / 1024:8.2f} MB  cpu={elapsed * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark workflow context persistence")
+    parser.add_argument('--stages', type=int, default=10, help="阶段数量")
+    parser.add_argument('--content-kb', type=int, default=200, help="每个阶段输出内容大小（KB）")
+    parser.add_argument('--files', type=int, default=30, help="每个阶段生成的文件数")
+    args = parser.parse_args()
+
+    stages = [f"stage_{i}" for i in range(args.stages)]
+    print(f"stages={args.stages} content={args.content_kb}KB files/stage={args.files}\n")
+
+    run("full rewrite (before)", RecordingDBClient(), False, stages, args.content_kb, args.files)
+    run("delta per-stage (after)", RecordingDBClient(), True, stages, args.content_kb, args.files)
+    run("delta batched (after)", BatchRecordingDBClient(), True, stages, args.content_kb, args.files)
+
+
+if __name__ == '__main__':
+    main()
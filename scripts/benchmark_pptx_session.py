@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+html2pptx 演示文稿构建耗时基准测试
+
+构建同样的演示文稿（每张幻灯片一个标题、若干文本框、一个形状和一个表格），对比：
+- 逐元素调用：add_slide/add_text/add_shape/add_table 每次都加载并保存 PPTX 文件（旧用法）
+- 会话批量：open_presentation_session + apply_presentation_operations，commit 时只写一次文件
+
+使用方法:
+    python scripts/benchmark_pptx_session.py [--slides 40] [--texts 5]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.generated_tools.html2pptx import pptx_generator
+
+
+def slide_operations(slide_no: int, texts: int):
+    """一张幻灯片的全部操作（不含 add_slide）"""
+    operations = []
+    for i in range(texts):
+        operations.append({
+            "type": "add_text",
+            "slide_index": slide_no,
+            "text": f"第{slide_no + 1}页 第{i + 1}段：" + "内容示例 " * 20,
+            "position": {"left": 0.5, "top": 1.5 + i * 0.8},
+            "size": {"width": 9, "height": 0.7},
+            "formatting": {"font_size": 14, "color": [40, 40, 40]}
+        })
+    operations.append({
+        "type": "add_shape",
+        "slide_index": slide_no,
+        "shape_type": "rounded_rectangle",
+        "position": {"left": 7, "top": 0.3},
+        "text": f"{slide_no + 1}",
+        "formatting": {"fill_color": [0, 112, 192], "font_color": [255, 255, 255]}
+    })
+    operations.append({
+        "type": "add_table",
+        "slide_index": slide_no,
+        "data": [["指标", "数值", "说明"]] + [[f"项目{r}", str(r * 10), "示例"] for r in range(4)],
+        "position": {"left": 0.5, "top": 5.5},
+        "size": {"width": 9, "height": 1.5},
+        "formatting": {"header_bold": True, "font_size": 11}
+    })
+    return operations
+
+
+def build_per_element(path: str, slides: int, texts: int) -> int:
+    calls = 0
+    pptx_generator.create_presentation(output_path=path)
+    for slide_no in range(slides):
+        pptx_generator.add_slide(path, layout_index=5, title=f"第{slide_no + 1}页")
+        calls += 1
+        for operation in slide_operations(slide_no, texts):
+            params = dict(operation)
+            op_type = params.pop("type")
+            result = json.loads(getattr(pptx_generator, op_type)(path, **params))
+            if result.get("status") != "success":
+                raise RuntimeError(result)
+            calls += 1
+    return calls
+
+
+def build_session(path: str, slides: int, texts: int) -> int:
+    session_id = json.loads(pptx_generator.open_presentation_session(presentation_path=path))["session_id"]
+    operations = []
+    for slide_no in range(slides):
+        operations.append({"type": "add_slide", "layout_index": 5, "title": f"第{slide_no + 1}页"})
+        operations.extend(slide_operations(slide_no, texts))
+    result = json.loads(pptx_generator.apply_presentation_operations(operations, session_id=session_id))
+    if result.get("status") != "success":
+        raise RuntimeError(result)
+    pptx_generator.commit_presentation_session(session_id)
+    return len(operations)
+
+
+def run(label: str, build, slides: int, texts: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "deck.pptx")
+        start = time.perf_counter()
+        operations = build(path, slides, texts)
+        elapsed = time.perf_counter() - start
+        size_kb = os.path.getsize(path) / 1024
+    print(f"{label:<28} operations={operations:<6} time={elapsed:8.2f} s  file={size_kb:8.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark html2pptx deck building")
+    parser.add_argument('--slides', type=int, default=40, help="幻灯片数量")
+    parser.add_argument('--texts', type=int, default=5, help="每张幻灯片的文本框数量")
+    args = parser.parse_args()
+
+    print(f"slides={args.slides} texts/slide={args.texts}\n")
+
+    run("per-element save (before)", build_per_element, args.slides, args.texts)
+    run("session batch (after)", build_session, args.slides, args.texts)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+分层工具缓存基准测试
+
+对比各工具原有的“每个键一个 JSON 文件”缓存与 tiered_cache：
+- 写入吞吐量
+- 冷读（新进程/新实例，只命中磁盘层）与热读（命中内存 LRU）吞吐量
+- 并发请求同一键时 single-flight 合并后的加载次数
+- 缓存文件占用（压缩后）
+
+使用方法:
+    python scripts/benchmark_tiered_cache.py [--entries 5000] [--payload-bytes 8000] [--threads 16]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.template_tools.common.tiered_cache import TieredCache
+
+
+def make_payload(rng: random.Random, size: int) -> dict:
+    """模拟 API 响应：重复字段名 + 随机文本，接近真实 JSON 的可压缩性"""
+    words = ["protein", "trial", "patient", "dose", "study", "cell", "gene", "result", "cohort", "phase"]
+    records = []
+    while len(json.dumps(records)) < size:
+        records.append({
+            "id": rng.randint(1, 10 ** 8),
+            "title": " ".join(rng.choice(words) for _ in range(8)),
+            "score": rng.random()
+        })
+    return {"count": len(records), "records": records}
+
+
+def json_file_set(cache_dir: str, key: str, data: dict) -> None:
+    """旧实现：每个键一个 JSON 文件"""
+    path = os.path.join(cache_dir, hashlib.md5(key.encode()).hexdigest() + ".json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"timestamp": time.time(), "data": data}, f)
+
+
+def json_file_get(cache_dir: str, key: str):
+    path = os.path.join(cache_dir, hashlib.md5(key.encode()).hexdigest() + ".json")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("data")
+
+
+def directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def report(label: str, count: int, elapsed: float, extra: str = "") -> None:
+    print(f"{label:<28} ops={count:<7} time={elapsed:8.3f} s  throughput={count / elapsed:10.0f}/s  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tiered tool cache")
+    parser.add_argument('--entries', type=int, default=5000, help="缓存条目数")
+    parser.add_argument('--payload-bytes', type=int, default=8000, help="单条缓存的近似 JSON 大小")
+    parser.add_argument('--threads', type=int, default=16, help="single-flight 测试的并发线程数")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    payloads = [make_payload(rng, args.payload_bytes) for _ in range(64)]
+    keys = [f"esearch:term={i}" for i in range(args.entries)]
+    print(f"entries={args.entries} payload≈{args.payload_bytes} bytes\n")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        json_dir = os.path.join(workdir, "json")
+        os.makedirs(json_dir)
+        start = time.perf_counter()
+        for i, key in enumerate(keys):
+            json_file_set(json_dir, key, payloads[i % len(payloads)])
+        report("json files: set", len(keys), time.perf_counter() - start)
+        start = time.perf_counter()
+        for key in keys:
+            json_file_get(json_dir, key)
+        report("json files: get", len(keys), time.perf_counter() - start,
+               f"disk={directory_bytes(json_dir) / 1e6:.1f} MB in {len(keys)} files")
+
+        db_path = os.path.join(workdir, "tiered", "tool_cache.db")
+        cache = TieredCache("benchmark", path=db_path)
+        start = time.perf_counter()
+        for i, key in enumerate(keys):
+            cache.set(key, payloads[i % len(payloads)])
+        report("tiered: set", len(keys), time.perf_counter() - start)
+
+        cold = TieredCache("benchmark", path=db_path, memory_max_items=0)
+        start = time.perf_counter()
+        for key in keys:
+            cold.get(key)
+        report("tiered: get (disk tier)", len(keys), time.perf_counter() - start)
+
+        hot_keys = keys[:cache.stats()["memory"]["entries"]]
+        start = time.perf_counter()
+        for _ in range(4):
+            for key in hot_keys:
+                cache.get(key)
+        report("tiered: get (memory tier)", 4 * len(hot_keys), time.perf_counter() - start,
+               f"disk={directory_bytes(os.path.dirname(db_path)) / 1e6:.1f} MB in 1 file")
+
+        loads = []
+
+        def slow_loader():
+            loads.append(1)
+            time.sleep(0.2)
+            return payloads[0]
+
+        threads = [threading.Thread(target=cache.get_or_compute, args=("single-flight", slow_loader))
+                   for _ in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        report("tiered: single-flight", args.threads, time.perf_counter() - start,
+               f"loader_calls={len(loads)} coalesced={cache.stats()['coalesced']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -25,6 +25,9 @@ from api.v2.config import (
     TABLE_MESSAGES,
     TABLE_TASKS,
     TABLE_TOOLS,
+    TABLE_STATISTICS,
+    TABLE_INVOCATION_EVENTS,
+    TABLE_LEASES,
     ALL_QUEUES,
 )
 
@@ -64,6 +67,8 @@ TABLE_DEFINITIONS = [
         'TableName': TABLE_PROJECTS,
         'KeySchema': [{'AttributeName': 'project_id', 'KeyType': 'HASH'}],
         'AttributeDefinitions': [{'AttributeName': 'project_id', 'AttributeType': 'S'}],
+        # 工作流控制信号（暂停/停止）通过表流推送给正在运行的 Worker
+        'StreamSpecification': {'StreamEnabled': True, 'StreamViewType': 'NEW_IMAGE'},
     },
     {
         'TableName': TABLE_STAGES,
@@ -132,6 +137,30 @@ TABLE_DEFINITIONS = [
         'KeySchema': [{'AttributeName': 'tool_id', 'KeyType': 'HASH'}],
         'AttributeDefinitions': [{'AttributeName': 'tool_id', 'AttributeType': 'S'}],
     },
+    # 预聚合统计表 - global / day#YYYY-MM-DD 汇总项
+    {
+        'TableName': TABLE_STATISTICS,
+        'KeySchema': [{'AttributeName': 'stat_key', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [{'AttributeName': 'stat_key', 'AttributeType': 'S'}],
+    },
+    # 调用事件表 - 按天分桶
+    {
+        'TableName': TABLE_INVOCATION_EVENTS,
+        'KeySchema': [
+            {'AttributeName': 'day', 'KeyType': 'HASH'},
+            {'AttributeName': 'event_id', 'KeyType': 'RANGE'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'day', 'AttributeType': 'S'},
+            {'AttributeName': 'event_id', 'AttributeType': 'S'}
+        ],
+    },
+    # 租约表 - 分布式协调租约（如控制信号流读取者名额）
+    {
+        'TableName': TABLE_LEASES,
+        'KeySchema': [{'AttributeName': 'lease_key', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [{'AttributeName': 'lease_key', 'AttributeType': 'S'}],
+    },
     # Artifacts表 - 存储Agent版本和S3同步信息
     {
         'TableName': TABLE_ARTIFACTS,
@@ -191,6 +220,9 @@ def create_table(client, table_def: dict) -> bool:
             })
         create_params['GlobalSecondaryIndexes'] = gsis
     
+    if 'StreamSpecification' in table_def:
+        create_params['StreamSpecification'] = table_def['StreamSpecification']
+    
     client.create_table(**create_params)
     print(f"  ✓ 创建表: {table_name}")
     return True
@@ -3,11 +3,12 @@ import requests
 import json
 import time
 import hashlib
-import os
 from typing import Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 import urllib.parse
 
+from tools.template_tools.common.tiered_cache import get_cache
+
 class ClinicalTrialsAPIClient:
     """Client for interacting with ClinicalTrials.gov API."""
     
@@ -16,53 +17,18 @@ class ClinicalTrialsAPIClient:
     DEFAULT_TIMEOUT = 30
     MAX_RETRIES = 3
     RETRY_DELAY = 2
-    CACHE_DIR = ".cache/clinicaltrials_search_agent"
+    CACHE_NAMESPACE = "clinicaltrials_search_agent"
     CACHE_EXPIRY = 86400  # 24 hours in seconds
     
     def __init__(self):
         """Initialize the ClinicalTrials.gov API client."""
-        # Create cache directory if it doesn't exist
-        os.makedirs(self.CACHE_DIR, exist_ok=True)
+        self.cache = get_cache(self.CACHE_NAMESPACE, default_ttl=self.CACHE_EXPIRY)
     
     def _get_cache_key(self, endpoint: str, params: Dict[str, Any]) -> str:
         """Generate a cache key based on endpoint and parameters."""
         param_str = json.dumps(params, sort_keys=True)
         return hashlib.md5(f"{endpoint}:{param_str}".encode()).hexdigest()
     
-    def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Get cached response if it exists and is not expired."""
-        cache_file = os.path.join(self.CACHE_DIR, f"{cache_key}.json")
-        
-        if not os.path.exists(cache_file):
-            return None
-            
-        try:
-            with open(cache_file, 'r') as f:
-                cached_data = json.load(f)
-                
-            # Check if cache is expired
-            if time.time() - cached_data.get('timestamp', 0) > self.CACHE_EXPIRY:
-                return None
-                
-            return cached_data.get('data')
-        except Exception:
-            return None
-    
-    def _cache_response(self, cache_key: str, response_data: Dict[str, Any]) -> None:
-        """Cache API response data."""
-        cache_file = os.path.join(self.CACHE_DIR, f"{cache_key}.json")
-        
-        try:
-            cache_data = {
-                'timestamp': time.time(),
-                'data': response_data
-            }
-            
-            with open(cache_file, 'w') as f:
-                json.dump(cache_data, f)
-        except Exception as e:
-            print(f"Warning: Failed to cache response: {str(e)}")
-    
     def _make_request(self, endpoint: str, params: Dict[str, Any] = None, use_cache: bool = True) -> Dict[str, Any]:
         """Make a request to the ClinicalTrials.gov API with retry logic and caching."""
         url = f"{self.BASE_URL}/{endpoint}"
@@ -72,13 +38,15 @@ class ClinicalTrialsAPIClient:
         if 'format' not in params:
             params['format'] = self.DEFAULT_FORMAT
             
-        # Check cache first if enabled
+        # Serve from cache if enabled; concurrent identical requests share one API call
         if use_cache:
             cache_key = self._get_cache_key(endpoint, params)
-            cached_response = self._get_cached_response(cache_key)
-            if cached_response:
-                return cached_response
+            return self.cache.get_or_compute(cache_key, lambda: self._request_with_retries(url, params))
         
+        return self._request_with_retries(url, params)
+    
+    def _request_with_retries(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Request the API with retry logic, without caching."""
         # Make the request with retries
         retries = 0
         while retries <= self.MAX_RETRIES:
@@ -86,14 +54,7 @@ class ClinicalTrialsAPIClient:
                 response = requests.get(url, params=params, timeout=self.DEFAULT_TIMEOUT)
                 response.raise_for_status()
                 
-                data = response.json()
-                
-                # Cache the successful response if caching is enabled
-                if use_cache:
-                    cache_key = self._get_cache_key(endpoint, params)
-                    self._cache_response(cache_key, data)
-                    
-                return data
+                return response.json()
             except requests.exceptions.RequestException as e:
                 retries += 1
                 
@@ -1126,30 +1087,14 @@ def clear_clinical_trials_cache() -> str:
         JSON string containing cache clearing result
     """
     try:
-        cache_dir = ClinicalTrialsAPIClient.CACHE_DIR
-        
-        if not os.path.exists(cache_dir):
-            return json.dumps({
-                "status": "success",
-                "message": "Cache directory does not exist, nothing to clear",
-                "timestamp": datetime.now().isoformat()
-            }, indent=2)
-        
-        # Count files before deletion
-        files_before = [f for f in os.listdir(cache_dir) if f.endswith('.json')]
-        file_count = len(files_before)
-        
-        # Delete all JSON files in the cache directory
-        for filename in files_before:
-            file_path = os.path.join(cache_dir, filename)
-            try:
-                os.remove(file_path)
-            except OSError:
-                pass
+        cache = get_cache(ClinicalTrialsAPIClient.CACHE_NAMESPACE,
+                          default_ttl=ClinicalTrialsAPIClient.CACHE_EXPIRY)
+        cleared = cache.clear()
         
         return json.dumps({
             "status": "success",
-            "message": f"Successfully cleared {file_count} cached responses",
+            "message": f"Successfully cleared {cleared['deleted_entries']} cached responses",
+            "cache_stats": cache.stats(),
             "timestamp": datetime.now().isoformat()
         }, indent=2)
     except Exception as e:
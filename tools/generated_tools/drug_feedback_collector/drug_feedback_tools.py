@@ -16,13 +16,14 @@ import os
 import re
 import time
 from datetime import datetime, timedelta
-from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from urllib.parse import urlparse, quote_plus
 import traceback
 
 from strands import tool
 
+from tools.template_tools.common.tiered_cache import get_cache
+
 # DuckDuckGo搜索（替代Tavily）
 try:
     from duckduckgo_search import DDGS
@@ -38,6 +39,23 @@ try:
 except ImportError:
     SCRAPING_AVAILABLE = False
 
+# 并发网页抓取引擎
+try:
+    from tools.template_tools.network.fetch_engine import fetch_urls
+    FETCH_ENGINE_AVAILABLE = True
+except ImportError:
+    FETCH_ENGINE_AVAILABLE = False
+
+# 批量抓取时单个网页的最大下载字节数
+MAX_DOWNLOAD_BYTES = 2 * 1024 * 1024
+
+# 网页抓取请求头
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8"
+}
+
 # AWS Bedrock用于AI分析
 try:
     import boto3
@@ -219,58 +237,11 @@ def extract_webpage_content(
                 "message": "网页抓取库未安装。请安装: pip install requests beautifulsoup4 lxml"
             }, ensure_ascii=False)
         
-        # 设置请求头
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8"
-        }
-        
         # 发送请求
-        response = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
+        response = requests.get(url, headers=REQUEST_HEADERS, timeout=timeout, allow_redirects=True)
         response.raise_for_status()
         
-        # 解析HTML
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        # 移除脚本和样式
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # 提取正文内容
-        # 优先提取article、main、content等主要内容区域
-        main_content = None
-        for tag in ['article', 'main', '[role="main"]', '.content', '#content']:
-            main_content = soup.select_one(tag)
-            if main_content:
-                break
-        
-        if not main_content:
-            main_content = soup.body if soup.body else soup
-        
-        # 提取文本
-        text = main_content.get_text(separator="\n", strip=True)
-        
-        # 清理文本
-        lines = [line.strip() for line in text.split("\n") if line.strip()]
-        cleaned_text = "\n".join(lines)
-        
-        # 限制长度
-        if len(cleaned_text) > max_content_length:
-            cleaned_text = cleaned_text[:max_content_length] + "..."
-        
-        # 提取标题
-        title = soup.title.string if soup.title else ""
-        
-        result = {
-            "status": "success",
-            "url": url,
-            "title": title,
-            "content": cleaned_text,
-            "content_length": len(cleaned_text),
-            "extraction_time": datetime.now().isoformat(),
-            "source_domain": urlparse(url).netloc
-        }
+        result = _extract_main_content(response.content, url, max_content_length)
         
         return json.dumps(result, ensure_ascii=False, indent=2)
         
@@ -295,6 +266,50 @@ def extract_webpage_content(
         }, ensure_ascii=False)
 
 
+def _extract_main_content(html: bytes, url: str, max_content_length: int) -> Dict[str, Any]:
+    """解析HTML并提取标题和正文，返回单个网页的抓取结果"""
+    soup = BeautifulSoup(html, 'lxml')
+    
+    # 移除脚本和样式
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+    
+    # 提取正文内容
+    # 优先提取article、main、content等主要内容区域
+    main_content = None
+    for tag in ['article', 'main', '[role="main"]', '.content', '#content']:
+        main_content = soup.select_one(tag)
+        if main_content:
+            break
+    
+    if not main_content:
+        main_content = soup.body if soup.body else soup
+    
+    # 提取文本
+    text = main_content.get_text(separator="\n", strip=True)
+    
+    # 清理文本
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    cleaned_text = "\n".join(lines)
+    
+    # 限制长度
+    if len(cleaned_text) > max_content_length:
+        cleaned_text = cleaned_text[:max_content_length] + "..."
+    
+    # 提取标题
+    title = soup.title.string if soup.title else ""
+    
+    return {
+        "status": "success",
+        "url": url,
+        "title": title,
+        "content": cleaned_text,
+        "content_length": len(cleaned_text),
+        "extraction_time": datetime.now().isoformat(),
+        "source_domain": urlparse(url).netloc
+    }
+
+
 @tool
 def batch_extract_webpages(
     urls: List[str],
@@ -309,29 +324,43 @@ def batch_extract_webpages(
         urls (List[str]): 网页URL列表
         max_content_length (int): 每个网页的最大内容长度
         timeout (int): 请求超时时间
-        max_concurrent (int): 最大并发数（当前版本顺序执行）
+        max_concurrent (int): 最大并发数（同一网站最多2个并发请求，并遵守robots.txt）
         
     Returns:
         str: JSON格式的批量抓取结果
     """
     try:
-        results = []
-        successful = 0
-        failed = 0
+        if not SCRAPING_AVAILABLE or not FETCH_ENGINE_AVAILABLE:
+            return json.dumps({
+                "status": "error",
+                "message": "网页抓取库未安装。请安装: pip install httpx beautifulsoup4 lxml"
+            }, ensure_ascii=False)
         
-        for url in urls[:max_concurrent]:  # 限制并发数
-            result_json = extract_webpage_content(url, max_content_length, timeout)
-            result = json.loads(result_json)
-            
-            if result["status"] == "success":
-                successful += 1
+        # 每个网页下载完成后立即在线程中解析正文
+        fetch_results = fetch_urls(
+            urls,
+            extractor=lambda r: _extract_main_content(r.content, r.url, max_content_length),
+            max_concurrency=max_concurrent,
+            timeout=timeout,
+            max_bytes=MAX_DOWNLOAD_BYTES,
+            headers=REQUEST_HEADERS,
+            allowed_content_types=("text/", "application/xhtml", "application/xml")
+        )
+        
+        results = []
+        for fetch_result in fetch_results:
+            if fetch_result.ok:
+                result = dict(fetch_result.extracted, from_cache=fetch_result.from_cache)
             else:
-                failed += 1
-            
+                result = {
+                    "status": "error",
+                    "url": fetch_result.url,
+                    "message": f"抓取失败: {fetch_result.error}"
+                }
             results.append(result)
-            
-            # 避免触发速率限制
-            time.sleep(1)
+        
+        successful = sum(1 for r in results if r["status"] == "success")
+        failed = len(results) - successful
         
         return json.dumps({
             "status": "success",
@@ -704,6 +733,14 @@ def _determine_overall_sentiment(sentiment_stats: Dict[str, int]) -> str:
 
 # ==================== 工具6: 缓存管理工具 ====================
 
+CACHE_NAMESPACE = "drug_feedback_collector"
+
+
+def _drug_cache_key(drug_name: str) -> str:
+    """药物缓存键（同一药物的各类缓存共享该前缀）"""
+    return hashlib.sha256(drug_name.lower().strip().encode()).hexdigest()
+
+
 @tool
 def check_cache(
     drug_name: str,
@@ -722,32 +759,20 @@ def check_cache(
         str: JSON格式的缓存检查结果
     """
     try:
-        # 生成缓存键
-        cache_key = hashlib.sha256(drug_name.lower().strip().encode()).hexdigest()
-        
-        # 缓存目录
-        cache_dir = Path(f".cache/drug_feedback_collector/{cache_key}")
-        
-        if not cache_dir.exists():
-            return json.dumps({
-                "status": "not_found",
-                "cache_exists": False,
-                "message": "缓存不存在"
-            }, ensure_ascii=False)
+        cache = get_cache(CACHE_NAMESPACE)
         
-        # 检查缓存文件
-        cache_file = cache_dir / f"{cache_type}.json"
+        # 读取缓存条目
+        entry = cache.get_entry(f"{_drug_cache_key(drug_name)}/{cache_type}")
         
-        if not cache_file.exists():
+        if entry is None:
             return json.dumps({
                 "status": "not_found",
                 "cache_exists": False,
-                "message": f"缓存文件不存在: {cache_type}.json"
+                "message": f"缓存不存在: {cache_type}"
             }, ensure_ascii=False)
         
         # 检查缓存时间
-        cache_mtime = datetime.fromtimestamp(cache_file.stat().st_mtime)
-        cache_age = datetime.now() - cache_mtime
+        cache_age = timedelta(seconds=entry.age_seconds)
         
         if cache_age.days > max_age_days:
             return json.dumps({
@@ -758,16 +783,12 @@ def check_cache(
                 "message": f"缓存已过期（{cache_age.days}天）"
             }, ensure_ascii=False)
         
-        # 读取缓存
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cached_data = json.load(f)
-        
         return json.dumps({
             "status": "valid",
             "cache_exists": True,
             "cache_age_days": cache_age.days,
-            "cache_path": str(cache_file),
-            "cached_data": cached_data,
+            "cache_path": cache.path,
+            "cached_data": entry.value,
             "message": "缓存有效"
         }, ensure_ascii=False, indent=2)
         
@@ -797,15 +818,7 @@ def save_to_cache(
         str: JSON格式的保存结果
     """
     try:
-        # 生成缓存键
-        cache_key = hashlib.sha256(drug_name.lower().strip().encode()).hexdigest()
-        
-        # 创建缓存目录
-        cache_dir = Path(f".cache/drug_feedback_collector/{cache_key}")
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 保存缓存文件
-        cache_file = cache_dir / f"{cache_type}.json"
+        cache = get_cache(CACHE_NAMESPACE)
         
         # 添加元数据
         cache_data = {
@@ -815,13 +828,18 @@ def save_to_cache(
             "data": data
         }
         
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        # 有效期由check_cache的max_age_days控制，这里不设置TTL
+        entry = cache.set(
+            f"{_drug_cache_key(drug_name)}/{cache_type}",
+            cache_data,
+            ttl=None,
+            metadata={"drug_name": drug_name, "cache_type": cache_type}
+        )
         
         return json.dumps({
             "status": "success",
-            "cache_path": str(cache_file),
-            "cache_size": cache_file.stat().st_size,
+            "cache_path": cache.path,
+            "cache_size": entry.size,
             "message": "缓存保存成功"
         }, ensure_ascii=False)
         
@@ -849,51 +867,31 @@ def clear_cache(
         str: JSON格式的清理结果
     """
     try:
-        cache_base_dir = Path(".cache/drug_feedback_collector")
-        
-        if not cache_base_dir.exists():
-            return json.dumps({
-                "status": "success",
-                "message": "缓存目录不存在，无需清理",
-                "deleted_count": 0
-            }, ensure_ascii=False)
+        cache = get_cache(CACHE_NAMESPACE)
         
         deleted_count = 0
         deleted_items = []
         
         if drug_name:
             # 清理特定药物的缓存
-            cache_key = hashlib.sha256(drug_name.lower().strip().encode()).hexdigest()
-            cache_dir = cache_base_dir / cache_key
-            
-            if cache_dir.exists():
-                import shutil
-                shutil.rmtree(cache_dir)
+            if cache.clear(prefix=f"{_drug_cache_key(drug_name)}/")["deleted_entries"]:
                 deleted_count = 1
                 deleted_items.append(drug_name)
         else:
-            # 清理所有缓存或过期缓存
-            for cache_dir in cache_base_dir.iterdir():
-                if cache_dir.is_dir():
-                    should_delete = False
-                    
-                    if older_than_days is not None:
-                        # 检查缓存年龄
-                        report_file = cache_dir / "report.json"
-                        if report_file.exists():
-                            cache_mtime = datetime.fromtimestamp(report_file.stat().st_mtime)
-                            cache_age = datetime.now() - cache_mtime
-                            if cache_age.days > older_than_days:
-                                should_delete = True
-                    else:
-                        # 清理所有缓存
-                        should_delete = True
-                    
-                    if should_delete:
-                        import shutil
-                        shutil.rmtree(cache_dir)
-                        deleted_count += 1
-                        deleted_items.append(cache_dir.name)
+            # 清理所有缓存或过期缓存（按报告的缓存时间判断）
+            for entry in cache.entries():
+                if entry.metadata.get("cache_type") != "report":
+                    continue
+                if older_than_days is not None and timedelta(seconds=entry.age_seconds).days <= older_than_days:
+                    continue
+                
+                cache.clear(prefix=entry.key.split("/", 1)[0] + "/")
+                deleted_count += 1
+                deleted_items.append(entry.metadata.get("drug_name", entry.key))
+            
+            if older_than_days is None:
+                # 清理没有报告的缓存（例如只有search_results）
+                cache.clear()
         
         return json.dumps({
             "status": "success",
@@ -919,47 +917,36 @@ def get_cache_statistics() -> str:
         str: JSON格式的缓存统计
     """
     try:
-        cache_base_dir = Path(".cache/drug_feedback_collector")
+        cache = get_cache(CACHE_NAMESPACE)
         
-        if not cache_base_dir.exists():
-            return json.dumps({
-                "status": "success",
-                "total_cached_drugs": 0,
-                "total_cache_size": 0,
-                "message": "缓存目录不存在"
-            }, ensure_ascii=False)
-        
-        total_drugs = 0
-        total_size = 0
+        drug_sizes = {}
         cache_items = []
         
-        for cache_dir in cache_base_dir.iterdir():
-            if cache_dir.is_dir():
-                total_drugs += 1
-                
-                # 计算目录大小
-                dir_size = sum(f.stat().st_size for f in cache_dir.rglob('*') if f.is_file())
-                total_size += dir_size
-                
-                # 获取药物名称和缓存时间
-                report_file = cache_dir / "report.json"
-                if report_file.exists():
-                    with open(report_file, 'r', encoding='utf-8') as f:
-                        report_data = json.load(f)
-                        cache_items.append({
-                            "drug_name": report_data.get("drug_name", "unknown"),
-                            "cached_time": report_data.get("cached_time", "unknown"),
-                            "cache_size": dir_size,
-                            "cache_key": cache_dir.name
-                        })
+        for entry in cache.entries():
+            drug_key = entry.key.split("/", 1)[0]
+            drug_sizes[drug_key] = drug_sizes.get(drug_key, 0) + entry.size
+            
+            # 获取药物名称和缓存时间
+            if entry.metadata.get("cache_type") == "report":
+                cache_items.append({
+                    "drug_name": entry.metadata.get("drug_name", "unknown"),
+                    "cached_time": datetime.fromtimestamp(entry.created_at).isoformat(),
+                    "cache_key": drug_key
+                })
+        
+        for item in cache_items:
+            item["cache_size"] = drug_sizes[item["cache_key"]]
+        
+        total_size = sum(drug_sizes.values())
         
         return json.dumps({
             "status": "success",
-            "total_cached_drugs": total_drugs,
+            "total_cached_drugs": len(drug_sizes),
             "total_cache_size": total_size,
             "total_cache_size_mb": round(total_size / 1024 / 1024, 2),
             "cache_items": cache_items,
-            "cache_base_dir": str(cache_base_dir)
+            "cache_base_dir": cache.path,
+            "cache_stats": cache.stats()
         }, ensure_ascii=False, indent=2)
         
     except Exception as e:
@@ -5,44 +5,39 @@ FDA数据查询支持工具
 提供缓存管理、数据解析、错误处理等支持功能，配合FDA API工具使用。
 """
 
-import os
 import json
 import hashlib
 import time
 from typing import Dict, List, Any, Optional, Union
-from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 from strands import tool
 
+from tools.template_tools.common.tiered_cache import get_cache
+
 
 # 缓存配置
-DEFAULT_CACHE_DIR = ".cache/fda_data_query_agent"
+DEFAULT_CACHE_DIR = None  # 为空时使用共享工具缓存文件
 DEFAULT_CACHE_EXPIRATION_HOURS = 24
 MAX_CACHE_SIZE_MB = 500
+CACHE_NAMESPACE = "fda_data_query_agent"
 
 
-def _ensure_cache_dir(cache_dir: str = None) -> str:
+def _get_cache(cache_dir: str = None):
     """
-    确保缓存目录存在
+    获取FDA查询缓存（内存LRU + SQLite磁盘层，超过MAX_CACHE_SIZE_MB时按LRU淘汰）
     
     Args:
-        cache_dir: 缓存目录路径
+        cache_dir: 缓存目录，为空时使用共享工具缓存
         
     Returns:
-        缓存目录的绝对路径
+        TieredCache实例
     """
-    if not cache_dir:
-        cache_dir = DEFAULT_CACHE_DIR
-    
-    # 创建缓存目录
-    Path(cache_dir).mkdir(parents=True, exist_ok=True)
-    
-    # 创建子目录
-    subdirs = ["drugs", "devices", "food", "adverse_events", "recalls", "comprehensive"]
-    for subdir in subdirs:
-        Path(os.path.join(cache_dir, subdir)).mkdir(exist_ok=True)
-    
-    return cache_dir
+    return get_cache(
+        CACHE_NAMESPACE,
+        cache_dir=cache_dir or DEFAULT_CACHE_DIR,
+        default_ttl=DEFAULT_CACHE_EXPIRATION_HOURS * 3600,
+        disk_max_bytes=MAX_CACHE_SIZE_MB * 1024 * 1024
+    )
 
 
 def _generate_cache_key(query_params: Dict[str, Any]) -> str:
@@ -61,19 +56,18 @@ def _generate_cache_key(query_params: Dict[str, Any]) -> str:
     return hashlib.sha256(params_str.encode()).hexdigest()
 
 
-def _get_cache_file_path(cache_dir: str, category: str, cache_key: str) -> str:
+def _get_entry_key(category: str, cache_key: str) -> str:
     """
-    获取缓存文件路径
+    获取缓存条目键（按数据类别分组）
     
     Args:
-        cache_dir: 缓存目录
         category: 数据类别
         cache_key: 缓存键
         
     Returns:
-        缓存文件的完整路径
+        缓存条目键
     """
-    return os.path.join(cache_dir, category, f"{cache_key}.json")
+    return f"{category}/{cache_key}"
 
 
 @tool
@@ -91,7 +85,7 @@ def cache_query_result(
         query_type (str): 查询类型（drugs/devices/food/adverse_events/recalls/comprehensive）
         query_params (Dict[str, Any]): 查询参数
         result_data (str): 查询结果（JSON字符串）
-        cache_dir (str): 缓存目录，默认使用.cache/fda_data_query_agent
+        cache_dir (str): 缓存目录，默认使用共享工具缓存
         expiration_hours (int): 缓存过期时间（小时），默认24小时
         
     Returns:
@@ -104,8 +98,7 @@ def cache_query_result(
         >>> print(data["cache_key"])
     """
     try:
-        # 确保缓存目录存在
-        cache_dir = _ensure_cache_dir(cache_dir)
+        cache = _get_cache(cache_dir)
         
         # 生成缓存键
         cache_key = _generate_cache_key(query_params)
@@ -119,34 +112,24 @@ def cache_query_result(
                 "error_message": "无效的JSON数据"
             }, ensure_ascii=False)
         
-        # 构建缓存条目
-        cache_entry = {
-            "cache_key": cache_key,
-            "query_type": query_type,
-            "query_params": query_params,
-            "cached_at": datetime.now().isoformat(),
-            "expires_at": (datetime.now() + timedelta(hours=expiration_hours)).isoformat(),
-            "expiration_hours": expiration_hours,
-            "hit_count": 0,
-            "data": result_obj
-        }
-        
-        # 获取缓存文件路径
-        cache_file = _get_cache_file_path(cache_dir, query_type, cache_key)
-        
-        # 写入缓存文件
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_entry, f, ensure_ascii=False, indent=2)
-        
-        # 检查缓存大小并清理
-        _cleanup_cache_if_needed(cache_dir)
+        # 写入缓存（超出字节预算时由缓存按LRU淘汰）
+        entry = cache.set(
+            _get_entry_key(query_type, cache_key),
+            result_obj,
+            ttl=expiration_hours * 3600,
+            metadata={
+                "query_type": query_type,
+                "query_params": query_params,
+                "expiration_hours": expiration_hours
+            }
+        )
         
         return json.dumps({
             "status": "success",
             "cache_key": cache_key,
-            "cache_file": cache_file,
-            "cached_at": cache_entry["cached_at"],
-            "expires_at": cache_entry["expires_at"]
+            "cache_file": cache.path,
+            "cached_at": datetime.fromtimestamp(entry.created_at).isoformat(),
+            "expires_at": datetime.fromtimestamp(entry.expires_at).isoformat()
         }, ensure_ascii=False, indent=2)
         
     except Exception as e:
@@ -171,7 +154,7 @@ def get_cached_result(
     Args:
         query_type (str): 查询类型（drugs/devices/food/adverse_events/recalls/comprehensive）
         query_params (Dict[str, Any]): 查询参数
-        cache_dir (str): 缓存目录，默认使用.cache/fda_data_query_agent
+        cache_dir (str): 缓存目录，默认使用共享工具缓存
         allow_expired (bool): 是否允许返回过期的缓存数据，默认False
         max_expired_days (int): 允许的最大过期天数（当allow_expired=True时），默认7天
         
@@ -186,39 +169,33 @@ def get_cached_result(
         >>>     print(data["data"])
     """
     try:
-        # 确保缓存目录存在
-        cache_dir = _ensure_cache_dir(cache_dir)
+        cache = _get_cache(cache_dir)
         
         # 生成缓存键
         cache_key = _generate_cache_key(query_params)
         
-        # 获取缓存文件路径
-        cache_file = _get_cache_file_path(cache_dir, query_type, cache_key)
+        # 过期条目由本函数判断是否可用
+        entry = cache.get_entry(_get_entry_key(query_type, cache_key), allow_expired=True)
         
-        # 检查缓存文件是否存在
-        if not os.path.exists(cache_file):
+        if entry is None:
             return json.dumps({
                 "status": "miss",
                 "cache_key": cache_key,
                 "message": "缓存未命中"
             }, ensure_ascii=False)
         
-        # 读取缓存文件
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_entry = json.load(f)
-        
-        # 检查缓存是否过期
-        expires_at = datetime.fromisoformat(cache_entry["expires_at"])
+        cached_at = datetime.fromtimestamp(entry.created_at).isoformat()
+        expires_at = datetime.fromtimestamp(entry.expires_at) if entry.expires_at else None
         now = datetime.now()
-        is_expired = now > expires_at
+        is_expired = entry.expired
         
         # 如果过期且不允许返回过期数据
         if is_expired and not allow_expired:
             return json.dumps({
                 "status": "expired",
                 "cache_key": cache_key,
-                "cached_at": cache_entry["cached_at"],
-                "expires_at": cache_entry["expires_at"],
+                "cached_at": cached_at,
+                "expires_at": expires_at.isoformat(),
                 "message": "缓存已过期"
             }, ensure_ascii=False)
         
@@ -233,23 +210,15 @@ def get_cached_result(
                     "message": f"缓存过期超过{max_expired_days}天"
                 }, ensure_ascii=False)
         
-        # 更新命中次数
-        cache_entry["hit_count"] += 1
-        cache_entry["last_hit_at"] = now.isoformat()
-        
-        # 写回缓存文件
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_entry, f, ensure_ascii=False, indent=2)
-        
         # 返回缓存数据
         return json.dumps({
             "status": "hit",
             "cache_key": cache_key,
-            "cached_at": cache_entry["cached_at"],
-            "expires_at": cache_entry["expires_at"],
+            "cached_at": cached_at,
+            "expires_at": expires_at.isoformat() if expires_at else None,
             "is_expired": is_expired,
-            "hit_count": cache_entry["hit_count"],
-            "data": cache_entry["data"]
+            "hit_count": entry.hits,
+            "data": entry.value
         }, ensure_ascii=False, indent=2)
         
     except Exception as e:
@@ -270,7 +239,7 @@ def clear_cache(
     清理缓存数据
     
     Args:
-        cache_dir (str): 缓存目录，默认使用.cache/fda_data_query_agent
+        cache_dir (str): 缓存目录，默认使用共享工具缓存
         query_type (Optional[str]): 要清理的查询类型，如果不提供则清理所有类型
         older_than_hours (Optional[int]): 清理超过指定小时数的缓存，如果不提供则清理所有缓存
         
@@ -283,59 +252,17 @@ def clear_cache(
         >>> print(data["deleted_count"])
     """
     try:
-        # 确保缓存目录存在
-        cache_dir = _ensure_cache_dir(cache_dir)
-        
-        deleted_count = 0
-        total_size_deleted = 0
+        cache = _get_cache(cache_dir)
         
-        # 确定要清理的目录
-        if query_type:
-            target_dirs = [os.path.join(cache_dir, query_type)]
-        else:
-            target_dirs = [
-                os.path.join(cache_dir, d) for d in 
-                ["drugs", "devices", "food", "adverse_events", "recalls", "comprehensive"]
-                if os.path.exists(os.path.join(cache_dir, d))
-            ]
-        
-        # 遍历目录清理缓存
-        for target_dir in target_dirs:
-            if not os.path.exists(target_dir):
-                continue
-                
-            for filename in os.listdir(target_dir):
-                if not filename.endswith('.json'):
-                    continue
-                
-                filepath = os.path.join(target_dir, filename)
-                
-                # 如果指定了时间限制，检查缓存时间
-                if older_than_hours is not None:
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            cache_entry = json.load(f)
-                        
-                        cached_at = datetime.fromisoformat(cache_entry["cached_at"])
-                        age_hours = (datetime.now() - cached_at).total_seconds() / 3600
-                        
-                        if age_hours < older_than_hours:
-                            continue
-                    except:
-                        pass  # 如果无法读取，删除该文件
-                
-                # 获取文件大小
-                file_size = os.path.getsize(filepath)
-                
-                # 删除文件
-                os.remove(filepath)
-                deleted_count += 1
-                total_size_deleted += file_size
+        cleared = cache.clear(
+            prefix=_get_entry_key(query_type, "") if query_type else None,
+            older_than=older_than_hours * 3600 if older_than_hours is not None else None
+        )
         
         return json.dumps({
             "status": "success",
-            "deleted_count": deleted_count,
-            "total_size_deleted_mb": round(total_size_deleted / (1024 * 1024), 2),
+            "deleted_count": cleared["deleted_entries"],
+            "total_size_deleted_mb": round(cleared["deleted_bytes"] / (1024 * 1024), 2),
             "query_type": query_type or "all",
             "older_than_hours": older_than_hours
         }, ensure_ascii=False, indent=2)
@@ -354,7 +281,7 @@ def get_cache_stats(cache_dir: str = None) -> str:
     获取缓存统计信息
     
     Args:
-        cache_dir (str): 缓存目录，默认使用.cache/fda_data_query_agent
+        cache_dir (str): 缓存目录，默认使用共享工具缓存
         
     Returns:
         str: JSON格式的缓存统计信息
@@ -365,8 +292,7 @@ def get_cache_stats(cache_dir: str = None) -> str:
         >>> print(data["total_entries"])
     """
     try:
-        # 确保缓存目录存在
-        cache_dir = _ensure_cache_dir(cache_dir)
+        cache = _get_cache(cache_dir)
         
         stats = {
             "total_entries": 0,
@@ -377,71 +303,47 @@ def get_cache_stats(cache_dir: str = None) -> str:
             "newest_entry": None
         }
         
-        # 统计各类型的缓存
-        categories = ["drugs", "devices", "food", "adverse_events", "recalls", "comprehensive"]
-        
         oldest_time = None
         newest_time = None
         
-        for category in categories:
-            category_dir = os.path.join(cache_dir, category)
-            if not os.path.exists(category_dir):
-                continue
-            
-            category_stats = {
+        # 按查询类型汇总缓存条目
+        for entry in cache.entries():
+            category = entry.metadata.get("query_type") or entry.key.split("/", 1)[0]
+            category_stats = stats["by_type"].setdefault(category, {
                 "count": 0,
                 "size_mb": 0,
                 "expired": 0,
                 "total_hits": 0
-            }
+            })
             
-            for filename in os.listdir(category_dir):
-                if not filename.endswith('.json'):
-                    continue
-                
-                filepath = os.path.join(category_dir, filename)
-                file_size = os.path.getsize(filepath)
-                
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        cache_entry = json.load(f)
-                    
-                    # 统计基本信息
-                    category_stats["count"] += 1
-                    category_stats["size_mb"] += file_size
-                    category_stats["total_hits"] += cache_entry.get("hit_count", 0)
-                    
-                    # 检查是否过期
-                    expires_at = datetime.fromisoformat(cache_entry["expires_at"])
-                    if datetime.now() > expires_at:
-                        category_stats["expired"] += 1
-                        stats["expired_entries"] += 1
-                    
-                    # 更新最早和最新时间
-                    cached_at = datetime.fromisoformat(cache_entry["cached_at"])
-                    if oldest_time is None or cached_at < oldest_time:
-                        oldest_time = cached_at
-                    if newest_time is None or cached_at > newest_time:
-                        newest_time = cached_at
-                        
-                except:
-                    pass
+            category_stats["count"] += 1
+            category_stats["size_mb"] += entry.size
+            category_stats["total_hits"] += entry.hits
             
-            # 转换大小为MB
-            category_stats["size_mb"] = round(category_stats["size_mb"] / (1024 * 1024), 2)
+            if entry.expired:
+                category_stats["expired"] += 1
+                stats["expired_entries"] += 1
             
-            stats["by_type"][category] = category_stats
+            if oldest_time is None or entry.created_at < oldest_time:
+                oldest_time = entry.created_at
+            if newest_time is None or entry.created_at > newest_time:
+                newest_time = entry.created_at
+        
+        # 转换大小为MB
+        for category_stats in stats["by_type"].values():
             stats["total_entries"] += category_stats["count"]
-            stats["total_size_mb"] += category_stats["size_mb"]
+            stats["total_size_mb"] += category_stats["size_mb"] / (1024 * 1024)
+            category_stats["size_mb"] = round(category_stats["size_mb"] / (1024 * 1024), 2)
         
         # 格式化时间
         if oldest_time:
-            stats["oldest_entry"] = oldest_time.isoformat()
+            stats["oldest_entry"] = datetime.fromtimestamp(oldest_time).isoformat()
         if newest_time:
-            stats["newest_entry"] = newest_time.isoformat()
+            stats["newest_entry"] = datetime.fromtimestamp(newest_time).isoformat()
         
         stats["total_size_mb"] = round(stats["total_size_mb"], 2)
-        stats["cache_dir"] = cache_dir
+        stats["cache_dir"] = cache.path
+        stats["cache"] = cache.stats()
         
         return json.dumps({
             "status": "success",
@@ -456,74 +358,6 @@ def get_cache_stats(cache_dir: str = None) -> str:
         }, ensure_ascii=False)
 
 
-def _cleanup_cache_if_needed(cache_dir: str) -> None:
-    """
-    如果缓存大小超过限制，使用LRU策略清理
-    
-    Args:
-        cache_dir: 缓存目录
-    """
-    try:
-        # 获取缓存统计
-        stats_result = get_cache_stats(cache_dir)
-        stats_data = json.loads(stats_result)
-        
-        if stats_data["status"] != "success":
-            return
-        
-        total_size_mb = stats_data["stats"]["total_size_mb"]
-        
-        # 如果未超过限制，不需要清理
-        if total_size_mb <= MAX_CACHE_SIZE_MB:
-            return
-        
-        # 收集所有缓存文件及其最后访问时间
-        cache_files = []
-        categories = ["drugs", "devices", "food", "adverse_events", "recalls", "comprehensive"]
-        
-        for category in categories:
-            category_dir = os.path.join(cache_dir, category)
-            if not os.path.exists(category_dir):
-                continue
-            
-            for filename in os.listdir(category_dir):
-                if not filename.endswith('.json'):
-                    continue
-                
-                filepath = os.path.join(category_dir, filename)
-                
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        cache_entry = json.load(f)
-                    
-                    last_access = cache_entry.get("last_hit_at", cache_entry["cached_at"])
-                    last_access_time = datetime.fromisoformat(last_access)
-                    file_size = os.path.getsize(filepath)
-                    
-                    cache_files.append({
-                        "path": filepath,
-                        "last_access": last_access_time,
-                        "size": file_size
-                    })
-                except:
-                    pass
-        
-        # 按最后访问时间排序（LRU）
-        cache_files.sort(key=lambda x: x["last_access"])
-        
-        # 删除最旧的文件，直到缓存大小降到限制以下
-        current_size_mb = total_size_mb
-        for cache_file in cache_files:
-            if current_size_mb <= MAX_CACHE_SIZE_MB * 0.8:  # 降到80%
-                break
-            
-            os.remove(cache_file["path"])
-            current_size_mb -= cache_file["size"] / (1024 * 1024)
-            
-    except:
-        pass  # 清理失败不影响主流程
-
-
 @tool
 def parse_fda_drug_data(raw_data: str) -> str:
     """
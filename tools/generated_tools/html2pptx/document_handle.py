@@ -0,0 +1,330 @@
+"""
+HTML文档句柄工具，用于在多个分析工具之间共享解析后的文档。
+
+此模块把HTML解析为BeautifulSoup文档树后按内容哈希缓存在进程内（LRU淘汰），
+并为每个文档分配一个句柄ID。html_parser、semantic_analyzer、style_mapper中的工具
+既可以接收HTML内容或文件路径，也可以接收句柄ID，同一份HTML只解析一次。
+标题层次、主内容节点、元素样式等派生结果也按句柄缓存，供不同工具复用。
+
+共享的文档树是只读的：使用方不能修改文档树（例如extract/decompose/append），
+需要修改时应先复制节点。
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Callable, Iterator
+
+from bs4 import BeautifulSoup, Tag, NavigableString
+from bs4.element import PreformattedString
+from strands import tool
+
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+# 文档句柄ID前缀
+HANDLE_PREFIX = "htmldoc:"
+
+# 同时缓存的文档数量上限
+DOCUMENT_CACHE_MAX_COUNT = 8
+
+# 缓存文档的HTML总长度上限（字符数），解析后的文档树通常占用源文档数倍的内存
+DOCUMENT_CACHE_MAX_CHARS = 32 * 1024 * 1024
+
+# 提取可见文本时跳过的元素
+NON_VISIBLE_TAGS = ("script", "style", "noscript", "template")
+
+
+class HTMLDocument:
+    """解析后的HTML文档及其派生结果缓存"""
+    
+    def __init__(self, handle_id: str, soup: BeautifulSoup, parser: str, size: int):
+        self.handle_id = handle_id
+        self.soup = soup
+        self.parser = parser
+        self.size = size
+        self.created_at = time.time()
+        self.last_access = time.monotonic()
+        self._artifacts: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+    
+    def memoize(self, key: str, factory: Callable[[BeautifulSoup], Any]) -> Any:
+        """
+        获取派生结果，首次访问时调用factory(soup)计算并缓存。
+        
+        缓存的结果在调用方之间共享，调用方不能修改返回的对象。
+        """
+        with self._lock:
+            if key not in self._artifacts:
+                self._artifacts[key] = factory(self.soup)
+            return self._artifacts[key]
+    
+    @property
+    def artifact_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._artifacts)
+
+
+class _DocumentRegistry:
+    """
+    进程内的解析文档缓存
+    
+    以（解析器, HTML内容哈希）为键，相同内容重复加载时直接返回已解析的文档。
+    文档数或HTML总长度超过上限时淘汰最久未使用的文档。
+    """
+    
+    def __init__(self, max_documents: int = DOCUMENT_CACHE_MAX_COUNT, max_chars: int = DOCUMENT_CACHE_MAX_CHARS):
+        self.max_documents = max_documents
+        self.max_chars = max_chars
+        self._documents: "OrderedDict[str, HTMLDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._parse_locks: Dict[str, threading.Lock] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "parse_seconds": 0.0}
+    
+    def load(self, html_content: str, parser: str) -> HTMLDocument:
+        digest = hashlib.sha1(parser.encode("utf-8") + b"\0" + html_content.encode("utf-8", "surrogatepass")).hexdigest()
+        handle_id = f"{HANDLE_PREFIX}{digest}"
+        
+        document = self._lookup(handle_id)
+        if document is not None:
+            return document
+        
+        # 同一文档只由一个线程解析，其他线程等待后直接使用结果
+        with self._lock:
+            parse_lock = self._parse_locks.setdefault(handle_id, threading.Lock())
+        with parse_lock:
+            document = self._lookup(handle_id)
+            if document is not None:
+                return document
+            
+            start = time.perf_counter()
+            soup = BeautifulSoup(html_content, parser)
+            document = HTMLDocument(handle_id, soup, parser, len(html_content))
+            
+            with self._lock:
+                self.stats["misses"] += 1
+                self.stats["parse_seconds"] += time.perf_counter() - start
+                self._documents[handle_id] = document
+                self._evict()
+                self._parse_locks.pop(handle_id, None)
+        return document
+    
+    def get(self, handle_id: str) -> HTMLDocument:
+        document = self._lookup(handle_id)
+        if document is None:
+            raise ValueError(f"文档句柄不存在或已被淘汰: {handle_id}")
+        return document
+    
+    def close(self, handle_id: str) -> Optional[HTMLDocument]:
+        with self._lock:
+            return self._documents.pop(handle_id, None)
+    
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._documents)
+            self._documents.clear()
+            return count
+    
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            documents = [
+                {
+                    "handle_id": document.handle_id,
+                    "parser": document.parser,
+                    "size": document.size,
+                    "created_at": document.created_at,
+                    "artifacts": document.artifact_keys
+                }
+                for document in self._documents.values()
+            ]
+            stats = dict(self.stats)
+        stats["parse_seconds"] = round(stats["parse_seconds"], 3)
+        return {
+            "documents": documents,
+            "document_count": len(documents),
+            "total_chars": sum(d["size"] for d in documents),
+            "max_documents": self.max_documents,
+            "max_chars": self.max_chars,
+            "stats": stats
+        }
+    
+    def _lookup(self, handle_id: str) -> Optional[HTMLDocument]:
+        with self._lock:
+            document = self._documents.get(handle_id)
+            if document is not None:
+                self._documents.move_to_end(handle_id)
+                document.last_access = time.monotonic()
+                self.stats["hits"] += 1
+            return document
+    
+    def _evict(self) -> None:
+        """淘汰最久未使用的文档（调用方持有锁），最新加载的文档总是保留"""
+        total_chars = sum(d.size for d in self._documents.values())
+        while len(self._documents) > 1 and (
+            len(self._documents) > self.max_documents or total_chars > self.max_chars
+        ):
+            _, document = self._documents.popitem(last=False)
+            total_chars -= document.size
+            self.stats["evictions"] += 1
+
+
+_document_registry = _DocumentRegistry()
+
+
+def is_document_handle(value: Any) -> bool:
+    """判断输入是否为文档句柄ID"""
+    return isinstance(value, str) and value.startswith(HANDLE_PREFIX)
+
+
+def load_document(html_content: str, parser: str = None, encoding: str = "utf-8") -> HTMLDocument:
+    """
+    加载HTML文档，返回共享的解析结果。
+    
+    Args:
+        html_content: 文档句柄ID、HTML内容或HTML文件路径
+        parser: 解析器类型，默认使用lxml（未安装时使用html.parser）
+        encoding: 读取文件时使用的编码
+    """
+    if is_document_handle(html_content):
+        return _document_registry.get(html_content)
+    
+    if not html_content.lstrip().startswith('<') and os.path.isfile(html_content):
+        with open(html_content, 'r', encoding=encoding) as f:
+            html_content = f.read()
+    
+    return _document_registry.load(html_content, parser or DEFAULT_PARSER)
+
+
+def iter_visible_strings(element: Tag, excluded_tags=NON_VISIBLE_TAGS) -> Iterator[NavigableString]:
+    """按文档顺序遍历元素中的可见文本，跳过脚本、样式等元素，不修改文档树"""
+    stack = [element]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Tag):
+            if node.name in excluded_tags and node is not element:
+                continue
+            stack.extend(reversed(node.contents))
+        elif isinstance(node, NavigableString) and not isinstance(node, PreformattedString):
+            yield node
+
+
+def get_visible_text(element: Tag, separator: str = "", strip: bool = False,
+                     excluded_tags=NON_VISIBLE_TAGS) -> str:
+    """与Tag.get_text相同，但不包含脚本、样式等元素中的文本"""
+    texts = []
+    for text in iter_visible_strings(element, excluded_tags):
+        if strip:
+            text = text.strip()
+            if not text:
+                continue
+        texts.append(str(text))
+    return separator.join(texts)
+
+
+@tool
+def open_html_document(
+    html_content: str,
+    parser: str = None,
+    encoding: str = "utf-8"
+) -> str:
+    """
+    解析HTML文档并返回文档句柄ID，后续工具可以传入句柄ID代替HTML内容，避免重复解析。
+    
+    Args:
+        html_content (str): HTML文档内容或文件路径
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
+        encoding (str): 文档编码，默认为utf-8
+    
+    Returns:
+        str: JSON格式的结果，包含文档句柄ID和文档基本信息
+    """
+    try:
+        document = load_document(html_content, parser, encoding)
+        soup = document.soup
+        
+        response = {
+            "status": "success",
+            "handle_id": document.handle_id,
+            "parser": document.parser,
+            "size": document.size,
+            "title": soup.title.get_text(strip=True) if soup.title else "",
+            "element_count": len(soup.find_all(True)),
+            "max_documents": _document_registry.max_documents
+        }
+        
+        return json.dumps(response, ensure_ascii=False, indent=2)
+    
+    except Exception as e:
+        error_response = {
+            "status": "failed",
+            "error": str(e),
+            "message": "HTML文档解析失败"
+        }
+        return json.dumps(error_response, ensure_ascii=False)
+
+
+@tool
+def close_html_document(handle_id: str = None) -> str:
+    """
+    释放文档句柄及其缓存的派生结果。
+    
+    Args:
+        handle_id (str, optional): 文档句柄ID，不提供时释放全部文档
+    
+    Returns:
+        str: JSON格式的释放结果
+    """
+    try:
+        if handle_id:
+            released = 1 if _document_registry.close(handle_id) else 0
+        else:
+            released = _document_registry.clear()
+        
+        response = {
+            "status": "success",
+            "released": released,
+            "handle_id": handle_id
+        }
+        
+        return json.dumps(response, ensure_ascii=False, indent=2)
+    
+    except Exception as e:
+        error_response = {
+            "status": "failed",
+            "error": str(e),
+            "message": "释放文档句柄失败"
+        }
+        return json.dumps(error_response, ensure_ascii=False)
+
+
+@tool
+def get_document_cache_info() -> str:
+    """
+    获取解析文档缓存的状态，包括缓存的文档、派生结果和命中统计。
+    
+    Returns:
+        str: JSON格式的缓存信息
+    """
+    try:
+        response = {
+            "status": "success",
+            "default_parser": DEFAULT_PARSER,
+            **_document_registry.info()
+        }
+        
+        return json.dumps(response, ensure_ascii=False, indent=2)
+    
+    except Exception as e:
+        error_response = {
+            "status": "failed",
+            "error": str(e),
+            "message": "获取文档缓存信息失败"
+        }
+        return json.dumps(error_response, ensure_ascii=False)
@@ -3,6 +3,7 @@ HTML解析和处理工具，用于解析HTML文档结构和内容。
 
 此模块提供了一组工具函数，用于解析HTML文档、提取元素、分析结构和处理内容。
 基于BeautifulSoup和lxml库实现，支持复杂的HTML文档处理。
+解析结果由document_handle按内容缓存，工具也可以接收open_html_document返回的文档句柄ID。
 """
 
 import json
@@ -17,32 +18,30 @@ from bs4 import BeautifulSoup, Tag, NavigableString
 import requests
 from strands import tool
 
+from tools.generated_tools.html2pptx.document_handle import load_document, get_visible_text
+
 
 @tool
 def parse_html(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     encoding: str = "utf-8"
 ) -> str:
     """
     解析HTML内容并返回文档结构信息。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         encoding (str): 文档编码，默认为utf-8
         
     Returns:
         str: JSON格式的文档结构信息，包含标题、元数据、主要元素等
     """
     try:
-        # 检查输入是否为文件路径
-        if os.path.exists(html_content) and os.path.isfile(html_content):
-            with open(html_content, 'r', encoding=encoding) as f:
-                html_content = f.read()
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser, encoding)
+        soup = document.soup
         
         # 提取文档信息
         document_info = {
@@ -57,7 +56,7 @@ def parse_html(
                 "lists": len(soup.find_all(["ul", "ol"])),
                 "forms": len(soup.find_all("form"))
             },
-            "main_content": _identify_main_content(soup)
+            "main_content": document.memoize("html_parser.main_content", _identify_main_content)
         }
         
         return json.dumps(document_info, ensure_ascii=False, indent=2)
@@ -75,7 +74,7 @@ def parse_html(
 def extract_elements(
     html_content: str,
     selector: str,
-    parser: str = "html.parser",
+    parser: str = None,
     extract_attributes: List[str] = None,
     limit: int = 0
 ) -> str:
@@ -83,9 +82,9 @@ def extract_elements(
     使用CSS选择器从HTML中提取特定元素。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
         selector (str): CSS选择器表达式
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         extract_attributes (List[str]): 要提取的属性列表，默认为None表示提取文本内容
         limit (int): 限制结果数量，0表示不限制
         
@@ -93,13 +92,9 @@ def extract_elements(
         str: JSON格式的提取结果
     """
     try:
-        # 检查输入是否为文件路径
-        if os.path.exists(html_content) and os.path.isfile(html_content):
-            with open(html_content, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 提取元素
         elements = soup.select(selector)
@@ -145,46 +140,41 @@ def extract_text_content(
     html_content: str,
     clean: bool = True,
     preserve_formatting: bool = False,
-    parser: str = "html.parser"
+    parser: str = None
 ) -> str:
     """
     从HTML中提取纯文本内容。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
         clean (bool): 是否清理文本（删除多余空格、换行等）
         preserve_formatting (bool): 是否保留段落格式
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         
     Returns:
         str: JSON格式的文本内容
     """
     try:
-        # 检查输入是否为文件路径
-        if os.path.exists(html_content) and os.path.isfile(html_content):
-            with open(html_content, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
-        
-        # 删除脚本和样式元素
-        for script_or_style in soup(["script", "style"]):
-            script_or_style.extract()
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
-        # 获取文本
+        # 获取文本（跳过脚本和样式元素，共享的文档树不能修改）
         if preserve_formatting:
             # 保留段落格式
             paragraphs = []
             for element in soup.find_all(["p", "h1", "h2", "h3", "h4", "h5", "h6", "li"]):
-                text = element.get_text(strip=True)
+                text = get_visible_text(element, strip=True, excluded_tags=("script", "style"))
                 if text:
                     paragraphs.append(text)
             
             text_content = "\n\n".join(paragraphs)
         else:
             # 获取所有文本
-            text_content = soup.get_text()
+            text_content = document.memoize(
+                "html_parser.text",
+                lambda s: get_visible_text(s, excluded_tags=("script", "style"))
+            )
             
             # 清理文本
             if clean:
@@ -216,29 +206,25 @@ def extract_links(
     base_url: str = None,
     filter_external: bool = False,
     include_text: bool = True,
-    parser: str = "html.parser"
+    parser: str = None
 ) -> str:
     """
     从HTML中提取所有链接。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
         base_url (str): 基础URL，用于转换相对链接为绝对链接
         filter_external (bool): 是否只包含外部链接
         include_text (bool): 是否包含链接文本
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         
     Returns:
         str: JSON格式的链接列表
     """
     try:
-        # 检查输入是否为文件路径
-        if os.path.exists(html_content) and os.path.isfile(html_content):
-            with open(html_content, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 提取链接
         links = []
@@ -290,7 +276,7 @@ def extract_links(
 @tool
 def extract_tables(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     include_headers: bool = True,
     max_tables: int = 0
 ) -> str:
@@ -298,8 +284,8 @@ def extract_tables(
     从HTML中提取表格数据。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         include_headers (bool): 是否将第一行作为表头
         max_tables (int): 最大提取表格数，0表示不限制
         
@@ -307,13 +293,9 @@ def extract_tables(
         str: JSON格式的表格数据
     """
     try:
-        # 检查输入是否为文件路径
-        if os.path.exists(html_content) and os.path.isfile(html_content):
-            with open(html_content, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 提取表格
         tables_data = []
@@ -375,29 +357,25 @@ def extract_images(
     base_url: str = None,
     download: bool = False,
     output_dir: str = "./images",
-    parser: str = "html.parser"
+    parser: str = None
 ) -> str:
     """
     从HTML中提取图片信息和链接。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
         base_url (str): 基础URL，用于转换相对链接为绝对链接
         download (bool): 是否下载图片到本地
         output_dir (str): 图片下载目录
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         
     Returns:
         str: JSON格式的图片信息
     """
     try:
-        # 检查输入是否为文件路径
-        if os.path.exists(html_content) and os.path.isfile(html_content):
-            with open(html_content, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 提取图片
         images = []
@@ -478,28 +456,24 @@ def extract_images(
 @tool
 def analyze_document_structure(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     detailed: bool = False
 ) -> str:
     """
     分析HTML文档结构，提取层次结构和语义信息。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         detailed (bool): 是否返回详细结构信息
         
     Returns:
         str: JSON格式的文档结构分析结果
     """
     try:
-        # 检查输入是否为文件路径
-        if os.path.exists(html_content) and os.path.isfile(html_content):
-            with open(html_content, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 基本文档信息
         document_info = {
@@ -510,11 +484,11 @@ def analyze_document_structure(
         }
         
         # 提取主要部分
-        main_sections = _extract_document_sections(soup)
+        main_sections = document.memoize("html_parser.sections", _extract_document_sections)
         document_info["sections"] = main_sections
         
         # 提取标题层次结构
-        headings_structure = _extract_heading_structure(soup)
+        headings_structure = document.memoize("html_parser.heading_structure", _extract_heading_structure)
         document_info["heading_hierarchy"] = headings_structure
         
         # 语义结构分析
@@ -3,10 +3,17 @@ PowerPoint生成工具，用于创建和操作PPTX文档。
 
 此模块提供了一组工具函数，用于创建PowerPoint演示文稿、添加幻灯片、插入内容元素、
 应用样式和保存文件。基于python-pptx库实现，支持丰富的PPT功能。
+
+逐个元素调用add_*工具时，每次调用都会重新解析并保存整个PPTX文件。构建较大的演示文稿时，
+可以先用open_presentation_session打开一个内存中的演示文稿会话，通过session_id参数或
+apply_presentation_operations批量添加元素，最后用commit_presentation_session一次性写入文件。
 """
 
 import os
 import json
+import time
+import uuid
+import threading
 from typing import Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
 
@@ -19,6 +26,23 @@ from pptx.dml.color import RGBColor
 from strands import tool
 
 
+# 演示文稿会话空闲超时时间（秒），超时的会话会被淘汰
+SESSION_IDLE_TTL_SECONDS = 1800
+
+# 同时打开的演示文稿会话上限，超出时淘汰最久未使用的会话
+SESSION_MAX_COUNT = 16
+
+# 支持的形状类型
+SHAPE_TYPES = {
+    "rectangle": MSO_SHAPE.RECTANGLE,
+    "oval": MSO_SHAPE.OVAL,
+    "rounded_rectangle": MSO_SHAPE.ROUNDED_RECTANGLE,
+    "diamond": MSO_SHAPE.DIAMOND,
+    "triangle": MSO_SHAPE.ISOSCELES_TRIANGLE,
+    "arrow": MSO_SHAPE.RIGHT_ARROW
+}
+
+
 @tool
 def create_presentation(
     template_path: str = None,
@@ -28,50 +52,24 @@ def create_presentation(
 ) -> str:
     """
     创建新的PowerPoint演示文稿，可选择使用模板。
-
+    
     Args:
         template_path (str, optional): PowerPoint模板文件路径，如果不提供则创建空白演示文稿
         title (str, optional): 演示文稿标题
         author (str, optional): 演示文稿作者
         output_path (str, optional): 输出文件路径，如果不提供则不保存文件
-        
+    
     Returns:
         str: JSON格式的结果，包含演示文稿信息和临时文件路径
     """
     try:
         # 创建演示文稿
-        if template_path and os.path.exists(template_path):
-            prs = Presentation(template_path)
-        else:
-            prs = Presentation()
-        
-        # 设置文档属性
-        if title or author:
-            core_properties = prs.core_properties
-            if title:
-                core_properties.title = title
-            if author:
-                core_properties.author = author
-        
-        # 获取演示文稿信息
-        slide_layouts = []
-        for idx, layout in enumerate(prs.slide_layouts):
-            layout_info = {
-                "index": idx,
-                "name": layout.name if hasattr(layout, "name") else f"Layout {idx}",
-                "placeholder_count": len(layout.placeholders)
-            }
-            slide_layouts.append(layout_info)
+        prs = _new_presentation(template_path, title, author)
         
         # 保存文件
         temp_path = None
         if output_path:
-            # 确保输出目录存在
-            output_dir = os.path.dirname(output_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            
-            prs.save(output_path)
+            _save_presentation(prs, output_path)
             temp_path = output_path
         else:
             # 创建临时文件
@@ -85,7 +83,7 @@ def create_presentation(
             "status": "success",
             "presentation_info": {
                 "slide_count": len(prs.slides),
-                "slide_layouts": slide_layouts,
+                "slide_layouts": _get_slide_layouts(prs),
                 "title": title,
                 "author": author
             },
@@ -105,82 +103,42 @@ def create_presentation(
 
 @tool
 def add_slide(
-    presentation_path: str,
+    presentation_path: str = None,
     layout_index: int = 0,
     title: str = None,
     subtitle: str = None,
     notes: str = None,
-    save_path: str = None
+    save_path: str = None,
+    session_id: str = None
 ) -> str:
     """
     向演示文稿添加新的幻灯片。
-
+    
     Args:
-        presentation_path (str): PowerPoint文件路径
+        presentation_path (str): PowerPoint文件路径（使用会话时可不提供）
         layout_index (int): 幻灯片布局索引，默认为0（标题幻灯片）
         title (str, optional): 幻灯片标题
         subtitle (str, optional): 幻灯片副标题
         notes (str, optional): 幻灯片备注
         save_path (str, optional): 保存路径，如果不提供则覆盖原文件
-        
+        session_id (str, optional): 演示文稿会话ID，提供时只修改内存中的演示文稿，不写入文件
+    
     Returns:
         str: JSON格式的结果，包含新幻灯片信息
     """
     try:
-        # 加载演示文稿
-        prs = Presentation(presentation_path)
-        
-        # 检查布局索引是否有效
-        if layout_index < 0 or layout_index >= len(prs.slide_layouts):
-            raise ValueError(f"无效的布局索引: {layout_index}，有效范围: 0-{len(prs.slide_layouts)-1}")
-        
-        # 添加幻灯片
-        slide_layout = prs.slide_layouts[layout_index]
-        slide = prs.slides.add_slide(slide_layout)
-        
-        # 设置标题和副标题
-        if hasattr(slide, 'shapes') and hasattr(slide.shapes, 'title') and slide.shapes.title:
-            if title:
-                slide.shapes.title.text = title
-        
-        # 查找副标题占位符
-        if subtitle:
-            for shape in slide.placeholders:
-                if shape.placeholder_format.type == 1:  # 副标题占位符类型
-                    shape.text = subtitle
-                    break
-        
-        # 添加备注
-        if notes:
-            if not slide.notes_slide:
-                slide.notes_slide
-            if slide.notes_slide and hasattr(slide.notes_slide, 'notes_text_frame'):
-                slide.notes_slide.notes_text_frame.text = notes
-        
-        # 保存文件
-        if save_path:
-            # 确保输出目录存在
-            output_dir = os.path.dirname(save_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            prs.save(save_path)
-        else:
-            prs.save(presentation_path)
+        slide_info, prs, file_path = _edit_presentation(
+            presentation_path, save_path, session_id,
+            lambda prs: _op_add_slide(prs, layout_index, title, subtitle, notes)
+        )
         
         # 构建响应
         response = {
             "status": "success",
-            "slide_info": {
-                "index": len(prs.slides) - 1,
-                "layout_index": layout_index,
-                "layout_name": slide_layout.name if hasattr(slide_layout, "name") else f"Layout {layout_index}",
-                "title": title,
-                "subtitle": subtitle,
-                "has_notes": notes is not None
-            },
+            "slide_info": slide_info,
             "presentation_info": {
                 "slide_count": len(prs.slides),
-                "file_path": save_path if save_path else presentation_path
+                "file_path": file_path
             }
         }
         
@@ -197,20 +155,21 @@ def add_slide(
 
 @tool
 def add_text(
-    presentation_path: str,
-    slide_index: int,
-    text: str,
+    presentation_path: str = None,
+    slide_index: int = 0,
+    text: str = "",
     position: Dict[str, float] = None,
     size: Dict[str, float] = None,
     formatting: Dict[str, Any] = None,
     placeholder_index: int = None,
-    save_path: str = None
+    save_path: str = None,
+    session_id: str = None
 ) -> str:
     """
     向幻灯片添加文本。
-
+    
     Args:
-        presentation_path (str): PowerPoint文件路径
+        presentation_path (str): PowerPoint文件路径（使用会话时可不提供）
         slide_index (int): 幻灯片索引
         text (str): 要添加的文本
         position (Dict[str, float], optional): 文本框位置，格式: {"left": 值, "top": 值}，单位为英寸
@@ -225,71 +184,22 @@ def add_text(
             - "alignment": 对齐方式，可选值: "left", "center", "right", "justify"
         placeholder_index (int, optional): 占位符索引，如果提供则将文本添加到指定占位符
         save_path (str, optional): 保存路径，如果不提供则覆盖原文件
-        
+        session_id (str, optional): 演示文稿会话ID，提供时只修改内存中的演示文稿，不写入文件
+    
     Returns:
         str: JSON格式的结果
     """
     try:
-        # 加载演示文稿
-        prs = Presentation(presentation_path)
-        
-        # 检查幻灯片索引是否有效
-        if slide_index < 0 or slide_index >= len(prs.slides):
-            raise ValueError(f"无效的幻灯片索引: {slide_index}，有效范围: 0-{len(prs.slides)-1}")
-        
-        slide = prs.slides[slide_index]
-        
-        # 处理文本
-        if placeholder_index is not None:
-            # 添加到占位符
-            try:
-                placeholder = slide.placeholders[placeholder_index]
-                if hasattr(placeholder, 'text'):
-                    placeholder.text = text
-                else:
-                    raise ValueError(f"占位符 {placeholder_index} 不支持文本")
-                
-                # 应用格式
-                if formatting and hasattr(placeholder, 'text_frame'):
-                    _apply_text_formatting(placeholder.text_frame, formatting)
-                
-                shape = placeholder
-            except (IndexError, KeyError):
-                raise ValueError(f"幻灯片中不存在索引为 {placeholder_index} 的占位符")
-        else:
-            # 创建文本框
-            left = Inches(position['left']) if position and 'left' in position else Inches(1)
-            top = Inches(position['top']) if position and 'top' in position else Inches(2)
-            width = Inches(size['width']) if size and 'width' in size else Inches(8)
-            height = Inches(size['height']) if size and 'height' in size else Inches(1)
-            
-            shape = slide.shapes.add_textbox(left, top, width, height)
-            shape.text_frame.text = text
-            
-            # 应用格式
-            if formatting:
-                _apply_text_formatting(shape.text_frame, formatting)
-        
-        # 保存文件
-        if save_path:
-            # 确保输出目录存在
-            output_dir = os.path.dirname(save_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            prs.save(save_path)
-        else:
-            prs.save(presentation_path)
+        text_info, prs, file_path = _edit_presentation(
+            presentation_path, save_path, session_id,
+            lambda prs: _op_add_text(prs, slide_index, text, position, size, formatting, placeholder_index)
+        )
         
         # 构建响应
         response = {
             "status": "success",
-            "text_info": {
-                "slide_index": slide_index,
-                "text": text[:100] + ("..." if len(text) > 100 else ""),
-                "shape_id": shape.shape_id if hasattr(shape, 'shape_id') else None,
-                "is_placeholder": placeholder_index is not None
-            },
-            "file_path": save_path if save_path else presentation_path
+            "text_info": text_info,
+            "file_path": file_path
         }
         
         return json.dumps(response, ensure_ascii=False, indent=2)
@@ -305,86 +215,42 @@ def add_text(
 
 @tool
 def add_image(
-    presentation_path: str,
-    slide_index: int,
-    image_path: str,
+    presentation_path: str = None,
+    slide_index: int = 0,
+    image_path: str = None,
     position: Dict[str, float] = None,
     size: Dict[str, float] = None,
     placeholder_index: int = None,
-    save_path: str = None
+    save_path: str = None,
+    session_id: str = None
 ) -> str:
     """
     向幻灯片添加图片。
-
+    
     Args:
-        presentation_path (str): PowerPoint文件路径
+        presentation_path (str): PowerPoint文件路径（使用会话时可不提供）
         slide_index (int): 幻灯片索引
         image_path (str): 图片文件路径
         position (Dict[str, float], optional): 图片位置，格式: {"left": 值, "top": 值}，单位为英寸
         size (Dict[str, float], optional): 图片大小，格式: {"width": 值, "height": 值}，单位为英寸
         placeholder_index (int, optional): 占位符索引，如果提供则将图片添加到指定占位符
         save_path (str, optional): 保存路径，如果不提供则覆盖原文件
-        
+        session_id (str, optional): 演示文稿会话ID，提供时只修改内存中的演示文稿，不写入文件
+    
     Returns:
         str: JSON格式的结果
     """
     try:
-        # 检查图片文件是否存在
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"图片文件不存在: {image_path}")
-        
-        # 加载演示文稿
-        prs = Presentation(presentation_path)
-        
-        # 检查幻灯片索引是否有效
-        if slide_index < 0 or slide_index >= len(prs.slides):
-            raise ValueError(f"无效的幻灯片索引: {slide_index}，有效范围: 0-{len(prs.slides)-1}")
-        
-        slide = prs.slides[slide_index]
-        
-        # 处理图片
-        if placeholder_index is not None:
-            # 添加到占位符
-            try:
-                placeholder = slide.placeholders[placeholder_index]
-                placeholder.insert_picture(image_path)
-                shape = placeholder
-            except (IndexError, KeyError):
-                raise ValueError(f"幻灯片中不存在索引为 {placeholder_index} 的占位符")
-            except TypeError:
-                raise TypeError(f"占位符 {placeholder_index} 不支持插入图片")
-        else:
-            # 直接添加图片
-            left = Inches(position['left']) if position and 'left' in position else Inches(1)
-            top = Inches(position['top']) if position and 'top' in position else Inches(2)
-            
-            if size and 'width' in size and 'height' in size:
-                width = Inches(size['width'])
-                height = Inches(size['height'])
-                shape = slide.shapes.add_picture(image_path, left, top, width, height)
-            else:
-                shape = slide.shapes.add_picture(image_path, left, top)
-        
-        # 保存文件
-        if save_path:
-            # 确保输出目录存在
-            output_dir = os.path.dirname(save_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            prs.save(save_path)
-        else:
-            prs.save(presentation_path)
+        image_info, prs, file_path = _edit_presentation(
+            presentation_path, save_path, session_id,
+            lambda prs: _op_add_image(prs, slide_index, image_path, position, size, placeholder_index)
+        )
         
         # 构建响应
         response = {
             "status": "success",
-            "image_info": {
-                "slide_index": slide_index,
-                "image_path": image_path,
-                "shape_id": shape.shape_id if hasattr(shape, 'shape_id') else None,
-                "is_placeholder": placeholder_index is not None
-            },
-            "file_path": save_path if save_path else presentation_path
+            "image_info": image_info,
+            "file_path": file_path
         }
         
         return json.dumps(response, ensure_ascii=False, indent=2)
@@ -400,20 +266,21 @@ def add_image(
 
 @tool
 def add_table(
-    presentation_path: str,
-    slide_index: int,
-    data: List[List[str]],
+    presentation_path: str = None,
+    slide_index: int = 0,
+    data: List[List[str]] = None,
     position: Dict[str, float] = None,
     size: Dict[str, float] = None,
     formatting: Dict[str, Any] = None,
     has_header: bool = True,
-    save_path: str = None
+    save_path: str = None,
+    session_id: str = None
 ) -> str:
     """
     向幻灯片添加表格。
-
+    
     Args:
-        presentation_path (str): PowerPoint文件路径
+        presentation_path (str): PowerPoint文件路径（使用会话时可不提供）
         slide_index (int): 幻灯片索引
         data (List[List[str]]): 表格数据，二维数组
         position (Dict[str, float], optional): 表格位置，格式: {"left": 值, "top": 值}，单位为英寸
@@ -428,71 +295,22 @@ def add_table(
             - "cell_text_color": 单元格文字颜色，格式: [R, G, B]
         has_header (bool): 第一行是否为表头
         save_path (str, optional): 保存路径，如果不提供则覆盖原文件
-        
+        session_id (str, optional): 演示文稿会话ID，提供时只修改内存中的演示文稿，不写入文件
+    
     Returns:
         str: JSON格式的结果
     """
     try:
-        # 检查数据有效性
-        if not data or not isinstance(data, list) or not all(isinstance(row, list) for row in data):
-            raise ValueError("无效的表格数据格式，应为二维数组")
-        
-        # 加载演示文稿
-        prs = Presentation(presentation_path)
-        
-        # 检查幻灯片索引是否有效
-        if slide_index < 0 or slide_index >= len(prs.slides):
-            raise ValueError(f"无效的幻灯片索引: {slide_index}，有效范围: 0-{len(prs.slides)-1}")
-        
-        slide = prs.slides[slide_index]
-        
-        # 确定表格尺寸
-        rows = len(data)
-        cols = max(len(row) for row in data) if data else 0
-        
-        if rows == 0 or cols == 0:
-            raise ValueError("表格必须至少包含一行一列")
-        
-        # 确定表格位置和大小
-        left = Inches(position['left']) if position and 'left' in position else Inches(1)
-        top = Inches(position['top']) if position and 'top' in position else Inches(2)
-        width = Inches(size['width']) if size and 'width' in size else Inches(8)
-        height = Inches(size['height']) if size and 'height' in size else Inches(rows * 0.5)
-        
-        # 创建表格
-        table = slide.shapes.add_table(rows, cols, left, top, width, height).table
-        
-        # 填充数据
-        for row_idx, row_data in enumerate(data):
-            for col_idx, cell_text in enumerate(row_data):
-                if col_idx < cols:  # 确保不超出列数
-                    cell = table.cell(row_idx, col_idx)
-                    cell.text = str(cell_text)
-        
-        # 应用格式
-        if formatting:
-            _apply_table_formatting(table, formatting, has_header)
-        
-        # 保存文件
-        if save_path:
-            # 确保输出目录存在
-            output_dir = os.path.dirname(save_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            prs.save(save_path)
-        else:
-            prs.save(presentation_path)
+        table_info, prs, file_path = _edit_presentation(
+            presentation_path, save_path, session_id,
+            lambda prs: _op_add_table(prs, slide_index, data, position, size, formatting, has_header)
+        )
         
         # 构建响应
         response = {
             "status": "success",
-            "table_info": {
-                "slide_index": slide_index,
-                "rows": rows,
-                "columns": cols,
-                "has_header": has_header
-            },
-            "file_path": save_path if save_path else presentation_path
+            "table_info": table_info,
+            "file_path": file_path
         }
         
         return json.dumps(response, ensure_ascii=False, indent=2)
@@ -508,20 +326,21 @@ def add_table(
 
 @tool
 def add_shape(
-    presentation_path: str,
-    slide_index: int,
-    shape_type: str,
+    presentation_path: str = None,
+    slide_index: int = 0,
+    shape_type: str = "rectangle",
     position: Dict[str, float] = None,
     size: Dict[str, float] = None,
     text: str = None,
     formatting: Dict[str, Any] = None,
-    save_path: str = None
+    save_path: str = None,
+    session_id: str = None
 ) -> str:
     """
     向幻灯片添加形状。
-
+    
     Args:
-        presentation_path (str): PowerPoint文件路径
+        presentation_path (str): PowerPoint文件路径（使用会话时可不提供）
         slide_index (int): 幻灯片索引
         shape_type (str): 形状类型，可选值: "rectangle", "oval", "rounded_rectangle", "diamond", "triangle", "arrow"
         position (Dict[str, float], optional): 形状位置，格式: {"left": 值, "top": 值}，单位为英寸
@@ -536,70 +355,22 @@ def add_shape(
             - "font_color": 字体颜色，格式: [R, G, B]
             - "text_align": 文本对齐方式，可选值: "left", "center", "right"
         save_path (str, optional): 保存路径，如果不提供则覆盖原文件
-        
+        session_id (str, optional): 演示文稿会话ID，提供时只修改内存中的演示文稿，不写入文件
+    
     Returns:
         str: JSON格式的结果
     """
     try:
-        # 加载演示文稿
-        prs = Presentation(presentation_path)
-        
-        # 检查幻灯片索引是否有效
-        if slide_index < 0 or slide_index >= len(prs.slides):
-            raise ValueError(f"无效的幻灯片索引: {slide_index}，有效范围: 0-{len(prs.slides)-1}")
-        
-        slide = prs.slides[slide_index]
-        
-        # 映射形状类型
-        shape_types = {
-            "rectangle": MSO_SHAPE.RECTANGLE,
-            "oval": MSO_SHAPE.OVAL,
-            "rounded_rectangle": MSO_SHAPE.ROUNDED_RECTANGLE,
-            "diamond": MSO_SHAPE.DIAMOND,
-            "triangle": MSO_SHAPE.ISOSCELES_TRIANGLE,
-            "arrow": MSO_SHAPE.RIGHT_ARROW
-        }
-        
-        if shape_type not in shape_types:
-            raise ValueError(f"不支持的形状类型: {shape_type}，支持的类型: {', '.join(shape_types.keys())}")
-        
-        # 确定形状位置和大小
-        left = Inches(position['left']) if position and 'left' in position else Inches(2)
-        top = Inches(position['top']) if position and 'top' in position else Inches(2)
-        width = Inches(size['width']) if size and 'width' in size else Inches(2)
-        height = Inches(size['height']) if size and 'height' in size else Inches(1)
-        
-        # 添加形状
-        shape = slide.shapes.add_shape(shape_types[shape_type], left, top, width, height)
-        
-        # 添加文本
-        if text:
-            shape.text = text
-        
-        # 应用格式
-        if formatting:
-            _apply_shape_formatting(shape, formatting)
-        
-        # 保存文件
-        if save_path:
-            # 确保输出目录存在
-            output_dir = os.path.dirname(save_path)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            prs.save(save_path)
-        else:
-            prs.save(presentation_path)
+        shape_info, prs, file_path = _edit_presentation(
+            presentation_path, save_path, session_id,
+            lambda prs: _op_add_shape(prs, slide_index, shape_type, position, size, text, formatting)
+        )
         
         # 构建响应
         response = {
             "status": "success",
-            "shape_info": {
-                "slide_index": slide_index,
-                "shape_type": shape_type,
-                "shape_id": shape.shape_id if hasattr(shape, 'shape_id') else None,
-                "has_text": text is not None
-            },
-            "file_path": save_path if save_path else presentation_path
+            "shape_info": shape_info,
+            "file_path": file_path
         }
         
         return json.dumps(response, ensure_ascii=False, indent=2)
@@ -615,22 +386,32 @@ def add_shape(
 
 @tool
 def get_presentation_info(
-    presentation_path: str,
+    presentation_path: str = None,
     include_slides: bool = True,
-    include_placeholders: bool = False
+    include_placeholders: bool = False,
+    session_id: str = None
 ) -> str:
     """
     获取演示文稿的详细信息。
-
+    
     Args:
-        presentation_path (str): PowerPoint文件路径
+        presentation_path (str): PowerPoint文件路径（使用会话时可不提供）
         include_slides (bool): 是否包含幻灯片信息
         include_placeholders (bool): 是否包含占位符信息
-        
+        session_id (str, optional): 演示文稿会话ID，提供时读取内存中的演示文稿（包含未提交的修改）
+    
     Returns:
         str: JSON格式的演示文稿信息
     """
     try:
+        if session_id:
+            session = _session_registry.get(session_id)
+            with session.lock:
+                return json.dumps(
+                    _describe_presentation(session.presentation, session.path, include_slides, include_placeholders),
+                    ensure_ascii=False, indent=2
+                )
+        
         # 检查文件是否存在
         if not os.path.exists(presentation_path):
             raise FileNotFoundError(f"文件不存在: {presentation_path}")
@@ -638,81 +419,564 @@ def get_presentation_info(
         # 加载演示文稿
         prs = Presentation(presentation_path)
         
-        # 基本信息
-        info = {
-            "file_path": presentation_path,
-            "file_name": os.path.basename(presentation_path),
-            "file_size": os.path.getsize(presentation_path),
-            "slide_count": len(prs.slides),
-            "slide_layouts_count": len(prs.slide_layouts)
+        info = _describe_presentation(prs, presentation_path, include_slides, include_placeholders)
+        return json.dumps(info, ensure_ascii=False, indent=2)
+    
+    except Exception as e:
+        error_response = {
+            "status": "failed",
+            "error": str(e),
+            "message": "获取演示文稿信息失败"
+        }
+        return json.dumps(error_response, ensure_ascii=False)
+
+
+@tool
+def open_presentation_session(
+    presentation_path: str = None,
+    template_path: str = None,
+    title: str = None,
+    author: str = None
+) -> str:
+    """
+    打开内存中的演示文稿会话，之后的修改不会写入文件，直到提交会话。
+    
+    Args:
+        presentation_path (str, optional): 演示文稿文件路径；文件存在时加载，否则作为提交时的默认保存路径
+        template_path (str, optional): 新建演示文稿时使用的模板文件路径
+        title (str, optional): 演示文稿标题
+        author (str, optional): 演示文稿作者
+    
+    Returns:
+        str: JSON格式的结果，包含会话ID和演示文稿信息
+    """
+    try:
+        if presentation_path and os.path.exists(presentation_path):
+            prs = Presentation(presentation_path)
+            if title:
+                prs.core_properties.title = title
+            if author:
+                prs.core_properties.author = author
+        else:
+            prs = _new_presentation(template_path, title, author)
+        
+        session = _session_registry.open(prs, presentation_path)
+        
+        # 构建响应
+        response = {
+            "status": "success",
+            "session_id": session.session_id,
+            "presentation_info": {
+                "slide_count": len(prs.slides),
+                "slide_layouts": _get_slide_layouts(prs),
+                "file_path": presentation_path
+            },
+            "idle_ttl_seconds": SESSION_IDLE_TTL_SECONDS
         }
         
-        # 文档属性
-        if hasattr(prs, 'core_properties'):
-            core_props = prs.core_properties
-            info["properties"] = {
-                "title": core_props.title if hasattr(core_props, 'title') else None,
-                "author": core_props.author if hasattr(core_props, 'author') else None,
-                "subject": core_props.subject if hasattr(core_props, 'subject') else None,
-                "created": str(core_props.created) if hasattr(core_props, 'created') else None,
-                "modified": str(core_props.modified) if hasattr(core_props, 'modified') else None
-            }
+        return json.dumps(response, ensure_ascii=False, indent=2)
+    
+    except Exception as e:
+        error_response = {
+            "status": "failed",
+            "error": str(e),
+            "message": "打开演示文稿会话失败"
+        }
+        return json.dumps(error_response, ensure_ascii=False)
+
+
+@tool
+def apply_presentation_operations(
+    operations: List[Dict[str, Any]],
+    session_id: str = None,
+    presentation_path: str = None,
+    save_path: str = None,
+    stop_on_error: bool = False
+) -> str:
+    """
+    批量执行演示文稿操作，整批操作只加载和保存一次文件（使用会话时不写入文件）。
+    
+    Args:
+        operations (List[Dict[str, Any]]): 操作列表，每个操作包含"type"字段和对应工具的参数，例如:
+            - {"type": "add_slide", "layout_index": 1, "title": "标题"}
+            - {"type": "add_text", "slide_index": 0, "text": "内容", "formatting": {...}}
+            - {"type": "add_image", "slide_index": 0, "image_path": "a.png"}
+            - {"type": "add_table", "slide_index": 0, "data": [["A", "B"]]}
+            - {"type": "add_shape", "slide_index": 0, "shape_type": "oval"}
+            slide_index为-1时表示最后一张幻灯片
+        session_id (str, optional): 演示文稿会话ID
+        presentation_path (str, optional): 不使用会话时的PowerPoint文件路径
+        save_path (str, optional): 不使用会话时的保存路径，如果不提供则覆盖原文件
+        stop_on_error (bool): 某个操作失败时是否停止执行后续操作
+    
+    Returns:
+        str: JSON格式的结果，包含每个操作的执行结果
+    """
+    try:
+        if not isinstance(operations, list):
+            raise ValueError("operations必须是操作列表")
         
-        # 幻灯片布局
-        layouts = []
-        for idx, layout in enumerate(prs.slide_layouts):
-            layout_info = {
-                "index": idx,
-                "name": layout.name if hasattr(layout, "name") else f"Layout {idx}",
-                "placeholder_count": len(layout.placeholders)
+        results, prs, file_path = _edit_presentation(
+            presentation_path, save_path, session_id,
+            lambda prs: _apply_operations(prs, operations, stop_on_error)
+        )
+        
+        failed_count = sum(1 for result in results if result["status"] == "failed")
+        
+        # 构建响应
+        response = {
+            "status": "success" if failed_count == 0 else "partial_success",
+            "operation_count": len(operations),
+            "applied_count": len(results) - failed_count,
+            "failed_count": failed_count,
+            "results": results,
+            "presentation_info": {
+                "slide_count": len(prs.slides),
+                "file_path": file_path
             }
-            layouts.append(layout_info)
-        
-        info["slide_layouts"] = layouts
-        
-        # 幻灯片信息
-        if include_slides:
-            slides = []
-            for idx, slide in enumerate(prs.slides):
-                slide_info = {
-                    "index": idx,
-                    "layout_index": _get_slide_layout_index(slide, prs),
-                    "shape_count": len(slide.shapes),
-                    "has_notes": hasattr(slide, 'notes_slide') and slide.notes_slide is not None
-                }
-                
-                # 获取标题
-                if hasattr(slide, 'shapes') and hasattr(slide.shapes, 'title') and slide.shapes.title:
-                    slide_info["title"] = slide.shapes.title.text
-                
-                # 占位符信息
-                if include_placeholders:
-                    placeholders = []
-                    for p_idx, placeholder in enumerate(slide.placeholders):
-                        placeholder_info = {
-                            "index": p_idx,
-                            "type": placeholder.placeholder_format.type if hasattr(placeholder, 'placeholder_format') else None,
-                            "name": placeholder.name if hasattr(placeholder, 'name') else None
-                        }
-                        placeholders.append(placeholder_info)
-                    
-                    slide_info["placeholders"] = placeholders
-                
-                slides.append(slide_info)
+        }
+        
+        return json.dumps(response, ensure_ascii=False, indent=2)
+    
+    except Exception as e:
+        error_response = {
+            "status": "failed",
+            "error": str(e),
+            "message": "批量执行演示文稿操作失败"
+        }
+        return json.dumps(error_response, ensure_ascii=False)
+
+
+@tool
+def commit_presentation_session(
+    session_id: str,
+    save_path: str = None,
+    close_session: bool = True
+) -> str:
+    """
+    将会话中的演示文稿写入文件。
+    
+    Args:
+        session_id (str): 演示文稿会话ID
+        save_path (str, optional): 保存路径，如果不提供则使用打开会话时的路径
+        close_session (bool): 提交后是否关闭会话
+    
+    Returns:
+        str: JSON格式的结果
+    """
+    try:
+        session = _session_registry.get(session_id)
+        
+        with session.lock:
+            target_path = save_path or session.path
+            if not target_path:
+                raise ValueError("会话没有关联的文件路径，请提供save_path")
             
-            info["slides"] = slides
+            _save_presentation(session.presentation, target_path)
+            committed_operations = session.pending_operations
+            session.pending_operations = 0
+            session.path = target_path
+            slide_count = len(session.presentation.slides)
         
-        return json.dumps(info, ensure_ascii=False, indent=2)
+        if close_session:
+            _session_registry.close(session_id)
+        
+        # 构建响应
+        response = {
+            "status": "success",
+            "session_id": session_id,
+            "committed_operations": committed_operations,
+            "presentation_info": {
+                "slide_count": slide_count,
+                "file_path": target_path
+            },
+            "session_closed": close_session
+        }
+        
+        return json.dumps(response, ensure_ascii=False, indent=2)
     
     except Exception as e:
         error_response = {
             "status": "failed",
             "error": str(e),
-            "message": "获取演示文稿信息失败"
+            "message": "提交演示文稿会话失败"
         }
         return json.dumps(error_response, ensure_ascii=False)
 
 
+@tool
+def close_presentation_session(session_id: str) -> str:
+    """
+    关闭演示文稿会话，放弃尚未提交的修改。
+    
+    Args:
+        session_id (str): 演示文稿会话ID
+    
+    Returns:
+        str: JSON格式的结果
+    """
+    try:
+        session = _session_registry.close(session_id)
+        if session is None:
+            raise ValueError(f"演示文稿会话不存在或已过期: {session_id}")
+        
+        response = {
+            "status": "success",
+            "session_id": session_id,
+            "discarded_operations": session.pending_operations
+        }
+        
+        return json.dumps(response, ensure_ascii=False, indent=2)
+    
+    except Exception as e:
+        error_response = {
+            "status": "failed",
+            "error": str(e),
+            "message": "关闭演示文稿会话失败"
+        }
+        return json.dumps(error_response, ensure_ascii=False)
+
+
+# 演示文稿会话
+
+class _PresentationSession:
+    """内存中的演示文稿及其待提交的修改数"""
+    
+    def __init__(self, session_id: str, presentation, path: Optional[str]):
+        self.session_id = session_id
+        self.presentation = presentation
+        self.path = path
+        self.pending_operations = 0
+        self.last_access = time.monotonic()
+        self.lock = threading.RLock()
+
+
+class _PresentationSessionRegistry:
+    """
+    进程内的演示文稿会话表
+    
+    每次访问时淘汰空闲超时的会话，会话数超过上限时淘汰最久未使用的会话。
+    被淘汰的会话如果有未提交的修改且关联了文件路径，会先写入文件，避免丢失修改。
+    """
+    
+    def __init__(self, idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS, max_sessions: int = SESSION_MAX_COUNT):
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, _PresentationSession] = {}
+        self._lock = threading.Lock()
+    
+    def open(self, presentation, path: Optional[str]) -> _PresentationSession:
+        session = _PresentationSession(uuid.uuid4().hex, presentation, path)
+        with self._lock:
+            evicted = self._collect_idle()
+            while len(self._sessions) >= self.max_sessions:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_access)
+                evicted.append(self._sessions.pop(oldest.session_id))
+            self._sessions[session.session_id] = session
+        self._release(evicted)
+        return session
+    
+    def get(self, session_id: str) -> _PresentationSession:
+        with self._lock:
+            evicted = self._collect_idle()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+        self._release(evicted)
+        if session is None:
+            raise ValueError(f"演示文稿会话不存在或已过期: {session_id}")
+        return session
+    
+    def close(self, session_id: str) -> Optional[_PresentationSession]:
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+    
+    def _collect_idle(self) -> List[_PresentationSession]:
+        """移除空闲超时的会话（调用方持有锁）"""
+        deadline = time.monotonic() - self.idle_ttl_seconds
+        idle_ids = [sid for sid, s in self._sessions.items() if s.last_access < deadline]
+        return [self._sessions.pop(sid) for sid in idle_ids]
+    
+    def _release(self, sessions: List[_PresentationSession]) -> None:
+        for session in sessions:
+            with session.lock:
+                if session.pending_operations and session.path:
+                    try:
+                        _save_presentation(session.presentation, session.path)
+                    except Exception:
+                        pass
+
+
+_session_registry = _PresentationSessionRegistry()
+
+
+def _edit_presentation(presentation_path: Optional[str], save_path: Optional[str], session_id: Optional[str], operation):
+    """
+    对演示文稿执行修改操作
+    
+    提供会话ID时修改会话中的演示文稿，不写入文件；否则加载文件、修改后保存。
+    
+    Returns:
+        Tuple: (操作结果, 演示文稿, 文件路径)
+    """
+    if session_id:
+        session = _session_registry.get(session_id)
+        with session.lock:
+            result = operation(session.presentation)
+            session.pending_operations += 1
+            session.last_access = time.monotonic()
+            return result, session.presentation, session.path
+    
+    if not presentation_path:
+        raise ValueError("必须提供presentation_path或session_id")
+    
+    # 加载演示文稿
+    prs = Presentation(presentation_path)
+    result = operation(prs)
+    
+    # 保存文件
+    file_path = save_path or presentation_path
+    _save_presentation(prs, file_path)
+    return result, prs, file_path
+
+
+def _apply_operations(prs, operations: List[Dict[str, Any]], stop_on_error: bool) -> List[Dict[str, Any]]:
+    """按顺序执行批量操作，返回每个操作的结果"""
+    results = []
+    for index, operation in enumerate(operations):
+        params = dict(operation)
+        op_type = params.pop("type", None)
+        try:
+            if op_type not in _OPERATIONS:
+                raise ValueError(f"不支持的操作类型: {op_type}，支持的类型: {', '.join(_OPERATIONS.keys())}")
+            if params.get("slide_index") == -1:
+                params["slide_index"] = len(prs.slides) - 1
+            results.append({
+                "index": index,
+                "type": op_type,
+                "status": "success",
+                "result": _OPERATIONS[op_type](prs, **params)
+            })
+        except Exception as e:
+            results.append({
+                "index": index,
+                "type": op_type,
+                "status": "failed",
+                "error": str(e)
+            })
+            if stop_on_error:
+                break
+    return results
+
+
+# 演示文稿操作
+
+def _op_add_slide(prs, layout_index=0, title=None, subtitle=None, notes=None):
+    """添加幻灯片"""
+    # 检查布局索引是否有效
+    if layout_index < 0 or layout_index >= len(prs.slide_layouts):
+        raise ValueError(f"无效的布局索引: {layout_index}，有效范围: 0-{len(prs.slide_layouts)-1}")
+    
+    # 添加幻灯片
+    slide_layout = prs.slide_layouts[layout_index]
+    slide = prs.slides.add_slide(slide_layout)
+    
+    # 设置标题和副标题
+    if hasattr(slide, 'shapes') and hasattr(slide.shapes, 'title') and slide.shapes.title:
+        if title:
+            slide.shapes.title.text = title
+    
+    # 查找副标题占位符
+    if subtitle:
+        for shape in slide.placeholders:
+            if shape.placeholder_format.type == 1:  # 副标题占位符类型
+                shape.text = subtitle
+                break
+    
+    # 添加备注
+    if notes:
+        if not slide.notes_slide:
+            slide.notes_slide
+        if slide.notes_slide and hasattr(slide.notes_slide, 'notes_text_frame'):
+            slide.notes_slide.notes_text_frame.text = notes
+    
+    return {
+        "index": len(prs.slides) - 1,
+        "layout_index": layout_index,
+        "layout_name": slide_layout.name if hasattr(slide_layout, "name") else f"Layout {layout_index}",
+        "title": title,
+        "subtitle": subtitle,
+        "has_notes": notes is not None
+    }
+
+
+def _op_add_text(prs, slide_index, text, position=None, size=None, formatting=None, placeholder_index=None):
+    """添加文本"""
+    slide = _get_slide(prs, slide_index)
+    
+    # 处理文本
+    if placeholder_index is not None:
+        # 添加到占位符
+        try:
+            placeholder = slide.placeholders[placeholder_index]
+            if hasattr(placeholder, 'text'):
+                placeholder.text = text
+            else:
+                raise ValueError(f"占位符 {placeholder_index} 不支持文本")
+            
+            # 应用格式
+            if formatting and hasattr(placeholder, 'text_frame'):
+                _apply_text_formatting(placeholder.text_frame, formatting)
+            
+            shape = placeholder
+        except (IndexError, KeyError):
+            raise ValueError(f"幻灯片中不存在索引为 {placeholder_index} 的占位符")
+    else:
+        # 创建文本框
+        left = Inches(position['left']) if position and 'left' in position else Inches(1)
+        top = Inches(position['top']) if position and 'top' in position else Inches(2)
+        width = Inches(size['width']) if size and 'width' in size else Inches(8)
+        height = Inches(size['height']) if size and 'height' in size else Inches(1)
+        
+        shape = slide.shapes.add_textbox(left, top, width, height)
+        shape.text_frame.text = text
+        
+        # 应用格式
+        if formatting:
+            _apply_text_formatting(shape.text_frame, formatting)
+    
+    return {
+        "slide_index": slide_index,
+        "text": text[:100] + ("..." if len(text) > 100 else ""),
+        "shape_id": shape.shape_id if hasattr(shape, 'shape_id') else None,
+        "is_placeholder": placeholder_index is not None
+    }
+
+
+def _op_add_image(prs, slide_index, image_path, position=None, size=None, placeholder_index=None):
+    """添加图片"""
+    # 检查图片文件是否存在
+    if not image_path or not os.path.exists(image_path):
+        raise FileNotFoundError(f"图片文件不存在: {image_path}")
+    
+    slide = _get_slide(prs, slide_index)
+    
+    # 处理图片
+    if placeholder_index is not None:
+        # 添加到占位符
+        try:
+            placeholder = slide.placeholders[placeholder_index]
+            placeholder.insert_picture(image_path)
+            shape = placeholder
+        except (IndexError, KeyError):
+            raise ValueError(f"幻灯片中不存在索引为 {placeholder_index} 的占位符")
+        except TypeError:
+            raise TypeError(f"占位符 {placeholder_index} 不支持插入图片")
+    else:
+        # 直接添加图片
+        left = Inches(position['left']) if position and 'left' in position else Inches(1)
+        top = Inches(position['top']) if position and 'top' in position else Inches(2)
+        
+        if size and 'width' in size and 'height' in size:
+            width = Inches(size['width'])
+            height = Inches(size['height'])
+            shape = slide.shapes.add_picture(image_path, left, top, width, height)
+        else:
+            shape = slide.shapes.add_picture(image_path, left, top)
+    
+    return {
+        "slide_index": slide_index,
+        "image_path": image_path,
+        "shape_id": shape.shape_id if hasattr(shape, 'shape_id') else None,
+        "is_placeholder": placeholder_index is not None
+    }
+
+
+def _op_add_table(prs, slide_index, data, position=None, size=None, formatting=None, has_header=True):
+    """添加表格"""
+    # 检查数据有效性
+    if not data or not isinstance(data, list) or not all(isinstance(row, list) for row in data):
+        raise ValueError("无效的表格数据格式，应为二维数组")
+    
+    slide = _get_slide(prs, slide_index)
+    
+    # 确定表格尺寸
+    rows = len(data)
+    cols = max(len(row) for row in data) if data else 0
+    
+    if rows == 0 or cols == 0:
+        raise ValueError("表格必须至少包含一行一列")
+    
+    # 确定表格位置和大小
+    left = Inches(position['left']) if position and 'left' in position else Inches(1)
+    top = Inches(position['top']) if position and 'top' in position else Inches(2)
+    width = Inches(size['width']) if size and 'width' in size else Inches(8)
+    height = Inches(size['height']) if size and 'height' in size else Inches(rows * 0.5)
+    
+    # 创建表格
+    table = slide.shapes.add_table(rows, cols, left, top, width, height).table
+    
+    # 填充数据
+    for row_idx, row_data in enumerate(data):
+        for col_idx, cell_text in enumerate(row_data):
+            if col_idx < cols:  # 确保不超出列数
+                cell = table.cell(row_idx, col_idx)
+                cell.text = str(cell_text)
+    
+    # 应用格式
+    if formatting:
+        _apply_table_formatting(table, formatting, has_header)
+    
+    return {
+        "slide_index": slide_index,
+        "rows": rows,
+        "columns": cols,
+        "has_header": has_header
+    }
+
+
+def _op_add_shape(prs, slide_index, shape_type, position=None, size=None, text=None, formatting=None):
+    """添加形状"""
+    slide = _get_slide(prs, slide_index)
+    
+    if shape_type not in SHAPE_TYPES:
+        raise ValueError(f"不支持的形状类型: {shape_type}，支持的类型: {', '.join(SHAPE_TYPES.keys())}")
+    
+    # 确定形状位置和大小
+    left = Inches(position['left']) if position and 'left' in position else Inches(2)
+    top = Inches(position['top']) if position and 'top' in position else Inches(2)
+    width = Inches(size['width']) if size and 'width' in size else Inches(2)
+    height = Inches(size['height']) if size and 'height' in size else Inches(1)
+    
+    # 添加形状
+    shape = slide.shapes.add_shape(SHAPE_TYPES[shape_type], left, top, width, height)
+    
+    # 添加文本
+    if text:
+        shape.text = text
+    
+    # 应用格式
+    if formatting:
+        _apply_shape_formatting(shape, formatting)
+    
+    return {
+        "slide_index": slide_index,
+        "shape_type": shape_type,
+        "shape_id": shape.shape_id if hasattr(shape, 'shape_id') else None,
+        "has_text": text is not None
+    }
+
+
+# 批量操作类型
+_OPERATIONS = {
+    "add_slide": _op_add_slide,
+    "add_text": _op_add_text,
+    "add_image": _op_add_image,
+    "add_table": _op_add_table,
+    "add_shape": _op_add_shape
+}
+
+
 # 辅助函数
 
 def _apply_text_formatting(text_frame, formatting):
@@ -857,4 +1121,110 @@ def _get_slide_layout_index(slide, presentation):
         if slide.slide_layout == layout:
             return idx
     
-    return -1
\ No newline at end of file
+    return -1
+
+
+def _new_presentation(template_path=None, title=None, author=None):
+    """创建演示文稿，可选择使用模板并设置文档属性"""
+    if template_path and os.path.exists(template_path):
+        prs = Presentation(template_path)
+    else:
+        prs = Presentation()
+    
+    # 设置文档属性
+    if title or author:
+        core_properties = prs.core_properties
+        if title:
+            core_properties.title = title
+        if author:
+            core_properties.author = author
+    
+    return prs
+
+
+def _save_presentation(prs, path):
+    """保存演示文稿，确保输出目录存在"""
+    output_dir = os.path.dirname(path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    prs.save(path)
+
+
+def _get_slide(prs, slide_index):
+    """获取幻灯片并检查索引是否有效"""
+    if slide_index < 0 or slide_index >= len(prs.slides):
+        raise ValueError(f"无效的幻灯片索引: {slide_index}，有效范围: 0-{len(prs.slides)-1}")
+    return prs.slides[slide_index]
+
+
+def _get_slide_layouts(prs):
+    """获取幻灯片布局列表"""
+    slide_layouts = []
+    for idx, layout in enumerate(prs.slide_layouts):
+        layout_info = {
+            "index": idx,
+            "name": layout.name if hasattr(layout, "name") else f"Layout {idx}",
+            "placeholder_count": len(layout.placeholders)
+        }
+        slide_layouts.append(layout_info)
+    return slide_layouts
+
+
+def _describe_presentation(prs, presentation_path, include_slides, include_placeholders):
+    """构建演示文稿详细信息"""
+    # 基本信息
+    info = {
+        "file_path": presentation_path,
+        "file_name": os.path.basename(presentation_path) if presentation_path else None,
+        "file_size": os.path.getsize(presentation_path) if presentation_path and os.path.exists(presentation_path) else None,
+        "slide_count": len(prs.slides),
+        "slide_layouts_count": len(prs.slide_layouts)
+    }
+    
+    # 文档属性
+    if hasattr(prs, 'core_properties'):
+        core_props = prs.core_properties
+        info["properties"] = {
+            "title": core_props.title if hasattr(core_props, 'title') else None,
+            "author": core_props.author if hasattr(core_props, 'author') else None,
+            "subject": core_props.subject if hasattr(core_props, 'subject') else None,
+            "created": str(core_props.created) if hasattr(core_props, 'created') else None,
+            "modified": str(core_props.modified) if hasattr(core_props, 'modified') else None
+        }
+    
+    # 幻灯片布局
+    info["slide_layouts"] = _get_slide_layouts(prs)
+    
+    # 幻灯片信息
+    if include_slides:
+        slides = []
+        for idx, slide in enumerate(prs.slides):
+            slide_info = {
+                "index": idx,
+                "layout_index": _get_slide_layout_index(slide, prs),
+                "shape_count": len(slide.shapes),
+                "has_notes": hasattr(slide, 'notes_slide') and slide.notes_slide is not None
+            }
+            
+            # 获取标题
+            if hasattr(slide, 'shapes') and hasattr(slide.shapes, 'title') and slide.shapes.title:
+                slide_info["title"] = slide.shapes.title.text
+            
+            # 占位符信息
+            if include_placeholders:
+                placeholders = []
+                for p_idx, placeholder in enumerate(slide.placeholders):
+                    placeholder_info = {
+                        "index": p_idx,
+                        "type": placeholder.placeholder_format.type if hasattr(placeholder, 'placeholder_format') else None,
+                        "name": placeholder.name if hasattr(placeholder, 'name') else None
+                    }
+                    placeholders.append(placeholder_info)
+                
+                slide_info["placeholders"] = placeholders
+            
+            slides.append(slide_info)
+        
+        info["slides"] = slides
+    
+    return info
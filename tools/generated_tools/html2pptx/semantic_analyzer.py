@@ -3,6 +3,7 @@
 
 此模块提供了一组工具函数，用于分析HTML文档的语义结构、识别重要内容、
 提取主题和关键信息，以便在PPT中合理组织内容。
+解析结果由document_handle按内容缓存，工具也可以接收open_html_document返回的文档句柄ID。
 """
 
 import re
@@ -10,6 +11,7 @@ import json
 import math
 from typing import Dict, List, Any, Optional, Tuple, Union
 from collections import Counter
+import copy
 from bs4 import BeautifulSoup, Tag, NavigableString
 import nltk
 try:
@@ -24,40 +26,30 @@ from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.corpus import stopwords
 from strands import tool
 
+from tools.generated_tools.html2pptx.document_handle import HTMLDocument, load_document, get_visible_text
+
 
 @tool
 def analyze_document_structure(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     max_depth: int = 5
 ) -> str:
     """
     分析HTML文档的语义结构。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         max_depth (int): 分析的最大深度
         
     Returns:
         str: JSON格式的文档结构分析结果
     """
     try:
-        # 检查输入是否为文件路径
-        if html_content.strip().startswith(('<', '<!DOCTYPE')):
-            # 这是HTML内容
-            pass
-        else:
-            # 尝试作为文件路径读取
-            try:
-                with open(html_content, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-            except:
-                # 如果无法作为文件读取，假设它是HTML内容
-                pass
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 提取文档基本信息
         doc_info = {
@@ -76,13 +68,13 @@ def analyze_document_structure(
         structure = _analyze_structure(soup, max_depth)
         
         # 提取主要内容区域
-        main_content = _identify_main_content(soup)
+        main_content = document.memoize("semantic.main_content", _identify_main_content)
         
         # 分析标题层次结构
-        headings = _analyze_headings(soup)
+        headings = document.memoize("semantic.headings", _analyze_headings)
         
         # 分析语义分区
-        sections = _analyze_sections(soup)
+        sections = _get_sections(document)
         
         # 构建响应
         response = {
@@ -91,7 +83,10 @@ def analyze_document_structure(
             "structure": structure,
             "main_content": main_content,
             "headings": headings,
-            "sections": sections
+            "sections": [
+                {key: value for key, value in section.items() if key != "content"}
+                for section in sections
+            ]
         }
         
         return json.dumps(response, ensure_ascii=False, indent=2)
@@ -108,36 +103,24 @@ def analyze_document_structure(
 @tool
 def extract_key_content(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     content_type: str = "all"
 ) -> str:
     """
     从HTML文档中提取关键内容。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         content_type (str): 内容类型，可选值: "all", "headings", "paragraphs", "lists", "tables", "quotes"
         
     Returns:
         str: JSON格式的关键内容
     """
     try:
-        # 检查输入是否为文件路径
-        if html_content.strip().startswith(('<', '<!DOCTYPE')):
-            # 这是HTML内容
-            pass
-        else:
-            # 尝试作为文件路径读取
-            try:
-                with open(html_content, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-            except:
-                # 如果无法作为文件读取，假设它是HTML内容
-                pass
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 初始化结果
         result = {}
@@ -253,39 +236,27 @@ def extract_key_content(
 @tool
 def identify_key_topics(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     max_topics: int = 5
 ) -> str:
     """
     从HTML文档中识别关键主题。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         max_topics (int): 最大主题数量
         
     Returns:
         str: JSON格式的关键主题
     """
     try:
-        # 检查输入是否为文件路径
-        if html_content.strip().startswith(('<', '<!DOCTYPE')):
-            # 这是HTML内容
-            pass
-        else:
-            # 尝试作为文件路径读取
-            try:
-                with open(html_content, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-            except:
-                # 如果无法作为文件读取，假设它是HTML内容
-                pass
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 提取文本内容
-        text = _extract_main_text(soup)
+        text = _get_main_text(document)
         
         # 提取关键词
         keywords = _extract_keywords(text, max_topics * 3)
@@ -349,48 +320,36 @@ def identify_key_topics(
 @tool
 def suggest_slide_structure(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     max_slides: int = 10
 ) -> str:
     """
     根据HTML文档内容建议PPT幻灯片结构。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         max_slides (int): 最大幻灯片数量
         
     Returns:
         str: JSON格式的幻灯片结构建议
     """
     try:
-        # 检查输入是否为文件路径
-        if html_content.strip().startswith(('<', '<!DOCTYPE')):
-            # 这是HTML内容
-            pass
-        else:
-            # 尝试作为文件路径读取
-            try:
-                with open(html_content, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-            except:
-                # 如果无法作为文件读取，假设它是HTML内容
-                pass
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 获取文档标题
         document_title = soup.title.string.strip() if soup.title else "Presentation"
         
         # 分析标题层次结构
-        headings = _analyze_headings(soup)
+        headings = document.memoize("semantic.headings", _analyze_headings)
         
         # 分析语义分区
-        sections = _analyze_sections(soup)
+        sections = _get_sections(document)
         
-        # 提取关键内容
-        key_content_json = extract_key_content(html_content, parser)
+        # 提取关键内容（复用已解析的文档）
+        key_content_json = extract_key_content(document.handle_id)
         key_content = json.loads(key_content_json)
         
         # 创建幻灯片结构
@@ -615,34 +574,22 @@ def suggest_slide_structure(
 @tool
 def analyze_content_importance(
     html_content: str,
-    parser: str = "html.parser"
+    parser: str = None
 ) -> str:
     """
     分析HTML文档中内容的重要性。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         
     Returns:
         str: JSON格式的内容重要性分析结果
     """
     try:
-        # 检查输入是否为文件路径
-        if html_content.strip().startswith(('<', '<!DOCTYPE')):
-            # 这是HTML内容
-            pass
-        else:
-            # 尝试作为文件路径读取
-            try:
-                with open(html_content, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-            except:
-                # 如果无法作为文件读取，假设它是HTML内容
-                pass
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 分析标题重要性
         headings = []
@@ -792,46 +739,40 @@ def analyze_content_importance(
 @tool
 def extract_hierarchical_structure(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     max_depth: int = 3
 ) -> str:
     """
     提取HTML文档的层次结构。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         max_depth (int): 最大深度
         
     Returns:
         str: JSON格式的层次结构
     """
     try:
-        # 检查输入是否为文件路径
-        if html_content.strip().startswith(('<', '<!DOCTYPE')):
-            # 这是HTML内容
-            pass
-        else:
-            # 尝试作为文件路径读取
-            try:
-                with open(html_content, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-            except:
-                # 如果无法作为文件读取，假设它是HTML内容
-                pass
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 提取文档标题
         document_title = soup.title.string.strip() if soup.title else "Untitled Document"
         
         # 基于标题层次提取结构
-        structure = _extract_heading_hierarchy(soup, max_depth)
+        structure = document.memoize(
+            f"semantic.heading_hierarchy:{max_depth}",
+            lambda s: _extract_heading_hierarchy(s, max_depth)
+        )
         
         # 如果没有足够的标题结构，尝试使用语义元素
         if not structure["children"]:
-            structure = _extract_semantic_hierarchy(soup, max_depth)
+            structure = document.memoize(
+                f"semantic.semantic_hierarchy:{max_depth}",
+                lambda s: _extract_semantic_hierarchy(s, max_depth)
+            )
         
         # 构建响应
         response = {
@@ -854,36 +795,24 @@ def extract_hierarchical_structure(
 @tool
 def summarize_content(
     html_content: str,
-    parser: str = "html.parser",
+    parser: str = None,
     max_length: int = 500
 ) -> str:
     """
     总结HTML文档内容。
 
     Args:
-        html_content (str): HTML文档内容或文件路径
-        parser (str): 解析器类型，可选值: "html.parser", "lxml", "html5lib"
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
         max_length (int): 摘要最大长度
         
     Returns:
         str: JSON格式的内容摘要
     """
     try:
-        # 检查输入是否为文件路径
-        if html_content.strip().startswith(('<', '<!DOCTYPE')):
-            # 这是HTML内容
-            pass
-        else:
-            # 尝试作为文件路径读取
-            try:
-                with open(html_content, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-            except:
-                # 如果无法作为文件读取，假设它是HTML内容
-                pass
-        
-        # 解析HTML
-        soup = BeautifulSoup(html_content, parser)
+        # 加载HTML（文档句柄、文件路径或HTML内容），相同文档只解析一次
+        document = load_document(html_content, parser)
+        soup = document.soup
         
         # 提取文档标题
         document_title = soup.title.string.strip() if soup.title else "Untitled Document"
@@ -896,7 +825,7 @@ def summarize_content(
             summary = meta_description
         else:
             # 提取主要文本内容
-            main_text = _extract_main_text(soup)
+            main_text = _get_main_text(document)
             
             # 提取关键句子
             key_sentences = _extract_key_sentences(main_text, max_length)
@@ -1055,8 +984,8 @@ def _analyze_headings(soup: BeautifulSoup) -> List[Dict[str, Any]]:
     return headings
 
 
-def _analyze_sections(soup: BeautifulSoup) -> List[Dict[str, Any]]:
-    """分析语义分区"""
+def _analyze_sections(soup: BeautifulSoup, main_content: Optional[Tag] = None) -> List[Dict[str, Any]]:
+    """分析语义分区（隐式分区使用节点副本，不修改文档树）"""
     sections = []
     
     # 检查显式的section元素
@@ -1095,12 +1024,8 @@ def _analyze_sections(soup: BeautifulSoup) -> List[Dict[str, Any]]:
     
     # 如果没有足够的显式分区，尝试使用标题作为分区标志
     if len(sections) < 2:
-        main_content = None
-        for selector in ['main', 'article', '#main', '#content', '.main', '.content']:
-            elements = soup.select(selector)
-            if elements:
-                main_content = elements[0]
-                break
+        if main_content is None:
+            main_content = _find_main_node(soup)
         
         if not main_content and soup.body:
             main_content = soup.body
@@ -1118,7 +1043,7 @@ def _analyze_sections(soup: BeautifulSoup) -> List[Dict[str, Any]]:
                         if current_heading and current_content:
                             section_content = BeautifulSoup('<div></div>', 'html.parser').div
                             for elem in current_content:
-                                section_content.append(elem)
+                                section_content.append(copy.copy(elem))
                             
                             sections.append({
                                 "type": "implicit_section",
@@ -1138,7 +1063,7 @@ def _analyze_sections(soup: BeautifulSoup) -> List[Dict[str, Any]]:
             if current_heading and current_content:
                 section_content = BeautifulSoup('<div></div>', 'html.parser').div
                 for elem in current_content:
-                    section_content.append(elem)
+                    section_content.append(copy.copy(elem))
                 
                 sections.append({
                     "type": "implicit_section",
@@ -1150,25 +1075,41 @@ def _analyze_sections(soup: BeautifulSoup) -> List[Dict[str, Any]]:
     return sections
 
 
-def _extract_main_text(soup: BeautifulSoup) -> str:
-    """提取主要文本内容"""
-    # 删除脚本和样式
-    for script_or_style in soup(['script', 'style', 'noscript']):
-        script_or_style.extract()
-    
-    # 尝试找到主内容区域
-    main_content = None
+def _find_main_node(soup: BeautifulSoup) -> Optional[Tag]:
+    """查找主内容区域节点"""
     for selector in ['main', 'article', '#main', '#content', '.main', '.content']:
-        elements = soup.select(selector)
-        if elements:
-            main_content = elements[0]
-            break
+        element = soup.select_one(selector)
+        if element:
+            return element
+    return None
+
+
+def _get_main_node(document: HTMLDocument) -> Optional[Tag]:
+    """获取文档的主内容区域节点（按文档句柄缓存）"""
+    return document.memoize("semantic.main_node", _find_main_node)
+
+
+def _get_main_text(document: HTMLDocument) -> str:
+    """获取文档的主要文本内容（按文档句柄缓存）"""
+    return document.memoize("semantic.main_text", lambda soup: _extract_main_text(soup, _get_main_node(document)))
+
+
+def _get_sections(document: HTMLDocument) -> List[Dict[str, Any]]:
+    """获取文档的语义分区（按文档句柄缓存）"""
+    return document.memoize("semantic.sections", lambda soup: _analyze_sections(soup, _get_main_node(document)))
+
+
+def _extract_main_text(soup: BeautifulSoup, main_content: Optional[Tag] = None) -> str:
+    """提取主要文本内容（跳过脚本和样式，不修改文档树）"""
+    # 尝试找到主内容区域
+    if main_content is None:
+        main_content = _find_main_node(soup)
     
     if not main_content:
         main_content = soup.body if soup.body else soup
     
     # 提取文本
-    text = main_content.get_text(separator=' ', strip=True)
+    text = get_visible_text(main_content, separator=' ', strip=True)
     
     # 清理文本
     text = re.sub(r'\s+', ' ', text)
@@ -11,6 +11,19 @@ import colorsys
 from typing import Dict, List, Any, Optional, Tuple, Union
 from strands import tool
 
+from tools.generated_tools.html2pptx.document_handle import load_document, NON_VISIBLE_TAGS
+
+
+# 子元素从父元素继承的CSS属性
+INHERITED_PROPERTIES = (
+    "color", "font-family", "font-size", "font-style", "font-weight", "font-variant",
+    "line-height", "letter-spacing", "text-align", "text-indent", "text-transform",
+    "white-space", "visibility", "list-style-type"
+)
+
+# 支持的简单CSS选择器：标签、类、ID及其组合，例如 h1、.title、#main、p.note
+_SIMPLE_SELECTOR_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9-]*|\*)?((?:[.#][\w-]+)*)$')
+
 
 @tool
 def map_html_styles_to_ppt(
@@ -701,20 +714,82 @@ def map_text_style_to_ppt(
         return json.dumps(error_response, ensure_ascii=False)
 
 
+@tool
+def extract_document_styles(
+    html_content: str,
+    parser: str = None,
+    element_types: List[str] = None,
+    limit: int = 0
+) -> str:
+    """
+    计算HTML文档中元素的样式（默认样式、继承样式、<style>中的简单规则和内联样式）。
+
+    Args:
+        html_content (str): HTML文档内容、文件路径或文档句柄ID
+        parser (str, optional): 解析器类型，可选值: "lxml", "html.parser", "html5lib"，默认使用lxml
+        element_types (List[str], optional): 只返回这些类型的元素，默认返回全部有样式的元素
+        limit (int): 限制结果数量，0表示不限制
+        
+    Returns:
+        str: JSON格式的元素样式列表，每项格式与extract_html_styles的结果相同
+    """
+    try:
+        # 计算样式（按文档句柄缓存）
+        document = load_document(html_content, parser)
+        element_styles = document.memoize("style_mapper.element_styles", _compute_element_styles)
+        
+        if element_types:
+            wanted = {element_type.lower() for element_type in element_types}
+            element_styles = [item for item in element_styles if item["element_type"] in wanted]
+        
+        total = len(element_styles)
+        if limit > 0:
+            element_styles = element_styles[:limit]
+        
+        # 构建响应
+        response = {
+            "status": "success",
+            "handle_id": document.handle_id,
+            "total": total,
+            "count": len(element_styles),
+            "element_styles": element_styles
+        }
+        
+        return json.dumps(response, ensure_ascii=False, indent=2)
+    
+    except Exception as e:
+        error_response = {
+            "status": "failed",
+            "error": str(e),
+            "message": "文档样式计算失败"
+        }
+        return json.dumps(error_response, ensure_ascii=False)
+
+
 @tool
 def analyze_document_theme(
-    html_styles: List[Dict[str, Any]]
+    html_styles: List[Dict[str, Any]] = None,
+    html_content: str = None,
+    parser: str = None
 ) -> str:
     """
     分析HTML文档的主题样式，提取配色方案和字体方案。
 
     Args:
-        html_styles (List[Dict[str, Any]]): HTML元素样式列表
+        html_styles (List[Dict[str, Any]], optional): HTML元素样式列表
+        html_content (str, optional): HTML文档内容、文件路径或文档句柄ID，未提供html_styles时从文档计算样式
+        parser (str, optional): 解析器类型，默认使用lxml
         
     Returns:
         str: JSON格式的文档主题分析结果
     """
     try:
+        if html_styles is None:
+            if not html_content:
+                raise ValueError("需要提供html_styles或html_content")
+            document = load_document(html_content, parser)
+            html_styles = document.memoize("style_mapper.element_styles", _compute_element_styles)
+        
         # 初始化分析结果
         colors = []
         fonts = []
@@ -796,6 +871,114 @@ def analyze_document_theme(
 
 # 辅助函数
 
+def _parse_style_rules(soup) -> List[Tuple[Tuple[int, int, int], int, Optional[str], List[str], Optional[str], Dict[str, str]]]:
+    """
+    解析文档<style>元素中的简单CSS规则。
+    
+    返回 (特异性, 顺序, 标签, 类列表, ID, 声明) 列表，按层叠顺序排序。
+    不支持的选择器（后代、伪类、属性选择器等）和@规则会被忽略。
+    """
+    rules = []
+    order = 0
+    for style_tag in soup.find_all('style'):
+        css = re.sub(r'/\*.*?\*/', '', style_tag.get_text(), flags=re.S)
+        for selector_text, body in re.findall(r'([^{}]+)\{([^{}]*)\}', css):
+            declarations = _parse_inline_styles(body)
+            if not declarations:
+                continue
+            for selector in selector_text.split(','):
+                selector = selector.strip()
+                match = _SIMPLE_SELECTOR_RE.match(selector)
+                if not selector or selector.startswith('@') or not match:
+                    continue
+                tag_name = match.group(1).lower() if match.group(1) and match.group(1) != '*' else None
+                parts = re.findall(r'([.#])([\w-]+)', match.group(2))
+                classes = [name for kind, name in parts if kind == '.']
+                ids = [name for kind, name in parts if kind == '#']
+                specificity = (len(ids), len(classes), 1 if tag_name else 0)
+                rules.append((specificity, order, tag_name, classes, ids[0] if ids else None, declarations))
+                order += 1
+    rules.sort(key=lambda rule: (rule[0], rule[1]))
+    return rules
+
+
+def _compute_element_styles(soup) -> List[Dict[str, Any]]:
+    """
+    按文档顺序计算body中元素的样式。
+    
+    合并顺序为 继承样式 < 默认样式 < <style>规则 < 内联样式。
+    只返回有显式样式（默认样式、规则或内联样式）的元素以及body。
+    """
+    # 按ID、类、标签索引规则，每个元素只检查可能匹配的规则
+    rule_index: Dict[Tuple[str, str], List[tuple]] = {}
+    for rule in _parse_style_rules(soup):
+        _, _, tag_name, rule_classes, rule_id, _ = rule
+        if rule_id:
+            key = ('#', rule_id)
+        elif rule_classes:
+            key = ('.', rule_classes[0])
+        else:
+            key = ('tag', tag_name or '*')
+        rule_index.setdefault(key, []).append(rule)
+    
+    root = soup.body
+    if root is None:
+        elements = soup.find_all(True)
+        inherited_by_element = {id(soup): {}}
+    else:
+        elements = [root] + root.find_all(True)
+        inherited_by_element = {id(root.parent): {}}
+    results = []
+    
+    for element in elements:
+        parent_inherited = inherited_by_element.get(id(element.parent))
+        if parent_inherited is None or element.name in NON_VISIBLE_TAGS:
+            # 脚本、样式等不可见元素及其子元素不参与样式计算
+            continue
+        
+        classes = element.get('class') or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        element_id = element.get('id')
+        
+        candidates = list(rule_index.get(('tag', '*'), [])) + rule_index.get(('tag', element.name), [])
+        if element_id:
+            candidates += rule_index.get(('#', element_id), [])
+        for name in classes:
+            candidates += rule_index.get(('.', name), [])
+        candidates.sort(key=lambda rule: (rule[0], rule[1]))
+        
+        declared = dict(_get_default_styles(element.name))
+        for _, _, tag_name, rule_classes, rule_id, declarations in candidates:
+            if tag_name and tag_name != element.name:
+                continue
+            if rule_id and rule_id != element_id:
+                continue
+            if rule_classes and not all(name in classes for name in rule_classes):
+                continue
+            declared.update(declarations)
+        
+        inline_styles = _parse_inline_styles(element.get('style', ''))
+        declared.update(inline_styles)
+        
+        styles = dict(parent_inherited)
+        styles.update(declared)
+        inherited_by_element[id(element)] = {
+            name: value for name, value in styles.items() if name in INHERITED_PROPERTIES
+        }
+        
+        if declared or element is root:
+            results.append({
+                "element_type": element.name,
+                "styles": styles,
+                "classes": list(classes),
+                "id": element_id,
+                "has_inline_styles": bool(inline_styles)
+            })
+    
+    return results
+
+
 def _parse_inline_styles(style_str: str) -> Dict[str, str]:
     """解析内联样式字符串为样式字典"""
     styles = {}
@@ -0,0 +1,518 @@
+"""
+文章近似重复检测模块
+
+基于 MinHash + LSH 分桶的近似去重，供 data_processor.deduplicate_articles(method="fuzzy") 使用：
+- 对标题和正文做字符 n-gram 分片（不依赖分词，中英文通用）
+- 使用单次哈希分箱（One Permutation Hashing）加旋转填充计算 MinHash 签名，
+  每个分片只哈希一次，整批文章一次性向量化计算
+- 按相似度阈值选择 LSH 分段参数（bands × rows），只比较至少有一段签名完全相同的候选文章
+- 历史索引持久化到本地目录，当天采集的文章可以与最近 N 天已保留的文章去重
+"""
+
+import os
+import json
+import time
+import logging
+import hashlib
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# 签名长度（分箱数，必须是 2 的幂）
+DEFAULT_NUM_PERM = 128
+
+# 字符 n-gram 分片长度
+DEFAULT_SHINGLE_SIZE = 5
+
+# 参与分片的最大字符数（标题 + 正文开头）
+MAX_SHINGLE_CHARS = 2000
+
+# 批量计算签名时每块的最大字符数
+SIGNATURE_CHUNK_CHARS = 2 * 1024 * 1024
+
+# 哈希种子，修改后历史索引中的签名不再可比
+HASH_SEED = 0x5EED
+
+# 选择 LSH 分段参数时漏检相对误检的权重：候选文章都会用签名复核相似度，误检只增加少量比较
+LSH_FALSE_NEGATIVE_WEIGHT = 0.9
+
+# 历史索引默认目录
+DEFAULT_INDEX_DIR = ".cache/lifescience_news_collector/dedup_index"
+
+# 历史索引格式版本
+INDEX_VERSION = 1
+
+# 空文本的签名值
+EMPTY_SLOT = np.uint32(0xFFFFFFFF)
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_ROLLING_PRIME = np.uint64(0x100000001B3)
+_BAND_PRIME = np.uint64(0x9E3779B97F4A7C15)
+_DENSIFY_OFFSET = np.uint32(0x9E3779B1)
+_SEPARATOR = np.uint32(ord(" "))
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 终结函数（uint64 溢出即取模）"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+@lru_cache(maxsize=1)
+def _word_char_table() -> np.ndarray:
+    """码点 -> 是否为字母或数字（标点、空白和下划线都作为分隔符）"""
+    return np.array(list(map(str.isalnum, map(chr, range(0x110000)))), dtype=bool)
+
+
+def normalize_text(text: str) -> str:
+    """统一全半角和大小写（标点和空白在计算签名时统一替换为单个分隔符）"""
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def article_text(article: Dict[str, Any], max_chars: int = MAX_SHINGLE_CHARS) -> str:
+    """文章参与去重的文本：标题 + 正文开头"""
+    title = str(article.get("title") or "")[:max_chars]
+    content = str(article.get("content") or "")[:max_chars - len(title)]
+    return normalize_text(f"{title} {content}")
+
+
+def compute_signatures(
+    texts: Sequence[str],
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    seed: int = HASH_SEED,
+) -> np.ndarray:
+    """
+    批量计算 MinHash 签名
+    
+    所有文本拼接为一个码点数组，标点和空白折叠为单个分隔符后滚动哈希得到每个位置的 n-gram 哈希，
+    高位决定分箱、低 32 位作为箱内取最小值的哈希值；空箱从右侧最近的非空箱借值（旋转填充）。
+    
+    Args:
+        texts: 经过 normalize_text 处理的文本列表
+        num_perm: 签名长度（2 的幂）
+        shingle_size: 字符 n-gram 长度
+        seed: 哈希种子
+    
+    Returns:
+        np.ndarray: (len(texts), num_perm) 的 uint32 签名矩阵，空文本的签名全部为 EMPTY_SLOT
+    """
+    if num_perm <= 0 or num_perm & (num_perm - 1):
+        raise ValueError(f"num_perm 必须是 2 的幂: {num_perm}")
+    signatures = np.full((len(texts), num_perm), EMPTY_SLOT, dtype=np.uint32)
+    
+    # 按字符数分块计算，限制中间数组的内存占用
+    chunk_start, chunk_chars = 0, 0
+    for i, text in enumerate(texts):
+        chunk_chars += len(text)
+        if chunk_chars >= SIGNATURE_CHUNK_CHARS or i == len(texts) - 1:
+            _compute_chunk(texts[chunk_start:i + 1], signatures[chunk_start:i + 1], shingle_size, seed)
+            chunk_start, chunk_chars = i + 1, 0
+    return signatures
+
+
+def _compute_chunk(texts: Sequence[str], signatures: np.ndarray, shingle_size: int, seed: int) -> None:
+    """计算一块文本的签名，结果写入 signatures（视图）"""
+    count = len(texts)
+    num_perm = signatures.shape[1]
+    
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=count)
+    codes = np.frombuffer("".join(texts).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    
+    # 非字母数字字符替换为分隔符，连续的分隔符只保留一个，去掉文章首尾的分隔符
+    boundaries = np.concatenate(([0], np.cumsum(lengths)))
+    word = _word_char_table()[codes]
+    keep = word.copy()
+    keep[1:] |= word[:-1]
+    starts = boundaries[:-1][lengths > 0]
+    keep[starts] = word[starts]
+    kept_before = np.concatenate(([0], np.cumsum(keep)))
+    lengths = kept_before[boundaries[1:]] - kept_before[boundaries[:-1]]
+    codes = np.where(word, codes, _SEPARATOR)[keep]
+    
+    # 折叠后文章末尾最多剩一个分隔符
+    ends = np.cumsum(lengths)
+    trailing = (lengths > 0) & (codes[np.maximum(ends - 1, 0)] == _SEPARATOR) if len(codes) else np.zeros(count, dtype=bool)
+    if trailing.any():
+        keep = np.ones(len(codes), dtype=bool)
+        keep[ends[trailing] - 1] = False
+        codes = codes[keep]
+        lengths = lengths - trailing
+    
+    # 每篇文章后补 shingle_size - 1 个 0，使分片不跨越文章边界，且短文本也至少有一个分片
+    ends = np.cumsum(lengths)
+    codes = np.insert(codes, np.repeat(ends, shingle_size - 1), 0).astype(np.uint64)
+    starts = ends - lengths + np.arange(count, dtype=np.int64) * (shingle_size - 1)
+    shingle_counts = lengths
+    total = int(shingle_counts.sum())
+    if total == 0:
+        return
+    
+    # 在整个码点数组上按切片计算每个位置的 n-gram 哈希，再取出属于各文章的位置
+    windows = len(codes) - shingle_size + 1
+    rolling = np.full(windows, np.uint64(seed), dtype=np.uint64)
+    for j in range(shingle_size):
+        rolling *= _ROLLING_PRIME
+        rolling += codes[j:j + windows]
+    
+    doc_ids = np.repeat(np.arange(count, dtype=np.int64), shingle_counts)
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(ends - lengths, shingle_counts)
+    hashes = _mix64(rolling[np.repeat(starts, shingle_counts) + offsets])
+    
+    bin_bits = np.uint64(num_perm.bit_length() - 1)
+    bins = (hashes >> (np.uint64(64) - bin_bits)).astype(np.int64) if bin_bits else np.zeros(total, dtype=np.int64)
+    values = (hashes & _MASK32).astype(np.uint32)
+    # 低 32 位恰好等于 EMPTY_SLOT 的分片与空箱无法区分，概率可以忽略，按最大有效值处理
+    np.minimum(values, EMPTY_SLOT - np.uint32(1), out=values)
+    np.minimum.at(signatures, (doc_ids, bins), values)
+    
+    _densify(signatures, shingle_counts > 0)
+
+
+def _densify(signatures: np.ndarray, non_empty_docs: np.ndarray) -> None:
+    """旋转填充：空箱取右侧（循环）最近非空箱的值，并按距离加偏移，避免不同空箱取到相同的值"""
+    rows = np.flatnonzero(non_empty_docs & (signatures == EMPTY_SLOT).any(axis=1))
+    if len(rows) == 0:
+        return
+    block = signatures[rows]
+    num_perm = block.shape[1]
+    columns = np.arange(num_perm, dtype=np.int64)
+    filled = block != EMPTY_SLOT
+    
+    # 右侧最近的非空箱下标（两倍长度处理循环）
+    index = np.where(np.concatenate([filled, filled], axis=1), np.concatenate([columns, columns + num_perm]), 3 * num_perm)
+    nearest = np.minimum.accumulate(index[:, ::-1], axis=1)[:, ::-1][:, :num_perm]
+    distance = (nearest - columns).astype(np.uint32)
+    borrowed = np.take_along_axis(block, nearest % num_perm, axis=1)
+    densified = borrowed + distance * _DENSIFY_OFFSET
+    signatures[rows] = np.where(filled, block, densified)
+
+
+def signature_similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """用签名相同位置的比例估计 Jaccard 相似度"""
+    return (others == signature).mean(axis=1)
+
+
+@lru_cache(maxsize=64)
+def lsh_parameters(threshold: float, num_perm: int = DEFAULT_NUM_PERM) -> Tuple[int, int]:
+    """
+    选择 LSH 分段参数，使阈值两侧的漏检和误检概率（积分）的加权和最小
+    
+    Returns:
+        Tuple[int, int]: (bands, rows)
+    """
+    grid = np.linspace(0.0, 1.0, 201)
+    below = grid <= threshold
+    best, best_error = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            probability = 1.0 - (1.0 - grid ** rows) ** bands
+            # 均匀网格上的积分，只比较相对大小，省略步长
+            error = np.where(
+                below,
+                (1.0 - LSH_FALSE_NEGATIVE_WEIGHT) * probability,
+                LSH_FALSE_NEGATIVE_WEIGHT * (1.0 - probability)
+            ).sum()
+            if error < best_error:
+                best, best_error = (bands, rows), error
+    return best
+
+
+def band_keys(signatures: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """将签名分段并哈希为 (n, bands) 的 uint64 分桶键"""
+    segments = signatures[:, :bands * rows].reshape(len(signatures), bands, rows).astype(np.uint64)
+    keys = np.zeros((len(signatures), bands), dtype=np.uint64)
+    for j in range(rows):
+        keys = (keys ^ segments[:, :, j]) * _BAND_PRIME
+    return keys
+
+
+def article_key(article: Dict[str, Any]) -> str:
+    """文章标识：优先使用URL，否则使用标题哈希"""
+    url = article.get("url") or article.get("link")
+    if url:
+        return str(url)
+    return hashlib.sha1(normalize_text(str(article.get("title") or "")).encode("utf-8")).hexdigest()
+
+
+class ArticleHistoryIndex:
+    """
+    跨批次的历史文章签名索引
+    
+    目录结构：
+        signatures.npy  (n, num_perm) uint32 签名矩阵
+        entries.json    索引参数和每篇文章的 key/title/url/added_at
+    """
+    
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, shingle_size: int = DEFAULT_SHINGLE_SIZE):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.entries: List[Dict[str, Any]] = []
+        self._band_index: Dict[Tuple[int, int], List[Tuple[np.ndarray, np.ndarray]]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    @classmethod
+    def load(
+        cls,
+        index_dir: str,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        retention_days: Optional[float] = None,
+    ) -> "ArticleHistoryIndex":
+        """加载历史索引，参数不一致或文件损坏时返回空索引"""
+        index = cls(num_perm, shingle_size)
+        directory = Path(index_dir)
+        meta_file = directory / "entries.json"
+        signature_file = directory / "signatures.npy"
+        if not meta_file.exists() or not signature_file.exists():
+            return index
+        try:
+            with open(meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            expected = {"version": INDEX_VERSION, "num_perm": num_perm, "shingle_size": shingle_size, "seed": HASH_SEED}
+            if any(meta.get(key) != value for key, value in expected.items()):
+                logger.warning(f"Dedup index parameters changed, ignoring {directory}")
+                return index
+            signatures = np.load(signature_file)
+            if signatures.shape != (len(meta["entries"]), num_perm):
+                raise ValueError(f"signature shape {signatures.shape} does not match entries")
+            index.signatures = signatures
+            index.entries = meta["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Failed to load dedup index {directory}: {e}")
+            return cls(num_perm, shingle_size)
+        if retention_days is not None:
+            index.prune(time.time() - retention_days * 86400)
+        return index
+    
+    def save(self, index_dir: str) -> None:
+        """原子写入索引目录"""
+        directory = Path(index_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        signature_tmp = directory / "signatures.npy.tmp"
+        meta_tmp = directory / "entries.json.tmp"
+        with open(signature_tmp, "wb") as f:
+            np.save(f, self.signatures)
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "num_perm": self.num_perm,
+                "shingle_size": self.shingle_size,
+                "seed": HASH_SEED,
+                "entries": self.entries,
+            }, f, ensure_ascii=False)
+        os.replace(signature_tmp, directory / "signatures.npy")
+        os.replace(meta_tmp, directory / "entries.json")
+    
+    def prune(self, cutoff: float) -> int:
+        """删除 added_at 早于 cutoff 的文章，返回删除数量"""
+        keep = np.array([entry.get("added_at", 0) >= cutoff for entry in self.entries], dtype=bool)
+        removed = int(len(keep) - keep.sum())
+        if removed:
+            self.signatures = self.signatures[keep]
+            self.entries = [entry for entry, kept in zip(self.entries, keep) if kept]
+            self._band_index.clear()
+        return removed
+    
+    def add(self, signatures: np.ndarray, entries: List[Dict[str, Any]]) -> None:
+        """添加文章，已存在相同 key 的文章被替换（重新处理的文章不会重复入库）"""
+        if len(entries) == 0:
+            return
+        new_keys = {entry.get("key") for entry in entries}
+        keep = np.array([entry.get("key") not in new_keys for entry in self.entries], dtype=bool)
+        if not keep.all():
+            self.signatures = self.signatures[keep]
+            self.entries = [entry for entry, kept in zip(self.entries, keep) if kept]
+        self.signatures = np.concatenate([self.signatures, signatures])
+        self.entries.extend(entries)
+        self._band_index.clear()
+    
+    def query(
+        self,
+        signatures: np.ndarray,
+        threshold: float,
+        bands: int,
+        rows: int,
+        exclude_keys: Optional[Sequence[str]] = None,
+    ) -> List[Optional[Tuple[int, float]]]:
+        """
+        批量查询每个签名在历史索引中最相似的文章
+        
+        Args:
+            exclude_keys: 与签名一一对应的文章 key，key 相同的历史文章（同一篇文章）不算作重复
+        
+        Returns:
+            List: 每个签名对应 (历史文章下标, 估计相似度) 或 None
+        """
+        matches: List[Optional[Tuple[int, float]]] = [None] * len(signatures)
+        if len(self.entries) == 0 or len(signatures) == 0:
+            return matches
+        
+        query_keys = band_keys(signatures, bands, rows)
+        pairs = []
+        for band, (sorted_keys, order) in enumerate(self._sorted_bands(bands, rows)):
+            left = np.searchsorted(sorted_keys, query_keys[:, band], side="left")
+            right = np.searchsorted(sorted_keys, query_keys[:, band], side="right")
+            counts = right - left
+            if not counts.any():
+                continue
+            query_ids = np.repeat(np.arange(len(signatures)), counts)
+            positions = np.repeat(left, counts) + np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+            pairs.append(query_ids * len(self.entries) + order[positions])
+        if not pairs:
+            return matches
+        
+        candidate_pairs = np.unique(np.concatenate(pairs))
+        query_ids = candidate_pairs // len(self.entries)
+        history_ids = candidate_pairs % len(self.entries)
+        similarities = (signatures[query_ids] == self.signatures[history_ids]).mean(axis=1)
+        for query_id, history_id, similarity in zip(query_ids, history_ids, similarities):
+            if exclude_keys is not None and self.entries[history_id].get("key") == exclude_keys[query_id]:
+                continue
+            if similarity >= threshold:
+                current = matches[query_id]
+                if current is None or similarity > current[1]:
+                    matches[query_id] = (int(history_id), float(similarity))
+        return matches
+    
+    def _sorted_bands(self, bands: int, rows: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """每个分段的（排序后的分桶键, 对应的文章下标），按分段参数缓存"""
+        sorted_bands = self._band_index.get((bands, rows))
+        if sorted_bands is None:
+            keys = band_keys(self.signatures, bands, rows)
+            sorted_bands = []
+            for band in range(bands):
+                order = np.argsort(keys[:, band], kind="stable")
+                sorted_bands.append((keys[order, band], order))
+            self._band_index[(bands, rows)] = sorted_bands
+        return sorted_bands
+
+
+@dataclass
+class NearDuplicateResult:
+    """
+    近似去重结果
+    
+    属性:
+        unique_indices: 保留的文章在输入中的下标
+        duplicates: 重复文章信息（index/duplicate_of/similarity/source）
+        stats: 耗时和参数统计
+    """
+    unique_indices: List[int] = field(default_factory=list)
+    duplicates: List[Dict[str, Any]] = field(default_factory=list)
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+def find_near_duplicates(
+    articles: List[Dict[str, Any]],
+    threshold: float = 0.85,
+    history_days: float = 0,
+    index_dir: str = DEFAULT_INDEX_DIR,
+    update_index: bool = True,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+) -> NearDuplicateResult:
+    """
+    查找近似重复的文章，按输入顺序保留每组中的第一篇
+    
+    Args:
+        articles: 文章列表（使用 title 和 content 字段）
+        threshold: 估计 Jaccard 相似度阈值
+        history_days: 与最近多少天的历史文章去重，0 表示不使用历史索引；
+                      历史中与输入 key（URL 或标题哈希）相同的文章是同一篇文章，不算作重复
+        index_dir: 历史索引目录
+        update_index: 是否把本批保留的文章写入历史索引
+        num_perm: 签名长度
+        shingle_size: 字符 n-gram 长度
+    
+    Returns:
+        NearDuplicateResult: 去重结果
+    """
+    started = time.perf_counter()
+    bands, rows = lsh_parameters(round(threshold, 4), num_perm)
+    signatures = compute_signatures([article_text(a) for a in articles], num_perm, shingle_size)
+    signature_seconds = time.perf_counter() - started
+    
+    history = None
+    history_matches: List[Optional[Tuple[int, float]]] = [None] * len(articles)
+    if history_days > 0:
+        history = ArticleHistoryIndex.load(index_dir, num_perm, shingle_size, retention_days=history_days)
+        article_keys = [article_key(article) for article in articles]
+        history_matches = history.query(signatures, threshold, bands, rows, exclude_keys=article_keys)
+    
+    result = NearDuplicateResult()
+    empty = (signatures == EMPTY_SLOT).all(axis=1)
+    keys = band_keys(signatures, bands, rows)
+    buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+    
+    for i in range(len(articles)):
+        if history_matches[i] is not None:
+            history_id, similarity = history_matches[i]
+            entry = history.entries[history_id]
+            result.duplicates.append({
+                "index": i,
+                "duplicate_of": entry.get("url") or entry.get("title"),
+                "similarity": round(similarity, 4),
+                "source": "history"
+            })
+            continue
+        
+        if not empty[i]:
+            candidates = {j for band, key in enumerate(keys[i].tolist()) for j in buckets[band].get(key, ())}
+            if candidates:
+                candidate_ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+                similarities = signature_similarity(signatures[i], signatures[candidate_ids])
+                best = int(np.argmax(similarities))
+                if similarities[best] >= threshold:
+                    duplicate_of = articles[int(candidate_ids[best])]
+                    result.duplicates.append({
+                        "index": i,
+                        "duplicate_of": duplicate_of.get("url") or duplicate_of.get("title"),
+                        "similarity": round(float(similarities[best]), 4),
+                        "source": "batch"
+                    })
+                    continue
+            for band, key in enumerate(keys[i].tolist()):
+                buckets[band].setdefault(key, []).append(i)
+        
+        result.unique_indices.append(i)
+    
+    if history is not None and update_index:
+        now = time.time()
+        indexed = [i for i in result.unique_indices if not empty[i]]
+        history.add(signatures[indexed], [
+            {
+                "key": article_keys[i],
+                "title": str(articles[i].get("title") or "")[:200],
+                "url": articles[i].get("url") or articles[i].get("link"),
+                "added_at": now
+            }
+            for i in indexed
+        ])
+        history.save(index_dir)
+    
+    elapsed = time.perf_counter() - started
+    result.stats = {
+        "num_perm": num_perm,
+        "bands": bands,
+        "rows": rows,
+        "shingle_size": shingle_size,
+        "history_size": len(history) if history is not None else 0,
+        "signature_seconds": round(signature_seconds, 4),
+        "total_seconds": round(elapsed, 4),
+        "articles_per_second": round(len(articles) / elapsed, 1) if elapsed > 0 else None
+    }
+    return result
@@ -16,10 +16,44 @@ import re
 from typing import Dict, Any, List, Optional, Set
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
-import aiohttp
 from bs4 import BeautifulSoup
 from strands import tool
 
+from tools.template_tools.network.fetch_engine import AsyncFetchEngine, FetchResult
+
+
+# 网页采集默认请求头
+DEFAULT_REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8"
+}
+
+# 只下载网页类内容
+HTML_CONTENT_TYPES = ("text/", "application/xhtml", "application/xml")
+
+
+def _fetch_result_to_dict(result: FetchResult) -> Dict[str, Any]:
+    """将抓取结果转换为采集工具的返回格式"""
+    if not result.ok:
+        return {
+            "success": False,
+            "url": result.url,
+            "status_code": result.status_code,
+            "error": f"HTTP请求失败: {result.error}"
+        }
+    html_content = result.text
+    return {
+        "success": True,
+        "url": result.url,
+        "status_code": result.status_code,
+        "content_length": len(html_content),
+        "html": html_content,
+        "truncated": result.truncated,
+        "from_cache": result.from_cache,
+        "timestamp": datetime.now().isoformat()
+    }
+
 
 # ============================================================================
 # SerpAPI Google Search 工具
@@ -120,7 +154,7 @@ async def fetch_webpage_content(
     headers: Optional[Dict[str, str]] = None
 ) -> str:
     """
-    使用aiohttp获取网页内容（适用于静态网页）
+    获取网页内容（适用于静态网页）
     
     Args:
         url: 网页URL
@@ -130,49 +164,18 @@ async def fetch_webpage_content(
     Returns:
         str: JSON格式的网页内容
     """
-    default_headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-        "Accept-Encoding": "gzip, deflate",
-        "Connection": "keep-alive"
-    }
-    
-    if headers:
-        default_headers.update(headers)
-    
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                url,
-                timeout=aiohttp.ClientTimeout(total=timeout),
-                headers=default_headers,
-                ssl=False
-            ) as response:
-                response.raise_for_status()
-                html_content = await response.text()
-                
-                return json.dumps({
-                    "success": True,
-                    "url": url,
-                    "status_code": response.status,
-                    "content_length": len(html_content),
-                    "html": html_content,
-                    "timestamp": datetime.now().isoformat()
-                }, ensure_ascii=False)
-                
-    except asyncio.TimeoutError:
-        return json.dumps({
-            "success": False,
-            "url": url,
-            "error": "请求超时"
-        }, ensure_ascii=False)
-    except aiohttp.ClientError as e:
-        return json.dumps({
-            "success": False,
-            "url": url,
-            "error": f"HTTP请求失败: {str(e)}"
-        }, ensure_ascii=False)
+        async with AsyncFetchEngine(
+            timeout=timeout,
+            retries=0,
+            headers={**DEFAULT_REQUEST_HEADERS, **(headers or {})},
+            allowed_content_types=HTML_CONTENT_TYPES,
+            verify_ssl=False
+        ) as engine:
+            result = await engine.fetch(url)
+        
+        return json.dumps(_fetch_result_to_dict(result), ensure_ascii=False)
+        
     except Exception as e:
         return json.dumps({
             "success": False,
@@ -569,52 +572,54 @@ async def batch_fetch_webpages(
     Returns:
         str: JSON格式的批量采集结果
     """
-    results = []
-    failed_urls = []
-    
-    async def fetch_with_retry(url: str) -> Dict[str, Any]:
-        """带重试的单个URL采集"""
-        for attempt in range(retry_count + 1):
-            try:
-                if use_playwright:
-                    # 使用Playwright（同步转异步）
-                    result_json = fetch_dynamic_webpage(url, timeout=timeout * 1000)
-                    result = json.loads(result_json)
-                else:
-                    # 使用aiohttp
-                    result_json = await fetch_webpage_content(url, timeout=timeout)
+    if use_playwright:
+        async def fetch_with_retry(url: str) -> Dict[str, Any]:
+            """带重试的单个URL采集（Playwright，同步转异步）"""
+            for attempt in range(retry_count + 1):
+                try:
+                    result_json = await asyncio.to_thread(fetch_dynamic_webpage, url, timeout=timeout * 1000)
                     result = json.loads(result_json)
-                
-                if result.get("success"):
-                    return result
-                else:
+                    
+                    if result.get("success"):
+                        return result
+                    else:
+                        if attempt < retry_count:
+                            await asyncio.sleep(2 ** attempt)  # 指数退避
+                        else:
+                            return result
+                            
+                except Exception as e:
                     if attempt < retry_count:
-                        await asyncio.sleep(2 ** attempt)  # 指数退避
+                        await asyncio.sleep(2 ** attempt)
                     else:
-                        return result
-                        
-            except Exception as e:
-                if attempt < retry_count:
-                    await asyncio.sleep(2 ** attempt)
-                else:
-                    return {
-                        "success": False,
-                        "url": url,
-                        "error": f"重试{retry_count}次后仍失败: {str(e)}"
-                    }
-        
-        return {"success": False, "url": url, "error": "未知错误"}
-    
-    # 使用信号量控制并发
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def fetch_with_semaphore(url: str):
-        async with semaphore:
-            return await fetch_with_retry(url)
-    
-    # 并发执行
-    tasks = [fetch_with_semaphore(url) for url in urls]
-    results = await asyncio.gather(*tasks)
+                        return {
+                            "success": False,
+                            "url": url,
+                            "error": f"重试{retry_count}次后仍失败: {str(e)}"
+                        }
+            
+            return {"success": False, "url": url, "error": "未知错误"}
+        
+        # 使用信号量控制并发
+        semaphore = asyncio.Semaphore(max_concurrent)
+        
+        async def fetch_with_semaphore(url: str):
+            async with semaphore:
+                return await fetch_with_retry(url)
+        
+        results = await asyncio.gather(*(fetch_with_semaphore(url) for url in urls))
+    else:
+        # 所有URL共用一个连接池，引擎负责全局/单站点并发限制、robots.txt和退避重试
+        async with AsyncFetchEngine(
+            max_concurrency=max_concurrent,
+            timeout=timeout,
+            retries=retry_count,
+            headers=DEFAULT_REQUEST_HEADERS,
+            allowed_content_types=HTML_CONTENT_TYPES,
+            verify_ssl=False
+        ) as engine:
+            fetch_results = await engine.fetch_many(urls)
+        results = [_fetch_result_to_dict(result) for result in fetch_results]
     
     # 分类成功和失败
     successful_results = [r for r in results if r.get("success")]
@@ -661,7 +666,7 @@ async def deep_crawl_website(
     try:
         # 初始化
         visited_urls: Set[str] = set()
-        url_queue: List[tuple[str, int]] = [(start_url, 0)]  # (url, depth)
+        frontier: List[str] = [start_url]
         collected_pages = []
         
         # 确定允许的域名
@@ -674,69 +679,59 @@ async def deep_crawl_website(
         if article_patterns:
             article_regex_list = [re.compile(pattern) for pattern in article_patterns]
         
-        async with aiohttp.ClientSession() as session:
-            while url_queue and len(collected_pages) < max_pages:
-                current_url, current_depth = url_queue.pop(0)
-                
-                # 跳过已访问的URL
-                if current_url in visited_urls:
-                    continue
-                
-                visited_urls.add(current_url)
-                
-                # 检查域名
-                parsed = urlparse(current_url)
-                if not any(domain in parsed.netloc for domain in allowed_domains):
-                    continue
+        def is_allowed(url: str) -> bool:
+            return any(domain in urlparse(url).netloc for domain in allowed_domains)
+        
+        def parse_page(result: FetchResult) -> Dict[str, Any]:
+            """在线程中解析页面标题和链接"""
+            soup = BeautifulSoup(result.text, "lxml")
+            links = [urljoin(result.url, link["href"]) for link in soup.find_all("a", href=True)]
+            return {"title": soup.title.string if soup.title else "", "links": links}
+        
+        # 按层遍历，同一层的页面并发采集（引擎负责单站点并发、请求间隔和robots.txt）
+        async with AsyncFetchEngine(
+            timeout=timeout,
+            retries=0,
+            headers=DEFAULT_REQUEST_HEADERS,
+            allowed_content_types=HTML_CONTENT_TYPES,
+            verify_ssl=False
+        ) as engine:
+            current_depth = 0
+            while frontier and len(collected_pages) < max_pages and current_depth <= max_depth:
+                # 跳过已访问和外部链接
+                pending = [url for url in frontier if url not in visited_urls and is_allowed(url)]
                 
-                # 获取页面内容
-                try:
-                    async with session.get(
-                        current_url,
-                        timeout=aiohttp.ClientTimeout(total=timeout),
-                        headers={
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                        },
-                        ssl=False
-                    ) as response:
-                        if response.status != 200:
+                next_frontier = []
+                while pending and len(collected_pages) < max_pages:
+                    batch = pending[:max_pages - len(collected_pages)]
+                    pending = pending[len(batch):]
+                    visited_urls.update(batch)
+                    
+                    # 单个页面失败不影响整体
+                    for result in await engine.fetch_many(batch, extractor=parse_page):
+                        if result.status_code != 200 or not result.ok:
                             continue
                         
-                        html = await response.text()
-                        soup = BeautifulSoup(html, "lxml")
-                        
                         # 判断是否为文章页
                         is_article = False
                         if article_regex_list:
-                            is_article = any(regex.search(current_url) for regex in article_regex_list)
+                            is_article = any(regex.search(result.url) for regex in article_regex_list)
                         
                         # 收集页面
                         collected_pages.append({
-                            "url": current_url,
+                            "url": result.url,
                             "depth": current_depth,
                             "is_article": is_article,
-                            "html": html,
-                            "title": soup.title.string if soup.title else ""
+                            "html": result.text,
+                            "title": result.extracted["title"]
                         })
                         
                         # 如果未达到最大深度，提取链接继续遍历
                         if current_depth < max_depth:
-                            for link in soup.find_all("a", href=True):
-                                href = link["href"]
-                                absolute_url = urljoin(current_url, href)
-                                
-                                # 跳过已访问和外部链接
-                                if absolute_url not in visited_urls:
-                                    parsed_link = urlparse(absolute_url)
-                                    if any(domain in parsed_link.netloc for domain in allowed_domains):
-                                        url_queue.append((absolute_url, current_depth + 1))
-                
-                except Exception as e:
-                    # 单个页面失败不影响整体
-                    continue
+                            next_frontier.extend(result.extracted["links"])
                 
-                # 避免过快请求
-                await asyncio.sleep(0.5)
+                frontier = list(dict.fromkeys(next_frontier))
+                current_depth += 1
         
         return json.dumps({
             "success": True,
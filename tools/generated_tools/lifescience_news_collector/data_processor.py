@@ -17,6 +17,8 @@ from datetime import datetime
 from collections import Counter
 from strands import tool
 
+from tools.generated_tools.lifescience_news_collector.article_dedup import DEFAULT_INDEX_DIR, find_near_duplicates
+
 
 # ============================================================================
 # 文章去重工具
@@ -26,7 +28,9 @@ from strands import tool
 def deduplicate_articles(
     articles: List[Dict[str, Any]],
     similarity_threshold: float = 0.85,
-    method: str = "title_hash"  # title_hash, content_hash, fuzzy
+    method: str = "title_hash",  # title_hash, content_hash, fuzzy
+    history_days: int = 0,
+    index_dir: Optional[str] = None
 ) -> str:
     """
     文章去重工具
@@ -34,12 +38,36 @@ def deduplicate_articles(
     Args:
         articles: 文章列表，每篇文章包含title和content字段
         similarity_threshold: 相似度阈值（0-1），用于fuzzy方法
-        method: 去重方法（title_hash=标题哈希, content_hash=内容哈希, fuzzy=模糊匹配）
+        method: 去重方法（title_hash=标题哈希, content_hash=内容哈希, fuzzy=基于标题和正文的MinHash近似去重）
+        history_days: fuzzy方法同时与最近多少天保留的文章去重（0表示只在本批内去重），本批保留的文章会写入历史索引
+        index_dir: fuzzy方法的历史索引目录（默认.cache/lifescience_news_collector/dedup_index）
     
     Returns:
         str: JSON格式的去重结果
     """
     try:
+        if method == "fuzzy":
+            # MinHash + LSH：只比较签名分段相同的候选文章
+            dedup_result = find_near_duplicates(
+                articles,
+                threshold=similarity_threshold,
+                history_days=history_days,
+                index_dir=index_dir or DEFAULT_INDEX_DIR
+            )
+            
+            return json.dumps({
+                "success": True,
+                "method": method,
+                "original_count": len(articles),
+                "unique_count": len(dedup_result.unique_indices),
+                "duplicate_count": len(dedup_result.duplicates),
+                "unique_articles": [articles[i] for i in dedup_result.unique_indices],
+                "duplicate_articles": [articles[d["index"]] for d in dedup_result.duplicates],
+                "duplicate_details": dedup_result.duplicates,
+                "stats": dedup_result.stats,
+                "timestamp": datetime.now().isoformat()
+            }, ensure_ascii=False, indent=2)
+        
         unique_articles = []
         duplicate_articles = []
         seen_hashes = set()
@@ -58,30 +86,6 @@ def deduplicate_articles(
                 content_sample = content[:500].strip().lower()
                 article_hash = hashlib.md5(content_sample.encode()).hexdigest()
                 
-            elif method == "fuzzy":
-                # 模糊匹配（简化版：基于标题关键词）
-                title_words = set(re.findall(r'\w+', title.lower()))
-                
-                is_duplicate = False
-                for unique_article in unique_articles:
-                    unique_title = unique_article.get("title", "")
-                    unique_words = set(re.findall(r'\w+', unique_title.lower()))
-                    
-                    # 计算Jaccard相似度
-                    if len(title_words) > 0 and len(unique_words) > 0:
-                        intersection = len(title_words & unique_words)
-                        union = len(title_words | unique_words)
-                        similarity = intersection / union if union > 0 else 0
-                        
-                        if similarity >= similarity_threshold:
-                            is_duplicate = True
-                            duplicate_articles.append(article)
-                            break
-                
-                if not is_duplicate:
-                    unique_articles.append(article)
-                
-                continue
             else:
                 return json.dumps({
                     "success": False,
@@ -568,7 +572,9 @@ def batch_process_articles(
             dedup_method = config.get("deduplicate_method", "title_hash")
             dedup_result = deduplicate_articles(
                 articles=processed_articles,
-                method=dedup_method
+                similarity_threshold=config.get("similarity_threshold", 0.85),
+                method=dedup_method,
+                history_days=config.get("deduplicate_history_days", 0)
             )
             dedup_data = json.loads(dedup_result)
             if dedup_data.get("success"):
@@ -18,6 +18,8 @@ import boto3
 from botocore.exceptions import ClientError
 from strands import tool
 
+from tools.template_tools.common.tiered_cache import get_cache
+
 
 # ============================================================================
 # AWS S3 存储工具
@@ -788,11 +790,14 @@ def list_local_files(
 # 缓存管理工具
 # ============================================================================
 
+CACHE_NAMESPACE = "lifescience_news_collector"
+
+
 @tool
 def save_to_cache(
     cache_key: str,
     data: Any,
-    cache_dir: str = ".cache/lifescience_news_collector",
+    cache_dir: Optional[str] = None,
     ttl_hours: Optional[int] = None
 ) -> str:
     """
@@ -801,37 +806,25 @@ def save_to_cache(
     Args:
         cache_key: 缓存键
         data: 要缓存的数据
-        cache_dir: 缓存目录
+        cache_dir: 缓存目录，None表示使用共享工具缓存
         ttl_hours: 缓存有效期（小时），None表示永久
     
     Returns:
         str: JSON格式的缓存结果
     """
     try:
-        cache_path = Path(cache_dir)
-        cache_path.mkdir(parents=True, exist_ok=True)
-        
-        # 生成缓存文件名
-        import hashlib
-        cache_file_name = hashlib.md5(cache_key.encode()).hexdigest() + ".json"
-        cache_file_path = cache_path / cache_file_name
-        
-        # 准备缓存数据
-        cache_data = {
-            "key": cache_key,
-            "data": data,
-            "created_at": datetime.now().isoformat(),
-            "ttl_hours": ttl_hours
-        }
-        
-        # 写入缓存
-        with open(cache_file_path, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        cache = get_cache(CACHE_NAMESPACE, cache_dir=cache_dir)
+        cache.set(
+            cache_key,
+            data,
+            ttl=ttl_hours * 3600 if ttl_hours else None,
+            metadata={"ttl_hours": ttl_hours}
+        )
         
         return json.dumps({
             "success": True,
             "cache_key": cache_key,
-            "cache_file": str(cache_file_path),
+            "cache_file": cache.path,
             "ttl_hours": ttl_hours,
             "timestamp": datetime.now().isoformat()
         }, ensure_ascii=False, indent=2)
@@ -847,56 +840,44 @@ def save_to_cache(
 @tool
 def get_from_cache(
     cache_key: str,
-    cache_dir: str = ".cache/lifescience_news_collector"
+    cache_dir: Optional[str] = None
 ) -> str:
     """
     从本地缓存获取数据
     
     Args:
         cache_key: 缓存键
-        cache_dir: 缓存目录
+        cache_dir: 缓存目录，None表示使用共享工具缓存
     
     Returns:
         str: JSON格式的缓存数据
     """
     try:
-        cache_path = Path(cache_dir)
-        
-        # 生成缓存文件名
-        import hashlib
-        cache_file_name = hashlib.md5(cache_key.encode()).hexdigest() + ".json"
-        cache_file_path = cache_path / cache_file_name
+        cache = get_cache(CACHE_NAMESPACE, cache_dir=cache_dir)
+        entry = cache.get_entry(cache_key, allow_expired=True)
         
-        if not cache_file_path.exists():
+        if entry is None:
             return json.dumps({
                 "success": False,
                 "error": "缓存不存在",
                 "cache_key": cache_key
             }, ensure_ascii=False, indent=2)
         
-        # 读取缓存
-        with open(cache_file_path, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-        
         # 检查TTL
-        if cache_data.get("ttl_hours"):
-            created_at = datetime.fromisoformat(cache_data["created_at"])
-            age_hours = (datetime.now() - created_at).total_seconds() / 3600
-            
-            if age_hours > cache_data["ttl_hours"]:
-                return json.dumps({
-                    "success": False,
-                    "error": "缓存已过期",
-                    "cache_key": cache_key,
-                    "age_hours": age_hours,
-                    "ttl_hours": cache_data["ttl_hours"]
-                }, ensure_ascii=False, indent=2)
+        if entry.expired:
+            return json.dumps({
+                "success": False,
+                "error": "缓存已过期",
+                "cache_key": cache_key,
+                "age_hours": entry.age_seconds / 3600,
+                "ttl_hours": entry.metadata.get("ttl_hours")
+            }, ensure_ascii=False, indent=2)
         
         return json.dumps({
             "success": True,
             "cache_key": cache_key,
-            "data": cache_data["data"],
-            "created_at": cache_data["created_at"],
+            "data": entry.value,
+            "created_at": datetime.fromtimestamp(entry.created_at).isoformat(),
             "timestamp": datetime.now().isoformat()
         }, ensure_ascii=False, indent=2)
         
@@ -910,54 +891,30 @@ def get_from_cache(
 
 @tool
 def clear_cache(
-    cache_dir: str = ".cache/lifescience_news_collector",
+    cache_dir: Optional[str] = None,
     older_than_hours: Optional[int] = None
 ) -> str:
     """
     清理本地缓存
     
     Args:
-        cache_dir: 缓存目录
+        cache_dir: 缓存目录，None表示使用共享工具缓存
         older_than_hours: 只清理超过指定小时数的缓存，None表示清理全部
     
     Returns:
         str: JSON格式的清理结果
     """
     try:
-        cache_path = Path(cache_dir)
-        
-        if not cache_path.exists():
-            return json.dumps({
-                "success": True,
-                "message": "缓存目录不存在，无需清理",
-                "cache_dir": cache_dir
-            }, ensure_ascii=False, indent=2)
-        
-        deleted_count = 0
-        total_count = 0
-        
-        # 遍历缓存文件
-        for cache_file in cache_path.glob("*.json"):
-            total_count += 1
-            
-            if older_than_hours is not None:
-                # 检查文件年龄
-                modified_time = datetime.fromtimestamp(cache_file.stat().st_mtime)
-                age_hours = (datetime.now() - modified_time).total_seconds() / 3600
-                
-                if age_hours > older_than_hours:
-                    cache_file.unlink()
-                    deleted_count += 1
-            else:
-                # 删除所有缓存
-                cache_file.unlink()
-                deleted_count += 1
+        cache = get_cache(CACHE_NAMESPACE, cache_dir=cache_dir)
+        total_count = cache.stats()["disk"]["entries"]
+        cleared = cache.clear(older_than=older_than_hours * 3600 if older_than_hours is not None else None)
         
         return json.dumps({
             "success": True,
-            "cache_dir": cache_dir,
+            "cache_dir": cache.path,
             "total_files": total_count,
-            "deleted_files": deleted_count,
+            "deleted_files": cleared["deleted_entries"],
+            "cache_stats": cache.stats(),
             "timestamp": datetime.now().isoformat()
         }, ensure_ascii=False, indent=2)
         
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+PMC Filelist Index
+
+把PMC目录的 filelist.csv 转换为本地SQLite索引，避免每次查询都逐行扫描数百万行的CSV：
+
+- 按PMCID、PMID、文件名精确查找（B树索引）
+- 以PMC/数字开头的搜索词按前缀范围查找，其余搜索词使用FTS5 trigram索引做子串匹配
+- filelist.csv 变化（大小/修改时间不同）时按文件名增量刷新：只删除和插入变化的行
+- 记录上游 filelist.csv 的ETag，用于判断是否需要重新下载
+"""
+
+import csv
+import sqlite3
+import threading
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 索引结构版本，结构变化时整体重建
+INDEX_SCHEMA_VERSION = 1
+
+# 批量写入的行数
+INSERT_BATCH_SIZE = 50000
+
+# trigram 索引要求搜索词至少3个字符
+MIN_SUBSTRING_LENGTH = 3
+
+# filelist.csv 的列名（不区分大小写）到索引字段的映射
+COLUMN_ALIASES = {
+    "file_name": ("key", "file", "filename", "file_name", "file name"),
+    "pmcid": ("accessionid", "accession id", "pmcid"),
+    "pmid": ("pmid",),
+    "license": ("license",),
+    "citation": ("article citation", "citation"),
+}
+
+# 无法识别列名时使用的位置（与旧的逐行扫描逻辑一致）
+DEFAULT_COLUMN_POSITIONS = {"file_name": 0, "pmcid": 1, "pmid": 2, "license": 3}
+
+@dataclass
+class FilelistRecord:
+    """filelist.csv 中的一行"""
+    file_name: str
+    pmcid: str
+    pmid: str
+    license: str
+    citation: str = ""
+    
+    def to_dict(self) -> Dict[str, str]:
+        return {
+            "file_name": self.file_name,
+            "pmcid": self.pmcid,
+            "pmid": self.pmid,
+            "license": self.license,
+            "citation": self.citation
+        }
+
+
+def normalize_pmcid(pmcid: str) -> str:
+    """规范化PMCID（补全PMC前缀）"""
+    pmcid = pmcid.strip().upper()
+    return pmcid if pmcid.startswith("PMC") else f"PMC{pmcid}"
+
+
+def _source_signature(csv_path: Path) -> Tuple[int, int]:
+    stat = csv_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _resolve_columns(header: List[str]) -> Dict[str, Optional[int]]:
+    normalized = [column.strip().lower() for column in header]
+    columns: Dict[str, Optional[int]] = {}
+    for field_name, aliases in COLUMN_ALIASES.items():
+        columns[field_name] = next((i for i, column in enumerate(normalized) if column in aliases), None)
+    if columns["file_name"] is None or columns["pmcid"] is None:
+        columns = {field_name: DEFAULT_COLUMN_POSITIONS.get(field_name) for field_name in COLUMN_ALIASES}
+    return columns
+
+
+def iter_filelist_rows(csv_path: Path) -> Iterator[Tuple[str, str, str, str, str]]:
+    """流式解析 filelist.csv，返回 (file_name, pmcid, pmid, license, citation)"""
+    with open(csv_path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = _resolve_columns(header)
+        
+        def value(row: List[str], field_name: str) -> str:
+            position = columns.get(field_name)
+            return row[position].strip() if position is not None and position < len(row) else ""
+        
+        for row in reader:
+            if not row:
+                continue
+            file_name = value(row, "file_name")
+            if not file_name:
+                continue
+            yield (
+                file_name,
+                value(row, "pmcid").upper(),
+                value(row, "pmid"),
+                value(row, "license"),
+                value(row, "citation"),
+            )
+
+
+def read_filelist_preview(csv_path: Path, sample_size: int = 5) -> Tuple[List[str], List[List[str]]]:
+    """只读取 filelist.csv 的表头和前几行"""
+    with open(csv_path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        sample_rows = []
+        for row in reader:
+            if len(sample_rows) >= sample_size:
+                break
+            if row:
+                sample_rows.append(row)
+    return header, sample_rows
+
+
+class FilelistIndex:
+    """
+    单个PMC目录的 filelist 索引
+    
+    索引文件与CSV放在同一目录（<directory>_filelist.sqlite），可以在多个线程中并发查询。
+    """
+    
+    def __init__(self, csv_path: Path, index_path: Optional[Path] = None):
+        self.csv_path = Path(csv_path)
+        self.index_path = Path(index_path) if index_path else self.csv_path.with_suffix(".sqlite")
+        self._lock = threading.RLock()
+        self._connection: Optional[sqlite3.Connection] = None
+    
+    # ------------------------------------------------------------------
+    # 构建与刷新
+    # ------------------------------------------------------------------
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.index_path), check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection = connection
+        return self._connection
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+    
+    def _create_schema(self, connection: sqlite3.Connection) -> None:
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == INDEX_SCHEMA_VERSION:
+            return
+        connection.executescript("""
+            DROP TABLE IF EXISTS files_fts;
+            DROP TABLE IF EXISTS files;
+            DROP TABLE IF EXISTS index_meta;
+            CREATE TABLE files (
+                id INTEGER PRIMARY KEY,
+                file_name TEXT NOT NULL UNIQUE,
+                pmcid TEXT,
+                pmid TEXT,
+                license TEXT,
+                citation TEXT
+            );
+            CREATE INDEX files_pmcid ON files(pmcid);
+            CREATE INDEX files_pmid ON files(pmid);
+            CREATE VIRTUAL TABLE files_fts USING fts5(
+                file_name, pmcid, pmid, license,
+                content='files', content_rowid='id', tokenize='trigram', columnsize=0
+            );
+            CREATE TRIGGER files_ai AFTER INSERT ON files BEGIN
+                INSERT INTO files_fts(rowid, file_name, pmcid, pmid, license)
+                VALUES (new.id, new.file_name, new.pmcid, new.pmid, new.license);
+            END;
+            CREATE TRIGGER files_ad AFTER DELETE ON files BEGIN
+                INSERT INTO files_fts(files_fts, rowid, file_name, pmcid, pmid, license)
+                VALUES ('delete', old.id, old.file_name, old.pmcid, old.pmid, old.license);
+            END;
+            CREATE TABLE index_meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        connection.execute(f"PRAGMA user_version={INDEX_SCHEMA_VERSION}")
+        connection.commit()
+    
+    def _get_meta(self, connection: sqlite3.Connection) -> Dict[str, str]:
+        return dict(connection.execute("SELECT key, value FROM index_meta").fetchall())
+    
+    def _set_meta(self, connection: sqlite3.Connection, values: Dict[str, object]) -> None:
+        connection.executemany(
+            "INSERT OR REPLACE INTO index_meta(key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()]
+        )
+    
+    def is_current(self) -> bool:
+        """索引是否与当前的 filelist.csv 一致"""
+        if not self.csv_path.exists() or not self.index_path.exists():
+            return False
+        with self._lock:
+            connection = self._connect()
+            self._create_schema(connection)
+            meta = self._get_meta(connection)
+        size, mtime_ns = _source_signature(self.csv_path)
+        return meta.get("source_size") == str(size) and meta.get("source_mtime_ns") == str(mtime_ns)
+    
+    def ensure_current(self) -> bool:
+        """
+        确保索引与 filelist.csv 一致，不一致时增量刷新
+        
+        Returns:
+            bool: CSV不存在时返回False
+        """
+        if not self.csv_path.exists():
+            return False
+        if not self.is_current():
+            self.refresh()
+        return True
+    
+    def refresh(self, etag: Optional[str] = None) -> Dict[str, int]:
+        """
+        从 filelist.csv 增量刷新索引
+        
+        CSV全部读入临时表后，删除已不存在或内容变化的行，再插入新增的行，
+        未变化的行（以及它们的全文索引）保持不动。
+        
+        Args:
+            etag: 上游 filelist.csv 的ETag（可选）
+        
+        Returns:
+            Dict: 刷新统计（rows/added/removed/seconds）
+        """
+        with self._lock:
+            start = time.perf_counter()
+            size, mtime_ns = _source_signature(self.csv_path)
+            connection = self._connect()
+            self._create_schema(connection)
+            
+            connection.execute("DROP TABLE IF EXISTS temp.staging")
+            connection.execute(
+                "CREATE TEMP TABLE staging (file_name TEXT PRIMARY KEY, pmcid TEXT, pmid TEXT, license TEXT, citation TEXT)"
+            )
+            batch = []
+            for row in iter_filelist_rows(self.csv_path):
+                batch.append(row)
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    connection.executemany("INSERT OR REPLACE INTO temp.staging VALUES (?, ?, ?, ?, ?)", batch)
+                    batch = []
+            if batch:
+                connection.executemany("INSERT OR REPLACE INTO temp.staging VALUES (?, ?, ?, ?, ?)", batch)
+            
+            removed = connection.execute("""
+                DELETE FROM files WHERE NOT EXISTS (
+                    SELECT 1 FROM temp.staging s
+                    WHERE s.file_name = files.file_name
+                      AND s.pmcid IS files.pmcid AND s.pmid IS files.pmid
+                      AND s.license IS files.license AND s.citation IS files.citation
+                )
+            """).rowcount
+            added = connection.execute("""
+                INSERT INTO files (file_name, pmcid, pmid, license, citation)
+                SELECT s.file_name, s.pmcid, s.pmid, s.license, s.citation FROM temp.staging s
+                WHERE NOT EXISTS (SELECT 1 FROM files f WHERE f.file_name = s.file_name)
+            """).rowcount
+            rows = connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            
+            meta = {
+                "source_size": size,
+                "source_mtime_ns": mtime_ns,
+                "row_count": rows,
+                "refreshed_at": time.time(),
+            }
+            if etag is not None:
+                meta["etag"] = etag
+            self._set_meta(connection, meta)
+            connection.commit()
+            connection.execute("DROP TABLE temp.staging")
+            
+            stats = {"rows": rows, "added": added, "removed": removed,
+                     "seconds": round(time.perf_counter() - start, 3)}
+            logger.info(f"filelist索引已刷新 {self.index_path.name}: {stats}")
+            return stats
+    
+    def set_etag(self, etag: str) -> None:
+        with self._lock:
+            connection = self._connect()
+            self._create_schema(connection)
+            self._set_meta(connection, {"etag": etag})
+            connection.commit()
+    
+    def info(self) -> Dict[str, str]:
+        with self._lock:
+            connection = self._connect()
+            self._create_schema(connection)
+            return self._get_meta(connection)
+    
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+    
+    def _query(self, sql: str, params: tuple) -> List[FilelistRecord]:
+        with self._lock:
+            rows = self._connect().execute(sql, params).fetchall()
+        return [FilelistRecord(*row) for row in rows]
+    
+    def lookup_pmcid(self, pmcid: str) -> List[FilelistRecord]:
+        """按PMCID精确查找"""
+        return self._query(
+            "SELECT file_name, pmcid, pmid, license, citation FROM files WHERE pmcid = ?",
+            (normalize_pmcid(pmcid),)
+        )
+    
+    def lookup_pmid(self, pmid: str) -> List[FilelistRecord]:
+        """按PMID精确查找"""
+        return self._query(
+            "SELECT file_name, pmcid, pmid, license, citation FROM files WHERE pmid = ?",
+            (pmid.strip(),)
+        )
+    
+    def lookup_file_name(self, file_name: str) -> List[FilelistRecord]:
+        """按文件名精确查找"""
+        return self._query(
+            "SELECT file_name, pmcid, pmid, license, citation FROM files WHERE file_name = ?",
+            (file_name.strip(),)
+        )
+    
+    def search(self, search_term: str, max_results: int = 20) -> List[FilelistRecord]:
+        """
+        搜索filelist
+        
+        依次使用精确匹配（PMCID/PMID/文件名）、ID前缀范围查找和子串匹配，
+        结果按该顺序去重合并，因此完全匹配的记录总是排在前面。
+        
+        Args:
+            search_term: 搜索词
+            max_results: 最大结果数量
+        
+        Returns:
+            List[FilelistRecord]: 匹配的记录
+        """
+        term = search_term.strip()
+        if not term or max_results <= 0:
+            return []
+        
+        results: Dict[str, FilelistRecord] = {}
+        
+        def collect(records: List[FilelistRecord]) -> bool:
+            for record in records:
+                if record.file_name not in results:
+                    results[record.file_name] = record
+                    if len(results) >= max_results:
+                        return True
+            return False
+        
+        upper = term.upper()
+        if upper.startswith("PMC") and collect(self.lookup_pmcid(upper)):
+            return list(results.values())
+        if term.isdigit() and (collect(self.lookup_pmid(term)) or collect(self.lookup_pmcid(term))):
+            return list(results.values())
+        if collect(self.lookup_file_name(term)):
+            return list(results.values())
+        
+        # 前缀范围查找（走B树索引）
+        if upper.startswith("PMC") or term.isdigit():
+            column, prefix = ("pmcid", upper) if upper.startswith("PMC") else ("pmid", term)
+            if collect(self._query(
+                f"SELECT file_name, pmcid, pmid, license, citation FROM files "
+                f"WHERE {column} >= ? AND {column} < ? ORDER BY {column} LIMIT ?",
+                (prefix, prefix + "\uffff", max_results)
+            )):
+                return list(results.values())
+        
+        # 子串匹配：trigram全文索引（搜索词不足3个字符时退化为LIKE扫描）
+        if len(term) >= MIN_SUBSTRING_LENGTH:
+            phrase = '"' + term.replace('"', '""') + '"'
+            records = self._query(
+                "SELECT f.file_name, f.pmcid, f.pmid, f.license, f.citation FROM files_fts "
+                "JOIN files f ON f.id = files_fts.rowid WHERE files_fts MATCH ? LIMIT ?",
+                (phrase, max_results)
+            )
+        else:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            records = self._query(
+                "SELECT file_name, pmcid, pmid, license, citation FROM files "
+                "WHERE file_name LIKE ?1 ESCAPE '\\' OR pmcid LIKE ?1 ESCAPE '\\' "
+                "OR pmid LIKE ?1 ESCAPE '\\' OR license LIKE ?1 ESCAPE '\\' LIMIT ?2",
+                (pattern, max_results)
+            )
+        collect(records)
+        return list(results.values())
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+_indexes: Dict[str, FilelistIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_filelist_index(csv_path: Path) -> FilelistIndex:
+    """获取 filelist.csv 对应的共享索引实例（不检查是否最新）"""
+    key = str(Path(csv_path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = FilelistIndex(Path(csv_path))
+        return index
+
+
+def release_filelist_indexes() -> None:
+    """关闭所有索引连接（清除缓存文件前调用）"""
+    with _indexes_lock:
+        for index in _indexes.values():
+            index.close()
+        _indexes.clear()
@@ -8,14 +8,21 @@ PMC S3 Connector Tool
 
 import json
 import os
+import threading
 import boto3
 from botocore import UNSIGNED
 from botocore.config import Config
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Set, Union
 import logging
 from pathlib import Path
 
 from strands import tool
+from tools.generated_tools.literature_analysis_agent.pmc_filelist_index import (
+    FilelistIndex,
+    get_filelist_index,
+    read_filelist_preview,
+    release_filelist_indexes,
+)
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -30,6 +37,94 @@ PMC_FORMATS = ["txt", "xml"]
 # 本地缓存目录
 CACHE_DIR = Path(".cache/pubmed_literature_agent")
 
+# 下载filelist.csv时每次读取的字节数
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# 正在后台刷新索引的目录
+_background_refreshes: Set[str] = set()
+_background_refreshes_lock = threading.Lock()
+
+
+def _filelist_cache_path(directory: str) -> Path:
+    return CACHE_DIR / f"{directory}_filelist.csv"
+
+
+def _open_filelist_index(directory: str, download: bool = False) -> Optional[FilelistIndex]:
+    """
+    获取目录的filelist索引，CSV变化后首次访问时增量刷新
+    
+    Args:
+        directory: PMC目录名称
+        download: 本地没有filelist.csv时是否先下载
+        
+    Returns:
+        FilelistIndex: 索引，本地没有filelist.csv时返回None
+    """
+    cache_file = _filelist_cache_path(directory)
+    if not cache_file.exists() and download:
+        pmc_get_filelist_csv(directory=directory, save_to_cache=True)
+    if not cache_file.exists():
+        return None
+    index = get_filelist_index(cache_file)
+    index.ensure_current()
+    return index
+
+
+def _refresh_index_in_background(directory: str, index: FilelistIndex) -> None:
+    """在后台线程中刷新目录的filelist索引（同一目录同时只有一个刷新）"""
+    with _background_refreshes_lock:
+        if directory in _background_refreshes:
+            return
+        _background_refreshes.add(directory)
+    
+    def run():
+        try:
+            stats = index.refresh()
+            logger.info(f"{directory} filelist索引后台刷新完成: {stats}")
+        except Exception as e:
+            logger.warning(f"{directory} filelist索引后台刷新失败: {str(e)}")
+        finally:
+            with _background_refreshes_lock:
+                _background_refreshes.discard(directory)
+    
+    threading.Thread(target=run, name=f"pmc-filelist-refresh-{directory}", daemon=True).start()
+
+
+def _locate_pmcid_directories(pmcid: str) -> Optional[List[str]]:
+    """
+    通过filelist索引确定PMCID所在的目录
+    
+    不在请求中构建索引：索引与filelist.csv不一致（或正在刷新）时在后台刷新，
+    本次返回None，由调用方直接探测S3。
+    
+    Returns:
+        List[str]: 包含该PMCID的目录；有目录没有本地filelist或索引未就绪时返回None（无法确定）
+    """
+    indexes = {}
+    ready = True
+    for directory in PMC_DIRECTORIES:
+        cache_file = _filelist_cache_path(directory)
+        if not cache_file.exists():
+            return None
+        index = get_filelist_index(cache_file)
+        with _background_refreshes_lock:
+            refreshing = directory in _background_refreshes
+        if refreshing or not index.is_current():
+            _refresh_index_in_background(directory, index)
+            ready = False
+        indexes[directory] = index
+    
+    if not ready:
+        return None
+    return [directory for directory, index in indexes.items() if index.lookup_pmcid(pmcid)]
+
+
+def _build_file_key(directory: str, format_type: str, file_name: str) -> str:
+    """根据filelist中的文件名构建S3对象键（文件名可以是完整的对象键）"""
+    if "/" in file_name:
+        return f"{directory}/{format_type}/all/{Path(file_name).stem}.{format_type}"
+    return f"{directory}/{format_type}/{file_name}"
+
 
 @tool
 def pmc_s3_connect(directory: str = "oa_comm", list_files: bool = False, max_files: int = 10) -> str:
@@ -274,13 +369,14 @@ def pmc_download_file(file_key: str, format_type: str = "xml", save_to_cache: bo
 @tool
 def pmc_search_files(search_term: str, directory: str = "oa_comm", format_type: str = "xml", max_results: int = 20, time_budget_seconds: int = 10) -> str:
     """
-    在PMC S3中搜索文件
+    在PMC S3中搜索文件（基于本地filelist索引：PMCID/PMID/文件名精确匹配优先，其次前缀和子串匹配）
     
     Args:
         search_term (str): 搜索词
         directory (str): PMC目录名称 (oa_comm, oa_noncomm, phe_timebound)
         format_type (str): 文件格式类型 (xml, txt)
         max_results (int): 最大结果数量
+        time_budget_seconds (int): 已不再使用（索引查询不需要时间预算），保留以兼容旧调用
         
     Returns:
         str: JSON格式的搜索结果
@@ -299,42 +395,19 @@ def pmc_search_files(search_term: str, directory: str = "oa_comm", format_type:
                 "message": f"无效的格式类型。请使用以下之一: {', '.join(PMC_FORMATS)}"
             }, ensure_ascii=False)
         
-        # 基于本地缓存的 filelist.csv 搜索，避免大规模 S3 遍历
-        import time as _time
-        start_ts = _time.time()
+        # 基于本地 filelist.csv 的索引搜索，避免大规模 S3 遍历和逐行扫描
         CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        cache_file = CACHE_DIR / f"{directory}_filelist.csv"
-
-        # 若无缓存则尝试下载一次 filelist.csv
-        if not cache_file.exists():
-            _ = pmc_get_filelist_csv(directory=directory, save_to_cache=True)
+        index = _open_filelist_index(directory, download=True)
 
         results = []
-        if cache_file.exists():
-            with open(cache_file, 'r', encoding='utf-8', errors='ignore') as f:
-                # 跳过标题行
-                header = f.readline()
-                for line in f:
-                    if ( _time.time() - start_ts ) > max(3, time_budget_seconds):
-                        break
-                    parts = line.strip().split(',')
-                    if not parts:
-                        continue
-                    file_name = parts[0]
-                    pmcid = parts[1] if len(parts) > 1 else ''
-                    pmid = parts[2] if len(parts) > 2 else ''
-                    license_info = parts[3] if len(parts) > 3 else ''
-
-                    haystack = (file_name + ' ' + pmcid + ' ' + pmid + ' ' + license_info).lower()
-                    if search_term.lower() in haystack:
-                        results.append({
-                            "key": f"{directory}/{format_type}/{file_name}",
-                            "pmcid": pmcid,
-                            "pmid": pmid,
-                            "license": license_info
-                        })
-                        if len(results) >= max_results:
-                            break
+        if index is not None:
+            for record in index.search(search_term, max_results):
+                results.append({
+                    "key": _build_file_key(directory, format_type, record.file_name),
+                    "pmcid": record.pmcid,
+                    "pmid": record.pmid,
+                    "license": record.license
+                })
 
         status = "success" if results else "partial_success"
         return json.dumps({
@@ -344,7 +417,7 @@ def pmc_search_files(search_term: str, directory: str = "oa_comm", format_type:
             "format": format_type,
             "result_count": len(results),
             "results": results,
-            "method": "filelist_cache"
+            "method": "filelist_index"
         }, ensure_ascii=False, indent=2)
         
     except Exception as e:
@@ -356,13 +429,14 @@ def pmc_search_files(search_term: str, directory: str = "oa_comm", format_type:
 
 
 @tool
-def pmc_get_filelist_csv(directory: str = "oa_comm", save_to_cache: bool = True) -> str:
+def pmc_get_filelist_csv(directory: str = "oa_comm", save_to_cache: bool = True, force_download: bool = False) -> str:
     """
-    获取PMC目录的filelist.csv文件
+    获取PMC目录的filelist.csv文件，保存到缓存时同时建立本地索引
     
     Args:
         directory (str): PMC目录名称 (oa_comm, oa_noncomm, phe_timebound)
         save_to_cache (bool): 是否保存到本地缓存
+        force_download (bool): 已有缓存时是否仍从S3重新下载
         
     Returns:
         str: JSON格式的filelist.csv内容
@@ -377,17 +451,12 @@ def pmc_get_filelist_csv(directory: str = "oa_comm", save_to_cache: bool = True)
         
         # 缓存文件路径
         CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        cache_file = CACHE_DIR / f"{directory}_filelist.csv"
+        cache_file = _filelist_cache_path(directory)
         
-        # 检查缓存
-        if save_to_cache and cache_file.exists():
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # 解析CSV内容的前几行
-            lines = content.split('\n')
-            headers = lines[0].split(',') if lines else []
-            sample_rows = [line.split(',') for line in lines[1:6] if line]
+        # 检查缓存（只读取表头和前几行，行数来自索引）
+        if save_to_cache and cache_file.exists() and not force_download:
+            headers, sample_rows = read_filelist_preview(cache_file)
+            index = _open_filelist_index(directory)
             
             return json.dumps({
                 "status": "success",
@@ -396,8 +465,9 @@ def pmc_get_filelist_csv(directory: str = "oa_comm", save_to_cache: bool = True)
                 "file": "filelist.csv",
                 "headers": headers,
                 "sample_rows": sample_rows,
-                "total_rows": len(lines) - 1 if lines else 0,
-                "cache_path": str(cache_file)
+                "total_rows": index.count(),
+                "cache_path": str(cache_file),
+                "index_path": str(index.index_path)
             }, ensure_ascii=False)
         
         # 创建无签名S3客户端
@@ -416,17 +486,23 @@ def pmc_get_filelist_csv(directory: str = "oa_comm", save_to_cache: bool = True)
                 Key=file_key
             )
             
-            content = response['Body'].read().decode('utf-8')
+            # 流式写入临时文件，完成后替换缓存文件并建立索引
+            download_path = cache_file.with_suffix(".csv.part")
+            with open(download_path, 'wb') as f:
+                for chunk in response['Body'].iter_chunks(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
             
-            # 保存到缓存
-            if save_to_cache:
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
+            headers, sample_rows = read_filelist_preview(download_path)
             
-            # 解析CSV内容的前几行
-            lines = content.split('\n')
-            headers = lines[0].split(',') if lines else []
-            sample_rows = [line.split(',') for line in lines[1:6] if line]
+            if save_to_cache:
+                download_path.replace(cache_file)
+                index = get_filelist_index(cache_file)
+                index.refresh(etag=response.get('ETag'))
+                total_rows = index.count()
+            else:
+                with open(download_path, 'rb') as f:
+                    total_rows = max(sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b'')) - 1, 0)
+                download_path.unlink()
             
             return json.dumps({
                 "status": "success",
@@ -435,7 +511,7 @@ def pmc_get_filelist_csv(directory: str = "oa_comm", save_to_cache: bool = True)
                 "file": "filelist.csv",
                 "headers": headers,
                 "sample_rows": sample_rows,
-                "total_rows": len(lines) - 1 if lines else 0,
+                "total_rows": total_rows,
                 "cache_path": str(cache_file) if save_to_cache else None
             }, ensure_ascii=False)
             
@@ -454,6 +530,77 @@ def pmc_get_filelist_csv(directory: str = "oa_comm", save_to_cache: bool = True)
         }, ensure_ascii=False)
 
 
+@tool
+def pmc_refresh_filelist_index(directory: str = "oa_comm", check_upstream: bool = True) -> str:
+    """
+    刷新PMC目录的filelist索引
+    
+    上游filelist.csv的ETag变化时重新下载，然后按文件名增量更新本地索引（只处理新增、删除和变化的行）。
+    
+    Args:
+        directory (str): PMC目录名称 (oa_comm, oa_noncomm, phe_timebound, author_manuscript)
+        check_upstream (bool): 是否检查S3上的filelist.csv是否有更新
+        
+    Returns:
+        str: JSON格式的刷新结果
+    """
+    try:
+        if directory not in PMC_DIRECTORIES:
+            return json.dumps({
+                "status": "error",
+                "message": f"无效的目录名称。请使用以下之一: {', '.join(PMC_DIRECTORIES)}"
+            }, ensure_ascii=False)
+        
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file = _filelist_cache_path(directory)
+        index = get_filelist_index(cache_file)
+        downloaded = False
+        
+        if check_upstream:
+            s3_client = boto3.client(
+                's3',
+                region_name=PMC_REGION,
+                config=Config(signature_version=UNSIGNED)
+            )
+            upstream_etag = s3_client.head_object(
+                Bucket=PMC_BUCKET_NAME,
+                Key=f"{directory}/filelist.csv"
+            ).get('ETag')
+            
+            local_etag = index.info().get("etag") if cache_file.exists() else None
+            if upstream_etag != local_etag:
+                logger.info(f"{directory}/filelist.csv 已更新 ({local_etag} -> {upstream_etag})，重新下载")
+                result = json.loads(pmc_get_filelist_csv(directory=directory, save_to_cache=True, force_download=True))
+                if result.get("status") != "success":
+                    return json.dumps(result, ensure_ascii=False)
+                downloaded = True
+        
+        if not cache_file.exists():
+            return json.dumps({
+                "status": "error",
+                "message": f"本地没有 {directory} 的filelist.csv，请设置check_upstream=True下载"
+            }, ensure_ascii=False)
+        
+        stats = None if index.is_current() else index.refresh()
+        
+        return json.dumps({
+            "status": "success",
+            "directory": directory,
+            "downloaded": downloaded,
+            "refresh": stats,
+            "total_rows": index.count(),
+            "index": index.info(),
+            "index_path": str(index.index_path)
+        }, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        logger.error(f"刷新filelist索引失败: {str(e)}")
+        return json.dumps({
+            "status": "error",
+            "message": f"刷新filelist索引失败: {str(e)}"
+        }, ensure_ascii=False)
+
+
 @tool
 def pmc_get_metadata_by_pmcid(pmcid: str, directory: str = None, timeout_seconds: int = 30) -> str:
     """
@@ -494,96 +641,88 @@ def pmc_get_metadata_by_pmcid(pmcid: str, directory: str = None, timeout_seconds
             config=Config(signature_version=UNSIGNED)
         )
         
-        # 首先尝试从缓存中快速查找
-        logger.info("检查缓存文件...")
+        # 首先通过filelist索引按PMCID精确查找
+        logger.info("检查filelist索引...")
         for dir_name in directories_to_search:
-            CACHE_DIR.mkdir(parents=True, exist_ok=True)
-            cache_file = CACHE_DIR / f"{dir_name}_filelist.csv"
+            index = _open_filelist_index(dir_name)
             
-            if cache_file.exists():
-                logger.info(f"在缓存中搜索 {dir_name}...")
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                for line in content.split('\n'):
-                    if pmcid in line:
-                        parts = line.split(',')
-                        if len(parts) >= 2:
-                            logger.info(f"在缓存中找到 {pmcid}")
+            if index is not None:
+                for record in index.lookup_pmcid(pmcid):
+                    logger.info(f"在索引中找到 {pmcid} ({dir_name})")
+                    
+                    # 优先尝试XML格式
+                    for format_type in ['xml', 'txt']:
+                        file_key = _build_file_key(dir_name, format_type, record.file_name)
+                        
+                        try:
+                            response = s3_client.get_object(
+                                Bucket=PMC_BUCKET_NAME,
+                                Key=file_key
+                            )
+                            
+                            content = response['Body'].read().decode('utf-8')
+                            
+                            # 提取基本元数据
+                            metadata = {
+                                "pmcid": pmcid,
+                                "file_key": file_key,
+                                "format": format_type,
+                                "directory": dir_name,
+                                "content_length": len(content),
+                                "status": "success"
+                            }
                             
-                            # 优先尝试XML格式
-                            for format_type in ['xml', 'txt']:
-                                file_key = f"{dir_name}/{format_type}/{parts[0]}"
+                            # 从内容中提取更多元数据
+                            if format_type == 'xml':
+                                import re
                                 
-                                try:
-                                    response = s3_client.get_object(
-                                        Bucket=PMC_BUCKET_NAME,
-                                        Key=file_key
-                                    )
-                                    
-                                    content = response['Body'].read().decode('utf-8')
-                                    
-                                    # 提取基本元数据
-                                    metadata = {
-                                        "pmcid": pmcid,
-                                        "file_key": file_key,
-                                        "format": format_type,
-                                        "directory": dir_name,
-                                        "content_length": len(content),
-                                        "status": "success"
-                                    }
-                                    
-                                    # 从内容中提取更多元数据
-                                    if format_type == 'xml':
-                                        import re
-                                        
-                                        # 提取标题
-                                        title_match = re.search(r'<article-title>(.*?)</article-title>', content)
-                                        if title_match:
-                                            metadata["title"] = title_match.group(1)
-                                        
-                                        # 提取作者
-                                        author_matches = re.findall(r'<contrib contrib-type="author">(.*?)</contrib>', content, re.DOTALL)
-                                        authors = []
-                                        for author_xml in author_matches:
-                                            surname_match = re.search(r'<surname>(.*?)</surname>', author_xml)
-                                            given_names_match = re.search(r'<given-names>(.*?)</given-names>', author_xml)
-                                            if surname_match and given_names_match:
-                                                authors.append(f"{given_names_match.group(1)} {surname_match.group(1)}")
-                                        metadata["authors"] = authors
-                                        
-                                        # 提取期刊信息
-                                        journal_match = re.search(r'<journal-title>(.*?)</journal-title>', content)
-                                        if journal_match:
-                                            metadata["journal"] = journal_match.group(1)
-                                        
-                                        # 提取发布日期
-                                        pub_date_match = re.search(r'<pub-date[^>]*>(.*?)</pub-date>', content, re.DOTALL)
-                                        if pub_date_match:
-                                            year_match = re.search(r'<year>(.*?)</year>', pub_date_match.group(1))
-                                            month_match = re.search(r'<month>(.*?)</month>', pub_date_match.group(1))
-                                            day_match = re.search(r'<day>(.*?)</day>', pub_date_match.group(1))
-                                            
-                                            year = year_match.group(1) if year_match else ""
-                                            month = month_match.group(1) if month_match else ""
-                                            day = day_match.group(1) if day_match else ""
-                                            
-                                            metadata["publication_date"] = f"{year}-{month}-{day}".rstrip("-")
-                                        
-                                        # 提取摘要
-                                        abstract_match = re.search(r'<abstract>(.*?)</abstract>', content, re.DOTALL)
-                                        if abstract_match:
-                                            # 移除HTML标签
-                                            abstract_text = re.sub(r'<[^>]+>', ' ', abstract_match.group(1))
-                                            abstract_text = re.sub(r'\s+', ' ', abstract_text).strip()
-                                            metadata["abstract"] = abstract_text
+                                # 提取标题
+                                title_match = re.search(r'<article-title>(.*?)</article-title>', content)
+                                if title_match:
+                                    metadata["title"] = title_match.group(1)
+                                
+                                # 提取作者
+                                author_matches = re.findall(r'<contrib contrib-type="author">(.*?)</contrib>', content, re.DOTALL)
+                                authors = []
+                                for author_xml in author_matches:
+                                    surname_match = re.search(r'<surname>(.*?)</surname>', author_xml)
+                                    given_names_match = re.search(r'<given-names>(.*?)</given-names>', author_xml)
+                                    if surname_match and given_names_match:
+                                        authors.append(f"{given_names_match.group(1)} {surname_match.group(1)}")
+                                metadata["authors"] = authors
+                                
+                                # 提取期刊信息
+                                journal_match = re.search(r'<journal-title>(.*?)</journal-title>', content)
+                                if journal_match:
+                                    metadata["journal"] = journal_match.group(1)
+                                
+                                # 提取发布日期
+                                pub_date_match = re.search(r'<pub-date[^>]*>(.*?)</pub-date>', content, re.DOTALL)
+                                if pub_date_match:
+                                    year_match = re.search(r'<year>(.*?)</year>', pub_date_match.group(1))
+                                    month_match = re.search(r'<month>(.*?)</month>', pub_date_match.group(1))
+                                    day_match = re.search(r'<day>(.*?)</day>', pub_date_match.group(1))
                                     
-                                    signal.alarm(0)  # 取消超时
-                                    return json.dumps(metadata, ensure_ascii=False, indent=2)
+                                    year = year_match.group(1) if year_match else ""
+                                    month = month_match.group(1) if month_match else ""
+                                    day = day_match.group(1) if day_match else ""
                                     
-                                except Exception as e:
-                                    logger.warning(f"无法下载文件 {file_key}: {str(e)}")
-                                    continue
+                                    metadata["publication_date"] = f"{year}-{month}-{day}".rstrip("-")
+                                
+                                # 提取摘要
+                                abstract_match = re.search(r'<abstract>(.*?)</abstract>', content, re.DOTALL)
+                                if abstract_match:
+                                    # 移除HTML标签
+                                    abstract_text = re.sub(r'<[^>]+>', ' ', abstract_match.group(1))
+                                    abstract_text = re.sub(r'\s+', ' ', abstract_text).strip()
+                                    metadata["abstract"] = abstract_text
+                            
+                            signal.alarm(0)  # 取消超时
+                            return json.dumps(metadata, ensure_ascii=False, indent=2)
+                            
+                        except Exception as e:
+                            logger.warning(f"无法下载文件 {file_key}: {str(e)}")
+                            continue
         
         # 如果缓存中没有找到，返回快速失败信息
         signal.alarm(0)  # 取消超时
@@ -635,6 +774,11 @@ def pmc_get_article_by_id(pmcid: str, format_type: str = "xml", verify_content:
             pmcid = f"PMC{pmcid}"
         
         logger.info(f"直接获取文章: {pmcid} ({format_type})")
+
+        # 本地filelist索引就绪时只访问包含该PMCID的目录，否则探测所有目录
+        candidate_directories = _locate_pmcid_directories(pmcid)
+        if candidate_directories is None:
+            candidate_directories = PMC_DIRECTORIES
         
         # 创建无签名S3客户端
         s3_client = boto3.client(
@@ -644,7 +788,7 @@ def pmc_get_article_by_id(pmcid: str, format_type: str = "xml", verify_content:
         )
         
         # 构建文件路径并尝试获取
-        for directory in PMC_DIRECTORIES:
+        for directory in candidate_directories:
             file_key = f"{directory}/{format_type}/all/{pmcid}.{format_type}"
             
             try:
@@ -864,6 +1008,11 @@ def pmc_quick_search(pmcid: str) -> str:
             pmcid = f"PMC{pmcid}"
         
         logger.info(f"快速搜索PMCID: {pmcid}")
+
+        # 本地filelist索引就绪时只访问包含该PMCID的目录，否则探测所有目录
+        candidate_directories = _locate_pmcid_directories(pmcid)
+        if candidate_directories is None:
+            candidate_directories = PMC_DIRECTORIES
         
         # 创建无签名S3客户端
         s3_client = boto3.client(
@@ -873,7 +1022,7 @@ def pmc_quick_search(pmcid: str) -> str:
         )
         
         # 直接尝试获取XML格式（优先）
-        for directory in PMC_DIRECTORIES:
+        for directory in candidate_directories:
             file_key = f"{directory}/xml/all/{pmcid}.xml"
             
             try:
@@ -918,7 +1067,7 @@ def pmc_quick_search(pmcid: str) -> str:
                 continue
         
         # 如果XML没找到，尝试TXT格式
-        for directory in PMC_DIRECTORIES:
+        for directory in candidate_directories:
             file_key = f"{directory}/txt/all/{pmcid}.txt"
             
             try:
@@ -1051,7 +1200,8 @@ def pmc_clear_cache(confirm: bool = False) -> str:
         cache_files = list(CACHE_DIR.glob('*'))
         file_count = len(cache_files)
         
-        # 清除缓存文件
+        # 关闭filelist索引连接后清除缓存文件
+        release_filelist_indexes()
         for file_path in cache_files:
             if file_path.is_file():
                 file_path.unlink()
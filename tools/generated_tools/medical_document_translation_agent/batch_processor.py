@@ -12,6 +12,7 @@ import uuid
 import datetime
 import time
 import threading
+import importlib
 from typing import Dict, List, Any, Optional, Union, Tuple, Set
 from pathlib import Path
 import shutil
@@ -37,6 +38,22 @@ TASK_STATUS = {
     "cancelled": "已取消"
 }
 
+# 任务进度写回task.json的最小间隔（秒）
+CHECKPOINT_INTERVAL = 2.0
+
+# 同目录工具模块所在的包：按包路径导入，所有任务共享翻译引擎的限流器、Bedrock 客户端和词库缓存
+_TOOLS_PACKAGE = "tools.generated_tools.medical_document_translation_agent"
+
+
+def _load_sibling_module(module_name: str):
+    """
+    按包路径导入同目录下的工具模块
+
+    与 Agent 加载工具时使用同一个模块对象（sys.modules 中只有一份），
+    词库写锁、翻译记忆库等模块级状态在进程内共享。
+    """
+    return importlib.import_module(f"{_TOOLS_PACKAGE}.{module_name}")
+
 
 @tool
 def create_batch_task(file_paths: List[str], 
@@ -591,7 +608,8 @@ def generate_batch_report(task_id: str,
                     task_info.get("start_time"), 
                     task_info.get("end_time") or datetime.datetime.now().isoformat()
                 )
-            }
+            },
+            "memory_stats": task_info.get("memory_stats")
         }
         
         # 添加详细信息
@@ -954,10 +972,77 @@ def _calculate_duration(start_time: Optional[str], end_time: Optional[str]) -> O
         return None
 
 
+class _TaskCheckpoint:
+    """
+    任务进度检查点
+    
+    进度更新只修改内存中的任务信息，按固定间隔写回task.json；状态变更时强制写回。
+    """
+    
+    def __init__(self, task_info: Dict[str, Any], task_file: str, interval: float = CHECKPOINT_INTERVAL):
+        self.task_info = task_info
+        self.task_file = task_file
+        self.interval = interval
+        self._last_saved = 0.0
+        self._lock = threading.Lock()
+    
+    def save(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_saved < self.interval:
+                return
+            
+            # 先写临时文件再替换，避免读取方看到写了一半的文件
+            temp_file = f"{self.task_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.task_info, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.task_file)
+            self._last_saved = now
+
+
+def _collect_translatable_items(document_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    按文档顺序收集需要翻译的文本项（段落、文本块、单元格、页眉页脚）
+    
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: 正文段落中的文本项和表格及页眉页脚中的文本项
+    """
+    def add_paragraph(items: List[Dict[str, Any]], paragraph: Dict[str, Any]) -> None:
+        if paragraph.get("text"):
+            items.append(paragraph)
+        for run in paragraph.get("runs", []):
+            if run.get("text"):
+                items.append(run)
+    
+    content = document_data.get("content", {})
+    paragraph_items: List[Dict[str, Any]] = []
+    other_items: List[Dict[str, Any]] = []
+    
+    for paragraph in content.get("paragraphs", []):
+        add_paragraph(paragraph_items, paragraph)
+    
+    for table in content.get("tables", []):
+        for cell in table.get("cells", []):
+            if cell.get("text"):
+                other_items.append(cell)
+            for para in cell.get("paragraphs", []):
+                add_paragraph(other_items, para)
+    
+    for section in ("headers", "footers"):
+        for block in content.get(section, []):
+            for para in block.get("paragraphs", []):
+                if para.get("text"):
+                    other_items.append(para)
+    
+    return paragraph_items, other_items
+
+
 def _process_batch_task(task_id: str, cache_dir: str) -> None:
     """
     处理批量翻译任务（后台线程）
     
+    每个文档的全部文本在一次流水线调用中并发翻译，进度按检查点间隔写回task.json。
+    
     Args:
         task_id (str): 任务ID
         cache_dir (str): 缓存目录
@@ -970,23 +1055,20 @@ def _process_batch_task(task_id: str, cache_dir: str) -> None:
         # 读取任务信息
         with open(task_file, 'r', encoding='utf-8') as f:
             task_info = json.load(f)
-        
-        # 导入必要的模块
-        import sys
-        import importlib.util
+        checkpoint = _TaskCheckpoint(task_info, task_file)
         
         # 导入翻译引擎和文档处理模块
-        docx_processor_path = os.path.join("tools", "generated_tools", "medical_document_translation_agent", "docx_processor.py")
-        translation_engine_path = os.path.join("tools", "generated_tools", "medical_document_translation_agent", "translation_engine.py")
-        
-        docx_processor_spec = importlib.util.spec_from_file_location("docx_processor", docx_processor_path)
-        translation_engine_spec = importlib.util.spec_from_file_location("translation_engine", translation_engine_path)
-        
-        docx_processor = importlib.util.module_from_spec(docx_processor_spec)
-        translation_engine = importlib.util.module_from_spec(translation_engine_spec)
-        
-        docx_processor_spec.loader.exec_module(docx_processor)
-        translation_engine_spec.loader.exec_module(translation_engine)
+        docx_processor = _load_sibling_module("docx_processor")
+        translation_engine = _load_sibling_module("translation_engine")
+        
+        # 同一任务的所有文档共享一个翻译流水线
+        pipeline = translation_engine.TranslationPipeline(
+            source_lang=task_info["source_lang"],
+            target_lang=task_info["target_lang"],
+            glossary_name=task_info["glossary_name"],
+            domain=task_info["domain"],
+            use_ai=True
+        )
         
         # 处理每个文件
         for i, file_item in enumerate(task_info["files"]):
@@ -1007,8 +1089,7 @@ def _process_batch_task(task_id: str, cache_dir: str) -> None:
             file_item["progress"] = 0.0
             
             # 保存任务信息
-            with open(task_file, 'w', encoding='utf-8') as f:
-                json.dump(task_info, f, ensure_ascii=False, indent=2)
+            checkpoint.save(force=True)
             
             # 更新任务索引
             _update_task_index(task_info, cache_dir)
@@ -1026,164 +1107,31 @@ def _process_batch_task(task_id: str, cache_dir: str) -> None:
                 
                 # 更新进度
                 file_item["progress"] = 0.1
-                with open(task_file, 'w', encoding='utf-8') as f:
-                    json.dump(task_info, f, ensure_ascii=False, indent=2)
+                checkpoint.save()
                 
                 # 提取文档结构
                 document_data = read_result
                 
-                # 翻译段落内容
-                if "content" in document_data and "paragraphs" in document_data["content"]:
-                    total_paragraphs = len(document_data["content"]["paragraphs"])
-                    
-                    for p_idx, paragraph in enumerate(document_data["content"]["paragraphs"]):
-                        # 翻译段落文本
-                        if paragraph.get("text"):
-                            translation_result = json.loads(translation_engine.translate_text(
-                                paragraph["text"],
-                                task_info["source_lang"],
-                                task_info["target_lang"],
-                                task_info["glossary_name"],
-                                task_info["domain"],
-                                True,
-                                None
-                            ))
-                            
-                            if "translation" in translation_result:
-                                paragraph["text"] = translation_result["translation"]
-                        
-                        # 翻译格式化文本块
-                        if "runs" in paragraph:
-                            for run in paragraph["runs"]:
-                                if run.get("text"):
-                                    translation_result = json.loads(translation_engine.translate_text(
-                                        run["text"],
-                                        task_info["source_lang"],
-                                        task_info["target_lang"],
-                                        task_info["glossary_name"],
-                                        task_info["domain"],
-                                        True,
-                                        None
-                                    ))
-                                    
-                                    if "translation" in translation_result:
-                                        run["text"] = translation_result["translation"]
-                        
-                        # 更新进度
-                        progress = 0.1 + 0.6 * ((p_idx + 1) / total_paragraphs)
-                        file_item["progress"] = round(progress, 2)
-                        with open(task_file, 'w', encoding='utf-8') as f:
-                            json.dump(task_info, f, ensure_ascii=False, indent=2)
+                # 翻译段落、表格和页眉页脚内容（段落占0.1-0.7的进度，其余占0.7-0.9）
+                paragraph_items, other_items = _collect_translatable_items(document_data)
+                items = paragraph_items + other_items
                 
-                # 翻译表格内容
-                if "content" in document_data and "tables" in document_data["content"]:
-                    total_tables = len(document_data["content"]["tables"])
-                    
-                    for t_idx, table in enumerate(document_data["content"]["tables"]):
-                        if "cells" in table:
-                            total_cells = len(table["cells"])
-                            
-                            for c_idx, cell in enumerate(table["cells"]):
-                                # 翻译单元格文本
-                                if cell.get("text"):
-                                    translation_result = json.loads(translation_engine.translate_text(
-                                        cell["text"],
-                                        task_info["source_lang"],
-                                        task_info["target_lang"],
-                                        task_info["glossary_name"],
-                                        task_info["domain"],
-                                        True,
-                                        None
-                                    ))
-                                    
-                                    if "translation" in translation_result:
-                                        cell["text"] = translation_result["translation"]
-                                
-                                # 翻译单元格中的段落
-                                if "paragraphs" in cell:
-                                    for para in cell["paragraphs"]:
-                                        if para.get("text"):
-                                            translation_result = json.loads(translation_engine.translate_text(
-                                                para["text"],
-                                                task_info["source_lang"],
-                                                task_info["target_lang"],
-                                                task_info["glossary_name"],
-                                                task_info["domain"],
-                                                True,
-                                                None
-                                            ))
-                                            
-                                            if "translation" in translation_result:
-                                                para["text"] = translation_result["translation"]
-                                        
-                                        # 翻译格式化文本块
-                                        if "runs" in para:
-                                            for run in para["runs"]:
-                                                if run.get("text"):
-                                                    translation_result = json.loads(translation_engine.translate_text(
-                                                        run["text"],
-                                                        task_info["source_lang"],
-                                                        task_info["target_lang"],
-                                                        task_info["glossary_name"],
-                                                        task_info["domain"],
-                                                        True,
-                                                        None
-                                                    ))
-                                                    
-                                                    if "translation" in translation_result:
-                                                        run["text"] = translation_result["translation"]
-                                
-                                # 更新进度
-                                if total_cells > 0:
-                                    progress = 0.7 + 0.2 * ((t_idx * total_cells + c_idx + 1) / (total_tables * total_cells))
-                                    file_item["progress"] = round(progress, 2)
-                                    with open(task_file, 'w', encoding='utf-8') as f:
-                                        json.dump(task_info, f, ensure_ascii=False, indent=2)
+                def report_progress(done: int, total: int, paragraph_total: int = len(paragraph_items)) -> None:
+                    if paragraph_total and done <= paragraph_total:
+                        progress = 0.1 + 0.6 * (done / paragraph_total)
+                    else:
+                        progress = 0.7 + 0.2 * ((done - paragraph_total) / max(1, total - paragraph_total))
+                    file_item["progress"] = max(file_item["progress"], round(progress, 2))
+                    checkpoint.save()
                 
-                # 翻译页眉页脚
-                if "content" in document_data:
-                    # 翻译页眉
-                    if "headers" in document_data["content"]:
-                        for header in document_data["content"]["headers"]:
-                            if "paragraphs" in header:
-                                for para in header["paragraphs"]:
-                                    if para.get("text"):
-                                        translation_result = json.loads(translation_engine.translate_text(
-                                            para["text"],
-                                            task_info["source_lang"],
-                                            task_info["target_lang"],
-                                            task_info["glossary_name"],
-                                            task_info["domain"],
-                                            True,
-                                            None
-                                        ))
-                                        
-                                        if "translation" in translation_result:
-                                            para["text"] = translation_result["translation"]
-                    
-                    # 翻译页脚
-                    if "footers" in document_data["content"]:
-                        for footer in document_data["content"]["footers"]:
-                            if "paragraphs" in footer:
-                                for para in footer["paragraphs"]:
-                                    if para.get("text"):
-                                        translation_result = json.loads(translation_engine.translate_text(
-                                            para["text"],
-                                            task_info["source_lang"],
-                                            task_info["target_lang"],
-                                            task_info["glossary_name"],
-                                            task_info["domain"],
-                                            True,
-                                            None
-                                        ))
-                                        
-                                        if "translation" in translation_result:
-                                            para["text"] = translation_result["translation"]
+                translations = pipeline.translate([item["text"] for item in items], report_progress)
+                for item, translation_result in zip(items, translations):
+                    if "translation" in translation_result:
+                        item["text"] = translation_result["translation"]
                 
                 # 更新进度
                 file_item["progress"] = 0.9
-                with open(task_file, 'w', encoding='utf-8') as f:
-                    json.dump(task_info, f, ensure_ascii=False, indent=2)
+                checkpoint.save()
                 
                 # 创建翻译后的文档
                 create_result = json.loads(docx_processor.create_docx(document_data, result_path))
@@ -1208,6 +1156,9 @@ def _process_batch_task(task_id: str, cache_dir: str) -> None:
                 # 更新任务计数
                 task_info["failed_files"] += 1
             
+            # 记录翻译记忆命中情况
+            task_info["memory_stats"] = dict(pipeline.stats)
+            
             # 更新总体进度
             total_files = task_info["total_files"]
             if total_files > 0:
@@ -1215,8 +1166,7 @@ def _process_batch_task(task_id: str, cache_dir: str) -> None:
             
             # 保存任务信息
             task_info["updated_time"] = datetime.datetime.now().isoformat()
-            with open(task_file, 'w', encoding='utf-8') as f:
-                json.dump(task_info, f, ensure_ascii=False, indent=2)
+            checkpoint.save(force=True)
             
             # 更新任务索引
             _update_task_index(task_info, cache_dir)
@@ -1231,8 +1181,7 @@ def _process_batch_task(task_id: str, cache_dir: str) -> None:
             task_info["updated_time"] = datetime.datetime.now().isoformat()
             
             # 保存任务信息
-            with open(task_file, 'w', encoding='utf-8') as f:
-                json.dump(task_info, f, ensure_ascii=False, indent=2)
+            checkpoint.save(force=True)
             
             # 更新任务索引
             _update_task_index(task_info, cache_dir)
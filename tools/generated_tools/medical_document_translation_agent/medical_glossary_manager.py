@@ -10,9 +10,15 @@ medical_glossary_manager.py - 医学词库管理工具
 import os
 import json
 import csv
-import re
 import hashlib
 import datetime
+import atexit
+import mmap
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
 from typing import Dict, List, Any, Optional, Union, Tuple, Set
 from io import StringIO
 from pathlib import Path
@@ -368,13 +374,10 @@ def search_term(term: str,
                 if len(results) >= max_results:
                     break
         
-        # 更新使用计数
+        # 更新使用计数（批量累计，由后台线程写回词库文件）
         for result in results:
             result["usage_count"] = result.get("usage_count", 0) + 1
-        
-        # 保存更新后的词库
-        with open(glossary_file, 'w', encoding='utf-8') as f:
-            json.dump(glossary_data, f, ensure_ascii=False, indent=2)
+        _usage_counter.add(glossary_file, {result["term_id"]: 1 for result in results})
         
         return json.dumps({
             "success": True,
@@ -738,6 +741,9 @@ def export_glossary(glossary_name: str,
                 "error": f"词库不存在: {glossary_name}"
             }, ensure_ascii=False)
         
+        # 写回尚未落盘的使用计数
+        _usage_counter.flush(glossary_file)
+        
         # 加载词库
         with open(glossary_file, 'r', encoding='utf-8') as f:
             glossary_data = json.load(f)
@@ -1067,74 +1073,14 @@ def match_terms(text: str,
                 "error": f"词库不存在: {glossary_name}"
             }, ensure_ascii=False)
         
-        # 加载词库
-        with open(glossary_file, 'r', encoding='utf-8') as f:
-            glossary_data = json.load(f)
-        
-        if "terms" not in glossary_data:
+        # 单次扫描匹配所有术语
+        matches = find_glossary_terms(text, glossary_name, is_source_lang, min_confidence, cache_dir)
+        if matches is None:
             return json.dumps({
                 "success": False,
                 "error": f"词库格式无效: {glossary_name}"
             }, ensure_ascii=False)
         
-        # 确定匹配字段
-        match_field = "source_term" if is_source_lang else "target_term"
-        result_field = "target_term" if is_source_lang else "source_term"
-        
-        # 按长度排序术语，优先匹配长术语
-        sorted_terms = sorted(
-            [t for t in glossary_data["terms"] if t.get("confidence", 1.0) >= min_confidence],
-            key=lambda x: len(x.get(match_field, "")),
-            reverse=True
-        )
-        
-        # 匹配结果
-        matches = []
-        matched_positions = set()
-        
-        # 对每个术语进行匹配
-        for term in sorted_terms:
-            source = term.get(match_field, "")
-            if not source:
-                continue
-            
-            # 查找所有匹配位置
-            for match in re.finditer(r'\b' + re.escape(source) + r'\b', text):
-                start, end = match.span()
-                
-                # 检查是否与已匹配的位置重叠
-                overlap = False
-                for pos_start, pos_end in matched_positions:
-                    if (start < pos_end and end > pos_start):
-                        overlap = True
-                        break
-                
-                if not overlap:
-                    matches.append({
-                        "term_id": term.get("term_id"),
-                        "source": source,
-                        "target": term.get(result_field),
-                        "category": term.get("category", "未分类"),
-                        "confidence": term.get("confidence", 1.0),
-                        "position": {
-                            "start": start,
-                            "end": end
-                        }
-                    })
-                    
-                    # 记录已匹配位置
-                    matched_positions.add((start, end))
-                    
-                    # 更新使用计数
-                    term["usage_count"] = term.get("usage_count", 0) + 1
-        
-        # 按位置排序匹配结果
-        matches.sort(key=lambda x: x["position"]["start"])
-        
-        # 保存更新后的词库
-        with open(glossary_file, 'w', encoding='utf-8') as f:
-            json.dump(glossary_data, f, ensure_ascii=False, indent=2)
-        
         return json.dumps({
             "success": True,
             "text_length": len(text),
@@ -1298,6 +1244,9 @@ def get_glossary_statistics(glossary_name: str,
                 "error": f"词库不存在: {glossary_name}"
             }, ensure_ascii=False)
         
+        # 写回尚未落盘的使用计数
+        _usage_counter.flush(glossary_file)
+        
         # 加载词库
         with open(glossary_file, 'r', encoding='utf-8') as f:
             glossary_data = json.load(f)
@@ -1445,6 +1394,84 @@ def get_glossary_statistics(glossary_name: str,
 
 
 # 辅助函数
+def find_glossary_terms(text: str,
+                        glossary_name: str,
+                        is_source_lang: bool = True,
+                        min_confidence: float = 0.0,
+                        cache_dir: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    使用术语匹配自动机在文本中查找词库术语，并累计使用计数
+    
+    长术语优先、不重叠，匹配规则与按 \\b 边界逐个正则匹配术语一致。
+    
+    Args:
+        text (str): 要匹配的文本
+        glossary_name (str): 词库名称
+        is_source_lang (bool): 是否在源语言中匹配
+        min_confidence (float): 最小置信度阈值
+        cache_dir (Optional[str]): 缓存目录（可选）
+        
+    Returns:
+        Optional[List[Dict[str, Any]]]: 按位置排序的匹配结果，词库不存在或无效时返回None
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    glossary_file = os.path.join(cache_dir, f"{glossary_name}.json")
+    if not os.path.exists(glossary_file):
+        return None
+    
+    # 加载匹配自动机索引（索引缺失或词库已变更时重建）
+    match_field = "source_term" if is_source_lang else "target_term"
+    automaton = _load_term_automaton(glossary_name, cache_dir, match_field)
+    if automaton is None:
+        return None
+    
+    try:
+        matches = automaton.match(text, min_confidence)
+    finally:
+        automaton.release()
+    
+    # 更新使用计数（批量累计，由后台线程写回词库文件）
+    usage = {}
+    for match in matches:
+        usage[match["term_id"]] = usage.get(match["term_id"], 0) + 1
+    _usage_counter.add(glossary_file, usage)
+    
+    return matches
+
+
+def get_glossary_version(glossary_name: str, cache_dir: Optional[str] = None) -> Optional[str]:
+    """
+    获取词库内容版本标识（版本号和最后修改时间）
+    
+    只写回使用计数不会改变版本标识；结果按词库文件版本缓存，避免重复解析词库。
+    
+    Args:
+        glossary_name (str): 词库名称
+        cache_dir (Optional[str]): 缓存目录（可选）
+        
+    Returns:
+        Optional[str]: 版本标识，词库不存在时返回None
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    glossary_file = os.path.join(cache_dir, f"{glossary_name}.json")
+    if not os.path.exists(glossary_file):
+        return None
+    
+    stamp = _file_stamp(glossary_file)
+    with _glossary_versions_lock:
+        cached = _glossary_versions.get(glossary_file)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    
+    with open(glossary_file, 'r', encoding='utf-8') as f:
+        metadata = json.load(f).get("metadata", {})
+    version = f"{metadata.get('version', '1.0')}:{metadata.get('last_updated', '')}"
+    
+    with _glossary_versions_lock:
+        _glossary_versions[glossary_file] = (stamp, version)
+    return version
+
+
 def create_glossary_index(glossary_name: str, cache_dir: str) -> bool:
     """
     为词库创建索引，加速术语查询
@@ -1463,6 +1490,9 @@ def create_glossary_index(glossary_name: str, cache_dir: str) -> bool:
         if not os.path.exists(glossary_file):
             return False
         
+        # 记录词库文件版本，用于判断匹配索引是否过期
+        glossary_stamp = _file_stamp(glossary_file)
+        
         # 加载词库
         with open(glossary_file, 'r', encoding='utf-8') as f:
             glossary_data = json.load(f)
@@ -1479,28 +1509,18 @@ def create_glossary_index(glossary_name: str, cache_dir: str) -> bool:
             source_term = term.get("source_term", "").lower()
             target_term = term.get("target_term", "").lower()
             
-            # 为源语言术语创建索引
+            # 为源语言术语创建索引（按插入顺序去重）
             for i in range(1, len(source_term) + 1):
-                prefix = source_term[:i]
-                if prefix not in source_index:
-                    source_index[prefix] = []
-                
-                if term_id not in source_index[prefix]:
-                    source_index[prefix].append(term_id)
+                source_index.setdefault(source_term[:i], {})[term_id] = None
             
             # 为目标语言术语创建索引
             for i in range(1, len(target_term) + 1):
-                prefix = target_term[:i]
-                if prefix not in target_index:
-                    target_index[prefix] = []
-                
-                if term_id not in target_index[prefix]:
-                    target_index[prefix].append(term_id)
+                target_index.setdefault(target_term[:i], {})[term_id] = None
         
         # 保存索引
         index_data = {
-            "source_term": source_index,
-            "target_term": target_index,
+            "source_term": {prefix: list(ids) for prefix, ids in source_index.items()},
+            "target_term": {prefix: list(ids) for prefix, ids in target_index.items()},
             "created": datetime.datetime.now().isoformat(),
             "glossary_name": glossary_name
         }
@@ -1510,7 +1530,504 @@ def create_glossary_index(glossary_name: str, cache_dir: str) -> bool:
         with open(index_file, 'w', encoding='utf-8') as f:
             json.dump(index_data, f, ensure_ascii=False)
         
+        # 创建源语言/目标语言术语匹配自动机
+        for match_field in ("source_term", "target_term"):
+            _write_term_automaton(
+                _term_automaton_path(glossary_name, cache_dir, match_field),
+                glossary_data["terms"],
+                match_field,
+                glossary_stamp
+            )
+        
         return True
         
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+# 术语匹配自动机索引
+#
+# 每个词库按匹配字段（source_term/target_term）各保存一个 Aho-Corasick 自动机文件，
+# 与词库文件位于同一目录。文件由定长头部和若干连续数组组成，加载时通过 mmap 映射，
+# 数组直接以 memoryview 访问，不需要反序列化；词条详情按需从 JSON 行数据中解码。
+# 置信度以双精度保存，与词库中的数值比较时不会因单精度舍入漏掉恰好等于阈值的词条。
+_TERM_INDEX_MAGIC = b"NXAC"
+_TERM_INDEX_VERSION = 2
+# magic, version, 词库 mtime_ns, 词库大小, 状态数, 转移数, 术语数, 词条数, 词条数据字节数
+_TERM_INDEX_HEADER = struct.Struct("=4sIqqIIIII")
+_TERM_INDEX_STAMP_OFFSET = 8
+
+_term_automata: Dict[str, "_TermAutomaton"] = {}
+_term_automata_lock = threading.Lock()
+
+# 词库版本标识缓存：词库文件 -> (文件版本, 版本标识)
+_glossary_versions: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_glossary_versions_lock = threading.Lock()
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    """文件版本标识（修改时间和大小）"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _term_automaton_path(glossary_name: str, cache_dir: str, match_field: str) -> str:
+    """匹配自动机索引文件路径"""
+    return os.path.join(cache_dir, f"{glossary_name}_{match_field}.acidx")
+
+
+def _is_word_char(ch: str) -> bool:
+    """与正则 \\w 一致的单词字符判断"""
+    return ch.isalnum() or ch == "_"
+
+
+def _write_term_automaton(index_path: str,
+                          terms: List[Dict[str, Any]],
+                          match_field: str,
+                          glossary_stamp: Tuple[int, int]) -> None:
+    """
+    构建术语匹配自动机并写入索引文件
+    
+    相同匹配文本的多个词条共享一个终止状态，按词库中的顺序保存，
+    匹配时取第一个满足置信度阈值的词条。
+    
+    Args:
+        index_path (str): 索引文件路径
+        terms (List[Dict[str, Any]]): 词条列表
+        match_field (str): 匹配字段
+        glossary_stamp (Tuple[int, int]): 构建时的词库文件版本
+    """
+    result_field = "target_term" if match_field == "source_term" else "source_term"
+    
+    # 按匹配文本分组词条，术语编号按首次出现顺序分配
+    key_ids: Dict[str, int] = {}
+    key_entries: List[List[Tuple[int, Dict[str, Any]]]] = []
+    for entry_id, term in enumerate(terms):
+        key = term.get(match_field, "")
+        if not key:
+            continue
+        if key not in key_ids:
+            key_ids[key] = len(key_entries)
+            key_entries.append([])
+        key_entries[key_ids[key]].append((entry_id, term))
+    
+    # 构建字典树
+    children: List[Dict[str, int]] = [{}]
+    state_key = array("i", [-1])
+    for key, key_id in key_ids.items():
+        state = 0
+        for ch in key:
+            next_state = children[state].get(ch)
+            if next_state is None:
+                next_state = len(children)
+                children.append({})
+                state_key.append(-1)
+                children[state][ch] = next_state
+            state = next_state
+        state_key[state] = key_id
+    
+    # 广度优先计算失败指针和输出链接（最近的带术语后缀状态）
+    state_count = len(children)
+    fail = array("i", [0]) * state_count
+    dict_link = array("i", [-1]) * state_count
+    queue = deque(children[0].values())
+    while queue:
+        state = queue.popleft()
+        for ch, next_state in children[state].items():
+            queue.append(next_state)
+            if state == 0:
+                continue
+            fallback = fail[state]
+            while fallback and ch not in children[fallback]:
+                fallback = fail[fallback]
+            target = children[fallback].get(ch, 0)
+            fail[next_state] = target
+            dict_link[next_state] = target if state_key[target] >= 0 else dict_link[target]
+    
+    # 转移表：每个状态的出边按字符码排序，便于二分查找
+    edge_start = array("i", [0])
+    edge_chars = array("I")
+    edge_targets = array("i")
+    for edges in children:
+        for ch in sorted(edges):
+            edge_chars.append(ord(ch))
+            edge_targets.append(edges[ch])
+        edge_start.append(len(edge_chars))
+    
+    # 术语长度、词条置信度和词条数据（每个词条一行 JSON）
+    key_lengths = array("i", (len(key) for key in key_ids))
+    key_entry_start = array("i", [0])
+    entry_ids = array("i")
+    entry_confidence = array("d")
+    entry_offset = array("i", [0])
+    blob = bytearray()
+    for entries in key_entries:
+        for entry_id, term in entries:
+            entry_ids.append(entry_id)
+            entry_confidence.append(float(term.get("confidence", 1.0)))
+            blob += json.dumps({
+                "term_id": term.get("term_id"),
+                "source": term.get(match_field),
+                "target": term.get(result_field),
+                "category": term.get("category", "未分类"),
+                "confidence": term.get("confidence", 1.0)
+            }, ensure_ascii=False).encode("utf-8")
+            entry_offset.append(len(blob))
+        key_entry_start.append(len(entry_ids))
+    
+    header = _TERM_INDEX_HEADER.pack(
+        _TERM_INDEX_MAGIC, _TERM_INDEX_VERSION,
+        glossary_stamp[0], glossary_stamp[1],
+        state_count, len(edge_chars), len(key_lengths), len(entry_ids), len(blob)
+    )
+    
+    temp_path = f"{index_path}.tmp{os.getpid()}"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        for section in (edge_start, edge_chars, edge_targets, fail, state_key, dict_link,
+                        key_lengths, key_entry_start, entry_ids, entry_confidence, entry_offset):
+            section.tofile(f)
+        f.write(blob)
+    os.replace(temp_path, index_path)
+
+
+class _TermAutomaton:
+    """
+    内存映射的术语匹配自动机
+    
+    匹配前通过 acquire() 登记使用、结束后 release()；被新索引替换后调用 retire()，
+    最后一个使用者释放时关闭映射。
+    """
+    
+    def __init__(self, index_path: str):
+        with open(index_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+        self._users = 0
+        self._retired = False
+        self._users_lock = threading.Lock()
+        
+        (magic, version, mtime_ns, size, state_count, edge_count,
+         key_count, entry_count, blob_size) = _TERM_INDEX_HEADER.unpack_from(self._mmap, 0)
+        if magic != _TERM_INDEX_MAGIC or version != _TERM_INDEX_VERSION:
+            self._close()
+            raise ValueError(f"无效的术语索引文件: {index_path}")
+        self.stamp = (mtime_ns, size)
+        
+        view = memoryview(self._mmap)
+        self._views.append(view)
+        offset = _TERM_INDEX_HEADER.size
+        
+        def section(fmt: str, count: int) -> memoryview:
+            nonlocal offset
+            end = offset + struct.calcsize(fmt) * count
+            data = view[offset:end].cast(fmt)
+            self._views.append(data)
+            offset = end
+            return data
+        
+        self._edge_start = section("i", state_count + 1)
+        self._edge_chars = section("I", edge_count)
+        self._edge_targets = section("i", edge_count)
+        self._fail = section("i", state_count)
+        self._state_key = section("i", state_count)
+        self._dict_link = section("i", state_count)
+        self._key_lengths = section("i", key_count)
+        self._key_entry_start = section("i", key_count + 1)
+        self._entry_ids = section("i", entry_count)
+        self._entry_confidence = section("d", entry_count)
+        self._entry_offset = section("i", entry_count + 1)
+        self._blob = view[offset:offset + blob_size]
+        self._views.append(self._blob)
+    
+    def acquire(self) -> "_TermAutomaton":
+        with self._users_lock:
+            self._users += 1
+        return self
+    
+    def release(self) -> None:
+        with self._users_lock:
+            self._users -= 1
+            if self._retired and self._users == 0:
+                self._close()
+    
+    def retire(self) -> None:
+        """标记为已被替换，没有使用者时立即关闭映射"""
+        with self._users_lock:
+            self._retired = True
+            if self._users == 0:
+                self._close()
+    
+    def _close(self) -> None:
+        # 映射上存在导出的 memoryview 时无法关闭，先逐个释放（切片先于其来源视图）
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+    
+    def _entry(self, index: int) -> Dict[str, Any]:
+        return json.loads(bytes(self._blob[self._entry_offset[index]:self._entry_offset[index + 1]]))
+    
+    def _select_entry(self, key_id: int, min_confidence: float) -> int:
+        """术语的第一个满足置信度阈值的词条，没有时返回 -1"""
+        for index in range(self._key_entry_start[key_id], self._key_entry_start[key_id + 1]):
+            if self._entry_confidence[index] >= min_confidence:
+                return index
+        return -1
+    
+    def match(self, text: str, min_confidence: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        在文本中匹配术语
+        
+        单次扫描找出所有满足单词边界的候选位置，再按术语长度从长到短、
+        词库顺序、文本位置依次选取不重叠的匹配。
+        
+        Args:
+            text (str): 要匹配的文本
+            min_confidence (float): 最小置信度阈值
+            
+        Returns:
+            List[Dict[str, Any]]: 按位置排序的匹配结果
+        """
+        edge_start = self._edge_start
+        edge_chars = self._edge_chars
+        edge_targets = self._edge_targets
+        fail = self._fail
+        state_key = self._state_key
+        dict_link = self._dict_link
+        key_lengths = self._key_lengths
+        
+        text_length = len(text)
+        selected_entries: Dict[int, int] = {}
+        candidates = []
+        state = 0
+        
+        for position, ch in enumerate(text):
+            code = ord(ch)
+            while True:
+                low, high = edge_start[state], edge_start[state + 1]
+                edge = bisect_left(edge_chars, code, low, high)
+                if edge < high and edge_chars[edge] == code:
+                    state = edge_targets[edge]
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            
+            output = state if state_key[state] >= 0 else dict_link[state]
+            if output < 0:
+                continue
+            
+            end = position + 1
+            right_is_word = end < text_length and _is_word_char(text[end])
+            while output >= 0:
+                key_id = state_key[output]
+                output = dict_link[output]
+                
+                # 与 \b 一致：术语两端都必须是单词边界
+                start = end - key_lengths[key_id]
+                left_is_word = start > 0 and _is_word_char(text[start - 1])
+                if (left_is_word == _is_word_char(text[start])
+                        or _is_word_char(text[position]) == right_is_word):
+                    continue
+                
+                entry = selected_entries.get(key_id)
+                if entry is None:
+                    entry = selected_entries[key_id] = self._select_entry(key_id, min_confidence)
+                if entry >= 0:
+                    candidates.append((start - end, self._entry_ids[entry], start, entry))
+        
+        # 长术语优先，已被占用的位置不再匹配
+        candidates.sort()
+        occupied = bytearray(text_length)
+        accepted = []
+        for negative_length, _, start, entry in candidates:
+            end = start - negative_length
+            if occupied.find(1, start, end) != -1:
+                continue
+            occupied[start:end] = b"\x01" * (end - start)
+            accepted.append((start, end, entry))
+        
+        accepted.sort()
+        entries: Dict[int, Dict[str, Any]] = {}
+        matches = []
+        for start, end, entry in accepted:
+            if entry not in entries:
+                entries[entry] = self._entry(entry)
+            matches.append({
+                **entries[entry],
+                "position": {
+                    "start": start,
+                    "end": end
+                }
+            })
+        return matches
+
+
+def _load_term_automaton(glossary_name: str,
+                         cache_dir: str,
+                         match_field: str) -> Optional[_TermAutomaton]:
+    """
+    获取词库的术语匹配自动机
+    
+    进程内缓存已映射的索引；索引文件缺失或与词库文件版本不一致时重建，
+    被替换的旧索引在使用者全部释放后关闭映射。
+    
+    Returns:
+        Optional[_TermAutomaton]: 已登记使用的匹配自动机（调用方负责 release()），词库无效时返回None
+    """
+    glossary_file = os.path.join(cache_dir, f"{glossary_name}.json")
+    index_path = _term_automaton_path(glossary_name, cache_dir, match_field)
+    
+    with _term_automata_lock:
+        stamp = _file_stamp(glossary_file)
+        current = _term_automata.get(index_path)
+        if current is not None and current.stamp == stamp:
+            return current.acquire()
+        
+        automaton = None
+        if os.path.exists(index_path):
+            try:
+                automaton = _TermAutomaton(index_path)
+            except (ValueError, struct.error):
+                automaton = None
+        
+        if automaton is None or automaton.stamp != stamp:
+            if automaton is not None:
+                automaton.retire()
+            if not create_glossary_index(glossary_name, cache_dir):
+                return None
+            automaton = _TermAutomaton(index_path)
+        
+        if current is not None:
+            current.retire()
+        _term_automata[index_path] = automaton
+        return automaton.acquire()
+
+
+def _restamp_term_automata(glossary_file: str,
+                           old_stamp: Tuple[int, int],
+                           new_stamp: Tuple[int, int]) -> None:
+    """
+    词库文件仅更新了使用计数时，更新匹配索引记录的词库版本，避免索引被视为过期
+    """
+    glossary_name = os.path.splitext(os.path.basename(glossary_file))[0]
+    cache_dir = os.path.dirname(glossary_file)
+    
+    with _term_automata_lock:
+        for match_field in ("source_term", "target_term"):
+            index_path = _term_automaton_path(glossary_name, cache_dir, match_field)
+            try:
+                with open(index_path, "r+b") as f:
+                    header = _TERM_INDEX_HEADER.unpack(f.read(_TERM_INDEX_HEADER.size))
+                    if header[0] != _TERM_INDEX_MAGIC or (header[2], header[3]) != old_stamp:
+                        continue
+                    f.seek(_TERM_INDEX_STAMP_OFFSET)
+                    f.write(struct.pack("=qq", *new_stamp))
+            except (OSError, struct.error):
+                continue
+            
+            automaton = _term_automata.get(index_path)
+            if automaton is not None and automaton.stamp == old_stamp:
+                automaton.stamp = new_stamp
+
+
+class _UsageCounter:
+    """
+    术语使用计数批量写回
+    
+    计数先在内存中累计，由后台线程定期（或待写回词条过多时）合并写入词库文件，
+    进程退出时写回剩余计数。
+    """
+    
+    def __init__(self, flush_interval: float = 5.0, max_pending: int = 1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def add(self, glossary_file: str, counts: Dict[str, int]) -> None:
+        """累计词条使用次数"""
+        if not counts:
+            return
+        with self._lock:
+            pending = self._pending.setdefault(glossary_file, {})
+            for term_id, count in counts.items():
+                pending[term_id] = pending.get(term_id, 0) + count
+            pending_count = sum(len(p) for p in self._pending.values())
+            
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="glossary-usage-flush", daemon=True
+                )
+                self._thread.start()
+        
+        if pending_count >= self.max_pending:
+            self._wakeup.set()
+    
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def flush(self, glossary_file: Optional[str] = None) -> None:
+        """
+        写回累计的使用计数
+        
+        Args:
+            glossary_file (Optional[str]): 只写回指定词库，默认写回全部
+        """
+        with self._lock:
+            if glossary_file is None:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {}
+                if glossary_file in self._pending:
+                    batch[glossary_file] = self._pending.pop(glossary_file)
+        
+        for path, counts in batch.items():
+            try:
+                self._apply(path, counts)
+            except Exception:
+                # 写回失败时保留计数，等待下次写回
+                with self._lock:
+                    pending = self._pending.setdefault(path, {})
+                    for term_id, count in counts.items():
+                        pending[term_id] = pending.get(term_id, 0) + count
+    
+    def _apply(self, glossary_file: str, counts: Dict[str, int]) -> None:
+        """将计数合并到词库文件；写入前词库被其他操作修改时重新读取"""
+        if not os.path.exists(glossary_file):
+            return
+        
+        with self._write_lock:
+            for _ in range(3):
+                old_stamp = _file_stamp(glossary_file)
+                with open(glossary_file, 'r', encoding='utf-8') as f:
+                    glossary_data = json.load(f)
+                
+                for term in glossary_data.get("terms", []):
+                    count = counts.get(term.get("term_id"))
+                    if count:
+                        term["usage_count"] = term.get("usage_count", 0) + count
+                
+                temp_file = f"{glossary_file}.tmp{os.getpid()}"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(glossary_data, f, ensure_ascii=False, indent=2)
+                
+                if _file_stamp(glossary_file) != old_stamp:
+                    os.remove(temp_file)
+                    continue
+                
+                os.replace(temp_file, glossary_file)
+                _restamp_term_automata(glossary_file, old_stamp, _file_stamp(glossary_file))
+                return
+            
+            raise RuntimeError(f"词库文件持续被修改，暂缓写回使用计数: {glossary_file}")
+
+
+_usage_counter = _UsageCounter()
+atexit.register(_usage_counter.flush)
@@ -11,12 +11,17 @@ import json
 import re
 import hashlib
 import datetime
-from typing import Dict, List, Any, Optional, Union, Tuple, Set
+import random
+import threading
+import importlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional, Union, Tuple, Set, Callable
 from pathlib import Path
 import time
 
 try:
     import boto3
+    from botocore.config import Config
     from botocore.exceptions import ClientError
 except ImportError:
     raise ImportError("请安装boto3库: pip install boto3")
@@ -60,6 +65,28 @@ MEDICAL_DOMAINS = [
     "laboratory"         # 实验室医学
 ]
 
+# Bedrock翻译模型与区域
+BEDROCK_MODEL_ID = 'anthropic.claude-3-sonnet-20240229-v1:0'
+BEDROCK_REGION = 'us-west-2'
+
+# 翻译流水线配置
+PIPELINE_MAX_CONCURRENCY = 8          # 并发窗口大小（同时进行的Bedrock请求数）
+PIPELINE_REQUESTS_PER_SECOND = 4.0    # 令牌桶初始速率
+PIPELINE_BURST = 8                    # 令牌桶容量
+PIPELINE_MIN_RATE = 0.5               # 限流后速率下限
+PIPELINE_MAX_RETRIES = 6              # 限流错误最大重试次数
+PIPELINE_PACK_MAX_CHARS = 3000        # 单个多片段请求的最大字符数
+PIPELINE_PACK_MAX_SEGMENTS = 20       # 单个多片段请求的最大片段数
+PIPELINE_SHORT_TEXT_CHARS = 600       # 不超过该长度的文本参与合并
+
+# Bedrock限流类错误码
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException"
+}
+
 
 @tool
 def translate_text(text: str, 
@@ -69,9 +96,10 @@ def translate_text(text: str,
                    domain: str = "general",
                    use_ai: bool = True,
                    context: Optional[str] = None,
-                   cache_dir: Optional[str] = None) -> str:
+                   cache_dir: Optional[str] = None,
+                   use_memory: bool = True) -> str:
     """
-    翻译单个文本，支持词库和AI翻译
+    翻译单个文本，支持翻译记忆、词库和AI翻译
     
     Args:
         text (str): 要翻译的文本
@@ -82,6 +110,7 @@ def translate_text(text: str,
         use_ai (bool): 是否使用AI翻译（默认为True）
         context (Optional[str]): 上下文信息（可选）
         cache_dir (Optional[str]): 缓存目录（可选）
+        use_memory (bool): 是否使用翻译记忆：精确匹配复用已有译文，相似片段作为AI翻译参考（默认为True）
         
     Returns:
         str: JSON格式的翻译结果
@@ -111,180 +140,13 @@ def translate_text(text: str,
         cache_dir = cache_dir or DEFAULT_CACHE_DIR
         os.makedirs(cache_dir, exist_ok=True)
         
-        # 创建翻译结果
-        result = {
-            "source_text": text,
-            "source_lang": source_lang,
-            "target_lang": target_lang,
-            "domain": domain,
-            "translation": "",
-            "glossary_matches": [],
-            "used_ai": False,
-            "confidence": 0.0
-        }
-        
-        # 检查缓存
-        cache_key = hashlib.md5(f"{text}:{source_lang}:{target_lang}:{domain}:{glossary_name or ''}".encode()).hexdigest()
-        cache_file = os.path.join(cache_dir, f"{cache_key}.json")
-        
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_result = json.load(f)
-                
-                # 检查缓存是否有效（不超过7天）
-                cache_time = datetime.datetime.fromisoformat(cached_result.get("timestamp", "1970-01-01T00:00:00"))
-                now = datetime.datetime.now()
-                
-                if (now - cache_time).days < 7:
-                    return json.dumps(cached_result, ensure_ascii=False)
-            except:
-                # 忽略缓存错误
-                pass
-        
-        # 如果提供了词库名称，使用词库进行术语匹配
-        if glossary_name:
-            glossary_dir = os.path.join(".cache", "medical_translator", "glossaries")
-            glossary_file = os.path.join(glossary_dir, f"{glossary_name}.json")
-            
-            if os.path.exists(glossary_file):
-                # 加载词库
-                with open(glossary_file, 'r', encoding='utf-8') as f:
-                    glossary_data = json.load(f)
-                
-                if "terms" in glossary_data:
-                    # 按长度排序术语，优先匹配长术语
-                    source_field = "source_term"
-                    target_field = "target_term"
-                    
-                    sorted_terms = sorted(
-                        glossary_data["terms"],
-                        key=lambda x: len(x.get(source_field, "")),
-                        reverse=True
-                    )
-                    
-                    # 匹配结果
-                    matches = []
-                    processed_text = text
-                    
-                    # 对每个术语进行匹配
-                    for term in sorted_terms:
-                        source = term.get(source_field, "")
-                        target = term.get(target_field, "")
-                        
-                        if not source or not target:
-                            continue
-                        
-                        # 使用正则表达式匹配术语
-                        pattern = r'\b' + re.escape(source) + r'\b'
-                        matches_found = list(re.finditer(pattern, processed_text))
-                        
-                        if matches_found:
-                            # 记录匹配
-                            for match in matches_found:
-                                start, end = match.span()
-                                matches.append({
-                                    "term_id": term.get("term_id"),
-                                    "source": source,
-                                    "target": target,
-                                    "position": {
-                                        "start": start,
-                                        "end": end
-                                    },
-                                    "confidence": term.get("confidence", 1.0)
-                                })
-                            
-                            # 更新术语使用计数
-                            term["usage_count"] = term.get("usage_count", 0) + len(matches_found)
-                            
-                            # 替换已匹配的术语为占位符
-                            processed_text = re.sub(pattern, f"__TERM_{len(matches) - 1}__", processed_text)
-                    
-                    # 保存更新后的词库
-                    with open(glossary_file, 'w', encoding='utf-8') as f:
-                        json.dump(glossary_data, f, ensure_ascii=False, indent=2)
-                    
-                    # 如果所有文本都被词库覆盖，直接返回结果
-                    if not re.search(r'[^\s\W_]', processed_text.replace("__TERM_", "")):
-                        # 恢复占位符为目标语言术语
-                        translated_text = processed_text
-                        for i, match in enumerate(matches):
-                            translated_text = translated_text.replace(f"__TERM_{i}__", match["target"])
-                        
-                        result["translation"] = translated_text
-                        result["glossary_matches"] = matches
-                        result["confidence"] = 1.0
-                        result["used_ai"] = False
-                        
-                        # 缓存结果
-                        result["timestamp"] = datetime.datetime.now().isoformat()
-                        with open(cache_file, 'w', encoding='utf-8') as f:
-                            json.dump(result, f, ensure_ascii=False, indent=2)
-                        
-                        return json.dumps(result, ensure_ascii=False)
-                    
-                    # 如果有部分文本未被词库覆盖，并且允许使用AI翻译
-                    if use_ai:
-                        # 使用AI翻译未匹配的部分
-                        ai_text = processed_text
-                        for i, match in enumerate(matches):
-                            # 将术语占位符替换为源语言术语，以便AI翻译时保持上下文
-                            ai_text = ai_text.replace(f"__TERM_{i}__", match["source"])
-                        
-                        # 调用AI翻译
-                        ai_result = _translate_with_ai(ai_text, source_lang, target_lang, domain, context)
-                        
-                        if ai_result["success"]:
-                            ai_translated = ai_result["translation"]
-                            
-                            # 将AI翻译结果中的术语替换为词库中的对应术语
-                            final_text = ai_translated
-                            for match in matches:
-                                source = match["source"]
-                                target = match["target"]
-                                
-                                # 使用正则表达式替换术语
-                                pattern = r'\b' + re.escape(source) + r'\b'
-                                final_text = re.sub(pattern, target, final_text)
-                            
-                            result["translation"] = final_text
-                            result["glossary_matches"] = matches
-                            result["used_ai"] = True
-                            result["confidence"] = 0.8  # 混合翻译的置信度
-                            
-                            # 缓存结果
-                            result["timestamp"] = datetime.datetime.now().isoformat()
-                            with open(cache_file, 'w', encoding='utf-8') as f:
-                                json.dump(result, f, ensure_ascii=False, indent=2)
-                            
-                            return json.dumps(result, ensure_ascii=False)
-        
-        # 如果没有词库或词库未覆盖所有文本，且允许使用AI翻译
-        if use_ai:
-            ai_result = _translate_with_ai(text, source_lang, target_lang, domain, context)
-            
-            if ai_result["success"]:
-                result["translation"] = ai_result["translation"]
-                result["used_ai"] = True
-                result["confidence"] = 0.7  # 纯AI翻译的置信度
-                
-                # 缓存结果
-                result["timestamp"] = datetime.datetime.now().isoformat()
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, ensure_ascii=False, indent=2)
-                
-                return json.dumps(result, ensure_ascii=False)
-            else:
-                return json.dumps({
-                    "success": False,
-                    "error": f"AI翻译失败: {ai_result.get('error', '未知错误')}"
-                }, ensure_ascii=False)
+        # 检查缓存和词库，需要AI翻译时调用Bedrock
+        job = _prepare_translation(text, source_lang, target_lang, glossary_name, domain, use_ai, cache_dir, use_memory)
+        if job.output is not None:
+            return json.dumps(job.output, ensure_ascii=False)
         
-        # 如果不允许使用AI翻译，且词库未覆盖所有文本
-        return json.dumps({
-            "success": False,
-            "error": "文本未被词库完全覆盖，且未启用AI翻译"
-        }, ensure_ascii=False)
+        ai_result = _translate_with_ai(job.ai_text, source_lang, target_lang, domain, context, job.reference)
+        return json.dumps(_finish_translation(job, ai_result), ensure_ascii=False)
         
     except Exception as e:
         return json.dumps({
@@ -301,10 +163,14 @@ def translate_batch(texts: List[str],
                     domain: str = "general",
                     use_ai: bool = True,
                     context: Optional[str] = None,
-                    cache_dir: Optional[str] = None) -> str:
+                    cache_dir: Optional[str] = None,
+                    max_concurrency: int = PIPELINE_MAX_CONCURRENCY,
+                    use_memory: bool = True) -> str:
     """
     批量翻译多个文本
     
+    短文本合并为多片段请求，请求在有界并发窗口内执行并共享限流，结果按输入顺序返回。
+    
     Args:
         texts (List[str]): 要翻译的文本列表
         source_lang (str): 源语言代码（如'en', 'zh'）
@@ -314,6 +180,8 @@ def translate_batch(texts: List[str],
         use_ai (bool): 是否使用AI翻译（默认为True）
         context (Optional[str]): 上下文信息（可选）
         cache_dir (Optional[str]): 缓存目录（可选）
+        max_concurrency (int): 最大并发请求数
+        use_memory (bool): 是否使用翻译记忆：精确匹配复用已有译文，相似片段作为AI翻译参考（默认为True）
         
     Returns:
         str: JSON格式的批量翻译结果
@@ -343,39 +211,23 @@ def translate_batch(texts: List[str],
         cache_dir = cache_dir or DEFAULT_CACHE_DIR
         os.makedirs(cache_dir, exist_ok=True)
         
-        # 批量翻译结果
-        results = []
+        # 并发翻译
+        pipeline = TranslationPipeline(
+            source_lang=source_lang,
+            target_lang=target_lang,
+            glossary_name=glossary_name,
+            domain=domain,
+            use_ai=use_ai,
+            context=context,
+            cache_dir=cache_dir,
+            max_concurrency=max_concurrency,
+            use_memory=use_memory
+        )
+        results = pipeline.translate(texts)
+        
         success_count = 0
         failed_count = 0
-        
-        # 逐个翻译文本
-        for i, text in enumerate(texts):
-            if not text.strip():
-                # 跳过空文本
-                results.append({
-                    "index": i,
-                    "source_text": text,
-                    "translation": "",
-                    "success": True,
-                    "empty": True
-                })
-                success_count += 1
-                continue
-            
-            # 调用单文本翻译
-            result_json = translate_text(
-                text=text,
-                source_lang=source_lang,
-                target_lang=target_lang,
-                glossary_name=glossary_name,
-                domain=domain,
-                use_ai=use_ai,
-                context=context,
-                cache_dir=cache_dir
-            )
-            
-            result = json.loads(result_json)
-            
+        for i, result in enumerate(results):
             # 添加索引
             result["index"] = i
             
@@ -383,8 +235,6 @@ def translate_batch(texts: List[str],
                 failed_count += 1
             else:
                 success_count += 1
-            
-            results.append(result)
         
         # 构建批量结果
         batch_result = {
@@ -396,6 +246,7 @@ def translate_batch(texts: List[str],
             "target_lang": target_lang,
             "domain": domain,
             "results": results,
+            "memory": pipeline.stats,
             "timestamp": datetime.datetime.now().isoformat()
         }
         
@@ -808,12 +659,530 @@ def clear_translation_cache(cache_key: Optional[str] = None,
         }, ensure_ascii=False)
 
 
+# 翻译流水线
+class _TokenBucket:
+    """
+    自适应令牌桶
+    
+    请求前获取令牌；遇到限流错误时速率减半，请求成功后逐步恢复到初始速率。
+    """
+    
+    def __init__(self, rate: float, capacity: int, min_rate: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """阻塞直到获得一个令牌"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+    
+    def on_throttle(self) -> None:
+        """限流时降低速率并清空积攒的令牌"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+    
+    def on_success(self) -> None:
+        """请求成功时逐步恢复速率"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class _TranslationJob:
+    """
+    单个文本的翻译状态：缓存命中或词库完全覆盖时output为最终结果，否则需要AI翻译ai_text，
+    reference为翻译记忆中相似片段的译文（只作为AI翻译的参考）
+    """
+    
+    __slots__ = ("text", "result", "cache_file", "matches", "ai_text", "output", "memory", "glossary_version",
+                 "reference")
+    
+    def __init__(self, text: str, result: Dict[str, Any], cache_file: str):
+        self.text = text
+        self.result = result
+        self.cache_file = cache_file
+        self.memory = None
+        self.glossary_version: Optional[str] = None
+        self.matches: List[Dict[str, Any]] = []
+        self.ai_text: Optional[str] = None
+        self.output: Optional[Dict[str, Any]] = None
+        self.reference: Optional[Dict[str, Any]] = None
+
+
+class TranslationPipeline:
+    """
+    并发翻译流水线
+    
+    缓存、翻译记忆与词库先在本地处理；需要AI翻译的短文本合并为多片段请求，
+    所有请求在有界并发窗口内执行，共享Bedrock客户端和令牌桶限流，结果按输入顺序返回。
+    """
+    
+    def __init__(self,
+                 source_lang: str,
+                 target_lang: str,
+                 glossary_name: Optional[str] = None,
+                 domain: str = "general",
+                 use_ai: bool = True,
+                 context: Optional[str] = None,
+                 cache_dir: Optional[str] = None,
+                 max_concurrency: int = PIPELINE_MAX_CONCURRENCY,
+                 use_memory: bool = True):
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.glossary_name = glossary_name
+        self.domain = domain
+        self.use_ai = use_ai
+        self.context = context
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_concurrency = max(1, max_concurrency)
+        self.use_memory = use_memory
+        
+        # 累计统计：翻译记忆精确命中、作为参考的模糊命中、节省的token数和实际发出的模型请求数
+        self.stats = {
+            "memory_exact_hits": 0,
+            "memory_fuzzy_references": 0,
+            "saved_tokens": 0,
+            "ai_segments": 0,
+            "ai_requests": 0
+        }
+    
+    def translate(self,
+                  texts: List[str],
+                  progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Dict[str, Any]]:
+        """
+        翻译文本列表
+        
+        Args:
+            texts (List[str]): 要翻译的文本列表
+            progress_callback (Optional[Callable[[int, int], None]]): 进度回调，参数为(已完成数, 总数)
+            
+        Returns:
+            List[Dict[str, Any]]: 与输入顺序一致的翻译结果
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        total = len(texts)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        
+        # 相同文本只翻译一次（页眉页脚、表头等重复内容）
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not text.strip():
+                results[i] = {
+                    "source_text": text,
+                    "translation": "",
+                    "success": True,
+                    "empty": True
+                }
+                continue
+            positions.setdefault(text, []).append(i)
+        
+        done = total - sum(len(indexes) for indexes in positions.values())
+        progress_lock = threading.Lock()
+        
+        def complete(text: str, output: Dict[str, Any]) -> None:
+            nonlocal done
+            for i in positions[text]:
+                results[i] = dict(output)
+            with progress_lock:
+                done += len(positions[text])
+                if progress_callback:
+                    progress_callback(done, total)
+        
+        # 本地处理缓存和词库
+        pending: List[_TranslationJob] = []
+        for text in positions:
+            try:
+                job = _prepare_translation(text, self.source_lang, self.target_lang, self.glossary_name,
+                                           self.domain, self.use_ai, self.cache_dir, self.use_memory)
+            except Exception as e:
+                complete(text, {"success": False, "error": f"翻译文本时出错: {str(e)}"})
+                continue
+            if job.output is not None:
+                self._record_memory_hit(job.output, len(positions[text]))
+                complete(text, job.output)
+            else:
+                if job.reference:
+                    self.stats["memory_fuzzy_references"] += len(positions[text])
+                pending.append(job)
+        
+        # 并发执行AI翻译请求
+        if pending:
+            groups = self._pack(pending)
+            self.stats["ai_segments"] += len(pending)
+            self.stats["ai_requests"] += len(groups)
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                futures = {
+                    executor.submit(self._translate_group, group): group
+                    for group in groups
+                }
+                for future in as_completed(futures):
+                    group = futures[future]
+                    try:
+                        ai_results = future.result()
+                    except Exception as e:
+                        ai_results = [{"success": False, "error": f"AI翻译错误: {str(e)}"}] * len(group)
+                    for job, ai_result in zip(group, ai_results):
+                        complete(job.text, _finish_translation(job, ai_result))
+        
+        return results
+    
+    def _record_memory_hit(self, output: Dict[str, Any], count: int) -> None:
+        """统计翻译记忆命中；同一批次中重复的文本也计为节省的请求"""
+        memory_match = output.get("memory_match")
+        if not memory_match:
+            return
+        self.stats[f"memory_{memory_match['match_type']}_hits"] += count
+        self.stats["saved_tokens"] += count * (_estimate_tokens(output.get("source_text", ""))
+                                               + _estimate_tokens(output.get("translation", "")))
+    
+    def _pack(self, jobs: List[_TranslationJob]) -> List[List[_TranslationJob]]:
+        """将短文本按顺序合并为多片段请求，长文本和带参考译文的文本单独请求"""
+        groups = []
+        current: List[_TranslationJob] = []
+        current_chars = 0
+        for job in jobs:
+            length = len(job.ai_text)
+            if length > PIPELINE_SHORT_TEXT_CHARS or job.reference:
+                groups.append([job])
+                continue
+            if current and (current_chars + length > PIPELINE_PACK_MAX_CHARS
+                            or len(current) >= PIPELINE_PACK_MAX_SEGMENTS):
+                groups.append(current)
+                current, current_chars = [], 0
+            current.append(job)
+            current_chars += length
+        if current:
+            groups.append(current)
+        return groups
+    
+    def _translate_group(self, group: List[_TranslationJob]) -> List[Dict[str, Any]]:
+        if len(group) == 1:
+            job = group[0]
+            return [_translate_with_ai(job.ai_text, self.source_lang, self.target_lang, self.domain,
+                                       self.context, job.reference)]
+        return _translate_segments_with_ai([job.ai_text for job in group], self.source_lang,
+                                           self.target_lang, self.domain, self.context)
+
+
 # 辅助函数
+# 共享的Bedrock客户端和限流器
+_bedrock_client = None
+_bedrock_client_lock = threading.Lock()
+_rate_limiter = _TokenBucket(PIPELINE_REQUESTS_PER_SECOND, PIPELINE_BURST, PIPELINE_MIN_RATE)
+
+# 同目录工具模块所在的包（延迟导入）
+_TOOLS_PACKAGE = "tools.generated_tools.medical_document_translation_agent"
+
+
+def _get_bedrock_client():
+    """获取进程内共享的Bedrock客户端（线程安全，连接池大小与并发窗口匹配）"""
+    global _bedrock_client
+    if _bedrock_client is None:
+        with _bedrock_client_lock:
+            if _bedrock_client is None:
+                _bedrock_client = boto3.client(
+                    service_name='bedrock-runtime',
+                    region_name=BEDROCK_REGION,
+                    config=Config(
+                        max_pool_connections=max(10, PIPELINE_MAX_CONCURRENCY * 2),
+                        retries={"max_attempts": 1, "mode": "standard"},
+                        read_timeout=300
+                    )
+                )
+    return _bedrock_client
+
+
+def _load_sibling_module(module_name: str):
+    """
+    按包路径导入同目录下的工具模块
+
+    与 Agent 加载工具时使用同一个模块对象（sys.modules 中只有一份），
+    词库写锁、翻译记忆库等模块级状态在进程内共享。
+    """
+    return importlib.import_module(f"{_TOOLS_PACKAGE}.{module_name}")
+
+
+def _get_glossary_manager():
+    """词库管理模块"""
+    return _load_sibling_module("medical_glossary_manager")
+
+
+def _get_translation_memory():
+    """进程内共享的翻译记忆库"""
+    return _load_sibling_module("translation_memory").get_translation_memory()
+
+
+def _estimate_tokens(text: str) -> int:
+    return _load_sibling_module("translation_memory").estimate_tokens(text)
+
+
+def _prepare_translation(text: str,
+                         source_lang: str,
+                         target_lang: str,
+                         glossary_name: Optional[str],
+                         domain: str,
+                         use_ai: bool,
+                         cache_dir: str,
+                         use_memory: bool = True) -> _TranslationJob:
+    """
+    依次检查缓存、翻译记忆，并使用词库匹配术语
+    
+    Returns:
+        _TranslationJob: 翻译状态，output不为None时无需AI翻译
+    """
+    result = {
+        "source_text": text,
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "domain": domain,
+        "translation": "",
+        "glossary_matches": [],
+        "used_ai": False,
+        "confidence": 0.0
+    }
+    
+    # 检查缓存
+    cache_key = hashlib.md5(f"{text}:{source_lang}:{target_lang}:{domain}:{glossary_name or ''}".encode()).hexdigest()
+    cache_file = os.path.join(cache_dir, f"{cache_key}.json")
+    job = _TranslationJob(text, result, cache_file)
+    
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached_result = json.load(f)
+            
+            # 检查缓存是否有效（不超过7天）
+            cache_time = datetime.datetime.fromisoformat(cached_result.get("timestamp", "1970-01-01T00:00:00"))
+            if (datetime.datetime.now() - cache_time).days < 7:
+                job.output = cached_result
+                return job
+        except:
+            # 忽略缓存错误
+            pass
+    
+    # 查找翻译记忆：精确匹配直接复用译文；模糊匹配的译文属于另一个片段（可能相差否定词等），
+    # 只作为AI翻译的参考
+    memory_match = None
+    if use_memory:
+        try:
+            job.memory = _get_translation_memory()
+            if glossary_name:
+                job.glossary_version = _get_glossary_manager().get_glossary_version(glossary_name)
+            memory_match = job.memory.lookup(text, source_lang, target_lang, domain, job.glossary_version)
+        except Exception:
+            # 忽略翻译记忆错误
+            job.memory = None
+    
+    # 如果提供了词库名称，使用词库进行术语匹配（位置以当前文本为准）
+    if glossary_name:
+        matches = _get_glossary_manager().find_glossary_terms(text, glossary_name, True) or []
+        job.matches = [match for match in matches if match.get("source") and match.get("target")]
+    
+    if memory_match and memory_match["match_type"] == "exact":
+        result["translation"] = memory_match["translation"]
+        result["glossary_matches"] = job.matches
+        result["confidence"] = memory_match["confidence"]
+        result["memory_match"] = {
+            "match_type": memory_match["match_type"],
+            "similarity": memory_match["similarity"],
+            "source_text": memory_match["source_text"]
+        }
+        result["timestamp"] = datetime.datetime.now().isoformat()
+        job.output = result
+        return job
+    job.reference = memory_match
+    
+    if job.matches:
+        # 如果所有文本都被词库覆盖，直接返回结果
+        parts = []
+        uncovered = []
+        last = 0
+        for match in job.matches:
+            start, end = match["position"]["start"], match["position"]["end"]
+            parts.append(text[last:start])
+            uncovered.append(text[last:start])
+            parts.append(match["target"])
+            last = end
+        parts.append(text[last:])
+        uncovered.append(text[last:])
+        
+        if not re.search(r'[^\s\W_]', "".join(uncovered)):
+            result["translation"] = "".join(parts)
+            result["glossary_matches"] = job.matches
+            result["confidence"] = 1.0
+            job.output = _save_translation(result, job)
+            return job
+    
+    if not use_ai:
+        job.output = {
+            "success": False,
+            "error": "文本未被词库完全覆盖，且未启用AI翻译"
+        }
+        if job.reference:
+            # 相似片段的译文交由人工复核
+            job.output["memory_suggestion"] = _memory_reference_info(job.reference, include_translation=True)
+        return job
+    
+    job.ai_text = text
+    return job
+
+
+def _finish_translation(job: _TranslationJob, ai_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    合并AI翻译结果与词库术语并写入缓存
+    """
+    if not ai_result.get("success"):
+        return {
+            "success": False,
+            "error": f"AI翻译失败: {ai_result.get('error', '未知错误')}"
+        }
+    
+    result = job.result
+    translation = ai_result["translation"]
+    if job.matches:
+        # 将AI翻译结果中残留的源语言术语替换为词库中的对应术语
+        for match in job.matches:
+            pattern = r'\b' + re.escape(match["source"]) + r'\b'
+            translation = re.sub(pattern, lambda _, target=match["target"]: target, translation)
+        result["glossary_matches"] = job.matches
+        result["confidence"] = 0.8  # 混合翻译的置信度
+    else:
+        result["confidence"] = 0.7  # 纯AI翻译的置信度
+    
+    result["translation"] = translation
+    result["used_ai"] = True
+    if job.reference:
+        result["memory_reference"] = _memory_reference_info(job.reference)
+    return _save_translation(result, job)
+
+
+def _memory_reference_info(reference: Dict[str, Any], include_translation: bool = False) -> Dict[str, Any]:
+    """翻译记忆模糊匹配的摘要"""
+    info = {
+        "match_type": reference["match_type"],
+        "similarity": reference["similarity"],
+        "source_text": reference["source_text"],
+        "needs_review": True
+    }
+    if include_translation:
+        info["translation"] = reference["translation"]
+    return info
+
+
+def _save_translation(result: Dict[str, Any], job: _TranslationJob) -> Dict[str, Any]:
+    """为翻译结果添加时间戳并写入缓存和翻译记忆"""
+    result["timestamp"] = datetime.datetime.now().isoformat()
+    with open(job.cache_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    
+    if job.memory is not None:
+        try:
+            job.memory.store(job.text, result["translation"], result["source_lang"], result["target_lang"],
+                             result["domain"], job.glossary_version, result["glossary_matches"],
+                             result["confidence"])
+        except Exception:
+            # 忽略翻译记忆错误
+            pass
+    return result
+
+
+def _invoke_bedrock(prompt: str, max_tokens: int = 4096) -> str:
+    """
+    调用Bedrock模型并返回文本结果
+    
+    请求前从共享令牌桶获取令牌；遇到限流错误时降低速率并以带抖动的指数退避重试。
+    """
+    bedrock_runtime = _get_bedrock_client()
+    body = json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": 0.1,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    })
+    
+    attempt = 0
+    while True:
+        _rate_limiter.acquire()
+        try:
+            response = bedrock_runtime.invoke_model(modelId=BEDROCK_MODEL_ID, body=body)
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code", "")
+            if code not in THROTTLING_ERROR_CODES or attempt >= PIPELINE_MAX_RETRIES:
+                raise
+            _rate_limiter.on_throttle()
+            time.sleep(min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0))
+            attempt += 1
+            continue
+        
+        _rate_limiter.on_success()
+        response_body = json.loads(response['body'].read().decode('utf-8'))
+        return response_body['content'][0]['text']
+
+
+def _build_translation_prompt(text: str,
+                              source_lang: str,
+                              target_lang: str,
+                              domain: str,
+                              context: Optional[str],
+                              reference: Optional[Dict[str, Any]] = None) -> str:
+    prompt = f"""请将以下{SUPPORTED_LANGUAGES.get(source_lang, '源语言')}医学文本翻译成{SUPPORTED_LANGUAGES.get(target_lang, '目标语言')}。
+这是一篇关于{domain.replace('_', ' ')}领域的医学文本。请确保翻译准确、专业，并保持医学术语的一致性。
+
+源文本:
+{text}
+
+"""
+    
+    if context:
+        prompt += f"\n上下文信息:\n{context}\n"
+    
+    if reference:
+        prompt += f"""
+参考译文（翻译记忆中相似句子的已有译文，仅供保持术语和表述一致；两句可能在否定、数值、主语等处不同，请以源文本的含义为准）:
+相似原文: {reference["source_text"]}
+相似译文: {reference["translation"]}
+"""
+    
+    return prompt
+
+
+def _clean_translation(translation: str) -> str:
+    """去除翻译结果的空白和前缀"""
+    translation = translation.strip()
+    
+    # 如果翻译结果以"翻译:"开头，移除这个前缀
+    prefixes = ["翻译:", "翻译：", "Translation:", "Translated text:"]
+    for prefix in prefixes:
+        if translation.startswith(prefix):
+            translation = translation[len(prefix):].strip()
+    
+    return translation
+
+
 def _translate_with_ai(text: str, 
                       source_lang: str, 
                       target_lang: str, 
                       domain: str = "general",
-                      context: Optional[str] = None) -> Dict[str, Any]:
+                      context: Optional[str] = None,
+                      reference: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     使用AWS Bedrock进行AI翻译
     
@@ -823,61 +1192,18 @@ def _translate_with_ai(text: str,
         target_lang (str): 目标语言代码
         domain (str): 医学领域
         context (Optional[str]): 上下文信息
+        reference (Optional[Dict[str, Any]]): 翻译记忆中相似片段的匹配结果（作为参考译文）
         
     Returns:
         Dict[str, Any]: 翻译结果
     """
     try:
-        # 创建Bedrock客户端
-        bedrock_runtime = boto3.client(
-            service_name='bedrock-runtime',
-            region_name='us-west-2'  # 使用适当的区域
-        )
-        
-        # 构建提示词
-        prompt = f"""请将以下{SUPPORTED_LANGUAGES.get(source_lang, '源语言')}医学文本翻译成{SUPPORTED_LANGUAGES.get(target_lang, '目标语言')}。
-这是一篇关于{domain.replace('_', ' ')}领域的医学文本。请确保翻译准确、专业，并保持医学术语的一致性。
-
-源文本:
-{text}
-
-"""
-        
-        if context:
-            prompt += f"\n上下文信息:\n{context}\n"
-        
-        # 调用Claude模型
-        response = bedrock_runtime.invoke_model(
-            modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 4096,
-                "temperature": 0.1,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            })
-        )
-        
-        # 解析响应
-        response_body = json.loads(response['body'].read().decode('utf-8'))
-        translation = response_body['content'][0]['text']
-        
-        # 清理翻译结果
-        translation = translation.strip()
-        
-        # 如果翻译结果以"翻译:"开头，移除这个前缀
-        prefixes = ["翻译:", "翻译：", "Translation:", "Translated text:"]
-        for prefix in prefixes:
-            if translation.startswith(prefix):
-                translation = translation[len(prefix):].strip()
+        prompt = _build_translation_prompt(text, source_lang, target_lang, domain, context, reference)
+        translation = _invoke_bedrock(prompt)
         
         return {
             "success": True,
-            "translation": translation
+            "translation": _clean_translation(translation)
         }
     
     except ClientError as e:
@@ -892,6 +1218,56 @@ def _translate_with_ai(text: str,
         }
 
 
+def _translate_segments_with_ai(segments: List[str],
+                                source_lang: str,
+                                target_lang: str,
+                                domain: str = "general",
+                                context: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    在一个请求中翻译多个片段
+    
+    片段以编号标记分隔，模型按相同标记返回译文；返回的标记不完整时逐个片段重新翻译。
+    
+    Returns:
+        List[Dict[str, Any]]: 与片段顺序一致的翻译结果
+    """
+    if len(segments) == 1:
+        return [_translate_with_ai(segments[0], source_lang, target_lang, domain, context)]
+    
+    marked_text = "\n".join(f"[[SEG-{i}]]\n{segment}" for i, segment in enumerate(segments, 1))
+    prompt = f"""请将以下{len(segments)}个{SUPPORTED_LANGUAGES.get(source_lang, '源语言')}医学文本片段逐段翻译成{SUPPORTED_LANGUAGES.get(target_lang, '目标语言')}。
+这是一篇关于{domain.replace('_', ' ')}领域的医学文档。请确保翻译准确、专业，并保持医学术语的一致性。
+每个片段以[[SEG-编号]]标记开头。请在每段译文前保留相同的标记，不要合并、拆分或遗漏片段，只输出标记和译文。
+
+{marked_text}
+
+"""
+    
+    if context:
+        prompt += f"\n上下文信息:\n{context}\n"
+    
+    try:
+        response_text = _invoke_bedrock(prompt)
+    except ClientError as e:
+        return [{"success": False, "error": f"AWS Bedrock API错误: {str(e)}"}] * len(segments)
+    except Exception as e:
+        return [{"success": False, "error": f"AI翻译错误: {str(e)}"}] * len(segments)
+    
+    # 按标记拆分译文
+    parts = re.split(r'\[\[SEG-(\d+)\]\]', response_text)
+    translations: Dict[int, str] = {}
+    for number, translation in zip(parts[1::2], parts[2::2]):
+        translations[int(number)] = _clean_translation(translation)
+    
+    results = []
+    for i, segment in enumerate(segments, 1):
+        if translations.get(i):
+            results.append({"success": True, "translation": translations[i]})
+        else:
+            results.append(_translate_with_ai(segment, source_lang, target_lang, domain, context))
+    return results
+
+
 def _find_abbreviations(text: str, lang: str, domain: str) -> List[Dict[str, Any]]:
     """
     在文本中查找医学缩写
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+translation_memory.py - 医学文档翻译记忆库工具
+
+该工具提供了跨文档的片段级翻译复用功能。
+翻译记忆以规范化后的源文本片段、语言对、医学领域和词库版本为键持久化保存，
+完全相同的片段直接复用译文；相似片段通过MinHash局部敏感哈希索引查找，
+其译文标记为需要复核，只作为翻译参考，不直接作为结果。
+同时统计命中率和节省的模型调用token数。
+"""
+
+import os
+import json
+import re
+import hashlib
+import datetime
+import sqlite3
+import struct
+import threading
+import unicodedata
+from typing import Dict, List, Any, Optional, Tuple, Set
+
+from strands import tool
+
+
+# 默认翻译记忆目录
+DEFAULT_MEMORY_DIR = os.path.join(".cache", "medical_translator", "memory")
+
+# 翻译记忆数据库文件名
+MEMORY_DB_NAME = "translation_memory.db"
+
+# 模糊匹配配置
+FUZZY_MATCH_THRESHOLD = 0.9   # 模糊匹配所需的最小相似度（字符n-gram的Jaccard相似度）
+FUZZY_MIN_CHARS = 30          # 短于该长度的片段只做精确匹配
+SHINGLE_SIZE = 4              # 字符n-gram长度
+MINHASH_PERMUTATIONS = 64     # MinHash签名长度
+LSH_BANDS = 16                # 局部敏感哈希分段数（每段 MINHASH_PERMUTATIONS / LSH_BANDS 行）
+FUZZY_MAX_CANDIDATES = 50     # 每次模糊查询最多校验的候选片段数
+
+# MinHash使用的哈希参数（固定种子，保证签名跨进程一致）
+_MERSENNE_PRIME = (1 << 61) - 1
+_MINHASH_PARAMS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % (_MERSENNE_PRIME - 1) + 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME
+    )
+    for i in range(MINHASH_PERMUTATIONS)
+]
+
+# 统计项
+_STAT_NAMES = ("lookups", "exact_hits", "fuzzy_hits", "misses", "stored", "saved_tokens")
+
+
+@tool
+def get_translation_memory_stats(memory_dir: Optional[str] = None) -> str:
+    """
+    获取翻译记忆库的统计信息，包括片段数量、命中率和节省的token数
+
+    Args:
+        memory_dir (Optional[str]): 翻译记忆目录（可选）
+
+    Returns:
+        str: JSON格式的统计信息
+    """
+    try:
+        memory = get_translation_memory(memory_dir)
+
+        return json.dumps({
+            "success": True,
+            **memory.stats()
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"获取翻译记忆统计信息时出错: {str(e)}"
+        }, ensure_ascii=False)
+
+
+@tool
+def search_translation_memory(text: str,
+                              source_lang: str,
+                              target_lang: str,
+                              domain: str = "general",
+                              glossary_version: Optional[str] = None,
+                              fuzzy_threshold: float = FUZZY_MATCH_THRESHOLD,
+                              memory_dir: Optional[str] = None) -> str:
+    """
+    在翻译记忆库中查找片段的已有译文
+
+    Args:
+        text (str): 源文本片段
+        source_lang (str): 源语言代码
+        target_lang (str): 目标语言代码
+        domain (str): 医学领域（默认为'general'）
+        glossary_version (Optional[str]): 词库版本标识（可选）
+        fuzzy_threshold (float): 模糊匹配的最小相似度
+        memory_dir (Optional[str]): 翻译记忆目录（可选）
+
+    Returns:
+        str: JSON格式的查找结果
+    """
+    try:
+        memory = get_translation_memory(memory_dir)
+        match = memory.lookup(text, source_lang, target_lang, domain, glossary_version,
+                              fuzzy_threshold=fuzzy_threshold, record_stats=False)
+
+        return json.dumps({
+            "success": True,
+            "found": match is not None,
+            "match": match
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"查找翻译记忆时出错: {str(e)}"
+        }, ensure_ascii=False)
+
+
+@tool
+def clear_translation_memory(older_than_days: Optional[int] = None,
+                             reset_stats: bool = False,
+                             memory_dir: Optional[str] = None) -> str:
+    """
+    清除翻译记忆
+
+    Args:
+        older_than_days (Optional[int]): 只清除指定天数内未被使用的片段（可选）
+        reset_stats (bool): 是否同时重置统计信息
+        memory_dir (Optional[str]): 翻译记忆目录（可选）
+
+    Returns:
+        str: JSON格式的操作结果
+    """
+    try:
+        memory = get_translation_memory(memory_dir)
+        deleted_count = memory.clear(older_than_days, reset_stats)
+
+        return json.dumps({
+            "success": True,
+            "message": f"已清除{deleted_count}个翻译记忆片段",
+            "deleted_count": deleted_count
+        }, ensure_ascii=False)
+
+    except Exception as e:
+        return json.dumps({
+            "success": False,
+            "error": f"清除翻译记忆时出错: {str(e)}"
+        }, ensure_ascii=False)
+
+
+class TranslationMemory:
+    """
+    持久化翻译记忆库（SQLite）
+
+    片段按作用域（语言对、领域、词库版本）隔离；精确匹配按规范化文本的哈希查找，
+    模糊匹配先通过MinHash分段桶筛选候选片段，再计算n-gram集合的Jaccard相似度。
+    """
+
+    def __init__(self, memory_dir: Optional[str] = None):
+        self.memory_dir = memory_dir or DEFAULT_MEMORY_DIR
+        os.makedirs(self.memory_dir, exist_ok=True)
+        self.db_path = os.path.join(self.memory_dir, MEMORY_DB_NAME)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS segments (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    segment_key TEXT NOT NULL UNIQUE,
+                    scope TEXT NOT NULL,
+                    source_lang TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    glossary_version TEXT NOT NULL,
+                    source_text TEXT NOT NULL,
+                    normalized_text TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    glossary_matches TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    created_time TEXT NOT NULL,
+                    last_used_time TEXT NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS lsh_buckets (
+                    scope TEXT NOT NULL,
+                    band INTEGER NOT NULL,
+                    bucket TEXT NOT NULL,
+                    segment_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh_buckets (scope, band, bucket);
+                CREATE INDEX IF NOT EXISTS idx_lsh_segment ON lsh_buckets (segment_id);
+                CREATE TABLE IF NOT EXISTS stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+            """)
+
+    def lookup(self,
+               text: str,
+               source_lang: str,
+               target_lang: str,
+               domain: str = "general",
+               glossary_version: Optional[str] = None,
+               fuzzy: bool = True,
+               fuzzy_threshold: float = FUZZY_MATCH_THRESHOLD,
+               record_stats: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        查找片段的已有译文
+
+        模糊匹配要求片段中的数字（剂量、编号等）与记忆片段完全一致。模糊匹配的译文属于
+        另一个源片段（可能相差否定词等），结果带 needs_review=True，只能作为参考译文。
+
+        Returns:
+            Optional[Dict[str, Any]]: 匹配结果（含match_type、similarity和needs_review），未命中时返回None
+        """
+        normalized = normalize_segment(text)
+        if not normalized:
+            return None
+
+        scope = _memory_scope(source_lang, target_lang, domain, glossary_version)
+        segment_key = _segment_key(scope, normalized)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM segments WHERE segment_key = ?", (segment_key,)
+            ).fetchone()
+            match_type, similarity = "exact", 1.0
+
+            if row is None and fuzzy and len(normalized) >= FUZZY_MIN_CHARS:
+                row, similarity = self._find_similar(scope, normalized, fuzzy_threshold)
+                match_type = "fuzzy"
+
+            with self._conn:
+                if row is None:
+                    if record_stats:
+                        self._add_stats(lookups=1, misses=1)
+                    return None
+
+                self._conn.execute(
+                    "UPDATE segments SET hit_count = hit_count + 1, last_used_time = ? WHERE id = ?",
+                    (datetime.datetime.now().isoformat(), row["id"])
+                )
+                if record_stats:
+                    # 只有精确匹配可以直接复用译文、省去模型调用
+                    saved_tokens = (estimate_tokens(row["source_text"]) + estimate_tokens(row["translation"])
+                                    if match_type == "exact" else 0)
+                    self._add_stats(**{
+                        "lookups": 1,
+                        f"{match_type}_hits": 1,
+                        "saved_tokens": saved_tokens
+                    })
+
+        return {
+            "match_type": match_type,
+            "similarity": round(similarity, 4),
+            "needs_review": match_type != "exact",
+            "source_text": row["source_text"],
+            "translation": row["translation"],
+            "glossary_matches": json.loads(row["glossary_matches"]),
+            "confidence": row["confidence"],
+            "hit_count": row["hit_count"] + 1
+        }
+
+    def store(self,
+              text: str,
+              translation: str,
+              source_lang: str,
+              target_lang: str,
+              domain: str = "general",
+              glossary_version: Optional[str] = None,
+              glossary_matches: Optional[List[Dict[str, Any]]] = None,
+              confidence: float = 1.0) -> None:
+        """保存片段译文；相同片段已存在时覆盖译文"""
+        normalized = normalize_segment(text)
+        if not normalized or not translation:
+            return
+
+        scope = _memory_scope(source_lang, target_lang, domain, glossary_version)
+        segment_key = _segment_key(scope, normalized)
+        now = datetime.datetime.now().isoformat()
+        bands = _lsh_bands(normalized) if len(normalized) >= FUZZY_MIN_CHARS else []
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM segments WHERE segment_key = ?", (segment_key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE segments SET translation = ?, glossary_matches = ?, confidence = ?, last_used_time = ? WHERE id = ?",
+                    (translation, json.dumps(glossary_matches or [], ensure_ascii=False), confidence, now, row["id"])
+                )
+                return
+
+            cursor = self._conn.execute(
+                """INSERT INTO segments (segment_key, scope, source_lang, target_lang, domain, glossary_version,
+                                         source_text, normalized_text, translation, glossary_matches, confidence,
+                                         created_time, last_used_time)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (segment_key, scope, source_lang, target_lang, domain, glossary_version or "",
+                 text, normalized, translation, json.dumps(glossary_matches or [], ensure_ascii=False),
+                 confidence, now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO lsh_buckets (scope, band, bucket, segment_id) VALUES (?, ?, ?, ?)",
+                [(scope, band, bucket, cursor.lastrowid) for band, bucket in enumerate(bands)]
+            )
+            self._add_stats(stored=1)
+
+    def stats(self) -> Dict[str, Any]:
+        """翻译记忆统计信息"""
+        with self._lock:
+            values = {name: 0 for name in _STAT_NAMES}
+            for row in self._conn.execute("SELECT name, value FROM stats"):
+                values[row["name"]] = row["value"]
+            segment_count = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+            language_pairs = [
+                {"source_lang": row[0], "target_lang": row[1], "segment_count": row[2]}
+                for row in self._conn.execute(
+                    "SELECT source_lang, target_lang, COUNT(*) FROM segments GROUP BY source_lang, target_lang"
+                )
+            ]
+
+        hits = values["exact_hits"] + values["fuzzy_hits"]
+        return {
+            "memory_dir": self.memory_dir,
+            "segment_count": segment_count,
+            "language_pairs": language_pairs,
+            "lookups": values["lookups"],
+            "exact_hits": values["exact_hits"],
+            "fuzzy_hits": values["fuzzy_hits"],
+            "misses": values["misses"],
+            "hit_rate": round(hits / values["lookups"], 4) if values["lookups"] else 0.0,
+            "stored_segments": values["stored"],
+            "saved_tokens": values["saved_tokens"]
+        }
+
+    def clear(self, older_than_days: Optional[int] = None, reset_stats: bool = False) -> int:
+        """
+        删除片段
+
+        Returns:
+            int: 删除的片段数
+        """
+        with self._lock, self._conn:
+            if older_than_days is None:
+                deleted_count = self._conn.execute("DELETE FROM segments").rowcount
+                self._conn.execute("DELETE FROM lsh_buckets")
+            else:
+                cutoff = (datetime.datetime.now() - datetime.timedelta(days=older_than_days)).isoformat()
+                self._conn.execute(
+                    "DELETE FROM lsh_buckets WHERE segment_id IN (SELECT id FROM segments WHERE last_used_time < ?)",
+                    (cutoff,)
+                )
+                deleted_count = self._conn.execute(
+                    "DELETE FROM segments WHERE last_used_time < ?", (cutoff,)
+                ).rowcount
+
+            if reset_stats:
+                self._conn.execute("DELETE FROM stats")
+
+        return deleted_count
+
+    def _find_similar(self,
+                      scope: str,
+                      normalized: str,
+                      threshold: float) -> Tuple[Optional[sqlite3.Row], float]:
+        """通过LSH桶查找候选片段并返回相似度最高且不低于阈值的片段"""
+        bands = _lsh_bands(normalized)
+        candidate_counts: Dict[int, int] = {}
+        for band, bucket in enumerate(bands):
+            for (segment_id,) in self._conn.execute(
+                "SELECT segment_id FROM lsh_buckets WHERE scope = ? AND band = ? AND bucket = ?",
+                (scope, band, bucket)
+            ):
+                candidate_counts[segment_id] = candidate_counts.get(segment_id, 0) + 1
+        if not candidate_counts:
+            return None, 0.0
+
+        # 共享桶越多的候选越可能相似，优先校验
+        candidates = sorted(candidate_counts, key=candidate_counts.get, reverse=True)[:FUZZY_MAX_CANDIDATES]
+        shingles = _shingles(normalized)
+        numbers = _NUMBER_PATTERN.findall(normalized)
+
+        best_row, best_similarity = None, 0.0
+        for segment_id in candidates:
+            row = self._conn.execute("SELECT * FROM segments WHERE id = ?", (segment_id,)).fetchone()
+            if row is None or _NUMBER_PATTERN.findall(row["normalized_text"]) != numbers:
+                continue
+            candidate_shingles = _shingles(row["normalized_text"])
+            similarity = len(shingles & candidate_shingles) / len(shingles | candidate_shingles)
+            if similarity >= threshold and similarity > best_similarity:
+                best_row, best_similarity = row, similarity
+
+        return best_row, best_similarity
+
+    def _add_stats(self, **increments: int) -> None:
+        """累加统计项（调用方持有锁和事务）"""
+        self._conn.executemany(
+            "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            list(increments.items())
+        )
+
+
+# 每个目录共享一个翻译记忆实例
+_memories: Dict[str, TranslationMemory] = {}
+_memories_lock = threading.Lock()
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)*')
+_CJK_PATTERN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+
+
+def get_translation_memory(memory_dir: Optional[str] = None) -> TranslationMemory:
+    """
+    获取指定目录的翻译记忆实例（进程内共享）
+
+    Args:
+        memory_dir (Optional[str]): 翻译记忆目录（可选）
+
+    Returns:
+        TranslationMemory: 翻译记忆实例
+    """
+    memory_dir = os.path.abspath(memory_dir or DEFAULT_MEMORY_DIR)
+    with _memories_lock:
+        memory = _memories.get(memory_dir)
+        if memory is None:
+            memory = _memories[memory_dir] = TranslationMemory(memory_dir)
+        return memory
+
+
+# 辅助函数
+def normalize_segment(text: str) -> str:
+    """规范化片段：Unicode NFKC规范化并合并空白字符"""
+    return _WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计文本的token数：中日韩字符按每字一个token，其余按每4个字符一个token"""
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    return cjk_count + (len(text) - cjk_count + 3) // 4
+
+
+def _memory_scope(source_lang: str, target_lang: str, domain: str, glossary_version: Optional[str]) -> str:
+    return hashlib.sha1(f"{source_lang}:{target_lang}:{domain}:{glossary_version or ''}".encode("utf-8")).hexdigest()
+
+
+def _segment_key(scope: str, normalized: str) -> str:
+    return hashlib.sha256(f"{scope}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+def _shingles(normalized: str) -> Set[str]:
+    """片段的字符n-gram集合（忽略大小写）"""
+    text = normalized.lower()
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _lsh_bands(normalized: str) -> List[str]:
+    """计算MinHash签名并按分段生成LSH桶标识"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in _shingles(normalized)
+    ]
+    signature = [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _MINHASH_PARAMS
+    ]
+
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    return [
+        hashlib.blake2b(struct.pack(f"<{rows}Q", *signature[band * rows:(band + 1) * rows]), digest_size=8).hexdigest()
+        for band in range(LSH_BANDS)
+    ]
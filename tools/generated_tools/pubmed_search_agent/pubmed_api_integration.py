@@ -19,6 +19,8 @@ from urllib.parse import urlencode
 from functools import lru_cache
 from strands import tool
 
+from tools.template_tools.common.tiered_cache import get_cache
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -39,9 +41,9 @@ REQUEST_DELAY = 0.34  # ~3 requests per second
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # seconds
 
-# In-memory cache for API responses
-CACHE = {}
+# Tiered cache for API responses (in-memory LRU + shared on-disk store)
 CACHE_EXPIRY = 3600  # 1 hour in seconds
+CACHE = get_cache("pubmed_api_integration", default_ttl=CACHE_EXPIRY)
 
 
 def _generate_cache_key(url: str, params: Dict[str, Any]) -> str:
@@ -51,20 +53,6 @@ def _generate_cache_key(url: str, params: Dict[str, Any]) -> str:
     return hashlib.md5(key_str.encode()).hexdigest()
 
 
-def _get_cached_response(cache_key: str) -> Optional[Dict[str, Any]]:
-    """Retrieve a cached response if it exists and is not expired."""
-    if cache_key in CACHE:
-        timestamp, data = CACHE[cache_key]
-        if time.time() - timestamp < CACHE_EXPIRY:
-            return data
-    return None
-
-
-def _cache_response(cache_key: str, data: Dict[str, Any]) -> None:
-    """Cache an API response with the current timestamp."""
-    CACHE[cache_key] = (time.time(), data)
-
-
 def _make_api_request(url: str, params: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
     """Make a request to the NCBI E-utilities API with rate limiting and caching."""
     # Add common parameters
@@ -74,14 +62,16 @@ def _make_api_request(url: str, params: Dict[str, Any], use_cache: bool = True)
         "email": "agent@example.com"  # Should be replaced with a valid email in production
     })
     
-    # Check cache first if enabled
+    # Serve from cache if enabled; concurrent identical requests share one API call
     if use_cache:
         cache_key = _generate_cache_key(url, params)
-        cached_data = _get_cached_response(cache_key)
-        if cached_data:
-            logger.debug(f"Cache hit for {url}")
-            return cached_data
+        return CACHE.get_or_compute(cache_key, lambda: _request_with_retries(url, params))
     
+    return _request_with_retries(url, params)
+
+
+def _request_with_retries(url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Request the NCBI E-utilities API with rate limiting and retries, without caching."""
     # Implement rate limiting
     time.sleep(REQUEST_DELAY)
     
@@ -98,11 +88,6 @@ def _make_api_request(url: str, params: Dict[str, Any], use_cache: bool = True)
                 # Some NCBI endpoints return XML by default
                 data = {"raw_content": response.text}
             
-            # Cache the successful response
-            if use_cache:
-                cache_key = _generate_cache_key(url, params)
-                _cache_response(cache_key, data)
-            
             return data
             
         except requests.exceptions.RequestException as e:
@@ -844,14 +829,14 @@ def pubmed_clear_cache() -> str:
         JSON string with cache clearing result
     """
     try:
-        cache_size = len(CACHE)
-        CACHE.clear()
+        cache_size = CACHE.clear()["deleted_entries"]
         
         return json.dumps({
             "success": True,
             "message": f"Cache cleared successfully. {cache_size} entries removed.",
             "cache_size_before": cache_size,
-            "cache_size_after": 0
+            "cache_size_after": 0,
+            "cache_stats": CACHE.stats()
         })
         
     except Exception as e:
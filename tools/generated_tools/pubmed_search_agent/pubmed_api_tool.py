@@ -19,6 +19,8 @@ from urllib.parse import urlencode
 import logging
 from strands import tool
 
+from tools.template_tools.common.tiered_cache import get_cache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -27,15 +29,13 @@ logger = logging.getLogger(__name__)
 BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 DEFAULT_RETMAX = 20
 MAX_RETMAX = 100
-DEFAULT_CACHE_DIR = ".pubmed_cache"
+DEFAULT_CACHE_DIR = None  # None uses the shared tool cache file
 DEFAULT_CACHE_EXPIRY = 24  # hours
+CACHE_NAMESPACE = "pubmed_api_tool"
 API_KEY_ENV_VAR = "PUBMED_API_KEY"
 DEFAULT_DELAY = 0.34  # seconds between requests (3 requests per second without API key)
 DEFAULT_DELAY_WITH_KEY = 0.1  # seconds between requests with API key (10 requests per second)
 
-# Initialize cache directory
-os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
-
 
 class PubMedRateLimiter:
     """Rate limiter for PubMed API requests"""
@@ -57,56 +57,53 @@ class PubMedRateLimiter:
 
 
 class PubMedCache:
-    """Cache manager for PubMed API responses"""
+    """Cache manager for PubMed API responses, backed by the shared tiered cache"""
     
-    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, expiry_hours: int = DEFAULT_CACHE_EXPIRY):
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR, expiry_hours: int = DEFAULT_CACHE_EXPIRY):
         self.cache_dir = cache_dir
         self.expiry_hours = expiry_hours
-        os.makedirs(self.cache_dir, exist_ok=True)
+        self.store = get_cache(CACHE_NAMESPACE, cache_dir=cache_dir, default_ttl=expiry_hours * 3600)
     
     def get_cache_key(self, url: str, params: Dict[str, Any]) -> str:
         """Generate a cache key from URL and parameters"""
         param_str = json.dumps(params, sort_keys=True)
         return hashlib.md5(f"{url}:{param_str}".encode()).hexdigest()
     
-    def get_cache_path(self, cache_key: str) -> str:
-        """Get the file path for a cache key"""
-        return os.path.join(self.cache_dir, f"{cache_key}.json")
-    
     def get(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Get cached response if it exists and is not expired"""
-        cache_key = self.get_cache_key(url, params)
-        cache_path = self.get_cache_path(cache_key)
-        
-        if not os.path.exists(cache_path):
-            return None
-        
         try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
-            
-            # Check if cache is expired
-            cached_time = datetime.fromisoformat(cached_data.get('cached_at', ''))
-            if datetime.now() - cached_time > timedelta(hours=self.expiry_hours):
-                return None
-            
-            return cached_data
-        except (json.JSONDecodeError, KeyError, ValueError):
+            return self.store.get(self.get_cache_key(url, params))
+        except Exception as e:
+            logger.warning(f"Failed to read from cache: {e}")
             return None
     
     def set(self, url: str, params: Dict[str, Any], data: Dict[str, Any]) -> None:
         """Cache response data"""
-        cache_key = self.get_cache_key(url, params)
-        cache_path = self.get_cache_path(cache_key)
-        
         # Add cache metadata
         data['cached_at'] = datetime.now().isoformat()
         
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.store.set(self.get_cache_key(url, params), data, ttl=self.expiry_hours * 3600)
         except Exception as e:
             logger.warning(f"Failed to write to cache: {e}")
+    
+    def get_or_fetch(self, url: str, params: Dict[str, Any], fetch) -> Dict[str, Any]:
+        """Return the cached response or call fetch(), coalescing concurrent identical requests"""
+        def load():
+            data = fetch()
+            if "error" not in data:
+                data['cached_at'] = datetime.now().isoformat()
+            return data
+        
+        return self.store.get_or_compute(
+            self.get_cache_key(url, params), load,
+            ttl=self.expiry_hours * 3600,
+            cache_if=lambda data: "error" not in data
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics of the underlying cache"""
+        return self.store.stats()
 
 
 class PubMedClient:
@@ -126,12 +123,14 @@ class PubMedClient:
         if self.api_key:
             params['api_key'] = self.api_key
         
-        # Check cache first
+        # Serve from cache; concurrent identical requests share one API call
         if self.use_cache:
-            cached_response = self.cache.get(url, params)
-            if cached_response:
-                return cached_response
+            return self.cache.get_or_fetch(url, params, lambda: self._fetch(url, endpoint, params))
         
+        return self._fetch(url, endpoint, params)
+    
+    def _fetch(self, url: str, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the API without caching"""
         # Respect rate limits
         self.rate_limiter.wait()
         
@@ -141,15 +140,8 @@ class PubMedClient:
             
             # Parse response based on format
             if endpoint in ['esearch.fcgi', 'esummary.fcgi']:
-                result = self._parse_response(response.text, endpoint)
-            else:
-                result = {'raw_text': response.text}
-            
-            # Cache the result
-            if self.use_cache:
-                self.cache.set(url, params, result)
-            
-            return result
+                return self._parse_response(response.text, endpoint)
+            return {'raw_text': response.text}
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {e}")
             return {"error": str(e)}
@@ -7,21 +7,20 @@
 
 import json
 import os
-import time
-import hashlib
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
 from strands import tool
 
+from tools.template_tools.common.tiered_cache import get_cache
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 默认缓存目录
-DEFAULT_CACHE_DIR = ".cache/stock_analysis_agent"
-os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+# 财报数据缓存（内存LRU + 共享SQLite磁盘层）
+_cache = get_cache("stock_analysis_agent", default_ttl=24 * 3600)
 
 
 @tool
@@ -777,22 +776,14 @@ def fetch_comparable_companies(symbol: str, sector: str = None) -> str:
 # 缓存辅助函数
 
 def _get_from_cache(cache_key: str, expiration_hours: int = 24) -> Optional[str]:
-    """从缓存获取数据"""
+    """从缓存获取数据（过期时间以写入时的expiration_hours为准）"""
     try:
-        cache_file = os.path.join(DEFAULT_CACHE_DIR, f"{_sanitize_key(cache_key)}.json")
-        
-        if not os.path.exists(cache_file):
-            return None
-        
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_item = json.load(f)
-        
-        # 检查是否过期
-        if time.time() > cache_item.get("expires_at", 0):
+        data = _cache.get(cache_key)
+        if data is None:
             return None
         
         logger.info(f"使用缓存数据: {cache_key}")
-        return cache_item.get("data", "")
+        return data
         
     except Exception as e:
         logger.warning(f"读取缓存失败: {str(e)}")
@@ -802,18 +793,7 @@ def _get_from_cache(cache_key: str, expiration_hours: int = 24) -> Optional[str]
 def _save_to_cache(cache_key: str, data: str, expiration_hours: int = 24) -> None:
     """保存数据到缓存"""
     try:
-        cache_file = os.path.join(DEFAULT_CACHE_DIR, f"{_sanitize_key(cache_key)}.json")
-        
-        cache_item = {
-            "key": cache_key,
-            "data": data,
-            "created_at": time.time(),
-            "expires_at": time.time() + (expiration_hours * 3600),
-            "expiration_hours": expiration_hours
-        }
-        
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_item, f, ensure_ascii=False, indent=2)
+        _cache.set(cache_key, data, ttl=expiration_hours * 3600)
         
         logger.info(f"数据已缓存: {cache_key}")
         
@@ -821,11 +801,6 @@ def _save_to_cache(cache_key: str, data: str, expiration_hours: int = 24) -> Non
         logger.warning(f"保存缓存失败: {str(e)}")
 
 
-def _sanitize_key(key: str) -> str:
-    """将缓存键转换为安全的文件名"""
-    return hashlib.md5(key.encode('utf-8')).hexdigest()
-
-
 def _safe_float(value: Any) -> Optional[float]:
     """安全地转换为浮点数"""
     try:
@@ -443,7 +443,8 @@ def init_index():
 if __name__ == "__main__":
     # 添加命令行参数type，分别是init和delete
     parser = argparse.ArgumentParser()
-    parser.add_argument("--type", type=str, help="init/delete/test/generate")
+    parser.add_argument("--type", type=str, help="init/delete/test/generate/index")
+    parser.add_argument("--quantize", action="store_true", help="index: 使用int8量化存储本地向量索引")
     args = parser.parse_args()
     if args.type == "init":
         init_index()
@@ -453,6 +454,10 @@ if __name__ == "__main__":
         test_embeddings("Which drug is the best choice for managing elevated intraocular pressure in a 35-year-old pregnant patient with primary hereditary glaucoma, currently in her second trimester and without any respiratory or cardiac history?")
     elif args.type == "generate":
         generate_toolslist_from_tooluniverse()
+    elif args.type == "index":
+        # 从本地embeddings缓存构建内存映射向量索引（供tools_embedding_search离线检索）
+        from tools.generated_tools.tooluniverse.embedding.vector_index import build_vector_index
+        build_vector_index(quantize=args.quantize)
     else:
         print("请输入正确的参数")
         exit(1)
@@ -1,12 +1,8 @@
-# 使用 Amazon Titan 文本嵌入 V2 来生成和打印嵌入。
-import boto3 
+# 使用 Amazon Titan 文本嵌入 V2 生成查询向量，在本地向量索引（或 S3 Vectors）中检索相似工具。
 import json
+from typing import Optional
 from strands import tool
-from tools.generated_tools.tooluniverse.embedding.tools_embedding import get_bedrock_client, get_s3vectors_client
-
-s3vectors_bucket = "curebench"
-indexName = "tools-index"
-modelId = "amazon.titan-embed-text-v2:0"
+from tools.generated_tools.tooluniverse.embedding.vector_index import search_tools, get_backend
 
  
 @tool(description="""
@@ -17,14 +13,18 @@ modelId = "amazon.titan-embed-text-v2:0"
 """)
 def search_from_s3vectors_by_embeddings(
     input_text: str = "", 
-    limit: int = 3
+    limit: int = 3,
+    backend: Optional[str] = None
 ):
     """
-    Search for tools using semantic similarity in the S3 Vectors database.
+    Search for tools using semantic similarity in the local vector index or the S3 Vectors database.
     
     Args:
         input_text (str): The text question/query describing the desired functionality or tool requirements.
         limit (int): The maximum number of similar tools to return. Defaults to 3.
+        backend (str, optional): "local", "s3vectors" or "auto". Defaults to the
+            TOOLUNIVERSE_VECTOR_BACKEND environment variable, then "auto"
+            (local index when the embeddings cache exists, otherwise S3 Vectors).
     Returns:
         List[Dict]: A list of dictionaries containing:
             - key (str): The unique identifier/key of the tool
@@ -36,41 +36,9 @@ def search_from_s3vectors_by_embeddings(
             - data (Dict, optional): Vector data if requested
     """
     try:
-        # Initialize AWS clients
-        bedrock_client = get_bedrock_client()
-        s3vectors_client = get_s3vectors_client()
-        
-        # Validate input parameters
-        if not input_text.strip():
-            raise ValueError("input_text cannot be empty")
-        if not s3vectors_bucket.strip():
-            raise ValueError("s3vectors_bucket cannot be empty")
-        
-        # Generate embedding vector from input text using Bedrock
-        request_body = json.dumps({"inputText": input_text.strip()})
-        
-        print(f"Generating embedding for query: '{input_text[:100]}...'")
-        response = bedrock_client.invoke_model(
-            modelId=modelId, 
-            body=request_body
-        )
-
-        # Parse the embedding response
-        model_response = json.loads(response["body"].read())
-        embedding_vector = model_response["embedding"]
-
-        # Perform similarity search in S3 Vectors
-        query_response = s3vectors_client.query_vectors(
-            vectorBucketName=s3vectors_bucket,
-            indexName=indexName,
-            queryVector={"float32": embedding_vector},
-            topK=limit,
-            returnDistance=True,
-            returnMetadata=True
-        )
-        
-        # Extract and format results
-        search_results = query_response["vectors"]
+        # Query embeddings are cached; the local backend searches a memory-mapped matrix without network calls
+        print(f"Searching tools ({get_backend(backend).name}) for query: '{input_text[:100]}...'")
+        search_results = search_tools(input_text, limit, backend)
         
         print(f"Found {len(search_results)} similar tools:")
         print("--------------------------------")
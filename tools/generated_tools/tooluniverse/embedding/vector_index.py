@@ -0,0 +1,466 @@
+# ToolUniverse 工具向量检索：本地内存映射向量索引 + 可插拔的检索后端。
+"""
+工具向量检索模块。
+
+本地后端把 save_embeddings_to_cache 生成的 embeddings JSON 转换为归一化的 float32 矩阵，
+保存为 .npy 并以内存映射方式加载，检索时用一次矩阵乘法计算余弦相似度并取 top-k，
+不需要任何网络调用（查询向量由可替换的 embedder 生成，并使用 LRU 缓存）。
+可选 int8 量化（每行一个缩放系数），索引体积约为 float32 的四分之一。
+
+S3 Vectors 作为远程后端保留，返回结果的格式与 query_vectors 相同：
+    {"key": ..., "metadata": {"id", "source_text", "genre"}, "distance": ...}
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import boto3
+import numpy as np
+
+s3vectors_bucket = "curebench"
+indexName = "tools-index"
+modelId = "amazon.titan-embed-text-v2:0"
+
+EMBEDDING_DIR = Path(__file__).resolve().parent
+
+# save_embeddings_to_cache 的默认输出位置
+DEFAULT_EMBEDDINGS_CACHE_FILE = EMBEDDING_DIR / "embeddings_cache.json"
+
+# 本地索引文件前缀：<prefix>.npy（float32）或 <prefix>.int8.npy + <prefix>.scales.npy，元数据为 <prefix>.json
+DEFAULT_INDEX_PREFIX = EMBEDDING_DIR / "tools_index"
+
+# 检索后端：auto 表示本地索引可用时使用本地，否则使用 S3 Vectors
+BACKEND_ENV = "TOOLUNIVERSE_VECTOR_BACKEND"
+DEFAULT_BACKEND = "auto"
+
+# 查询向量缓存的最大条目数
+QUERY_CACHE_MAX_ENTRIES = 1024
+
+# 计算相似度时每块处理的行数（int8 索引按块反量化，限制临时内存）
+SCORE_CHUNK_ROWS = 8192
+
+INDEX_FORMAT_VERSION = 1
+
+
+def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _source_signature(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _index_paths(prefix: Path) -> Dict[str, Path]:
+    prefix = Path(prefix)
+    return {
+        "meta": prefix.with_suffix(".json"),
+        "float32": prefix.with_suffix(".npy"),
+        "int8": prefix.with_suffix(".int8.npy"),
+        "scales": prefix.with_suffix(".scales.npy"),
+    }
+
+
+def build_vector_index(
+    cache_file: Path = DEFAULT_EMBEDDINGS_CACHE_FILE,
+    index_prefix: Path = DEFAULT_INDEX_PREFIX,
+    quantize: bool = False,
+) -> Dict[str, Any]:
+    """
+    从 embeddings 缓存 JSON 构建本地向量索引
+    
+    维度与多数向量不一致的条目（例如生成失败时写入的占位向量）和零向量会被跳过。
+    
+    Args:
+        cache_file: save_embeddings_to_cache 生成的 JSON 文件
+        index_prefix: 索引文件前缀
+        quantize: 是否使用 int8 量化存储
+    
+    Returns:
+        Dict: 索引元数据
+    """
+    cache_file = Path(cache_file)
+    with open(cache_file, 'r', encoding='utf-8') as f:
+        cache_data = json.load(f)
+    
+    embeddings = cache_data.get("embeddings", [])
+    tools_name = cache_data.get("tools_name", [])
+    tools_desc = cache_data.get("tools_desc", [])
+    genres = cache_data.get("genres", cache_data.get("genre")) or ['tooluniverse'] * len(tools_name)
+    
+    dimensions = [len(vector) for vector in embeddings]
+    if not dimensions:
+        raise ValueError(f"No embeddings found in {cache_file}")
+    dimension = max(set(dimensions), key=dimensions.count)
+    
+    items = []
+    rows = []
+    skipped = 0
+    for i, vector in enumerate(embeddings):
+        if len(vector) != dimension or not any(vector):
+            skipped += 1
+            continue
+        rows.append(vector)
+        items.append({
+            "key": tools_name[i],
+            "id": tools_name[i],
+            "source_text": tools_desc[i] if i < len(tools_desc) else "",
+            "genre": genres[i] if i < len(genres) else "tooluniverse",
+        })
+    
+    matrix = _l2_normalize(np.asarray(rows, dtype=np.float32))
+    paths = _index_paths(index_prefix)
+    paths["meta"].parent.mkdir(parents=True, exist_ok=True)
+    
+    if quantize:
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.round(matrix / scales[:, None]).astype(np.int8)
+        np.save(paths["int8"], quantized)
+        np.save(paths["scales"], scales.astype(np.float32))
+    else:
+        np.save(paths["float32"], matrix)
+    
+    meta = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "model": cache_data.get("metadata", {}).get("model", modelId),
+        "dimension": dimension,
+        "count": len(items),
+        "skipped": skipped,
+        "quantization": "int8" if quantize else "float32",
+        "source": _source_signature(cache_file),
+        "items": items,
+    }
+    with open(paths["meta"], 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    
+    print(f"Built {meta['quantization']} vector index with {len(items)} tools ({skipped} skipped): {paths['meta']}")
+    return meta
+
+
+class LocalVectorIndex:
+    """
+    内存映射的本地向量索引
+    
+    向量已归一化，余弦相似度即内积；distance = 1 - similarity，与 S3 Vectors 的 cosine 距离一致。
+    """
+    
+    def __init__(self, index_prefix: Path = DEFAULT_INDEX_PREFIX):
+        paths = _index_paths(index_prefix)
+        with open(paths["meta"], 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        
+        self.items: List[Dict[str, Any]] = self.meta["items"]
+        self.dimension: int = self.meta["dimension"]
+        self.quantization: str = self.meta.get("quantization", "float32")
+        
+        if self.quantization == "int8":
+            self.matrix = np.load(paths["int8"], mmap_mode='r')
+            self.scales = np.load(paths["scales"])
+        else:
+            self.matrix = np.load(paths["float32"], mmap_mode='r')
+            self.scales = None
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def is_stale(self, cache_file: Path) -> bool:
+        """索引是否落后于 embeddings 缓存文件"""
+        cache_file = Path(cache_file)
+        if not cache_file.exists():
+            return False
+        source = self.meta.get("source", {})
+        current = _source_signature(cache_file)
+        return source.get("size") != current["size"] or source.get("mtime_ns") != current["mtime_ns"]
+    
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        计算查询向量与全部索引向量的余弦相似度
+        
+        Args:
+            queries: (B, D) 查询矩阵
+        
+        Returns:
+            np.ndarray: (B, N) 相似度矩阵
+        """
+        queries = _l2_normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if queries.shape[1] != self.dimension:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match index dimension {self.dimension}")
+        
+        if self.scales is None:
+            return queries @ self.matrix.T
+        
+        result = np.empty((queries.shape[0], len(self.items)), dtype=np.float32)
+        for start in range(0, len(self.items), SCORE_CHUNK_ROWS):
+            block = np.asarray(self.matrix[start:start + SCORE_CHUNK_ROWS], dtype=np.float32)
+            result[:, start:start + len(block)] = (queries @ block.T) * self.scales[start:start + len(block)]
+        return result
+    
+    def search_batch(self, queries: np.ndarray, limit: int = 3) -> List[List[Dict[str, Any]]]:
+        """
+        批量检索 top-k
+        
+        Args:
+            queries: (B, D) 查询矩阵
+            limit: 每个查询返回的结果数
+        
+        Returns:
+            List: 每个查询的结果列表，按距离升序
+        """
+        scores = self.scores(queries)
+        limit = max(0, min(limit, scores.shape[1]))
+        if limit == 0:
+            return [[] for _ in range(scores.shape[0])]
+        
+        if limit < scores.shape[1]:
+            top = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        
+        results = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates], kind="stable")]
+            results.append([self._result(i, float(scores[row, i])) for i in ordered])
+        return results
+    
+    def search(self, query: Sequence[float], limit: int = 3) -> List[Dict[str, Any]]:
+        return self.search_batch(np.asarray([query], dtype=np.float32), limit)[0]
+    
+    def _result(self, position: int, similarity: float) -> Dict[str, Any]:
+        item = self.items[position]
+        return {
+            "key": item["key"],
+            "metadata": {
+                "id": item["id"],
+                "source_text": item["source_text"],
+                "genre": item["genre"],
+            },
+            "distance": round(1.0 - similarity, 6),
+        }
+
+
+# ---------------------------------------------------------------------------
+# 查询向量
+# ---------------------------------------------------------------------------
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_cached_client(service_name: str, region_name: str = "us-west-2"):
+    """获取进程内复用的 boto3 客户端"""
+    key = f"{service_name}:{region_name}"
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = boto3.client(service_name, region_name=region_name)
+        return client
+
+
+def bedrock_text_embedder(text: str) -> List[float]:
+    """使用 Bedrock Titan 文本嵌入模型生成查询向量"""
+    response = get_cached_client("bedrock-runtime").invoke_model(
+        modelId=modelId,
+        body=json.dumps({"inputText": text})
+    )
+    return json.loads(response["body"].read())["embedding"]
+
+
+class QueryEmbeddingCache:
+    """查询向量的 LRU 缓存，以（模型, 查询文本哈希）为键"""
+    
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+    
+    def get_or_compute(self, text: str, embedder: Callable[[str], List[float]]) -> List[float]:
+        key = hashlib.sha1(f"{modelId}\0{text}".encode("utf-8")).hexdigest()
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return vector
+        
+        vector = embedder(text)
+        
+        with self._lock:
+            self.stats["misses"] += 1
+            self._entries[key] = vector
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_query_cache = QueryEmbeddingCache()
+_query_embedder: Callable[[str], List[float]] = bedrock_text_embedder
+
+
+def set_query_embedder(embedder: Optional[Callable[[str], List[float]]]) -> None:
+    """替换查询向量生成函数（None 恢复为 Bedrock），用于离线环境和测试"""
+    global _query_embedder
+    _query_embedder = embedder or bedrock_text_embedder
+    _query_cache.clear()
+
+
+def embed_query(text: str) -> List[float]:
+    """生成查询向量（使用 LRU 缓存）"""
+    return _query_cache.get_or_compute(text.strip(), _query_embedder)
+
+
+# ---------------------------------------------------------------------------
+# 检索后端
+# ---------------------------------------------------------------------------
+
+class VectorSearchBackend:
+    """向量检索后端接口"""
+    
+    name = "base"
+    
+    def search(self, vector: Sequence[float], limit: int = 3) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    def search_batch(self, vectors: Sequence[Sequence[float]], limit: int = 3) -> List[List[Dict[str, Any]]]:
+        return [self.search(vector, limit) for vector in vectors]
+
+
+class LocalVectorBackend(VectorSearchBackend):
+    """本地内存映射索引后端，embeddings 缓存更新后自动重建索引"""
+    
+    name = "local"
+    
+    def __init__(
+        self,
+        cache_file: Path = DEFAULT_EMBEDDINGS_CACHE_FILE,
+        index_prefix: Path = DEFAULT_INDEX_PREFIX,
+        quantize: bool = False,
+    ):
+        self.cache_file = Path(cache_file)
+        self.index_prefix = Path(index_prefix)
+        self.quantize = quantize
+        self._index: Optional[LocalVectorIndex] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def available(self) -> bool:
+        return _index_paths(self.index_prefix)["meta"].exists() or self.cache_file.exists()
+    
+    @property
+    def index(self) -> LocalVectorIndex:
+        with self._lock:
+            if self._index is None:
+                if not _index_paths(self.index_prefix)["meta"].exists():
+                    build_vector_index(self.cache_file, self.index_prefix, self.quantize)
+                index = LocalVectorIndex(self.index_prefix)
+                if index.is_stale(self.cache_file):
+                    build_vector_index(self.cache_file, self.index_prefix, index.quantization == "int8")
+                    index = LocalVectorIndex(self.index_prefix)
+                self._index = index
+            return self._index
+    
+    def search(self, vector: Sequence[float], limit: int = 3) -> List[Dict[str, Any]]:
+        return self.index.search(vector, limit)
+    
+    def search_batch(self, vectors: Sequence[Sequence[float]], limit: int = 3) -> List[List[Dict[str, Any]]]:
+        return self.index.search_batch(np.asarray(vectors, dtype=np.float32), limit)
+
+
+class S3VectorsBackend(VectorSearchBackend):
+    """S3 Vectors 远程后端"""
+    
+    name = "s3vectors"
+    
+    def __init__(self, bucket: str = s3vectors_bucket, index_name: str = indexName):
+        self.bucket = bucket
+        self.index_name = index_name
+    
+    def search(self, vector: Sequence[float], limit: int = 3) -> List[Dict[str, Any]]:
+        response = get_cached_client("s3vectors").query_vectors(
+            vectorBucketName=self.bucket,
+            indexName=self.index_name,
+            queryVector={"float32": [float(value) for value in vector]},
+            topK=limit,
+            returnDistance=True,
+            returnMetadata=True
+        )
+        return response["vectors"]
+
+
+_backends: Dict[str, VectorSearchBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def register_backend(backend: VectorSearchBackend) -> None:
+    """注册（或替换）检索后端"""
+    with _backends_lock:
+        _backends[backend.name] = backend
+
+
+def get_backend(name: Optional[str] = None) -> VectorSearchBackend:
+    """
+    获取检索后端
+    
+    Args:
+        name: 后端名称（local/s3vectors/auto），默认读取环境变量 TOOLUNIVERSE_VECTOR_BACKEND
+    """
+    name = (name or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND).lower()
+    with _backends_lock:
+        if "local" not in _backends:
+            _backends["local"] = LocalVectorBackend()
+        if "s3vectors" not in _backends:
+            _backends["s3vectors"] = S3VectorsBackend()
+        if name == "auto":
+            local = _backends["local"]
+            name = "local" if not isinstance(local, LocalVectorBackend) or local.available else "s3vectors"
+        if name not in _backends:
+            raise ValueError(f"Unknown vector search backend: {name}")
+        return _backends[name]
+
+
+def search_tools(input_text: str, limit: int = 3, backend: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    按语义相似度检索工具
+    
+    Args:
+        input_text: 查询文本
+        limit: 返回的结果数
+        backend: 检索后端名称（可选）
+    
+    Returns:
+        List[Dict]: 与 S3 Vectors query_vectors 相同格式的结果
+    """
+    if not input_text.strip():
+        raise ValueError("input_text cannot be empty")
+    return get_backend(backend).search(embed_query(input_text), limit)
+
+
+def search_tools_batch(input_texts: List[str], limit: int = 3, backend: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+    """批量检索工具，本地后端用一次矩阵乘法完成全部查询"""
+    vectors = [embed_query(text) for text in input_texts]
+    return get_backend(backend).search_batch(vectors, limit)
+
+
+def get_search_stats() -> Dict[str, Any]:
+    """检索后端和查询缓存的状态"""
+    stats = {"query_cache": dict(_query_cache.stats), "backends": {}}
+    with _backends_lock:
+        for name, backend in _backends.items():
+            info = {"type": type(backend).__name__}
+            if isinstance(backend, LocalVectorBackend) and backend._index is not None:
+                info.update(count=len(backend._index), dimension=backend._index.dimension,
+                            quantization=backend._index.quantization)
+            stats["backends"][name] = info
+    return stats
@@ -21,10 +21,13 @@
 """
 
 import os
+import fcntl
 import json
 import logging
+import threading
 import uuid
 import yaml
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List, Literal
 from pathlib import Path
@@ -216,6 +219,34 @@ def _normalize_artifact_path(path_value: str) -> str:
     except ValueError:
         return candidate.as_posix()
 
+
+@contextmanager
+def _status_file_lock(status_path: str):
+    """
+    status.yaml 的跨线程/跨进程文件锁
+
+    并行执行的 Agent 会同时更新同一个状态文件，读取-修改-写入必须在锁内完成。
+    """
+    lock_path = os.path.join(os.path.dirname(status_path), f".{os.path.basename(status_path)}.lock")
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_status_file(status_path: str, status_data: Dict[str, Any]) -> None:
+    """先写入临时文件再原子替换 status.yaml，读取方不会看到写了一半的文件"""
+    temp_path = f"{status_path}.tmp{os.getpid()}-{threading.get_ident()}"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            yaml.dump(status_data, f, default_flow_style=False, allow_unicode=True, indent=2)
+        os.replace(temp_path, status_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
 # @tool
 # def set_current_project_stats(action: str, agent: Agent):
 #     """设置项目基本信息"""
@@ -706,155 +737,156 @@ def update_project_status(project_name: str, agent_name: str, stage: str, status
             except yaml.YAMLError:
                 pass  # 使用默认值
         
-        # 读取现有状态
-        status_data = {}
-        if os.path.exists(status_path):
-            try:
-                with open(status_path, 'r', encoding='utf-8') as f:
-                    status_data = yaml.safe_load(f) or {}
-            except yaml.YAMLError as e:
-                return f"错误：无法解析状态文件: {str(e)}"
-        
-        # 初始化或更新项目信息
-        if "project_info" not in status_data:
-            status_data["project_info"] = []
-        # 查找或创建项目条目
-        project_entry = None
-        for project in status_data["project_info"]:
-            if project.get("name") == project_name:
-                project_entry = project
-                break
-        
-        if project_entry is None:
-            # 创建新的项目条目
-            project_entry = {
-                "name": project_name,
-                "description": project_description,
-                "version": project_version,
-                "last_updated": datetime.now(timezone.utc).isoformat(),
-                "progress": [
-                    {
-                        "total": 0,
-                        "completed": 0
-                    }
-                ],
-                "agents": []
-            }
-            status_data["project_info"].append(project_entry)
-        else:
-            # 更新项目基本信息
-            project_entry["name"] = project_name
-            project_entry["description"] = project_description
-            project_entry["version"] = project_version
-            project_entry["last_updated"] = datetime.now(timezone.utc).isoformat()
-        
-        # 确保agents字段存在
-        if "agents" not in project_entry:
-            project_entry["agents"] = []
-        
-        # 查找或创建Agent条目
-        agent_entry = None
-        for agent in project_entry["agents"]:
-            if agent.get("name") == agent_name:
-                agent_entry = agent
-                break
-        
-        if agent_entry is None:
-            # 创建新的Agent条目，包含所有阶段
-            agent_entry = {
-                "name": agent_name,
-                "description": f"智能体：{agent_name}",
-                "created_date": datetime.now(timezone.utc).isoformat(),
-                "pipeline": []
-            }
+        # 读取-修改-写入期间持有状态文件锁，避免并行执行的 Agent 互相覆盖更新
+        with _status_file_lock(status_path):
+            # 读取现有状态
+            status_data = {}
+            if os.path.exists(status_path):
+                try:
+                    with open(status_path, 'r', encoding='utf-8') as f:
+                        status_data = yaml.safe_load(f) or {}
+                except yaml.YAMLError as e:
+                    return f"错误：无法解析状态文件: {str(e)}"
             
-            # 初始化所有阶段
-            for stage_name in valid_stages:
-                stage_entry = {
-                    "description": _get_stage_description(stage_name),
-                    "doc_path": "",
-                    "stage": stage_name,
-                    "status": False,
-                    "updated_date": None
+            # 初始化或更新项目信息
+            if "project_info" not in status_data:
+                status_data["project_info"] = []
+            # 查找或创建项目条目
+            project_entry = None
+            for project in status_data["project_info"]:
+                if project.get("name") == project_name:
+                    project_entry = project
+                    break
+            
+            if project_entry is None:
+                # 创建新的项目条目
+                project_entry = {
+                    "name": project_name,
+                    "description": project_description,
+                    "version": project_version,
+                    "last_updated": datetime.now(timezone.utc).isoformat(),
+                    "progress": [
+                        {
+                            "total": 0,
+                            "completed": 0
+                        }
+                    ],
+                    "agents": []
                 }
-                agent_entry["pipeline"].append(stage_entry)
+                status_data["project_info"].append(project_entry)
+            else:
+                # 更新项目基本信息
+                project_entry["name"] = project_name
+                project_entry["description"] = project_description
+                project_entry["version"] = project_version
+                project_entry["last_updated"] = datetime.now(timezone.utc).isoformat()
             
-            project_entry["agents"].append(agent_entry)
-        
-        # 更新Agent的最后更新时间
-        agent_entry["last_updated"] = datetime.now(timezone.utc).isoformat()
-        
-        # 更新指定阶段的状态
-        pipeline = agent_entry.get("pipeline", [])
-        stage_found = False
-        
-        for stage_entry in pipeline:
-            if stage_entry.get("stage") == stage:
-                stage_entry["status"] = status
-                stage_entry["doc_path"] = doc_path
-                stage_entry["updated_date"] = datetime.now(timezone.utc).isoformat()
+            # 确保agents字段存在
+            if "agents" not in project_entry:
+                project_entry["agents"] = []
+            
+            # 查找或创建Agent条目
+            agent_entry = None
+            for agent in project_entry["agents"]:
+                if agent.get("name") == agent_name:
+                    agent_entry = agent
+                    break
+            
+            if agent_entry is None:
+                # 创建新的Agent条目，包含所有阶段
+                agent_entry = {
+                    "name": agent_name,
+                    "description": f"智能体：{agent_name}",
+                    "created_date": datetime.now(timezone.utc).isoformat(),
+                    "pipeline": []
+                }
                 
-                # 如果提供了agent_artifact_path，更新制品路径
+                # 初始化所有阶段
+                for stage_name in valid_stages:
+                    stage_entry = {
+                        "description": _get_stage_description(stage_name),
+                        "doc_path": "",
+                        "stage": stage_name,
+                        "status": False,
+                        "updated_date": None
+                    }
+                    agent_entry["pipeline"].append(stage_entry)
+                
+                project_entry["agents"].append(agent_entry)
+            
+            # 更新Agent的最后更新时间
+            agent_entry["last_updated"] = datetime.now(timezone.utc).isoformat()
+            
+            # 更新指定阶段的状态
+            pipeline = agent_entry.get("pipeline", [])
+            stage_found = False
+            
+            for stage_entry in pipeline:
+                if stage_entry.get("stage") == stage:
+                    stage_entry["status"] = status
+                    stage_entry["doc_path"] = doc_path
+                    stage_entry["updated_date"] = datetime.now(timezone.utc).isoformat()
+                    
+                    # 如果提供了agent_artifact_path，更新制品路径
+                    artifact_stages = ["prompt_engineer", "tools_developer", "agent_code_developer"]
+                    if stage in artifact_stages and agent_artifact_path:
+                        stage_entry["agent_artifact_path"] = agent_artifact_path
+                    
+                    stage_found = True
+                    break
+            
+            # 如果阶段不存在，添加它
+            if not stage_found:
+                new_stage_entry = {
+                    "description": _get_stage_description(stage),
+                    "doc_path": doc_path,
+                    "stage": stage,
+                    "status": status,
+                    "updated_date": datetime.now(timezone.utc).isoformat()
+                }
+                
+                # 如果提供了agent_artifact_path，添加到新阶段
                 artifact_stages = ["prompt_engineer", "tools_developer", "agent_code_developer"]
                 if stage in artifact_stages and agent_artifact_path:
-                    stage_entry["agent_artifact_path"] = agent_artifact_path
+                    new_stage_entry["agent_artifact_path"] = agent_artifact_path
                 
-                stage_found = True
-                break
-        
-        # 如果阶段不存在，添加它
-        if not stage_found:
-            new_stage_entry = {
-                "description": _get_stage_description(stage),
-                "doc_path": doc_path,
-                "stage": stage,
-                "status": status,
-                "updated_date": datetime.now(timezone.utc).isoformat()
-            }
+                agent_entry["pipeline"].append(new_stage_entry)
+                logger.info(
+                    "Stage entry created: project=%s agent=%s stage=%s",
+                    project_name,
+                    agent_name,
+                    stage,
+                )
+
+            # 计算项目整体进度
+            all_agents = project_entry["agents"]
+            total_project_stages = 0
+            completed_project_stages = 0
             
-            # 如果提供了agent_artifact_path，添加到新阶段
-            artifact_stages = ["prompt_engineer", "tools_developer", "agent_code_developer"]
-            if stage in artifact_stages and agent_artifact_path:
-                new_stage_entry["agent_artifact_path"] = agent_artifact_path
+            for agent in all_agents:
+                agent_pipeline = agent.get("pipeline", [])
+                for stage_entry in agent_pipeline:
+                    total_project_stages += 1
+                    if stage_entry.get("status", False):
+                        completed_project_stages += 1
             
-            agent_entry["pipeline"].append(new_stage_entry)
-            logger.info(
-                "Stage entry created: project=%s agent=%s stage=%s",
-                project_name,
-                agent_name,
-                stage,
-            )
-
-        # 计算项目整体进度
-        all_agents = project_entry["agents"]
-        total_project_stages = 0
-        completed_project_stages = 0
-        
-        for agent in all_agents:
-            agent_pipeline = agent.get("pipeline", [])
-            for stage_entry in agent_pipeline:
-                total_project_stages += 1
-                if stage_entry.get("status", False):
-                    completed_project_stages += 1
-        
-        # 更新项目进度
-        if "progress" not in project_entry:
-            project_entry["progress"] = []
-        
-        if len(project_entry["progress"]) == 0:
-            project_entry["progress"].append({
-                "total": total_project_stages,
-                "completed": completed_project_stages
-            })
-        else:
-            project_entry["progress"][0] = {
-                "total": total_project_stages,
-                "completed": completed_project_stages
-            }
-        
-        # 写入状态文件
-        with open(status_path, 'w', encoding='utf-8') as f:
-            yaml.dump(status_data, f, default_flow_style=False, allow_unicode=True, indent=2)
+            # 更新项目进度
+            if "progress" not in project_entry:
+                project_entry["progress"] = []
+            
+            if len(project_entry["progress"]) == 0:
+                project_entry["progress"].append({
+                    "total": total_project_stages,
+                    "completed": completed_project_stages
+                })
+            else:
+                project_entry["progress"][0] = {
+                    "total": total_project_stages,
+                    "completed": completed_project_stages
+                }
+            
+            # 写入状态文件（原子替换）
+            _write_status_file(status_path, status_data)
 
         _sync_stage_progress(project_name, stage, status=status, doc_path=doc_path)
 
@@ -1365,67 +1397,67 @@ def update_agent_artifact_paths(project_name: str, agent_name: str, stage: str,
         if not os.path.exists(status_path):
             return f"错误：项目 '{project_name}' 的状态文件不存在"
         
-        # 读取现有状态
-        status_data = {}
-        try:
-            with open(status_path, 'r', encoding='utf-8') as f:
-                status_data = yaml.safe_load(f) or {}
-        except yaml.YAMLError as e:
-            return f"错误：无法解析状态文件: {str(e)}"
-        
-        # 查找项目条目
-        project_entry = None
-        if "project_info" in status_data:
-            for project in status_data["project_info"]:
-                if project.get("name") == project_name:
-                    project_entry = project
+        with _status_file_lock(status_path):
+            # 读取现有状态
+            status_data = {}
+            try:
+                with open(status_path, 'r', encoding='utf-8') as f:
+                    status_data = yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                return f"错误：无法解析状态文件: {str(e)}"
+            
+            # 查找项目条目
+            project_entry = None
+            if "project_info" in status_data:
+                for project in status_data["project_info"]:
+                    if project.get("name") == project_name:
+                        project_entry = project
+                        break
+            
+            if project_entry is None:
+                return f"错误：在状态文件中未找到项目 '{project_name}'"
+            
+            # 查找Agent条目
+            agent_entry = None
+            for agent in project_entry.get("agents", []):
+                if agent.get("name") == agent_name:
+                    agent_entry = agent
                     break
-        
-        if project_entry is None:
-            return f"错误：在状态文件中未找到项目 '{project_name}'"
-        
-        # 查找Agent条目
-        agent_entry = None
-        for agent in project_entry.get("agents", []):
-            if agent.get("name") == agent_name:
-                agent_entry = agent
-                break
-        
-        if agent_entry is None:
-            return f"错误：在项目 '{project_name}' 中未找到 Agent '{agent_name}'"
-        
-        # 更新指定阶段的agent_artifact_path
-        pipeline = agent_entry.get("pipeline", [])
-        stage_found = False
-        
-        for stage_entry in pipeline:
-            if stage_entry.get("stage") == stage:
-                if append_mode:
-                    # 追加模式：合并现有路径和新路径，去重
-                    existing_paths = stage_entry.get("agent_artifact_path", [])
-                    if not isinstance(existing_paths, list):
-                        existing_paths = []
+            
+            if agent_entry is None:
+                return f"错误：在项目 '{project_name}' 中未找到 Agent '{agent_name}'"
+            
+            # 更新指定阶段的agent_artifact_path
+            pipeline = agent_entry.get("pipeline", [])
+            stage_found = False
+            
+            for stage_entry in pipeline:
+                if stage_entry.get("stage") == stage:
+                    if append_mode:
+                        # 追加模式：合并现有路径和新路径，去重
+                        existing_paths = stage_entry.get("agent_artifact_path", [])
+                        if not isinstance(existing_paths, list):
+                            existing_paths = []
+                        
+                        # 合并并去重
+                        combined_paths = list(set(existing_paths + agent_artifact_path))
+                        stage_entry["agent_artifact_path"] = combined_paths
+                    else:
+                        # 覆盖模式：直接替换
+                        stage_entry["agent_artifact_path"] = agent_artifact_path
                     
-                    # 合并并去重
-                    combined_paths = list(set(existing_paths + agent_artifact_path))
-                    stage_entry["agent_artifact_path"] = combined_paths
-                else:
-                    # 覆盖模式：直接替换
-                    stage_entry["agent_artifact_path"] = agent_artifact_path
-                
-                stage_entry["updated_date"] = datetime.now(timezone.utc).isoformat()
-                stage_found = True
-                break
-        
-        if not stage_found:
-            return f"错误：在 Agent '{agent_name}' 中未找到阶段 '{stage}'"
-        
-        # 写入状态文件
-        try:
-            with open(status_path, 'w', encoding='utf-8') as f:
-                yaml.dump(status_data, f, default_flow_style=False, allow_unicode=True, indent=2)
-        except PermissionError:
-            return f"错误：没有权限写入状态文件"
+                    stage_entry["updated_date"] = datetime.now(timezone.utc).isoformat()
+                    stage_found = True
+                    break
+            
+            if not stage_found:
+                return f"错误：在 Agent '{agent_name}' 中未找到阶段 '{stage}'"
+            
+            # 写入状态文件（原子替换）
+            try:
+                _write_status_file(status_path, status_data)
+            except PermissionError:
+                return f"错误：没有权限写入状态文件"
         
         result = {
             "status": "success",
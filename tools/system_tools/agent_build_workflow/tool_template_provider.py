@@ -20,7 +20,10 @@ import sys
 import os
 import json
 import ast
+import hashlib
 import inspect
+import threading
+import time
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 from strands import tool
@@ -199,13 +202,14 @@ def _get_builtin_tools_info() -> Dict[str, Dict[str, Any]]:
     return builtin_tools
 
 
-def _parse_tool_file(file_path: Path) -> List[Dict[str, Any]]:
+def _parse_tool_file(file_path: Path, content: Optional[str] = None) -> List[Dict[str, Any]]:
     """解析Python文件中的工具函数"""
     tools = []
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if content is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
         
         # 解析AST
         tree = ast.parse(content)
@@ -262,6 +266,244 @@ def _parse_tool_file(file_path: Path) -> List[Dict[str, Any]]:
     return tools
 
 
+def _module_path_for(file_path: str) -> str:
+    """将工具文件路径转换为模块路径，例如 tools/a/b.py -> tools.a.b"""
+    path = file_path[:-3] if file_path.endswith('.py') else file_path
+    return path.replace(os.sep, '.').replace('/', '.')
+
+
+class ToolIndex:
+    """
+    工具索引
+
+    缓存每个工具文件的解析结果（工具名、模块路径、参数签名、docstring），
+    以文件的 (mtime_ns, size) 作为快速失效依据，变化时再比较内容哈希，
+    只重新解析真正发生变化的文件。可选地将索引持久化到磁盘，
+    使 Worker 冷启动时无需重新扫描整个 tools 目录。
+    """
+
+    INDEX_VERSION = 1
+    # 两次目录遍历之间的最小间隔（秒），避免同一次Agent创建中反复stat所有文件
+    DEFAULT_REFRESH_INTERVAL = 2.0
+
+    def __init__(
+        self,
+        tool_dirs: Dict[str, str],
+        index_path: Optional[str] = None,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+    ):
+        self.tool_dirs = dict(tool_dirs)
+        self.index_path = index_path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        # file_path -> {'tool_type', 'relative_path', 'mtime_ns', 'size', 'sha1', 'tools'}
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, List[Dict[str, Any]]] = {}
+        self._last_refresh = 0.0
+        self._load()
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        """从磁盘加载索引，版本或目录配置不一致时忽略"""
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.INDEX_VERSION or data.get('tool_dirs') != self.tool_dirs:
+                return
+            self._files = data.get('files', {})
+            self._rebuild_name_index()
+        except Exception as e:
+            print(f"Warning: failed to load tool index '{self.index_path}': {e}")
+            self._files = {}
+
+    def _save(self) -> None:
+        """原子地将索引写入磁盘"""
+        if not self.index_path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.index_path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.INDEX_VERSION,
+                    'tool_dirs': self.tool_dirs,
+                    'files': self._files,
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Warning: failed to save tool index '{self.index_path}': {e}")
+
+    # ------------------------------------------------------------------
+    # 增量刷新
+    # ------------------------------------------------------------------
+
+    def _rebuild_name_index(self) -> None:
+        by_name: Dict[str, List[Dict[str, Any]]] = {}
+        for file_path in sorted(self._files):
+            for tool_info in self._files[file_path]['tools']:
+                by_name.setdefault(tool_info['name'], []).append(tool_info)
+        self._by_name = by_name
+
+    def _index_file(self, file_path: Path, tool_type: str, tool_dir: str, stat: os.stat_result) -> Dict[str, Any]:
+        """读取并解析单个文件，生成索引条目"""
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        sha1 = hashlib.sha1(raw).hexdigest()
+
+        previous = self._files.get(str(file_path))
+        if previous and previous['sha1'] == sha1 and previous['tool_type'] == tool_type:
+            # 仅 mtime 变化（如 touch / checkout），内容未变则复用解析结果
+            tools = previous['tools']
+        else:
+            try:
+                content = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                content = None
+            tools = _parse_tool_file(file_path, content)
+            relative_path = str(file_path.relative_to(Path(tool_dir)))
+            for tool_info in tools:
+                tool_info['type'] = tool_type
+                tool_info['relative_path'] = relative_path
+
+        return {
+            'tool_type': tool_type,
+            'module': _module_path_for(str(file_path)),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha1': sha1,
+            'tools': tools,
+        }
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        增量刷新索引
+
+        Args:
+            force: 忽略刷新间隔，立即检查文件变化
+
+        Returns:
+            bool: 索引内容是否发生变化
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_refresh and now - self._last_refresh < self.refresh_interval:
+                return False
+
+            changed = False
+            seen = set()
+            for tool_type, tool_dir in self.tool_dirs.items():
+                if not os.path.exists(tool_dir):
+                    continue
+                for file_path in Path(tool_dir).rglob("*.py"):
+                    if file_path.name.startswith('__'):
+                        continue
+                    key = str(file_path)
+                    seen.add(key)
+                    try:
+                        stat = file_path.stat()
+                    except OSError:
+                        continue
+                    entry = self._files.get(key)
+                    if (entry and entry['mtime_ns'] == stat.st_mtime_ns
+                            and entry['size'] == stat.st_size and entry['tool_type'] == tool_type):
+                        continue
+                    try:
+                        self._files[key] = self._index_file(file_path, tool_type, tool_dir, stat)
+                    except OSError:
+                        continue
+                    changed = True
+
+            for key in list(self._files):
+                if key not in seen:
+                    del self._files[key]
+                    changed = True
+
+            if changed:
+                self._rebuild_name_index()
+                self._save()
+            self._last_refresh = time.monotonic()
+            return changed
+
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        """使单个文件或整个索引失效，下次访问时重新检查"""
+        with self._lock:
+            if file_path is None:
+                self._files.clear()
+                self._by_name = {}
+            else:
+                self._files.pop(str(Path(file_path)), None)
+                self._rebuild_name_index()
+            self._last_refresh = 0.0
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def list_tools(self, tool_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """按文件路径顺序返回工具信息副本，可按工具类型过滤"""
+        self.refresh()
+        with self._lock:
+            tools = []
+            for file_path in sorted(self._files):
+                entry = self._files[file_path]
+                if tool_type and entry['tool_type'] != tool_type:
+                    continue
+                tools.extend(dict(tool_info) for tool_info in entry['tools'])
+            return tools
+
+    def find(self, tool_name: str) -> List[Dict[str, Any]]:
+        """精确查找同名工具"""
+        self.refresh()
+        with self._lock:
+            return [dict(tool_info) for tool_info in self._by_name.get(tool_name, [])]
+
+    def get_import_paths(self) -> Dict[str, str]:
+        """
+        获取 工具名 -> 'module.function' 映射
+
+        同名工具按 system_tools、template_tools、generated_tools 的顺序覆盖
+        """
+        self.refresh()
+        with self._lock:
+            mapping = {}
+            for tool_type in ('system_tools', 'template_tools', 'generated_tools'):
+                for file_path in sorted(self._files):
+                    entry = self._files[file_path]
+                    if entry['tool_type'] != tool_type:
+                        continue
+                    for tool_info in entry['tools']:
+                        mapping[tool_info['name']] = f"{entry['module']}.{tool_info['name']}"
+            return mapping
+
+
+_tool_index: Optional[ToolIndex] = None
+_tool_index_lock = threading.Lock()
+
+
+def get_tool_index() -> ToolIndex:
+    """
+    获取全局工具索引实例
+
+    索引文件路径可通过环境变量 NEXUS_TOOL_INDEX_PATH 或配置项
+    strands.tool_index_path 指定，未配置时仅保存在内存中
+    """
+    global _tool_index
+    if _tool_index is None:
+        with _tool_index_lock:
+            if _tool_index is None:
+                index_path = get_config().get_with_env_override(
+                    "NEXUS_TOOL_INDEX_PATH", "strands", "tool_index_path", default=None
+                )
+                _tool_index = ToolIndex(_get_tool_directories(), index_path=index_path or None)
+    return _tool_index
+
+
 @tool
 def list_all_tools() -> str:
     """
@@ -271,7 +513,6 @@ def list_all_tools() -> str:
         str: JSON格式的所有工具信息
     """
     try:
-        tool_dirs = _get_tool_directories()
         builtin_tools = _get_builtin_tools_info()
         
         result = {
@@ -292,20 +533,9 @@ def list_all_tools() -> str:
                 'type': 'builtin'
             })
         
-        # 扫描各个目录
-        for tool_type, tool_dir in tool_dirs.items():
-            if os.path.exists(tool_dir):
-                for file_path in Path(tool_dir).rglob("*.py"):
-                    if file_path.name.startswith('__'):
-                        continue
-                    
-                    tools_in_file = _parse_tool_file(file_path)
-                    for tool_info in tools_in_file:
-                        tool_info['type'] = tool_type
-                        # 添加相对路径信息
-                        relative_path = file_path.relative_to(Path(tool_dir))
-                        tool_info['relative_path'] = str(relative_path)
-                        result[tool_type].append(tool_info)
+        # 从工具索引读取各个目录的工具
+        for tool_info in get_tool_index().list_tools():
+            result[tool_info['type']].append(tool_info)
         
         # 生成摘要
         result['summary'] = {
@@ -378,17 +608,9 @@ def get_template_tools() -> str:
             return json.dumps({"error": "模板工具目录不存在", "tools": []}, ensure_ascii=False, indent=2)
         
         tools = []
-        
-        for file_path in Path(template_dir).rglob("*.py"):
-            if file_path.name.startswith('__'):
-                continue
-            
-            tools_in_file = _parse_tool_file(file_path)
-            # 为每个工具添加相对路径信息
-            for tool_info in tools_in_file:
-                relative_path = file_path.relative_to(Path(template_dir))
-                tool_info['relative_path'] = str(relative_path)
-            tools.extend(tools_in_file)
+        for tool_info in get_tool_index().list_tools('template_tools'):
+            tool_info.pop('type', None)
+            tools.append(tool_info)
         
         result = {
             'total_tools': len(tools),
@@ -418,17 +640,9 @@ def get_generated_tools() -> str:
             return json.dumps({"error": "生成工具目录不存在", "tools": []}, ensure_ascii=False, indent=2)
         
         tools = []
-        
-        for file_path in Path(generated_dir).rglob("*.py"):
-            if file_path.name.startswith('__'):
-                continue
-            
-            tools_in_file = _parse_tool_file(file_path)
-            # 为每个工具添加相对路径信息
-            for tool_info in tools_in_file:
-                relative_path = file_path.relative_to(Path(generated_dir))
-                tool_info['relative_path'] = str(relative_path)
-            tools.extend(tools_in_file)
+        for tool_info in get_tool_index().list_tools('generated_tools'):
+            tool_info.pop('type', None)
+            tools.append(tool_info)
         
         result = {
             'total_tools': len(tools),
@@ -454,25 +668,26 @@ def search_tools_by_name(tool_name: str) -> str:
         str: JSON格式的匹配工具信息
     """
     try:
-        # 获取所有工具
-        all_tools_result = list_all_tools()
-        all_tools_data = json.loads(all_tools_result)
-        
-        if "error" in all_tools_data:
-            return all_tools_result
-        
         matching_tools = []
+        search_term = tool_name.lower()
         
         # 搜索内置工具
-        for tool in all_tools_data['builtin_tools']:
-            if tool_name.lower() in tool['name'].lower():
-                matching_tools.append(tool)
+        for builtin_name, tool_info in _get_builtin_tools_info().items():
+            if search_term in builtin_name.lower():
+                matching_tools.append({
+                    'name': builtin_name,
+                    'category': tool_info['category'],
+                    'description': tool_info['description'],
+                    'package': tool_info['package'],
+                    'type': 'builtin'
+                })
         
         # 搜索其他类型工具
+        indexed_tools = get_tool_index().list_tools()
         for tool_type in ['template_tools', 'generated_tools', 'system_tools']:
-            for tool in all_tools_data[tool_type]:
-                if tool_name.lower() in tool['name'].lower():
-                    matching_tools.append(tool)
+            for indexed_tool in indexed_tools:
+                if indexed_tool['type'] == tool_type and search_term in indexed_tool['name'].lower():
+                    matching_tools.append(indexed_tool)
         
         result = {
             'search_term': tool_name,
@@ -551,18 +766,23 @@ def get_tool_details(tool_name: str, tool_type: Optional[str] = None) -> str:
                 }
                 return json.dumps(result, ensure_ascii=False, indent=2)
         
-        # 搜索所有工具
-        all_tools_result = list_all_tools()
-        all_tools_data = json.loads(all_tools_result)
-        
-        if "error" in all_tools_data:
-            return all_tools_result
-        
         # 在所有工具中搜索
-        for tool_type_key in ['builtin_tools', 'template_tools', 'generated_tools', 'system_tools']:
-            for tool in all_tools_data[tool_type_key]:
-                if tool['name'] == tool_name:
-                    return json.dumps(tool, ensure_ascii=False, indent=2)
+        builtin_tools = _get_builtin_tools_info()
+        if tool_name in builtin_tools:
+            tool_info = builtin_tools[tool_name]
+            return json.dumps({
+                'name': tool_name,
+                'category': tool_info['category'],
+                'description': tool_info['description'],
+                'package': tool_info['package'],
+                'type': 'builtin'
+            }, ensure_ascii=False, indent=2)
+        
+        matches = get_tool_index().find(tool_name)
+        for tool_type_key in ['template_tools', 'generated_tools', 'system_tools']:
+            for indexed_tool in matches:
+                if indexed_tool['type'] == tool_type_key:
+                    return json.dumps(indexed_tool, ensure_ascii=False, indent=2)
         
         return json.dumps({"error": f"未找到名为 '{tool_name}' 的工具"}, ensure_ascii=False, indent=2)
         
@@ -588,23 +808,13 @@ def get_tool_content(tool_name: str, file_path: Optional[str] = None) -> str:
         if file_path and os.path.exists(file_path):
             target_file = file_path
         else:
-            # 自动查找工具文件
-            tool_dirs = _get_tool_directories()
-            
-            for tool_type, tool_dir in tool_dirs.items():
-                if os.path.exists(tool_dir):
-                    for file_path in Path(tool_dir).rglob("*.py"):
-                        if file_path.name.startswith('__'):
-                            continue
-                        
-                        tools_in_file = _parse_tool_file(file_path)
-                        for tool_info in tools_in_file:
-                            if tool_info['name'] == tool_name:
-                                target_file = str(file_path)
-                                break
-                        
-                        if target_file:
-                            break
+            # 通过工具索引自动查找工具文件
+            matches = get_tool_index().find(tool_name)
+            for tool_type in _get_tool_directories():
+                for tool_info in matches:
+                    if tool_info['type'] == tool_type:
+                        target_file = tool_info['file_path']
+                        break
                 
                 if target_file:
                     break
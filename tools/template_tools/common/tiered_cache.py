@@ -0,0 +1,716 @@
+#!/usr/bin/env python3
+"""
+分层缓存
+
+为各工具族提供统一的缓存实现，替代各自维护的 JSON 文件缓存：
+- 内存层：进程内 LRU，按条目数和字节数限制
+- 磁盘层：单个 SQLite 文件（WAL 模式），多个进程共享，按命名空间隔离，
+  支持 TTL、全局/命名空间字节预算（按最近访问时间淘汰）和 zlib 压缩
+- get_or_compute 将同一键的并发加载合并为一次（single-flight）
+- 统一的命中/未命中统计
+
+使用示例:
+    from tools.template_tools.common.tiered_cache import get_cache
+
+    cache = get_cache("pubmed", default_ttl=24 * 3600)
+    data = cache.get_or_compute(key, lambda: fetch(url, params))
+    print(cache.stats())
+"""
+
+import atexit
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 默认共享缓存文件，可通过环境变量覆盖
+DEFAULT_CACHE_PATH = os.environ.get("NEXUS_TOOL_CACHE_PATH", os.path.join(".cache", "tool_cache.db"))
+# 指定 cache_dir 时使用的缓存文件名
+CACHE_FILE_NAME = "tool_cache.db"
+
+DEFAULT_DISK_MAX_BYTES = 1024 * 1024 * 1024  # 单个缓存文件的全局字节预算
+DEFAULT_MEMORY_MAX_ITEMS = 256
+DEFAULT_MEMORY_MAX_BYTES = 32 * 1024 * 1024
+MEMORY_MAX_ITEM_BYTES = 4 * 1024 * 1024  # 超过该大小的条目只存磁盘层
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_LEVEL = 6
+EVICT_TARGET_RATIO = 0.8  # 超出预算时淘汰到预算的 80%
+EVICT_BATCH_SIZE = 256
+SQLITE_BUSY_TIMEOUT_MS = 10000
+# 命中记录（命中次数、最近访问时间）批量写回磁盘层的条目数和时间间隔
+TOUCH_FLUSH_ITEMS = 64
+TOUCH_FLUSH_SECONDS = 5.0
+
+CODECS = ("auto", "json", "pickle", "bytes")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    codec TEXT NOT NULL,
+    compressed INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT,
+    UNIQUE (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS usage (
+    namespace TEXT PRIMARY KEY,
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS entries_usage_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO usage (namespace, entries, bytes) VALUES (NEW.namespace, 1, NEW.stored_size)
+    ON CONFLICT (namespace) DO UPDATE SET entries = entries + 1, bytes = bytes + NEW.stored_size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_usage_update AFTER UPDATE OF stored_size ON entries BEGIN
+    UPDATE usage SET bytes = bytes + NEW.stored_size - OLD.stored_size WHERE namespace = NEW.namespace;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_usage_delete AFTER DELETE ON entries BEGIN
+    UPDATE usage SET entries = entries - 1, bytes = bytes - OLD.stored_size WHERE namespace = OLD.namespace;
+END;
+"""
+
+_ENTRY_COLUMNS = "rowid, key, value, codec, compressed, size, created_at, expires_at, hits, metadata"
+
+_MISSING = object()
+_DEFAULT = object()
+
+
+@dataclass
+class CacheEntry:
+    """缓存条目（值已解码）"""
+    key: str
+    value: Any
+    created_at: float
+    expires_at: Optional[float] = None
+    size: int = 0
+    hits: int = 0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.time() >= self.expires_at
+    
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+
+def resolve_cache_path(cache_dir: Optional[str] = None) -> str:
+    """cache_dir 为空时返回共享缓存文件，否则返回该目录下的缓存文件"""
+    if not cache_dir:
+        return DEFAULT_CACHE_PATH
+    return os.path.join(cache_dir, CACHE_FILE_NAME)
+
+
+def encode_value(value: Any, codec: str = "auto") -> Tuple[bytes, str]:
+    """将值序列化为字节，返回 (payload, codec)"""
+    if codec not in CODECS:
+        raise ValueError(f"不支持的序列化方法: {codec}")
+    if codec == "auto":
+        if isinstance(value, (bytes, bytearray)):
+            codec = "bytes"
+        else:
+            try:
+                return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), "json"
+            except (TypeError, ValueError):
+                codec = "pickle"
+    if codec == "bytes":
+        if not isinstance(value, (bytes, bytearray)):
+            raise TypeError("使用bytes序列化方法时，值必须是bytes类型")
+        return bytes(value), "bytes"
+    if codec == "json":
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), "json"
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), "pickle"
+
+
+def decode_value(payload: bytes, codec: str) -> Any:
+    if codec == "json":
+        return json.loads(payload)
+    if codec == "pickle":
+        return pickle.loads(payload)
+    return payload
+
+
+class _MemoryTier:
+    """进程内 LRU，保存未压缩的序列化结果，命中时解码，避免调用方修改缓存对象"""
+    
+    def __init__(self, max_items: int, max_bytes: int):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def get(self, key: str) -> Optional[tuple]:
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+    
+    def put(self, key: str, item: tuple) -> int:
+        """item = (payload, codec, created_at, expires_at, metadata)，返回淘汰条目数"""
+        self.discard(key)
+        size = len(item[0])
+        if self.max_items <= 0 or size > min(self.max_bytes, MEMORY_MAX_ITEM_BYTES):
+            return 0
+        self._items[key] = item
+        self.bytes += size
+        evicted = 0
+        while self._items and (len(self._items) > self.max_items or self.bytes > self.max_bytes):
+            _, old = self._items.popitem(last=False)
+            self.bytes -= len(old[0])
+            evicted += 1
+        return evicted
+    
+    def discard(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.bytes -= len(item[0])
+    
+    def clear(self, prefix: Optional[str] = None) -> None:
+        if prefix is None:
+            self._items.clear()
+            self.bytes = 0
+            return
+        for key in [k for k in self._items if k.startswith(prefix)]:
+            self.discard(key)
+
+
+class _DiskStore:
+    """单个 SQLite 缓存文件，由同一路径上的所有命名空间共享"""
+    
+    def __init__(self, path: str, max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+        # 待写回的命中记录：(namespace, key) -> [命中次数, 最近访问时间]
+        self._touches: Dict[Tuple[str, str], List[float]] = {}
+        self._last_touch_flush = time.monotonic()
+    
+    def _connection(self) -> sqlite3.Connection:
+        # fork 出的子进程不能复用父进程的连接
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                                   check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+    
+    def get(self, namespace: str, key: str) -> Optional[tuple]:
+        """读取条目（不记录命中，命中由调用方确认有效后通过 touch 记录）"""
+        with self._lock:
+            return self._connection().execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+    
+    def touch(self, namespace: str, key: str) -> None:
+        """
+        记录一次命中（包括内存层命中）
+        
+        命中次数和最近访问时间先在内存中累积，达到 TOUCH_FLUSH_ITEMS 条或间隔 TOUCH_FLUSH_SECONDS 后批量写回，
+        淘汰前也会先写回，保证按最近访问时间淘汰时常用条目不会因只在内存层命中而被优先淘汰。
+        """
+        with self._lock:
+            pending = self._touches.get((namespace, key))
+            if pending is None:
+                self._touches[(namespace, key)] = [1, time.time()]
+            else:
+                pending[0] += 1
+                pending[1] = time.time()
+            if (len(self._touches) >= TOUCH_FLUSH_ITEMS
+                    or time.monotonic() - self._last_touch_flush >= TOUCH_FLUSH_SECONDS):
+                self.flush_touches()
+    
+    def flush_touches(self) -> None:
+        """将累积的命中记录写回磁盘层"""
+        with self._lock:
+            self._last_touch_flush = time.monotonic()
+            if not self._touches:
+                return
+            touches, self._touches = self._touches, {}
+            conn = self._connection()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "UPDATE entries SET hits = hits + ?, last_access = MAX(last_access, ?) "
+                    "WHERE namespace = ? AND key = ?",
+                    [(hits, accessed, namespace, key) for (namespace, key), (hits, accessed) in touches.items()]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def put(self, namespace: str, key: str, payload: bytes, codec: str, created_at: float,
+            expires_at: Optional[float], metadata: Optional[Dict[str, Any]],
+            namespace_max_bytes: Optional[int] = None) -> int:
+        """写入条目并执行字节预算，返回淘汰的条目数"""
+        size = len(payload)
+        stored, compressed = payload, 0
+        if size >= COMPRESS_MIN_BYTES:
+            packed = zlib.compress(payload, COMPRESS_LEVEL)
+            if len(packed) < size * 0.9:
+                stored, compressed = packed, 1
+        metadata_text = json.dumps(metadata, ensure_ascii=False) if metadata else None
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO entries (namespace, key, value, codec, compressed, size, stored_size, "
+                "created_at, expires_at, last_access, hits, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, codec = excluded.codec, "
+                "compressed = excluded.compressed, size = excluded.size, stored_size = excluded.stored_size, "
+                "created_at = excluded.created_at, expires_at = excluded.expires_at, "
+                "last_access = excluded.last_access, hits = 0, metadata = excluded.metadata",
+                (namespace, key, sqlite3.Binary(stored), codec, compressed, size, len(stored),
+                 created_at, expires_at, created_at, metadata_text)
+            )
+            evicted = 0
+            self.flush_touches()
+            if namespace_max_bytes:
+                evicted += self._enforce_budget(namespace_max_bytes, namespace, keep=(namespace, key))
+            evicted += self._enforce_budget(self.max_bytes, keep=(namespace, key))
+        return evicted
+    
+    def _usage_bytes(self, namespace: Optional[str] = None) -> int:
+        conn = self._connection()
+        if namespace is None:
+            row = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM usage").fetchone()
+        else:
+            row = conn.execute("SELECT COALESCE(bytes, 0) FROM usage WHERE namespace = ?", (namespace,)).fetchone()
+        return row[0] if row else 0
+    
+    def _enforce_budget(self, max_bytes: int, namespace: Optional[str] = None,
+                        keep: Optional[Tuple[str, str]] = None) -> int:
+        """
+        超出预算时先删除已过期条目，再按最近访问时间淘汰，只淘汰到使用量降至预算的 EVICT_TARGET_RATIO
+
+        keep 为刚写入的 (namespace, key)，不会被淘汰。
+        """
+        usage = self._usage_bytes(namespace)
+        if usage <= max_bytes:
+            return 0
+        conn = self._connection()
+        scope, scope_args = ("AND namespace = ?", (namespace,)) if namespace else ("", ())
+        if keep:
+            scope += " AND NOT (namespace = ? AND key = ?)"
+            scope_args += keep
+        evicted = conn.execute(
+            f"DELETE FROM entries WHERE expires_at <= ? {scope}", (time.time(),) + scope_args
+        ).rowcount
+        
+        to_free = self._usage_bytes(namespace) - int(max_bytes * EVICT_TARGET_RATIO)
+        if to_free <= 0:
+            return evicted
+        rowids = []
+        cursor = conn.execute(
+            f"SELECT rowid, stored_size FROM entries WHERE 1 = 1 {scope} ORDER BY last_access", scope_args
+        )
+        while to_free > 0:
+            rows = cursor.fetchmany(EVICT_BATCH_SIZE)
+            if not rows:
+                break
+            for rowid, stored_size in rows:
+                rowids.append(rowid)
+                to_free -= stored_size
+                if to_free <= 0:
+                    break
+        cursor.close()
+        for start in range(0, len(rowids), EVICT_BATCH_SIZE):
+            batch = rowids[start:start + EVICT_BATCH_SIZE]
+            evicted += conn.execute(
+                f"DELETE FROM entries WHERE rowid IN ({', '.join('?' * len(batch))})", batch
+            ).rowcount
+        return evicted
+    
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        return cursor.rowcount > 0
+    
+    def clear(self, namespace: str, prefix: Optional[str] = None, older_than: Optional[float] = None,
+              expired_only: bool = False) -> Tuple[int, int]:
+        """删除命名空间内的条目，返回 (条目数, 释放的字节数)"""
+        where, args = self._where(namespace, prefix)
+        if older_than is not None:
+            where += " AND created_at <= ?"
+            args += (time.time() - older_than,)
+        if expired_only:
+            where += " AND expires_at <= ?"
+            args += (time.time(),)
+        with self._lock:
+            conn = self._connection()
+            freed = conn.execute(f"SELECT COALESCE(SUM(stored_size), 0) FROM entries WHERE {where}", args).fetchone()[0]
+            count = conn.execute(f"DELETE FROM entries WHERE {where}", args).rowcount
+        return count, freed
+    
+    def iter_rows(self, namespace: str, prefix: Optional[str] = None) -> List[tuple]:
+        """列出条目元数据（不含值）：key, size, stored_size, created_at, expires_at, last_access, hits, metadata"""
+        where, args = self._where(namespace, prefix)
+        with self._lock:
+            self.flush_touches()
+            return self._connection().execute(
+                "SELECT key, size, stored_size, created_at, expires_at, last_access, hits, metadata "
+                f"FROM entries WHERE {where} ORDER BY created_at", args
+            ).fetchall()
+    
+    def usage(self, namespace: Optional[str] = None) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connection()
+            if namespace is None:
+                row = conn.execute("SELECT COALESCE(SUM(entries), 0), COALESCE(SUM(bytes), 0) FROM usage").fetchone()
+            else:
+                row = conn.execute("SELECT entries, bytes FROM usage WHERE namespace = ?", (namespace,)).fetchone()
+        entries, stored_bytes = row if row else (0, 0)
+        return {"entries": entries, "bytes": stored_bytes}
+    
+    @staticmethod
+    def _where(namespace: str, prefix: Optional[str]) -> Tuple[str, tuple]:
+        if not prefix:
+            return "namespace = ?", (namespace,)
+        # 前缀匹配使用范围查询，避免 LIKE 的通配符转义问题
+        return "namespace = ? AND key >= ? AND key < ?", (namespace, prefix, prefix + "\U0010ffff")
+
+
+class _Flight:
+    """一次进行中的加载，其余等待者共享结果"""
+    __slots__ = ("event", "value", "error")
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TieredCache:
+    """
+    命名空间缓存：内存 LRU + 共享的 SQLite 磁盘层
+    
+    Args:
+        namespace: 命名空间（通常为工具族名称）
+        path: SQLite 缓存文件路径
+        default_ttl: 默认有效期（秒），None 表示永不过期
+        memory_max_items: 内存层最大条目数，0 表示禁用内存层
+        memory_max_bytes: 内存层字节预算
+        disk_max_bytes: 命名空间磁盘字节预算，None 表示只受全局预算约束
+    """
+    
+    def __init__(
+        self,
+        namespace: str,
+        path: str = DEFAULT_CACHE_PATH,
+        default_ttl: Optional[float] = None,
+        memory_max_items: int = DEFAULT_MEMORY_MAX_ITEMS,
+        memory_max_bytes: int = DEFAULT_MEMORY_MAX_BYTES,
+        disk_max_bytes: Optional[int] = None
+    ):
+        self.namespace = namespace
+        self.path = path
+        self.default_ttl = default_ttl
+        self.disk_max_bytes = disk_max_bytes
+        self._store = _get_store(path)
+        self._memory = _MemoryTier(memory_max_items, memory_max_bytes)
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "sets": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "coalesced": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0
+        }
+    
+    def configure(self, default_ttl: Any = _DEFAULT, disk_max_bytes: Any = _DEFAULT,
+                  memory_max_items: Optional[int] = None, memory_max_bytes: Optional[int] = None) -> None:
+        """更新缓存配置（对已注册的实例生效）"""
+        with self._lock:
+            if default_ttl is not _DEFAULT:
+                self.default_ttl = default_ttl
+            if disk_max_bytes is not _DEFAULT:
+                self.disk_max_bytes = disk_max_bytes
+            if memory_max_items is not None:
+                self._memory.max_items = memory_max_items
+            if memory_max_bytes is not None:
+                self._memory.max_bytes = memory_max_bytes
+    
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+    
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+    
+    def get_entry(self, key: str, allow_expired: bool = False, record: bool = True) -> Optional[CacheEntry]:
+        """
+        查询条目，依次检查内存层和磁盘层
+        
+        Args:
+            key: 缓存键
+            allow_expired: 是否返回已过期条目（由调用方判断如何使用，过期条目不计入命中）
+            record: 是否计入命中统计
+        """
+        with self._lock:
+            item = self._memory.get(key)
+        if item is not None:
+            payload, codec, created_at, expires_at, metadata, hits = item
+            entry = CacheEntry(key, None, created_at, expires_at, len(payload), hits, metadata)
+            if not entry.expired:
+                entry.value = decode_value(payload, codec)
+                if record:
+                    # 内存层命中同样刷新磁盘层的访问时间，避免常用条目被优先淘汰
+                    self._store.touch(self.namespace, key)
+                    self._count("memory_hits")
+                return entry
+            with self._lock:
+                self._memory.discard(key)
+        row = self._store.get(self.namespace, key)
+        if row is None:
+            if record:
+                self._count("misses")
+            return None
+        _, _, stored, codec, compressed, size, created_at, expires_at, hits, metadata_text = row
+        entry = CacheEntry(key, None, created_at, expires_at, size, hits,
+                           json.loads(metadata_text) if metadata_text else {})
+        if entry.expired:
+            # 过期条目只计为未命中，allow_expired 时仍返回给调用方判断如何使用
+            if record:
+                self._count("expired")
+                self._count("misses")
+            if not allow_expired:
+                return None
+        payload = zlib.decompress(stored) if compressed else bytes(stored)
+        entry.value = decode_value(payload, codec)
+        if not entry.expired:
+            if record:
+                entry.hits += 1
+                self._store.touch(self.namespace, key)
+                self._count("disk_hits")
+            with self._lock:
+                evicted = self._memory.put(key, (payload, codec, created_at, expires_at, entry.metadata, entry.hits))
+                self._stats["memory_evictions"] += evicted
+        return entry
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry.value
+    
+    def set(self, key: str, value: Any, ttl: Any = _DEFAULT, metadata: Optional[Dict[str, Any]] = None,
+            codec: str = "auto") -> CacheEntry:
+        """
+        写入缓存
+        
+        Args:
+            key: 缓存键
+            value: 缓存值（JSON 可序列化对象、bytes 或可 pickle 的对象）
+            ttl: 有效期（秒），默认使用 default_ttl，None 表示永不过期
+            metadata: 附加元数据（JSON 对象）
+            codec: 序列化方法（auto/json/pickle/bytes）
+        """
+        payload, codec = encode_value(value, codec)
+        ttl = self.default_ttl if ttl is _DEFAULT else ttl
+        created_at = time.time()
+        expires_at = created_at + ttl if ttl is not None else None
+        metadata = metadata or {}
+        disk_evicted = self._store.put(self.namespace, key, payload, codec, created_at, expires_at,
+                                       metadata, self.disk_max_bytes)
+        with self._lock:
+            evicted = self._memory.put(key, (payload, codec, created_at, expires_at, metadata, 0))
+            self._stats["sets"] += 1
+            self._stats["memory_evictions"] += evicted
+            self._stats["disk_evictions"] += disk_evicted
+        return CacheEntry(key, value, created_at, expires_at, len(payload), 0, metadata)
+    
+    def get_or_compute(self, key: str, loader: Callable[[], Any], ttl: Any = _DEFAULT,
+                       metadata: Optional[Dict[str, Any]] = None,
+                       cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        命中则返回缓存值，否则调用 loader 加载并写入缓存
+        
+        同一进程内对同一键的并发调用只执行一次 loader，其余调用等待并共享结果。
+        
+        Args:
+            key: 缓存键
+            loader: 无参加载函数
+            ttl: 有效期（秒）
+            metadata: 附加元数据
+            cache_if: 判断结果是否写入缓存（例如不缓存错误响应）
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            # 上一次加载可能在本线程未命中之后刚完成
+            entry = self.get_entry(key, record=False)
+            if entry is not None:
+                flight.value = entry.value
+                return entry.value
+            self._count("loads")
+            value = loader()
+            if cache_if is None or cache_if(value):
+                self.set(key, value, ttl=ttl, metadata=metadata)
+            flight.value = value
+            return value
+        except BaseException as e:
+            self._count("load_errors")
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+    
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            self._memory.discard(key)
+        return self._store.delete(self.namespace, key)
+    
+    def clear(self, prefix: Optional[str] = None, older_than: Optional[float] = None,
+              expired_only: bool = False) -> Dict[str, int]:
+        """
+        清理命名空间内的条目
+        
+        Args:
+            prefix: 只清理以该前缀开头的键
+            older_than: 只清理创建时间早于该秒数之前的条目
+            expired_only: 只清理已过期条目
+        """
+        with self._lock:
+            self._memory.clear(prefix)
+        count, freed = self._store.clear(self.namespace, prefix, older_than, expired_only)
+        return {"deleted_entries": count, "deleted_bytes": freed}
+    
+    def entries(self, prefix: Optional[str] = None) -> Iterator[CacheEntry]:
+        """遍历条目元数据（value 为 None，size 为原始字节数）"""
+        for key, size, _, created_at, expires_at, _, hits, metadata_text in self._store.iter_rows(self.namespace, prefix):
+            yield CacheEntry(key, None, created_at, expires_at, size, hits,
+                             json.loads(metadata_text) if metadata_text else {})
+    
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+    
+    def stats(self) -> Dict[str, Any]:
+        """返回命中/未命中计数（本进程）以及内存层和磁盘层占用"""
+        with self._lock:
+            stats = dict(self._stats)
+            memory = {"entries": len(self._memory), "bytes": self._memory.bytes,
+                      "max_entries": self._memory.max_items, "max_bytes": self._memory.max_bytes}
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        disk = self._store.usage(self.namespace)
+        disk["max_bytes"] = self.disk_max_bytes
+        disk["total_bytes"] = self._store.usage()["bytes"]
+        disk["total_max_bytes"] = self._store.max_bytes
+        stats.update({"namespace": self.namespace, "path": self.path, "memory": memory, "disk": disk})
+        return stats
+    
+    def reset_stats(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+# ----------------------------------------------------------------------
+# 注册表
+# ----------------------------------------------------------------------
+
+_registry_lock = threading.Lock()
+_stores: Dict[str, _DiskStore] = {}
+_caches: Dict[Tuple[str, str], TieredCache] = {}
+
+
+def _get_store(path: str) -> _DiskStore:
+    path = os.path.abspath(path)
+    with _registry_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = _DiskStore(path)
+        return store
+
+
+def _flush_all_touches() -> None:
+    """进程退出前写回尚未写回的命中记录"""
+    with _registry_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        try:
+            store.flush_touches()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_all_touches)
+
+
+def get_cache(namespace: str, cache_dir: Optional[str] = None, **options) -> TieredCache:
+    """
+    获取（或创建）命名空间缓存，同一进程内同一文件同一命名空间共享一个实例
+    
+    Args:
+        namespace: 命名空间
+        cache_dir: 缓存目录，为空时使用共享缓存文件 DEFAULT_CACHE_PATH
+        **options: 首次创建时传给 TieredCache 的参数
+    """
+    path = os.path.abspath(resolve_cache_path(cache_dir))
+    with _registry_lock:
+        cache = _caches.get((path, namespace))
+    if cache is not None:
+        return cache
+    cache = TieredCache(namespace, path=path, **options)
+    with _registry_lock:
+        return _caches.setdefault((path, namespace), cache)
+
+
+def get_cache_stats(namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+    """返回本进程内已创建缓存的统计信息"""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches if namespace is None or cache.namespace == namespace]
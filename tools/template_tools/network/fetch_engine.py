@@ -0,0 +1,707 @@
+#!/usr/bin/env python3
+"""
+异步网页抓取引擎
+
+为采集类工具提供共享的并发抓取能力：
+- 基于 httpx.AsyncClient 的连接池，同一批请求复用连接
+- 全局并发上限 + 每个主机的并发上限和最小请求间隔
+- robots.txt 检查，并遵守其中的 Crawl-delay / Request-rate
+- 429/5xx 和网络错误按 Retry-After 或指数退避重试，退避期间同一主机的其他请求一起等待
+- 条件请求缓存（ETag / Last-Modified），内容未变化时服务器返回 304，直接使用缓存的响应体
+- 流式读取响应体并限制最大字节数，每个响应到达后立即在线程中执行提取函数
+
+robots.txt、条件请求缓存和主机请求间隔在进程内共享，与事件循环无关；
+连接池和信号量属于单个 AsyncFetchEngine 实例，只能在创建它的事件循环中使用。
+"""
+
+import re
+import time
+import codecs
+import random
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+# 默认请求头
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+DEFAULT_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
+# 全局并发上限
+DEFAULT_MAX_CONCURRENCY = 10
+
+# 每个主机的并发上限
+DEFAULT_MAX_PER_HOST = 2
+
+# 同一主机两次请求之间的最小间隔（秒）
+DEFAULT_HOST_INTERVAL = 0.5
+
+# robots.txt 中的 Crawl-delay 超过该值时按该值处理，避免单个站点拖住整批请求
+MAX_CRAWL_DELAY = 10.0
+
+# 单个请求超时（秒）
+DEFAULT_TIMEOUT = 30
+
+# 单个响应体的最大字节数，超出部分不再读取
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+
+# 失败重试次数
+DEFAULT_RETRIES = 2
+
+# 重试退避基数和上限（秒）
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 30.0
+
+# 触发重试的状态码
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# robots.txt 缓存时长（秒），获取失败时使用较短的缓存时长
+ROBOTS_TTL = 3600
+ROBOTS_ERROR_TTL = 300
+ROBOTS_MAX_BYTES = 512 * 1024
+
+# 条件请求缓存的条目数和总字节数上限
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+RESPONSE_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# 只在响应体前若干字节中查找 <meta charset>
+CHARSET_SNIFF_BYTES = 4096
+
+_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-]+)""", re.IGNORECASE)
+
+
+def _normalize_charset(charset: Optional[str]) -> Optional[str]:
+    if not charset:
+        return None
+    try:
+        return codecs.lookup(charset.strip().strip('"\'')).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(content_type: str, content: bytes) -> Optional[str]:
+    """
+    确定响应体编码：BOM > Content-Type 的 charset > HTML 中的 <meta charset>
+    
+    Returns:
+        Optional[str]: 编码名称，无法确定时返回 None
+    """
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if content.startswith(bom):
+            return encoding
+    for part in content_type.split(";")[1:]:
+        key, _, value = part.partition("=")
+        if key.strip().lower() == "charset":
+            encoding = _normalize_charset(value)
+            if encoding:
+                return encoding
+    match = _CHARSET_RE.search(content[:CHARSET_SNIFF_BYTES])
+    if match:
+        return _normalize_charset(match.group(1).decode("ascii", "ignore"))
+    return None
+
+
+@dataclass
+class FetchResult:
+    """
+    单个 URL 的抓取结果
+    
+    属性:
+        url: 请求的 URL
+        final_url: 跟随重定向后的 URL
+        status_code: HTTP 状态码（304 命中缓存时为缓存响应的状态码），请求未发出时为 0
+        headers: 响应头（键为小写）
+        content: 响应体（最多 max_bytes 字节）
+        encoding: 响应体编码
+        truncated: 响应体是否因超过 max_bytes 被截断
+        from_cache: 响应体是否来自条件请求缓存
+        blocked_by_robots: 是否因 robots.txt 禁止而未抓取
+        error: 错误信息，成功时为 None
+        attempts: 实际发出的请求次数
+        elapsed: 耗时（秒，含等待主机间隔和重试）
+        extracted: 提取函数的返回值
+    """
+    url: str
+    final_url: str = ""
+    status_code: int = 0
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+    encoding: Optional[str] = None
+    truncated: bool = False
+    from_cache: bool = False
+    blocked_by_robots: bool = False
+    error: Optional[str] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+    extracted: Any = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status_code < 300
+    
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+    
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+    
+    def to_dict(self, include_content: bool = True) -> Dict[str, Any]:
+        result = {
+            "url": self.url,
+            "final_url": self.final_url or self.url,
+            "status_code": self.status_code,
+            "success": self.ok,
+            "content_type": self.content_type,
+            "content_length": len(self.content),
+            "truncated": self.truncated,
+            "from_cache": self.from_cache,
+            "attempts": self.attempts,
+            "elapsed": round(self.elapsed, 3),
+        }
+        if self.blocked_by_robots:
+            result["blocked_by_robots"] = True
+        if self.error:
+            result["error"] = self.error
+        if include_content:
+            result["content"] = self.text
+        return result
+
+
+@dataclass
+class CachedResponse:
+    """条件请求缓存条目"""
+    final_url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float = field(default_factory=time.time)
+
+
+class ResponseCache:
+    """
+    条件请求缓存
+    
+    只缓存带 ETag 或 Last-Modified 且未截断的 200 响应，以 URL 为键，按 LRU 淘汰。
+    """
+    
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"revalidated": 0, "stored": 0, "evictions": 0}
+    
+    def get(self, url: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+    
+    def put(self, url: str, entry: CachedResponse) -> None:
+        if len(entry.content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(url, None)
+            if previous is not None:
+                self._total_bytes -= len(previous.content)
+            self._entries[url] = entry
+            self._total_bytes += len(entry.content)
+            self.stats["stored"] += 1
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted.content)
+                self.stats["evictions"] += 1
+    
+    def record_revalidated(self) -> None:
+        with self._lock:
+            self.stats["revalidated"] += 1
+    
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._total_bytes = 0
+            return count
+    
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                **self.stats,
+            }
+
+
+class RobotsCache:
+    """按源站（scheme://host:port）缓存解析后的 robots.txt"""
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, RobotFileParser]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, origin: str) -> Optional[RobotFileParser]:
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[origin]
+                return None
+            self._entries.move_to_end(origin)
+            return entry[1]
+    
+    def put(self, origin: str, parser: RobotFileParser, ttl: float) -> None:
+        with self._lock:
+            self._entries[origin] = (time.monotonic() + ttl, parser)
+            self._entries.move_to_end(origin)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            return count
+
+
+class HostRateLimiter:
+    """
+    主机请求间隔控制
+    
+    为每个主机记录下一次允许发出请求的时间，调用方预约时间片后自行等待，
+    因此可以在多个事件循环和线程之间共享。
+    """
+    
+    def __init__(self, max_hosts: int = 4096):
+        self.max_hosts = max_hosts
+        self._next_allowed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def reserve(self, host: str, interval: float) -> float:
+        """预约下一次请求，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed.get(host, 0.0))
+            self._next_allowed[host] = start + interval
+            if len(self._next_allowed) > self.max_hosts:
+                self._prune(now)
+            return start - now
+    
+    def penalize(self, host: str, delay: float) -> None:
+        """主机返回限流或错误后，推迟该主机的所有后续请求"""
+        with self._lock:
+            until = time.monotonic() + delay
+            if until > self._next_allowed.get(host, 0.0):
+                self._next_allowed[host] = until
+    
+    def _prune(self, now: float) -> None:
+        for host in [h for h, t in self._next_allowed.items() if t < now]:
+            del self._next_allowed[host]
+
+
+_response_cache = ResponseCache()
+_robots_cache = RobotsCache()
+_rate_limiter = HostRateLimiter()
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncFetchEngine:
+    """
+    异步并发抓取引擎
+    
+    用法:
+        async with AsyncFetchEngine(max_concurrency=10) as engine:
+            results = await engine.fetch_many(urls, extractor=parse_html)
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        min_host_interval: float = DEFAULT_HOST_INTERVAL,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        retries: int = DEFAULT_RETRIES,
+        user_agent: str = DEFAULT_USER_AGENT,
+        headers: Optional[Dict[str, str]] = None,
+        respect_robots: bool = True,
+        use_cache: bool = True,
+        allowed_content_types: Optional[Sequence[str]] = None,
+        verify_ssl: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        response_cache: Optional[ResponseCache] = None,
+        robots_cache: Optional[RobotsCache] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ):
+        """
+        初始化抓取引擎
+        
+        Args:
+            max_concurrency: 全局并发上限（同时也是连接池大小）
+            max_per_host: 每个主机的并发上限
+            min_host_interval: 同一主机两次请求之间的最小间隔（秒），robots.txt 的 Crawl-delay 更大时以其为准
+            timeout: 单个请求超时（秒）
+            max_bytes: 单个响应体的最大字节数
+            retries: 429/5xx 和网络错误的重试次数
+            user_agent: User-Agent，同时用于匹配 robots.txt 规则
+            headers: 附加请求头
+            respect_robots: 是否检查 robots.txt
+            use_cache: 是否使用条件请求缓存
+            allowed_content_types: 允许的 Content-Type 前缀（如 "text/"），为空时不限制
+            verify_ssl: 是否校验证书
+            transport: 自定义 httpx 传输层（测试时可传入 httpx.MockTransport）
+            response_cache / robots_cache / rate_limiter: 自定义共享状态（默认使用进程内共享实例）
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_host = max(1, max_per_host)
+        self.min_host_interval = max(0.0, min_host_interval)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.retries = max(0, retries)
+        extra_headers = dict(headers or {})
+        for key in [k for k in extra_headers if k.lower() == "user-agent"]:
+            user_agent = extra_headers.pop(key)
+        self.user_agent = user_agent
+        self.headers = {**DEFAULT_HEADERS, **extra_headers, "User-Agent": user_agent}
+        self.respect_robots = respect_robots
+        self.use_cache = use_cache
+        self.allowed_content_types = tuple(t.lower() for t in allowed_content_types or ())
+        self.verify_ssl = verify_ssl
+        self.transport = transport
+        self.response_cache = response_cache or _response_cache
+        self.robots_cache = robots_cache or _robots_cache
+        self.rate_limiter = rate_limiter or _rate_limiter
+        
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global_slots: Optional[asyncio.Semaphore] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._robots_locks: Dict[str, asyncio.Lock] = {}
+        self.stats = {"requests": 0, "retries": 0, "not_modified": 0, "robots_blocked": 0, "truncated": 0, "errors": 0}
+    
+    async def __aenter__(self) -> "AsyncFetchEngine":
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            limits=limits,
+            follow_redirects=True,
+            verify=self.verify_ssl,
+            transport=self.transport,
+        )
+        self._global_slots = asyncio.Semaphore(self.max_concurrency)
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """
+        抓取单个 URL，错误不抛出异常而是记录在 FetchResult.error 中
+        
+        Args:
+            url: 网页 URL
+            headers: 本次请求的附加请求头
+        """
+        if self._client is None:
+            raise RuntimeError("AsyncFetchEngine 未启动，请在 async with 中使用")
+        
+        started = time.perf_counter()
+        result = FetchResult(url=url)
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            result.error = f"不支持的URL: {url}"
+            return result
+        origin = f"{parts.scheme}://{parts.netloc}"
+        host = parts.netloc.lower()
+        
+        interval = self.min_host_interval
+        if self.respect_robots:
+            robots = await self._get_robots(origin)
+            if not robots.can_fetch(self.user_agent, url):
+                self.stats["robots_blocked"] += 1
+                result.blocked_by_robots = True
+                result.error = "robots.txt 禁止抓取该URL"
+                return result
+            interval = max(interval, self._robots_interval(robots))
+        
+        async with self._host_slot(host):
+            for attempt in range(self.retries + 1):
+                delay = self.rate_limiter.reserve(host, interval)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                
+                retryable = False
+                retry_after = None
+                async with self._global_slots:
+                    result.attempts += 1
+                    self.stats["requests"] += 1
+                    try:
+                        result = await self._request(url, result, headers)
+                        if result.status_code in RETRY_STATUS_CODES:
+                            retryable = True
+                            retry_after = _parse_retry_after(result.headers.get("retry-after"))
+                    except httpx.TimeoutException:
+                        retryable = True
+                        result.error = f"请求超时（{self.timeout}秒）"
+                    except httpx.TransportError as e:
+                        retryable = True
+                        result.error = f"网络请求失败: {e}"
+                    except httpx.HTTPError as e:
+                        result.error = f"HTTP请求失败: {e}"
+                
+                if not retryable or attempt >= self.retries:
+                    break
+                
+                backoff = retry_after if retry_after is not None else RETRY_BACKOFF_BASE * (2 ** attempt)
+                backoff = min(backoff, RETRY_BACKOFF_MAX) + random.uniform(0, RETRY_BACKOFF_BASE / 2)
+                self.rate_limiter.penalize(host, backoff)
+                self.stats["retries"] += 1
+                logger.debug(f"Retrying {url} in {backoff:.1f}s: {result.error}")
+                result = FetchResult(url=url, attempts=result.attempts)
+        
+        if result.error:
+            self.stats["errors"] += 1
+        result.elapsed = time.perf_counter() - started
+        return result
+    
+    async def fetch_many(
+        self,
+        urls: Sequence[str],
+        extractor: Optional[Callable[[FetchResult], Any]] = None,
+    ) -> List[FetchResult]:
+        """
+        并发抓取多个 URL，结果与输入顺序一致（重复的 URL 只抓取一次）
+        
+        Args:
+            urls: URL 列表
+            extractor: 提取函数，每个成功的响应到达后立即在线程中调用，返回值写入 FetchResult.extracted
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self._fetch_and_extract(url, extractor) for url in unique_urls))
+        by_url = dict(zip(unique_urls, results))
+        return [by_url[url] for url in urls]
+    
+    async def iter_fetch(
+        self,
+        urls: Sequence[str],
+        extractor: Optional[Callable[[FetchResult], Any]] = None,
+    ) -> AsyncIterator[FetchResult]:
+        """并发抓取多个 URL，按完成顺序逐个返回结果"""
+        tasks = [asyncio.ensure_future(self._fetch_and_extract(url, extractor)) for url in dict.fromkeys(urls)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _fetch_and_extract(self, url: str, extractor: Optional[Callable[[FetchResult], Any]]) -> FetchResult:
+        result = await self.fetch(url)
+        if extractor is not None and result.ok:
+            try:
+                result.extracted = await asyncio.to_thread(extractor, result)
+            except Exception as e:
+                result.error = f"内容提取失败: {e}"
+        return result
+    
+    async def _request(self, url: str, result: FetchResult, headers: Optional[Dict[str, str]]) -> FetchResult:
+        """发出请求并流式读取响应体"""
+        request_headers = dict(headers or {})
+        cached = self.response_cache.get(url) if self.use_cache else None
+        if cached is not None:
+            if cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+        
+        async with self._client.stream("GET", url, headers=request_headers) as response:
+            result.final_url = str(response.url)
+            result.status_code = response.status_code
+            result.headers = {k.lower(): v for k, v in response.headers.items()}
+            
+            if response.status_code == 304 and cached is not None:
+                self.stats["not_modified"] += 1
+                self.response_cache.record_revalidated()
+                result.status_code = cached.status_code
+                result.final_url = cached.final_url
+                result.headers = {**cached.headers, **result.headers}
+                result.content = cached.content
+                result.encoding = cached.encoding
+                result.from_cache = True
+                return result
+            
+            if response.status_code >= 400:
+                result.error = f"HTTP {response.status_code}"
+                return result
+            
+            if self.allowed_content_types and not result.content_type.startswith(self.allowed_content_types):
+                result.error = f"不支持的内容类型: {result.content_type or 'unknown'}"
+                return result
+            
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                remaining = self.max_bytes - size
+                if len(chunk) > remaining:
+                    chunks.append(chunk[:remaining])
+                    size += remaining
+                    result.truncated = True
+                    self.stats["truncated"] += 1
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+            result.content = b"".join(chunks)
+        
+        result.encoding = detect_encoding(result.headers.get("content-type", ""), result.content)
+        
+        etag = result.headers.get("etag")
+        last_modified = result.headers.get("last-modified")
+        if self.use_cache and result.status_code == 200 and not result.truncated and (etag or last_modified):
+            self.response_cache.put(url, CachedResponse(
+                final_url=result.final_url,
+                status_code=result.status_code,
+                headers=result.headers,
+                content=result.content,
+                encoding=result.encoding,
+                etag=etag,
+                last_modified=last_modified,
+            ))
+        return result
+    
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slot
+    
+    async def _get_robots(self, origin: str) -> RobotFileParser:
+        """获取源站的 robots.txt（同一源站只由一个协程获取）"""
+        robots = self.robots_cache.get(origin)
+        if robots is not None:
+            return robots
+        
+        lock = self._robots_locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            robots = self.robots_cache.get(origin)
+            if robots is not None:
+                return robots
+            
+            robots = RobotFileParser(f"{origin}/robots.txt")
+            ttl = ROBOTS_TTL
+            try:
+                async with self._global_slots:
+                    response = await self._client.get(robots.url, timeout=min(self.timeout, 10))
+                if response.status_code == 200:
+                    robots.parse(response.content[:ROBOTS_MAX_BYTES].decode("utf-8", errors="replace").splitlines())
+                elif response.status_code >= 500:
+                    # RFC 9309：robots.txt 不可达（5xx）时视为全部禁止
+                    robots.disallow_all = True
+                    ttl = ROBOTS_ERROR_TTL
+                else:
+                    # 4xx 表示没有 robots.txt，允许抓取
+                    robots.allow_all = True
+            except httpx.HTTPError as e:
+                # 网络错误时不阻止抓取，页面请求本身会报告错误
+                logger.debug(f"Failed to fetch {robots.url}: {e}")
+                robots.allow_all = True
+                ttl = ROBOTS_ERROR_TTL
+            robots.modified()
+            self.robots_cache.put(origin, robots, ttl)
+            return robots
+    
+    def _robots_interval(self, robots: RobotFileParser) -> float:
+        """robots.txt 中 Crawl-delay / Request-rate 要求的请求间隔"""
+        interval = 0.0
+        try:
+            crawl_delay = robots.crawl_delay(self.user_agent)
+            if crawl_delay:
+                interval = float(crawl_delay)
+            request_rate = robots.request_rate(self.user_agent)
+            if request_rate and request_rate.requests:
+                interval = max(interval, request_rate.seconds / request_rate.requests)
+        except (TypeError, ValueError):
+            return 0.0
+        return min(interval, MAX_CRAWL_DELAY)
+
+
+def run_sync(coro):
+    """在同步代码中运行协程，当前线程已有事件循环时在新线程中运行"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def fetch_urls(
+    urls: Sequence[str],
+    extractor: Optional[Callable[[FetchResult], Any]] = None,
+    **engine_options,
+) -> List[FetchResult]:
+    """
+    同步接口：使用一个 AsyncFetchEngine 并发抓取多个 URL
+    
+    Args:
+        urls: URL 列表
+        extractor: 提取函数，见 AsyncFetchEngine.fetch_many
+        **engine_options: AsyncFetchEngine 的构造参数
+    
+    Returns:
+        List[FetchResult]: 与输入顺序一致的抓取结果
+    """
+    async def _run():
+        async with AsyncFetchEngine(**engine_options) as engine:
+            return await engine.fetch_many(urls, extractor)
+    
+    return run_sync(_run())
+
+
+def get_fetch_cache_info() -> Dict[str, Any]:
+    """获取条件请求缓存的状态"""
+    return _response_cache.info()
+
+
+def clear_fetch_caches() -> Dict[str, int]:
+    """清空条件请求缓存和 robots.txt 缓存"""
+    return {
+        "responses": _response_cache.clear(),
+        "robots": _robots_cache.clear(),
+    }
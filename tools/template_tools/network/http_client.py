@@ -12,6 +12,13 @@ from typing import Dict, List, Any, Optional
 from urllib.parse import urljoin, urlparse
 from strands import tool
 
+from tools.template_tools.network.fetch_engine import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_PER_HOST,
+    fetch_urls,
+    get_fetch_cache_info,
+)
+
 
 @tool
 def api_client(url: str, method: str = "GET", headers: Dict[str, str] = None, 
@@ -84,6 +91,54 @@ def api_client(url: str, method: str = "GET", headers: Dict[str, str] = None,
         }, ensure_ascii=False, indent=2)
 
 
+@tool
+def batch_fetch(urls: List[str], max_concurrent: int = 10, max_per_host: int = DEFAULT_MAX_PER_HOST,
+                timeout: int = 30, max_bytes: int = DEFAULT_MAX_BYTES, respect_robots: bool = True,
+                include_content: bool = True) -> str:
+    """
+    批量并发GET请求工具
+    
+    复用连接池，限制全局和每个主机的并发数，遵守robots.txt，对带ETag/Last-Modified的响应使用条件请求缓存。
+    
+    Args:
+        urls (List[str]): URL列表
+        max_concurrent (int): 全局最大并发数
+        max_per_host (int): 每个主机的最大并发数
+        timeout (int): 单个请求超时时间（秒）
+        max_bytes (int): 单个响应体的最大字节数，超出部分截断
+        respect_robots (bool): 是否遵守robots.txt
+        include_content (bool): 结果中是否包含响应内容
+        
+    Returns:
+        str: JSON格式的批量请求结果（与输入顺序一致）
+    """
+    try:
+        results = fetch_urls(
+            urls,
+            max_concurrency=max_concurrent,
+            max_per_host=max_per_host,
+            timeout=timeout,
+            max_bytes=max_bytes,
+            respect_robots=respect_robots
+        )
+        
+        result = {
+            "total_urls": len(urls),
+            "successful": sum(1 for r in results if r.ok),
+            "failed": sum(1 for r in results if not r.ok),
+            "results": [r.to_dict(include_content=include_content) for r in results],
+            "cache": get_fetch_cache_info()
+        }
+        
+        return json.dumps(result, ensure_ascii=False, indent=2)
+        
+    except Exception as e:
+        return json.dumps({
+            "error": f"批量请求失败: {str(e)}",
+            "total_urls": len(urls)
+        }, ensure_ascii=False, indent=2)
+
+
 @tool
 def auth_manager(auth_type: str, credentials: Dict[str, str]) -> str:
     """
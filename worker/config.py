@@ -29,11 +29,17 @@ class WorkerSettings(BaseSettings):
     
     # Worker Configuration
     POLL_INTERVAL_SECONDS: int = 5
-    MAX_MESSAGES_PER_POLL: int = 1
+    MAX_MESSAGES_PER_POLL: int = 10  # 单次轮询上限，实际拉取数量不超过空闲槽位数
     VISIBILITY_TIMEOUT: int = 3600  # 1 hour
     HEARTBEAT_INTERVAL: int = 300  # 5 minutes
     MAX_RETRY_COUNT: int = 3
     
+    # Concurrency Configuration
+    WORKER_CONCURRENCY: int = 1  # 并发构建槽位数
+    WORKER_POOL_MODE: str = "thread"  # thread: 槽位线程内执行构建; process: 构建在独立子进程中执行（构建并发数大于1时强制使用）
+    DRAIN_TIMEOUT_SECONDS: int = 0  # 收到停止信号后等待进行中任务完成的时间，0 表示一直等待
+    METRICS_INTERVAL_SECONDS: int = 60  # 槽位利用率指标输出间隔
+    
     # Build Configuration
     BUILD_TIMEOUT_SECONDS: int = 7200  # 2 hours
     
@@ -2,5 +2,6 @@
 Worker Handlers
 """
 from .build_handler import BuildHandler
+from .deploy_handler import DeployHandler
 
-__all__ = ['BuildHandler']
+__all__ = ['BuildHandler', 'DeployHandler']
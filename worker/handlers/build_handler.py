@@ -354,7 +354,7 @@ class BuildHandler:
         
         try:
             # 获取项目所有阶段
-            stages = self.db.list_stages(project_id)
+            stages = self.db.list_stages(project_id, metadata_only=True)
             if not stages:
                 return result
             
@@ -0,0 +1,369 @@
+"""
+Deploy Handler - 处理 Agent 部署任务
+
+负责:
+- 消费部署队列中的任务，执行 AgentDeploymentService 部署流程
+- 准备阶段完成后，打包、制品上传与 AgentCore 发布并行执行，镜像构建在发布之后执行
+- 记录每个步骤的耗时和结果，写入任务结果
+"""
+import fcntl
+import logging
+import tarfile
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from api.v2.database import db_client
+from api.v2.models.schemas import TaskStatus
+from worker.config import worker_settings
+
+logger = logging.getLogger(__name__)
+
+# AgentCore starter toolkit 在仓库根目录生成 Dockerfile/.bedrock_agentcore.yaml，
+# 同一主机上的多个部署（包括进程池中的不同 Worker 子进程）不能同时执行 configure/launch
+_LAUNCH_LOCK_FILE = "deployment/.launch.lock"
+
+# 打包时收集的生成制品目录（与 ArtifactSyncManager.LOCAL_PATHS 一致）
+_PACKAGE_DIRS = (
+    'agents/generated_agents',
+    'prompts/generated_agents_prompts',
+    'tools/generated_tools',
+    'projects',
+)
+
+
+@contextmanager
+def _launch_lock(repo_root: Path):
+    """跨进程的发布锁（基于仓库目录下的文件锁）"""
+    lock_path = Path(repo_root) / _LAUNCH_LOCK_FILE
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@dataclass
+class DeployStep:
+    """部署步骤"""
+    name: str
+    fn: Callable[[Dict[str, Any]], Any]
+    depends_on: List[str] = field(default_factory=list)
+    required: bool = True
+
+
+def run_steps(steps: List[DeployStep], max_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    按依赖关系执行步骤，依赖已满足的步骤并行执行
+
+    每个步骤函数接收已完成步骤的结果字典。依赖的步骤失败或被跳过时，该步骤被跳过。
+
+    Returns:
+        Dict[str, Dict]: 每个步骤的 status(completed/failed/skipped)、started_at、
+                         duration_seconds、result、error
+    """
+    pending = {step.name: step for step in steps}
+    results: Dict[str, Any] = {}
+    report: Dict[str, Dict[str, Any]] = {}
+    running = {}
+
+    def execute(step: DeployStep):
+        started = time.perf_counter()
+        report[step.name] = {
+            'status': 'running',
+            'started_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        }
+        try:
+            return step.fn(dict(results))
+        finally:
+            report[step.name]['duration_seconds'] = round(time.perf_counter() - started, 3)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(steps) or 1, thread_name_prefix="deploy-step") as executor:
+        while pending or running:
+            for name, step in list(pending.items()):
+                dep_states = [report.get(dep, {}).get('status') for dep in step.depends_on]
+                if any(state in ('failed', 'skipped') for state in dep_states):
+                    report[name] = {'status': 'skipped', 'duration_seconds': 0.0}
+                    del pending[name]
+                elif all(state == 'completed' for state in dep_states):
+                    running[executor.submit(execute, step)] = step
+                    del pending[name]
+
+            if not running:
+                # 剩余步骤依赖不存在的步骤
+                for name in pending:
+                    report[name] = {'status': 'skipped', 'duration_seconds': 0.0}
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    results[step.name] = future.result()
+                    report[step.name]['status'] = 'completed'
+                    report[step.name]['result'] = results[step.name]
+                except Exception as e:
+                    report[step.name]['status'] = 'failed'
+                    report[step.name]['error'] = str(e)
+                    log = logger.error if step.required else logger.warning
+                    log(f"Deploy step {step.name} failed: {e}")
+                logger.info(
+                    f"Deploy step {step.name} {report[step.name]['status']} "
+                    f"in {report[step.name]['duration_seconds']:.1f}s"
+                )
+
+    return report
+
+
+class DeployHandler:
+    """
+    部署任务处理器
+
+    消息体字段:
+        task_id, project_id, agent_id
+        deployment_config:
+            project_name: 项目目录名（缺省时从项目记录读取）
+            region / agent_script_path / requirements_path / agent_name_override: 透传给部署服务
+            package: 是否打包生成制品（默认 True）
+            sync_artifacts: 是否上传制品到 S3（默认 True）
+            build_image: 是否使用本地 Docker 构建镜像（默认 False）
+    """
+
+    def __init__(self):
+        """初始化部署处理器"""
+        self.db = db_client
+        self.worker_id = worker_settings.WORKER_ID
+        self._service = None
+
+    @property
+    def service(self):
+        """延迟加载部署服务"""
+        if self._service is None:
+            from api.v2.services.agent_deployment_service import AgentDeploymentService
+            self._service = AgentDeploymentService()
+        return self._service
+
+    def handle(self, message: Dict[str, Any]) -> bool:
+        """
+        处理部署任务消息
+
+        Args:
+            message: SQS 消息内容
+
+        Returns:
+            是否处理成功
+        """
+        body = message.get('body', {})
+        task_id = body.get('task_id')
+        project_id = body.get('project_id')
+        agent_id = body.get('agent_id')
+        config = body.get('deployment_config') or {}
+
+        if not all([task_id, project_id]):
+            logger.error("Invalid message: missing required fields (task_id, project_id)")
+            return False
+
+        project_name = config.get('project_name')
+        if not project_name:
+            project = self.db.get_project(project_id) or {}
+            project_name = project.get('project_name')
+        if not project_name:
+            logger.error(f"Invalid message: cannot resolve project_name for project {project_id}")
+            self._update_task_status(task_id, TaskStatus.FAILED, error_message="project_name not found")
+            return False
+
+        logger.info(f"Processing deploy task {task_id} for project {project_name} (agent={agent_id})")
+        started = time.perf_counter()
+
+        try:
+            self._update_task_status(task_id, TaskStatus.RUNNING)
+
+            steps = self._build_steps(project_id, agent_id, project_name, config)
+            report = run_steps(steps)
+            total_seconds = round(time.perf_counter() - started, 3)
+
+            launch = report.get('launch', {})
+            result = {
+                'project_name': project_name,
+                'deployment': launch.get('result'),
+                'steps': {
+                    name: {
+                        k: v for k, v in step.items()
+                        if k != 'result' or (name != 'launch' and isinstance(v, dict))
+                    }
+                    for name, step in report.items()
+                },
+                'duration_seconds': total_seconds,
+            }
+
+            failed = [
+                step.name for step in steps
+                if step.required and report.get(step.name, {}).get('status') != 'completed'
+            ]
+            if failed:
+                error_msg = "; ".join(
+                    f"{name}: {report[name].get('error', report[name]['status'])}" for name in failed
+                )
+                self._update_task_status(task_id, TaskStatus.FAILED, result=result, error_message=error_msg)
+                logger.error(f"Deploy task {task_id} failed: {error_msg}")
+                return False
+
+            self._update_task_status(task_id, TaskStatus.COMPLETED, result=result)
+            logger.info(f"Deploy task {task_id} completed in {total_seconds:.1f}s")
+            return True
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Deploy task {task_id} failed: {error_msg}")
+            logger.error(traceback.format_exc())
+            self._update_task_status(task_id, TaskStatus.FAILED, error_message=error_msg)
+            return False
+
+    def _build_steps(
+        self,
+        project_id: str,
+        agent_id: Optional[str],
+        project_name: str,
+        config: Dict[str, Any],
+    ) -> List[DeployStep]:
+        """构建部署步骤：prepare 之后，launch 与打包/上传并行；镜像构建使用 launch 生成的 Dockerfile，在 launch 之后执行"""
+
+        def prepare(_):
+            return self.service.prepare_agentcore_deployment(
+                project_name=project_name,
+                project_id=project_id,
+                agent_id=agent_id,
+                agent_script_path=config.get('agent_script_path'),
+                requirements_path=config.get('requirements_path'),
+                region=config.get('region'),
+                agent_name_override=config.get('agent_name_override'),
+            )
+
+        def launch(results):
+            with _launch_lock(self.service.repo_root):
+                return self.service.launch_agentcore(results['prepare']).to_dict()
+
+        steps = [
+            DeployStep('prepare', prepare),
+            DeployStep('launch', launch, depends_on=['prepare']),
+        ]
+        if config.get('package', True):
+            steps.append(DeployStep(
+                'package', lambda results: self._package(results['prepare']),
+                depends_on=['prepare'], required=False,
+            ))
+        if config.get('sync_artifacts', True):
+            steps.append(DeployStep(
+                'artifact_upload', lambda results: self._sync_artifacts(project_name),
+                depends_on=['prepare'], required=False,
+            ))
+        if config.get('build_image', False):
+            steps.append(DeployStep(
+                'image_build', lambda results: self._build_image(results['prepare']),
+                depends_on=['launch'], required=False,
+            ))
+        return steps
+
+    def _package(self, prepared) -> Dict[str, Any]:
+        """将项目的生成制品打包到部署目录"""
+        repo_root = self.service.repo_root
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        package_path = prepared.deployment_dir / f"{prepared.agent_name}-{timestamp}.tar.gz"
+
+        file_count = 0
+        with tarfile.open(package_path, "w:gz") as tar:
+            for base in _PACKAGE_DIRS:
+                source = repo_root / base / prepared.project_name
+                if not source.exists():
+                    continue
+                for file_path in source.rglob('*'):
+                    if not file_path.is_file() or '__pycache__' in file_path.parts or file_path.suffix == '.pyc':
+                        continue
+                    tar.add(str(file_path), arcname=str(file_path.relative_to(repo_root)))
+                    file_count += 1
+
+        return {
+            'package_path': str(package_path),
+            'file_count': file_count,
+            'size': package_path.stat().st_size,
+        }
+
+    def _sync_artifacts(self, project_name: str) -> Dict[str, Any]:
+        """上传生成制品到 S3 并记录版本"""
+        from nexus_utils.artifact_sync import ArtifactSyncManager
+
+        result = ArtifactSyncManager(str(self.service.repo_root)).sync_agent(
+            project_name, notes=f"deploy by {self.worker_id}"
+        )
+        if not result.success:
+            raise RuntimeError(result.error or "artifact sync failed")
+        return {
+            'version_uuid': result.version_uuid,
+            'files_synced': result.files_synced,
+            'total_size': result.total_size,
+        }
+
+    def _build_image(self, prepared) -> Dict[str, Any]:
+        """使用部署目录中归档的 Dockerfile（本次 launch 时生成）构建本地镜像"""
+        from nexus_utils.cli.adapters.docker_adapter import DockerAdapter
+
+        dockerfile = prepared.deployment_dir / "Dockerfile"
+        if not dockerfile.exists():
+            raise FileNotFoundError(f"Dockerfile not found: {dockerfile}")
+
+        docker = DockerAdapter()
+        if not docker.is_docker_available():
+            raise RuntimeError("Docker is not available")
+
+        tag = self.service._build_image_tag(prepared.agent_name)
+        log_file = Path(self.service.repo_root) / "logs" / "builds" / f"{prepared.agent_name}-{tag.replace(':', '-')}.log"
+        result = docker.build_image(
+            project_name=prepared.project_name,
+            agent_name=prepared.agent_name,
+            dockerfile_path=str(dockerfile),
+            context_path=str(self.service.repo_root),
+            tag=tag,
+            log_file=log_file,
+        )
+        if not result.success:
+            raise RuntimeError(result.error or "image build failed")
+        return {'image_tag': result.image_tag, 'image_id': result.image_id, 'size': result.size}
+
+    def _update_task_status(
+        self,
+        task_id: str,
+        status: TaskStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error_message: Optional[str] = None
+    ):
+        """更新任务状态"""
+        now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+        updates = {
+            'status': status.value,
+            'worker_id': self.worker_id
+        }
+
+        if status == TaskStatus.RUNNING:
+            updates['started_at'] = now
+
+        if status in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
+            updates['completed_at'] = now
+
+        if result:
+            updates['result'] = result
+
+        if error_message:
+            updates['error_message'] = error_message
+
+        try:
+            self.db.update_task(task_id, updates)
+        except Exception as e:
+            logger.warning(f"Failed to update deploy task {task_id}: {e}")
@@ -2,22 +2,26 @@
 """
 Nexus AI Worker Service
 
-监听 SQS 队列并处理构建任务
+监听 SQS 队列并处理构建/部署任务
 
 使用方法:
-    python -m worker.main [--queue build|deploy] [--once]
+    python -m worker.main [--queue build|deploy] [--once] [--concurrency N] [--pool-mode thread|process]
 
 参数:
     --queue: 监听的队列类型 (build/deploy)，默认 build
-    --once: 只处理一条消息后退出（用于测试）
+    --once: 只处理一次轮询收到的消息后退出（用于测试）
+    --concurrency: 并发构建槽位数，默认 WORKER_CONCURRENCY
+    --pool-mode: thread 在槽位线程中执行构建；process 在独立子进程中执行构建（构建并发数大于1时总是使用 process）
 """
 import argparse
 import logging
+import multiprocessing
 import signal
 import sys
 import time
 import threading
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
 
 # 添加项目根目录到路径
 import os
@@ -25,7 +29,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from api.v2.database import sqs_client
 from worker.config import worker_settings
-from worker.handlers import BuildHandler
+from worker.handlers import BuildHandler, DeployHandler
+from worker.slots import SlotPool
 
 # 配置日志
 logging.basicConfig(
@@ -34,11 +39,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+POOL_MODES = ('thread', 'process')
+
+# 排空超时后等待子进程响应 SIGTERM 的时间（秒），超时则强制结束
+SUBPROCESS_TERMINATE_TIMEOUT = 10
+
+
+def _create_handler(queue_type: str):
+    """根据队列类型创建消息处理器"""
+    if queue_type == "build":
+        return BuildHandler()
+    if queue_type == "deploy":
+        return DeployHandler()
+    return None
+
+
+# 进程模式下每个子进程内的处理器
+_subprocess_handler = None
+
+
+def _init_subprocess() -> None:
+    """子进程初始化：忽略 SIGINT，由主进程统一处理停止信号并排空任务"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _handle_in_subprocess(queue_type: str, message: dict) -> bool:
+    """在子进程中处理消息"""
+    global _subprocess_handler
+    if _subprocess_handler is None:
+        _subprocess_handler = _create_handler(queue_type)
+    if _subprocess_handler is None:
+        logger.warning(f"No handler for queue type {queue_type}")
+        return False
+    return _subprocess_handler.handle(message)
+
 
 class Worker:
     """Worker 服务主类"""
     
-    def __init__(self, queue_type: str = "build"):
+    def __init__(
+        self,
+        queue_type: str = "build",
+        concurrency: Optional[int] = None,
+        pool_mode: Optional[str] = None,
+    ):
         self.queue_type = queue_type
         self.worker_id = worker_settings.WORKER_ID
         self.running = False
@@ -47,23 +91,51 @@ class Worker:
         # 根据队列类型选择队列名称和处理器
         if queue_type == "build":
             self.queue_name = worker_settings.SQS_BUILD_QUEUE_NAME
-            self.handler = BuildHandler()
             self.visibility_timeout = worker_settings.VISIBILITY_TIMEOUT
         elif queue_type == "deploy":
             self.queue_name = worker_settings.SQS_DEPLOY_QUEUE_NAME
-            self.handler = None  # TODO: 实现 DeployHandler
             self.visibility_timeout = 600
         else:
             raise ValueError(f"Unknown queue type: {queue_type}")
         
-        logger.info(f"Worker {self.worker_id} initialized for {queue_type} queue")
+        self.concurrency = concurrency or worker_settings.WORKER_CONCURRENCY
+        self.pool_mode = pool_mode or worker_settings.WORKER_POOL_MODE
+        if self.pool_mode not in POOL_MODES:
+            raise ValueError(f"Unknown pool mode: {self.pool_mode}")
+        if queue_type == "build" and self.pool_mode == 'thread' and self.concurrency > 1:
+            # 构建通过进程级环境变量 NEXUS_STAGE_TRACKER_PROJECT_ID 向工作流工具传递项目ID，
+            # 同一进程内并发构建会互相覆盖，因此多槽位构建必须隔离在子进程中
+            logger.warning(
+                f"Build concurrency {self.concurrency} requires process pool mode, "
+                f"switching from thread mode"
+            )
+            self.pool_mode = 'process'
+        
+        # 线程模式下所有槽位共享处理器（仅单槽位构建或部署任务，处理器不持有任务状态）；
+        # 进程模式下处理器在子进程中创建
+        self.handler = _create_handler(queue_type) if self.pool_mode == 'thread' else None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self.slots = SlotPool(self.concurrency, name=f"{queue_type}-slot")
+        
+        # 进行中消息的心跳，key 为 message_id
+        self._heartbeats: Dict[str, "HeartbeatThread"] = {}
+        self._heartbeats_lock = threading.Lock()
+        self._last_metrics_at = time.monotonic()
+        
+        logger.info(
+            f"Worker {self.worker_id} initialized for {queue_type} queue "
+            f"({self.concurrency} {self.pool_mode} slot(s))"
+        )
     
-    def start(self, once: bool = False):
+    def start(self, once: bool = False) -> bool:
         """
         启动 Worker
         
         Args:
-            once: 是否只处理一条消息后退出
+            once: 是否只处理一次轮询收到的消息后退出
+        
+        Returns:
+            bool: 退出前进行中的任务是否全部完成
         """
         self.running = True
         logger.info(f"Worker {self.worker_id} starting...")
@@ -75,32 +147,48 @@ class Worker:
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
         
+        if self.pool_mode == 'process':
+            # spawn 启动，避免 fork 继承 boto3 客户端和后台线程；每个子进程只处理一个任务，构建结束即释放内存
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_subprocess,
+                max_tasks_per_child=1,
+            )
+        
         poll_count = 0
+        drained = True
         
         try:
             while self.running and not self._shutdown_event.is_set():
+                # 没有空闲槽位时不轮询，避免拉取无法立即处理的消息
+                if not self.slots.wait_for_free_slot(timeout=1):
+                    self._report_metrics()
+                    continue
+                
                 poll_count += 1
                 logger.debug(f"Poll cycle #{poll_count}")
                 
                 self._poll_and_process()
+                self._report_metrics()
                 
                 if once:
                     logger.info("--once flag set, exiting after first poll")
                     break
-                
-                # 等待一段时间再轮询（使用 shutdown_event 以便能快速响应停止信号）
-                if not self._shutdown_event.is_set():
-                    self._shutdown_event.wait(timeout=1)  # 短暂等待，因为 receive_messages 已经有长轮询
         
         except Exception as e:
             logger.error(f"Worker error: {e}", exc_info=True)
         
         finally:
             self.running = False
+            drained = self._drain()
+            self._report_metrics(force=True)
             logger.info(f"Worker {self.worker_id} stopped after {poll_count} poll cycles")
+        
+        return drained
     
     def stop(self):
-        """停止 Worker"""
+        """停止 Worker（不再拉取新消息，进行中的任务继续执行直至完成）"""
         logger.info(f"Stopping worker {self.worker_id}...")
         self.running = False
         self._shutdown_event.set()
@@ -113,18 +201,63 @@ class Worker:
             sys.exit(1)
         
         logger.info(f"Received signal {signum}, shutting down gracefully...")
+        in_flight = self.slots.in_flight()
+        if in_flight:
+            logger.info(f"Draining {len(in_flight)} in-flight message(s): {in_flight}")
         logger.info("Press Ctrl+C again to force exit")
         self.stop()
     
+    def _drain(self) -> bool:
+        """
+        等待进行中的任务完成
+        
+        超过 DRAIN_TIMEOUT_SECONDS 仍未完成时，先终止仍在执行构建的子进程，
+        再让这些消息重新可见，交给其他 Worker 处理，避免同一构建被重复执行。
+        """
+        timeout = worker_settings.DRAIN_TIMEOUT_SECONDS or None
+        drained = self.slots.wait_idle(timeout=timeout)
+        if not drained:
+            logger.warning(f"Drain timed out after {timeout}s, releasing in-flight messages")
+            # 子进程被终止后槽位线程会移除心跳，先记录进行中的消息
+            with self._heartbeats_lock:
+                heartbeats = list(self._heartbeats.values())
+            for heartbeat in heartbeats:
+                heartbeat.cancel()
+            if self._process_pool:
+                self._terminate_subprocesses()
+            # 线程模式下构建在本进程中执行，释放消息后主进程立即退出
+            for heartbeat in heartbeats:
+                self._release_message(heartbeat.receipt_handle)
+        
+        self.slots.shutdown(wait=drained)
+        if self._process_pool:
+            self._process_pool.shutdown(wait=drained, cancel_futures=True)
+        return drained
+    
+    def _terminate_subprocesses(self) -> None:
+        """终止进程池中仍在执行的子进程，并等待其退出"""
+        processes = list((getattr(self._process_pool, '_processes', None) or {}).values())
+        for process in processes:
+            if process.is_alive():
+                logger.warning(f"Terminating build subprocess {process.pid}")
+                process.terminate()
+        for process in processes:
+            process.join(timeout=SUBPROCESS_TERMINATE_TIMEOUT)
+            if process.is_alive():
+                process.kill()
+                process.join()
+    
     def _poll_and_process(self):
-        """轮询并处理消息"""
+        """轮询并将消息分配到空闲槽位"""
         try:
-            logger.debug(f"Polling queue {self.queue_name}...")
+            free_slots = self.slots.free_count
+            max_messages = min(free_slots, worker_settings.MAX_MESSAGES_PER_POLL)
+            logger.debug(f"Polling queue {self.queue_name} for up to {max_messages} message(s)...")
             
             # 从队列接收消息
             messages = sqs_client.receive_messages(
                 queue_name=self.queue_name,
-                max_messages=worker_settings.MAX_MESSAGES_PER_POLL,
+                max_messages=max_messages,
                 wait_time_seconds=worker_settings.POLL_INTERVAL_SECONDS,
                 visibility_timeout=self.visibility_timeout
             )
@@ -137,33 +270,43 @@ class Worker:
             
             for message in messages:
                 if not self.running:
-                    logger.info("Worker stopping, skipping remaining messages")
-                    break
-                self._process_message(message)
+                    # 长轮询期间收到停止信号，立即释放消息
+                    logger.info(f"Worker stopping, releasing message {message.get('message_id')}")
+                    self._release_message(message.get('receipt_handle'))
+                    continue
+                self.slots.submit(message.get('message_id'), self._process_message, message)
         
         except Exception as e:
             logger.error(f"Error polling messages: {e}", exc_info=True)
             time.sleep(5)  # 出错后等待一段时间
     
-    def _process_message(self, message: dict):
-        """处理单条消息"""
+    def _run_handler(self, message: dict) -> bool:
+        """执行消息处理器（进程模式下在子进程中执行并等待结果）"""
+        if self._process_pool:
+            return self._process_pool.submit(_handle_in_subprocess, self.queue_type, message).result()
+        if self.handler:
+            return self.handler.handle(message)
+        logger.warning(f"No handler for queue type {self.queue_type}")
+        return False
+    
+    def _process_message(self, message: dict) -> bool:
+        """在槽位线程中处理单条消息"""
         message_id = message.get('message_id')
         receipt_handle = message.get('receipt_handle')
         
         logger.info(f"Processing message {message_id}")
         
         heartbeat_thread = None
+        success = False
         
         try:
             # 启动心跳线程（延长可见性超时）
             heartbeat_thread = self._start_heartbeat(receipt_handle)
+            with self._heartbeats_lock:
+                self._heartbeats[message_id] = heartbeat_thread
             
             # 处理消息
-            if self.handler:
-                success = self.handler.handle(message)
-            else:
-                logger.warning(f"No handler for queue type {self.queue_type}")
-                success = False
+            success = self._run_handler(message)
             
             if success:
                 # 删除消息（确认处理完成）
@@ -175,23 +318,59 @@ class Worker:
         
         except Exception as e:
             logger.error(f"Error processing message {message_id}: {e}", exc_info=True)
+            success = False
         
         finally:
             # 停止心跳线程
             if heartbeat_thread:
                 heartbeat_thread.cancel()
+            with self._heartbeats_lock:
+                self._heartbeats.pop(message_id, None)
             logger.debug(f"Finished processing message {message_id}")
+        
+        return success
+    
+    def _release_message(self, receipt_handle: Optional[str]) -> None:
+        """将消息可见性超时置 0，使其立即可被其他 Worker 接收"""
+        if not receipt_handle:
+            return
+        try:
+            sqs_client.change_message_visibility(self.queue_name, receipt_handle, 0)
+        except Exception as e:
+            logger.warning(f"Failed to release message: {e}")
+    
+    def _report_metrics(self, force: bool = False) -> None:
+        """按 METRICS_INTERVAL_SECONDS 输出槽位利用率"""
+        now = time.monotonic()
+        if not force and now - self._last_metrics_at < worker_settings.METRICS_INTERVAL_SECONDS:
+            return
+        self._last_metrics_at = now
+        
+        metrics = self.slots.metrics()
+        slot_summary = ", ".join(
+            f"#{slot['slot_id']}={slot['utilization']:.0%}"
+            f"({slot['processed']} ok/{slot['failed']} failed"
+            f"{', ' + slot['message_id'] if slot['message_id'] else ''})"
+            for slot in metrics['slots']
+        )
+        logger.info(
+            f"Slot utilization {metrics['utilization']:.1%} "
+            f"busy={metrics['busy']}/{metrics['size']} "
+            f"processed={metrics['processed']} failed={metrics['failed']} "
+            f"uptime={metrics['uptime_seconds']:.0f}s | {slot_summary}"
+        )
     
-    def _start_heartbeat(self, receipt_handle: str) -> Optional[threading.Timer]:
+    def _start_heartbeat(self, receipt_handle: str) -> "HeartbeatThread":
         """
         启动心跳线程
         
-        定期延长消息的可见性超时，防止长时间任务超时
+        定期延长消息的可见性超时，防止长时间任务超时。
+        停止信号不会中断心跳，排空期间进行中的消息保持不可见，直到处理结束。
         """
         heartbeat_stop = threading.Event()
         
         def heartbeat():
-            while not heartbeat_stop.is_set() and self.running:
+            while not heartbeat_stop.is_set():
                 try:
                     sqs_client.change_message_visibility(
                         self.queue_name,
@@ -206,20 +385,23 @@ class Worker:
                 # 等待下一次心跳，但可以被中断
                 heartbeat_stop.wait(timeout=worker_settings.HEARTBEAT_INTERVAL)
         
-        # 创建一个包装类来管理心跳线程
-        class HeartbeatThread:
-            def __init__(self, stop_event: threading.Event, thread: threading.Thread):
-                self.stop_event = stop_event
-                self.thread = thread
-            
-            def cancel(self):
-                self.stop_event.set()
-                # 不等待线程结束，让它自然退出
-        
         thread = threading.Thread(target=heartbeat, daemon=True)
         thread.start()
         
-        return HeartbeatThread(heartbeat_stop, thread)
+        return HeartbeatThread(heartbeat_stop, thread, receipt_handle)
+
+
+class HeartbeatThread:
+    """单条消息的心跳线程句柄"""
+    
+    def __init__(self, stop_event: threading.Event, thread: threading.Thread, receipt_handle: str):
+        self.stop_event = stop_event
+        self.thread = thread
+        self.receipt_handle = receipt_handle
+    
+    def cancel(self):
+        self.stop_event.set()
+        # 不等待线程结束，让它自然退出
 
 
 def main():
@@ -234,13 +416,29 @@ def main():
     parser.add_argument(
         '--once',
         action='store_true',
-        help='Process only one message and exit'
+        help='Process messages from a single poll and exit'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=None,
+        help='Number of concurrent build slots (default: WORKER_CONCURRENCY)'
+    )
+    parser.add_argument(
+        '--pool-mode',
+        type=str,
+        default=None,
+        choices=list(POOL_MODES),
+        help='Run builds in slot threads or in isolated subprocesses (default: WORKER_POOL_MODE; builds with concurrency > 1 always use process)'
     )
     
     args = parser.parse_args()
     
-    worker = Worker(queue_type=args.queue)
-    worker.start(once=args.once)
+    worker = Worker(queue_type=args.queue, concurrency=args.concurrency, pool_mode=args.pool_mode)
+    drained = worker.start(once=args.once)
+    if not drained:
+        # 排空超时：构建子进程已终止、消息已释放，槽位线程可能仍在执行，直接退出进程
+        os._exit(1)
 
 
 if __name__ == '__main__':
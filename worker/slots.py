@@ -0,0 +1,153 @@
+"""
+Worker Build Slots
+
+管理 Worker 的并发构建槽位：
+- 固定数量的槽位，每个槽位同一时刻处理一条消息
+- 轮询前查询空闲槽位数，只拉取能立即处理的消息
+- 统计每个槽位的忙碌时间、处理数量，用于输出利用率指标
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SlotStats:
+    """单个槽位的运行统计"""
+    slot_id: int
+    message_id: Optional[str] = None
+    busy_since: Optional[float] = None
+    busy_seconds: float = 0.0
+    processed: int = 0
+    failed: int = 0
+
+    def current_busy_seconds(self, now: float) -> float:
+        """累计忙碌时间（含正在处理的消息）"""
+        if self.busy_since is None:
+            return self.busy_seconds
+        return self.busy_seconds + (now - self.busy_since)
+
+
+class SlotPool:
+    """
+    并发构建槽位池
+
+    每个槽位对应线程池中的一个线程。进程模式下槽位线程负责心跳和消息确认，
+    实际构建交给 Worker 的进程池执行，因此槽位本身总是线程。
+    """
+
+    def __init__(self, size: int, name: str = "slot"):
+        if size < 1:
+            raise ValueError(f"Slot pool size must be >= 1, got {size}")
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix=name)
+        self._stats = [SlotStats(slot_id=i) for i in range(size)]
+        self._free: List[int] = list(range(size))
+        self._condition = threading.Condition()
+        self._started_at = time.monotonic()
+
+    @property
+    def free_count(self) -> int:
+        with self._condition:
+            return len(self._free)
+
+    @property
+    def busy_count(self) -> int:
+        return self.size - self.free_count
+
+    def wait_for_free_slot(self, timeout: Optional[float] = None) -> bool:
+        """等待至少一个空闲槽位，返回是否有空闲槽位"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._free, timeout=timeout)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """等待所有槽位空闲（排空），返回是否在超时前完成"""
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self._free) == self.size, timeout=timeout)
+
+    def submit(self, message_id: str, fn: Callable[..., bool], *args: Any) -> Future:
+        """
+        在空闲槽位上执行任务
+
+        fn 返回 False 或抛出异常时计为失败。调用方需先确认存在空闲槽位。
+
+        Raises:
+            RuntimeError: 没有空闲槽位
+        """
+        with self._condition:
+            if not self._free:
+                raise RuntimeError("No free worker slot")
+            slot_id = self._free.pop(0)
+            stats = self._stats[slot_id]
+            stats.message_id = message_id
+            stats.busy_since = time.monotonic()
+
+        def run() -> bool:
+            success = False
+            try:
+                success = bool(fn(*args))
+                return success
+            finally:
+                self._release(slot_id, success)
+
+        logger.debug(f"Message {message_id} assigned to slot {slot_id}")
+        return self._executor.submit(run)
+
+    def _release(self, slot_id: int, success: bool) -> None:
+        with self._condition:
+            stats = self._stats[slot_id]
+            stats.busy_seconds += time.monotonic() - stats.busy_since
+            stats.busy_since = None
+            stats.message_id = None
+            if success:
+                stats.processed += 1
+            else:
+                stats.failed += 1
+            self._free.append(slot_id)
+            self._condition.notify_all()
+
+    def in_flight(self) -> List[str]:
+        """正在处理的消息 ID"""
+        with self._condition:
+            return [s.message_id for s in self._stats if s.message_id]
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        获取槽位利用率指标
+
+        Returns:
+            Dict: 整体利用率和每个槽位的忙碌时间、利用率、处理/失败数量
+        """
+        now = time.monotonic()
+        elapsed = max(now - self._started_at, 1e-9)
+        with self._condition:
+            slots = [
+                {
+                    'slot_id': s.slot_id,
+                    'busy': s.busy_since is not None,
+                    'message_id': s.message_id,
+                    'busy_seconds': round(s.current_busy_seconds(now), 1),
+                    'utilization': round(s.current_busy_seconds(now) / elapsed, 4),
+                    'processed': s.processed,
+                    'failed': s.failed,
+                }
+                for s in self._stats
+            ]
+        total_busy = sum(slot['busy_seconds'] for slot in slots)
+        return {
+            'size': self.size,
+            'busy': sum(1 for slot in slots if slot['busy']),
+            'uptime_seconds': round(elapsed, 1),
+            'utilization': round(total_busy / (elapsed * self.size), 4),
+            'processed': sum(slot['processed'] for slot in slots),
+            'failed': sum(slot['failed'] for slot in slots),
+            'slots': slots,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)